@@ -1,10 +1,14 @@
 """Base model provider interface and data classes."""
 
+import asyncio
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from .retry import is_retryable_error
 
 logger = logging.getLogger(__name__)
 
@@ -190,6 +194,16 @@ class ModelResponse:
         return self.usage.get("total_tokens", 0)
 
 
+@dataclass
+class StreamChunk:
+    """Incremental piece of a streamed model response."""
+
+    content: str = ""  # Text generated since the previous chunk
+    usage: dict[str, int] = field(default_factory=dict)  # Usage reported so far (cumulative), if any
+    finish_reason: Optional[str] = None  # Set on the chunk that ends the response
+    metadata: dict[str, Any] = field(default_factory=dict)  # Provider-specific metadata
+
+
 class ModelProvider(ABC):
     """Abstract base class for model providers."""
 
@@ -231,6 +245,139 @@ class ModelProvider(ABC):
         """
         pass
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content without blocking the event loop.
+
+        Providers whose SDK has an async client override this to await the request
+        natively. The default runs generate_content on a worker thread, so tools can
+        always await it and several model calls can be in flight at once.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        return await asyncio.to_thread(
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream generated content as it arrives.
+
+        Providers that support streaming override this to yield text deltas as the
+        model produces them. The default awaits agenerate_content and yields the
+        whole response as a single chunk.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Yields:
+            StreamChunk with the text delta, usage reported so far and, on the last chunk, the finish reason
+        """
+        response = await self.agenerate_content(
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+        yield StreamChunk(
+            content=response.content or "",
+            usage=dict(response.usage),
+            finish_reason=response.metadata.get("finish_reason"),
+            metadata=dict(response.metadata),
+        )
+
+    async def agenerate_content_streaming(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        on_chunk: Optional[Callable[[StreamChunk], Awaitable[None]]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Stream a response through on_chunk and return it assembled as a ModelResponse.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            on_chunk: Awaited with every chunk as it arrives
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            ModelResponse with the full content, the last reported usage and the finish reason
+        """
+        parts = []
+        usage: dict[str, int] = {}
+        metadata: dict[str, Any] = {}
+        finish_reason = None
+
+        async for chunk in self.astream_content(
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        ):
+            parts.append(chunk.content)
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.finish_reason is not None:
+                finish_reason = chunk.finish_reason
+            metadata.update(chunk.metadata)
+            if on_chunk is not None:
+                await on_chunk(chunk)
+
+        metadata["finish_reason"] = finish_reason
+        return ModelResponse(
+            content="".join(parts),
+            usage=usage,
+            model_name=self._resolve_model_name(model_name),
+            friendly_name=getattr(self, "FRIENDLY_NAME", ""),
+            provider=self.get_provider_type(),
+            metadata=metadata,
+        )
+
     @abstractmethod
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using the specified model's tokenizer."""
@@ -433,6 +580,10 @@ class ModelProvider(ABC):
 
         return list(all_models)
 
+    def _is_error_retryable(self, error: Exception) -> bool:
+        """Whether a failed API call should be retried; see providers.retry.is_retryable_error."""
+        return is_retryable_error(error)
+
     def close(self):
         """Clean up any resources held by the provider.
 
@@ -1,22 +1,39 @@
 """DIAL (Data & AI Layer) model provider implementation."""
 
+import asyncio
 import logging
 import os
 import threading
-import time
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from .base import (
     ModelCapabilities,
+    ModelProvider,
     ModelResponse,
     ProviderType,
+    StreamChunk,
     create_temperature_constraint,
 )
 from .openai_compatible import OpenAICompatibleProvider
+from .retry import RetryError, get_retry_engine
+from .transport import get_transport_manager
 
 logger = logging.getLogger(__name__)
 
 
+def _remove_auth_header(request):
+    """Remove the Authorization header that the OpenAI client adds; DIAL authenticates with Api-Key."""
+    # httpx headers are case-insensitive, so we need to check all variations
+    headers_to_remove = []
+    for header_name in request.headers:
+        if header_name.lower() == "authorization":
+            headers_to_remove.append(header_name)
+
+    for header_name in headers_to_remove:
+        del request.headers[header_name]
+
+
 class DIALModelProvider(OpenAICompatibleProvider):
     """DIAL provider using OpenAI-compatible API.
 
@@ -26,10 +43,6 @@ class DIALModelProvider(OpenAICompatibleProvider):
 
     FRIENDLY_NAME = "DIAL"
 
-    # Retry configuration for API calls
-    MAX_RETRIES = 4
-    RETRY_DELAYS = [1, 3, 5, 8]  # seconds
-
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
         "o3-2025-04-16": ModelCapabilities(
@@ -225,8 +238,8 @@ class DIALModelProvider(OpenAICompatibleProvider):
         # Store the actual API key for use in Api-Key header
         self._dial_api_key = api_key
 
-        # Pass a placeholder API key to OpenAI client - we'll override the auth header in httpx
-        # The actual authentication happens via the Api-Key header in the httpx client
+        # Pass a placeholder API key to OpenAI client - the shared httpx client strips the auth header
+        # The actual authentication happens via the Api-Key header sent by the deployment clients
         super().__init__("placeholder-not-used", **kwargs)
 
         # Cache for deployment-specific clients to avoid recreating them on each request
@@ -234,32 +247,10 @@ class DIALModelProvider(OpenAICompatibleProvider):
         # Lock to ensure thread-safe client creation
         self._client_lock = threading.Lock()
 
-        # Create a SINGLE shared httpx client for the provider instance
-        import httpx
-
-        # Create custom event hooks to remove Authorization header
-        def remove_auth_header(request):
-            """Remove Authorization header that OpenAI client adds."""
-            # httpx headers are case-insensitive, so we need to check all variations
-            headers_to_remove = []
-            for header_name in request.headers:
-                if header_name.lower() == "authorization":
-                    headers_to_remove.append(header_name)
-
-            for header_name in headers_to_remove:
-                del request.headers[header_name]
-
-        self._http_client = httpx.Client(
-            timeout=self.timeout_config,
-            verify=True,
-            follow_redirects=True,
-            headers=self.DEFAULT_HEADERS.copy(),  # Include DIAL headers including Api-Key
-            limits=httpx.Limits(
-                max_keepalive_connections=5,
-                max_connections=10,
-                keepalive_expiry=30.0,
-            ),
-            event_hooks={"request": [remove_auth_header]},
+        # Lease the shared httpx client for DIAL's origin. It has its own partition because
+        # of the hook; the Api-Key header is sent by each deployment client
+        self._http_client = get_transport_manager().acquire(
+            self.base_url, partition="dial", event_hooks={"request": [_remove_auth_header]}
         )
 
         logger.info(f"Initialized DIAL provider with host: {dial_host} and api-version: {self.api_version}")
@@ -349,7 +340,7 @@ class DIALModelProvider(OpenAICompatibleProvider):
                 from openai import OpenAI
 
                 # Build deployment-specific URL
-                base_url = str(self.client.base_url)
+                base_url = self.base_url
                 if base_url.endswith("/"):
                     base_url = base_url[:-1]
 
@@ -364,8 +355,11 @@ class DIALModelProvider(OpenAICompatibleProvider):
                 self._deployment_clients[deployment] = OpenAI(
                     api_key="placeholder-not-used",
                     base_url=deployment_url,
-                    http_client=self._http_client,  # Pass the shared client with Api-Key header
+                    http_client=self._http_client,  # Shared client that strips the Authorization header
+                    default_headers=self.DEFAULT_HEADERS.copy(),  # DIAL authenticates with Api-Key
                     default_query={"api-version": self.api_version},  # Add api-version as query param
+                    timeout=self.timeout_config,
+                    max_retries=0,  # Retried by the shared retry engine in generate_content
                 )
 
         return self._deployment_clients[deployment]
@@ -461,55 +455,87 @@ class DIALModelProvider(OpenAICompatibleProvider):
         # DIAL-specific: Get cached client for deployment endpoint
         deployment_client = self._get_deployment_client(resolved_model)
 
-        # Retry logic with progressive delays
-        last_exception = None
-
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                # Generate completion using deployment-specific client
-                response = deployment_client.chat.completions.create(**completion_params)
-
-                # Extract content and usage
-                content = response.choices[0].message.content
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=content,
-                    usage=usage,
-                    model_name=model_name,
-                    friendly_name=self.FRIENDLY_NAME,
-                    provider=self.get_provider_type(),
-                    metadata={
-                        "finish_reason": response.choices[0].finish_reason,
-                        "model": response.model,
-                        "id": response.id,
-                        "created": response.created,
-                    },
-                )
-
-            except Exception as e:
-                last_exception = e
+        try:
+            response = get_retry_engine().call(
+                self.get_provider_type().value,
+                lambda: deployment_client.chat.completions.create(**completion_params),
+                description=f"DIAL API error for model {model_name}",
+                is_retryable=self._is_error_retryable,
+            )
+        except RetryError as e:
+            if not self._is_error_retryable(e.last_error):
+                raise ValueError(f"DIAL API error for model {model_name}: {str(e.last_error)}") from e.last_error
+            raise ValueError(
+                f"DIAL API error for model {model_name} after {e.attempts} attempts: {str(e.last_error)}"
+            ) from e.last_error
+
+        return ModelResponse(
+            content=response.choices[0].message.content,
+            usage=self._extract_usage(response),
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": response.choices[0].finish_reason,
+                "model": response.model,
+                "id": response.id,
+                "created": response.created,
+            },
+        )
 
-                # Check if this is a retryable error
-                is_retryable = self._is_error_retryable(e)
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content.
 
-                if not is_retryable:
-                    # Non-retryable error, raise immediately
-                    raise ValueError(f"DIAL API error for model {model_name}: {str(e)}")
+        DIAL routes requests through synchronous deployment-specific clients that share one
+        httpx.Client, so the request runs on a worker thread instead of the inherited
+        AsyncOpenAI path (which would bypass deployment routing).
+        """
+        return await asyncio.to_thread(
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            images=images,
+            **kwargs,
+        )
 
-                # If this isn't the last attempt and error is retryable, wait and retry
-                if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAYS[attempt]
-                    logger.info(
-                        f"DIAL API error (attempt {attempt + 1}/{self.MAX_RETRIES}), " f"retrying in {delay}s: {str(e)}"
-                    )
-                    time.sleep(delay)
-                    continue
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Yield the response as a single chunk.
 
-        # All retries exhausted
-        raise ValueError(
-            f"DIAL API error for model {model_name} after {self.MAX_RETRIES} attempts: {str(last_exception)}"
-        )
+        The inherited streaming path uses the AsyncOpenAI client, which would bypass
+        deployment routing, so DIAL uses the non-streaming default instead.
+        """
+        async for chunk in ModelProvider.astream_content(
+            self,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            images=images,
+            **kwargs,
+        ):
+            yield chunk
 
     def _supports_vision(self, model_name: str) -> bool:
         """Check if the model supports vision (image processing).
@@ -529,27 +555,18 @@ class DIALModelProvider(OpenAICompatibleProvider):
         return super()._supports_vision(model_name)
 
     def close(self):
-        """Clean up HTTP clients when provider is closed."""
+        """Release the HTTP clients leased by this provider."""
         logger.info("Closing DIAL provider HTTP clients...")
 
         # Clear the deployment clients cache
-        # Note: We don't need to close individual OpenAI clients since they
-        # use the shared httpx.Client which we close separately
+        # Note: The deployment OpenAI clients are not closed individually: that would
+        # close the shared httpx client, which is released below instead
         self._deployment_clients.clear()
 
-        # Close the shared HTTP client
-        if hasattr(self, "_http_client"):
-            try:
-                self._http_client.close()
-                logger.debug("Closed shared HTTP client")
-            except Exception as e:
-                logger.warning(f"Error closing shared HTTP client: {e}")
-
-        # Also close the client created by the superclass (OpenAICompatibleProvider)
-        # as it holds its own httpx.Client instance that is not used by DIAL's generate_content
-        if hasattr(self, "client") and self.client and hasattr(self.client, "close"):
-            try:
-                self.client.close()
-                logger.debug("Closed superclass's OpenAI client")
-            except Exception as e:
-                logger.warning(f"Error closing superclass's OpenAI client: {e}")
+        if getattr(self, "_http_client", None) is not None:
+            get_transport_manager().release(self._http_client)
+            self._http_client = None
+            logger.debug("Released shared HTTP client")
+
+        # Release the clients leased by the superclass (OpenAICompatibleProvider)
+        super().close()
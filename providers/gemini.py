@@ -3,13 +3,21 @@
 import base64
 import logging
 import os
-import time
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from google import genai
 from google.genai import types
 
-from .base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, create_temperature_constraint
+from .base import (
+    ModelCapabilities,
+    ModelProvider,
+    ModelResponse,
+    ProviderType,
+    StreamChunk,
+    create_temperature_constraint,
+)
+from .retry import RetryError, get_retry_engine
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +25,8 @@ logger = logging.getLogger(__name__)
 class GeminiModelProvider(ModelProvider):
     """Google Gemini model provider implementation."""
 
+    FRIENDLY_NAME = "Gemini"
+
     # Model configurations using ModelCapabilities objects
     SUPPORTED_MODELS = {
         "gemini-2.0-flash": ModelCapabilities(
@@ -147,18 +157,21 @@ class GeminiModelProvider(ModelProvider):
         # Return the ModelCapabilities object directly from SUPPORTED_MODELS
         return self.SUPPORTED_MODELS[resolved_name]
 
-    def generate_content(
+    def _build_generation_request(
         self,
         prompt: str,
         model_name: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_output_tokens: Optional[int] = None,
-        thinking_mode: str = "medium",
-        images: Optional[list[str]] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using Gemini model."""
+        system_prompt: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int],
+        thinking_mode: str,
+        images: Optional[list[str]],
+    ) -> tuple[str, list, types.GenerateContentConfig, ModelCapabilities]:
+        """Validate the request and build the Gemini contents and generation config.
+
+        Returns:
+            Tuple of (resolved model name, contents, generation config, model capabilities)
+        """
         # Validate parameters
         resolved_name = self._resolve_model_name(model_name)
         self.validate_parameters(model_name, temperature)
@@ -211,86 +224,196 @@ class GeminiModelProvider(ModelProvider):
                 actual_thinking_budget = int(max_thinking_tokens * self.THINKING_BUDGETS[thinking_mode])
                 generation_config.thinking_config = types.ThinkingConfig(thinking_budget=actual_thinking_budget)
 
-        # Retry logic with progressive delays
-        max_retries = 4  # Total of 4 attempts
-        retry_delays = [1, 3, 5, 8]  # Progressive delays: 1s, 3s, 5s, 8s
+        return resolved_name, contents, generation_config, capabilities
+
+    def _build_model_response(
+        self, response, resolved_name: str, thinking_mode: str, capabilities: ModelCapabilities
+    ) -> ModelResponse:
+        """Log the raw Gemini response and convert it into a ModelResponse."""
+        # Log raw response for debugging
+        logger.debug(f"[GEMINI RAW RESPONSE] Model: {resolved_name}")
+        logger.debug(f"[GEMINI RAW RESPONSE] Type: {type(response)}")
+        logger.debug(f"[GEMINI RAW RESPONSE] Response: {response}")
+
+        # Log response attributes
+        if hasattr(response, "__dict__"):
+            logger.debug(f"[GEMINI RAW RESPONSE] Response attributes: {response.__dict__}")
+
+        # Log candidates if present
+        if hasattr(response, "candidates"):
+            logger.debug(
+                f"[GEMINI RAW RESPONSE] Candidates count: {len(response.candidates) if response.candidates else 0}"
+            )
+            if response.candidates:
+                for i, candidate in enumerate(response.candidates):
+                    logger.debug(f"[GEMINI RAW RESPONSE] Candidate {i}: {candidate}")
+
+        # Log text extraction
+        try:
+            text_content = response.text
+            logger.debug(f"[GEMINI RAW RESPONSE] Extracted text length: {len(text_content) if text_content else 0}")
+            if not text_content:
+                logger.warning("[GEMINI RAW RESPONSE] No text content in response!")
+        except Exception as e:
+            logger.error(f"[GEMINI RAW RESPONSE] Error extracting text: {e}")
+
+        # Extract usage information if available
+        usage = self._extract_usage(response)
 
-        last_exception = None
+        return ModelResponse(
+            content=response.text,
+            usage=usage,
+            model_name=resolved_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=ProviderType.GOOGLE,
+            metadata={
+                "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+                "finish_reason": (
+                    getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
+                ),
+            },
+        )
 
-        for attempt in range(max_retries):
-            try:
-                # Generate content
-                response = self.client.models.generate_content(
+    def _retries_exhausted(self, error: RetryError, resolved_name: str) -> RuntimeError:
+        return RuntimeError(
+            f"Gemini API error for model {resolved_name} after {error.attempts} "
+            f"attempt{'s' if error.attempts > 1 else ''}: {str(error.last_error)}"
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using Gemini model."""
+        resolved_name, contents, generation_config, capabilities = self._build_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
+
+        try:
+            response = get_retry_engine().call(
+                self.get_provider_type().value,
+                lambda: self.client.models.generate_content(
                     model=resolved_name,
                     contents=contents,
                     config=generation_config,
-                )
-
-                # Log raw response for debugging
-                logger.debug(f"[GEMINI RAW RESPONSE] Model: {resolved_name}")
-                logger.debug(f"[GEMINI RAW RESPONSE] Type: {type(response)}")
-                logger.debug(f"[GEMINI RAW RESPONSE] Response: {response}")
-                
-                # Log response attributes
-                if hasattr(response, '__dict__'):
-                    logger.debug(f"[GEMINI RAW RESPONSE] Response attributes: {response.__dict__}")
-                
-                # Log candidates if present
-                if hasattr(response, 'candidates'):
-                    logger.debug(f"[GEMINI RAW RESPONSE] Candidates count: {len(response.candidates) if response.candidates else 0}")
-                    if response.candidates:
-                        for i, candidate in enumerate(response.candidates):
-                            logger.debug(f"[GEMINI RAW RESPONSE] Candidate {i}: {candidate}")
-                
-                # Log text extraction
-                try:
-                    text_content = response.text
-                    logger.debug(f"[GEMINI RAW RESPONSE] Extracted text length: {len(text_content) if text_content else 0}")
-                    if not text_content:
-                        logger.warning(f"[GEMINI RAW RESPONSE] No text content in response!")
-                except Exception as e:
-                    logger.error(f"[GEMINI RAW RESPONSE] Error extracting text: {e}")
-
-                # Extract usage information if available
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=response.text,
-                    usage=usage,
-                    model_name=resolved_name,
-                    friendly_name="Gemini",
-                    provider=ProviderType.GOOGLE,
-                    metadata={
-                        "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
-                        "finish_reason": (
-                            getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
-                        ),
-                    },
-                )
-
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error using structured error codes
-                is_retryable = self._is_error_retryable(e)
-
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
-
-                # Get progressive delay
-                delay = retry_delays[attempt]
-
-                # Log retry attempt
-                logger.warning(
-                    f"Gemini API error for model {resolved_name}, attempt {attempt + 1}/{max_retries}: {str(e)}. Retrying in {delay}s..."
-                )
-                time.sleep(delay)
-
-        # If we get here, all retries failed
-        actual_attempts = attempt + 1  # Convert from 0-based index to human-readable count
-        error_msg = f"Gemini API error for model {resolved_name} after {actual_attempts} attempt{'s' if actual_attempts > 1 else ''}: {str(last_exception)}"
-        raise RuntimeError(error_msg) from last_exception
+                ),
+                description=f"Gemini API error for model {resolved_name}",
+                is_retryable=self._is_error_retryable,
+            )
+        except RetryError as e:
+            raise self._retries_exhausted(e, resolved_name) from e.last_error
+        return self._build_model_response(response, resolved_name, thinking_mode, capabilities)
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using Gemini's async client without blocking the event loop."""
+        resolved_name, contents, generation_config, capabilities = self._build_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
+
+        try:
+            response = await get_retry_engine().acall(
+                self.get_provider_type().value,
+                lambda: self.client.aio.models.generate_content(
+                    model=resolved_name,
+                    contents=contents,
+                    config=generation_config,
+                ),
+                description=f"Gemini API error for model {resolved_name}",
+                is_retryable=self._is_error_retryable,
+            )
+        except RetryError as e:
+            raise self._retries_exhausted(e, resolved_name) from e.last_error
+        return self._build_model_response(response, resolved_name, thinking_mode, capabilities)
+
+    def _build_stream_chunk(self, response, metadata: dict) -> StreamChunk:
+        """Convert one chunk of a Gemini content stream into a StreamChunk."""
+        try:
+            text = response.text or ""
+        except Exception as e:
+            # Chunks without text parts (e.g. safety feedback) carry no content
+            logger.debug(f"[GEMINI STREAM] No text in chunk: {e}")
+            text = ""
+
+        finish_reason = None
+        if response.candidates:
+            finish_reason = getattr(response.candidates[0], "finish_reason", None)
+
+        return StreamChunk(
+            content=text,
+            usage=self._extract_usage(response),
+            finish_reason=finish_reason,
+            metadata=metadata,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        images: Optional[list[str]] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from Gemini's async client as it is generated.
+
+        Failed attempts are retried like generate_content until the first chunk has been
+        yielded; an error after that is raised to the caller.
+        """
+        resolved_name, contents, generation_config, capabilities = self._build_generation_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode, images
+        )
+        metadata = {"thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None}
+
+        async def open_stream():
+            # The first chunk is part of the attempt: many failures only surface once the stream is read
+            stream = await self.client.aio.models.generate_content_stream(
+                model=resolved_name,
+                contents=contents,
+                config=generation_config,
+            )
+            stream = stream.__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        try:
+            stream, first = await get_retry_engine().acall(
+                self.get_provider_type().value,
+                open_stream,
+                description=f"Gemini API error for model {resolved_name}",
+                is_retryable=self._is_error_retryable,
+            )
+        except RetryError as e:
+            raise self._retries_exhausted(e, resolved_name) from e.last_error
+        if first is None:
+            return
+
+        yield self._build_stream_chunk(first, metadata)
+        try:
+            async for response in stream:
+                yield self._build_stream_chunk(response, metadata)
+        except Exception as e:
+            raise RuntimeError(f"Gemini API error for model {resolved_name} while streaming: {str(e)}") from e
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using Gemini's tokenizer."""
@@ -390,78 +513,6 @@ class GeminiModelProvider(ModelProvider):
         }
         return model_name in vision_models
 
-    def _is_error_retryable(self, error: Exception) -> bool:
-        """Determine if an error should be retried based on structured error codes.
-
-        Uses Gemini API error structure instead of text pattern matching for reliability.
-
-        Args:
-            error: Exception from Gemini API call
-
-        Returns:
-            True if error should be retried, False otherwise
-        """
-        error_str = str(error).lower()
-
-        # Check for 429 errors first - these need special handling
-        if "429" in error_str or "quota" in error_str or "resource_exhausted" in error_str:
-            # For Gemini, check for specific non-retryable error indicators
-            # These typically indicate permanent failures or quota/size limits
-            non_retryable_indicators = [
-                "quota exceeded",
-                "resource exhausted",
-                "context length",
-                "token limit",
-                "request too large",
-                "invalid request",
-                "quota_exceeded",
-                "resource_exhausted",
-            ]
-
-            # Also check if this is a structured error from Gemini SDK
-            try:
-                # Try to access error details if available
-                if hasattr(error, "details") or hasattr(error, "reason"):
-                    # Gemini API errors may have structured details
-                    error_details = getattr(error, "details", "") or getattr(error, "reason", "")
-                    error_details_str = str(error_details).lower()
-
-                    # Check for non-retryable error codes/reasons
-                    if any(indicator in error_details_str for indicator in non_retryable_indicators):
-                        logger.debug(f"Non-retryable Gemini error: {error_details}")
-                        return False
-            except Exception:
-                pass
-
-            # Check main error string for non-retryable patterns
-            if any(indicator in error_str for indicator in non_retryable_indicators):
-                logger.debug(f"Non-retryable Gemini error based on message: {error_str[:200]}...")
-                return False
-
-            # If it's a 429/quota error but doesn't match non-retryable patterns, it might be retryable rate limiting
-            logger.debug(f"Retryable Gemini rate limiting error: {error_str[:100]}...")
-            return True
-
-        # For non-429 errors, check if they're retryable
-        retryable_indicators = [
-            "timeout",
-            "connection",
-            "network",
-            "temporary",
-            "unavailable",
-            "retry",
-            "internal error",
-            "408",  # Request timeout
-            "500",  # Internal server error
-            "502",  # Bad gateway
-            "503",  # Service unavailable
-            "504",  # Gateway timeout
-            "ssl",  # SSL errors
-            "handshake",  # Handshake failures
-        ]
-
-        return any(indicator in error_str for indicator in retryable_indicators)
-
     def _process_image(self, image_path: str) -> Optional[dict]:
         """Process an image for Gemini API."""
         try:
@@ -0,0 +1,300 @@
+"""
+Provider health tracking and circuit breaking
+
+ModelProviderRegistry.get_provider_for_model returned the first provider in
+priority order that accepted the model name, even while that provider was
+failing every call. The health tracker records the outcome of each model call
+per provider and per provider/model pair:
+
+- an error-rate EWMA over recent calls, counting only failures that are the
+  provider's fault (server errors, timeouts, connection failures, rate
+  limiting); invalid requests do not count against it
+- a latency EWMA over successful calls
+
+and runs a circuit breaker on each:
+
+- closed: calls are routed normally
+- open: entered when the error rate reaches the threshold (after a minimum
+  number of calls); the registry routes to the next provider that serves the
+  same model, e.g. native OpenAI -> OpenRouter
+- half-open: after the cooldown, one call is let through as a probe; success
+  closes the circuit, failure opens it for another cooldown. The probe is
+  claimed when the call starts (track), not when the registry looks the
+  provider up, since a request may look a model up several times before calling
+
+When every provider for a model has an open circuit, the registry still
+returns the healthiest one (lowest error rate, then latency) rather than none.
+
+Configuration (environment variables):
+- PROVIDER_CIRCUIT_BREAKER: Skip providers with open circuits (default: true)
+- PROVIDER_CIRCUIT_ERROR_THRESHOLD: Error rate that opens a circuit (default: 0.5)
+- PROVIDER_CIRCUIT_COOLDOWN: Seconds before an open circuit lets a probe through (default: 30)
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from .base import ModelProvider, ProviderType
+from .retry import is_retryable_error
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ERROR_THRESHOLD = 0.5
+DEFAULT_COOLDOWN = 30.0
+# Weight of the newest call in the EWMAs; four straight failures from healthy cross 0.5
+EWMA_ALPHA = 0.2
+# Calls seen before the error rate can open a circuit
+CIRCUIT_MIN_CALLS = 4
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _circuit_breaker_enabled() -> bool:
+    return os.getenv("PROVIDER_CIRCUIT_BREAKER", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _get_float_from_env(name: str, default: float, minimum: float, maximum: Optional[float] = None) -> float:
+    raw = os.getenv(name, "")
+    if not raw:
+        return default
+    try:
+        value = max(minimum, float(raw))
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+    return min(maximum, value) if maximum is not None else value
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Whether a failed call reflects on the provider's health
+
+    Providers wrap SDK errors (e.g. "Gemini API error ... after 4 attempts: 503 ..."),
+    so the chained cause is classified as well as the error itself.
+
+    Args:
+        error: Exception raised by a model call
+
+    Returns:
+        bool: True for server, network and rate-limit failures
+    """
+    cause = error.__cause__
+    return is_retryable_error(error) or (isinstance(cause, Exception) and is_retryable_error(cause))
+
+
+class CircuitBreaker:
+    """Health statistics and circuit state for one provider or provider/model pair"""
+
+    def __init__(self, error_threshold: float, cooldown: float):
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.error_rate = 0.0
+        self.latency: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+
+    def available(self, now: float) -> bool:
+        """Whether calls may be routed here; moves an open circuit to half-open after the cooldown"""
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probe_started = None
+        if self.state == HALF_OPEN:
+            # One probe at a time; a probe that never reported back is abandoned after a cooldown
+            return self.probe_started is None or now - self.probe_started >= self.cooldown
+        return self.state == CLOSED
+
+    def start_call(self, now: float) -> None:
+        if self.state == HALF_OPEN and (self.probe_started is None or now - self.probe_started >= self.cooldown):
+            self.probe_started = now
+
+    def record_success(self, latency: float) -> bool:
+        """Record a successful call; returns True if this closed the circuit"""
+        self.calls += 1
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.latency = latency if self.latency is None else self.latency + EWMA_ALPHA * (latency - self.latency)
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.error_rate = 0.0
+            self.probe_started = None
+            return True
+        return False
+
+    def record_failure(self, now: float) -> bool:
+        """Record a provider failure; returns True if this opened the circuit"""
+        self.calls += 1
+        self.failures += 1
+        self.error_rate += EWMA_ALPHA * (1 - self.error_rate)
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.calls >= CIRCUIT_MIN_CALLS and self.error_rate >= self.error_threshold
+        ):
+            self.state = OPEN
+            self.opened_at = now
+            self.probe_started = None
+            return True
+        return False
+
+    def score(self) -> tuple[float, float]:
+        """Sort key for choosing among providers: lower is healthier"""
+        return (self.error_rate, self.latency if self.latency is not None else 0.0)
+
+
+class ProviderHealth:
+    """Tracks call outcomes and circuit state per provider and per provider/model"""
+
+    def __init__(
+        self,
+        error_threshold: Optional[float] = None,
+        cooldown: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.error_threshold = (
+            error_threshold
+            if error_threshold is not None
+            else _get_float_from_env(
+                "PROVIDER_CIRCUIT_ERROR_THRESHOLD", DEFAULT_ERROR_THRESHOLD, minimum=0.01, maximum=1.0
+            )
+        )
+        self.cooldown = (
+            cooldown if cooldown is not None else _get_float_from_env("PROVIDER_CIRCUIT_COOLDOWN", DEFAULT_COOLDOWN, 0)
+        )
+        self.enabled = _circuit_breaker_enabled() if enabled is None else enabled
+        self._breakers: dict[tuple[ProviderType, Optional[str]], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _breakers_for(
+        self, provider_type: ProviderType, model_name: Optional[str], create: bool = True
+    ) -> list[CircuitBreaker]:
+        keys = [(provider_type, None)]
+        if model_name:
+            keys.append((provider_type, model_name.lower()))
+        breakers = []
+        for key in keys:
+            breaker = self._breakers.get(key)
+            if breaker is None and create:
+                breaker = self._breakers[key] = CircuitBreaker(self.error_threshold, self.cooldown)
+            if breaker is not None:
+                breakers.append(breaker)
+        return breakers
+
+    def is_available(self, provider_type: ProviderType, model_name: Optional[str] = None) -> bool:
+        """
+        Whether calls for a model should be routed to a provider
+
+        Args:
+            provider_type: Provider to check
+            model_name: Model requested; its own circuit is checked as well as the provider's
+
+        Returns:
+            bool: False while either circuit is open (or half-open with a probe in flight)
+        """
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            # Evaluate both so each open circuit can move to half-open
+            available = [breaker.available(now) for breaker in self._breakers_for(provider_type, model_name, False)]
+        return all(available)
+
+    def score(self, provider_type: ProviderType, model_name: Optional[str] = None) -> tuple[float, float]:
+        """Health of a provider for a model as a sort key (lower is healthier)"""
+        with self._lock:
+            scores = [breaker.score() for breaker in self._breakers_for(provider_type, model_name, create=False)]
+        return max(scores, default=(0.0, 0.0))
+
+    @contextmanager
+    def track(self, provider: ModelProvider, model_name: Optional[str] = None):
+        """
+        Record the outcome and latency of a model call
+
+        Args:
+            provider: Provider serving the call
+            model_name: Model requested
+        """
+        provider_type = provider.get_provider_type()
+        if not isinstance(provider_type, ProviderType):
+            # Test doubles and wrappers without a real provider type are not tracked
+            yield
+            return
+
+        start = time.monotonic()
+        with self._lock:
+            for breaker in self._breakers_for(provider_type, model_name):
+                breaker.start_call(start)
+        try:
+            yield
+        except Exception as e:
+            if is_provider_failure(e):
+                self._record(provider_type, model_name, failure=True)
+            raise
+        else:
+            self._record(provider_type, model_name, latency=time.monotonic() - start)
+
+    def _record(
+        self, provider_type: ProviderType, model_name: Optional[str], failure: bool = False, latency: float = 0.0
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            breakers = self._breakers_for(provider_type, model_name)
+            changed = [
+                breaker.record_failure(now) if failure else breaker.record_success(latency) for breaker in breakers
+            ]
+        for breaker, did_change, scope in zip(breakers, changed, ("provider", "model")):
+            if not did_change:
+                continue
+            target = provider_type.value if scope == "provider" else f"{provider_type.value}/{model_name}"
+            if failure:
+                logger.warning(
+                    f"Circuit opened for {target}: error rate {breaker.error_rate:.0%}; "
+                    f"routing to other providers for {breaker.cooldown:g}s"
+                )
+            else:
+                logger.info(f"Circuit closed for {target}")
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get health statistics
+
+        Returns:
+            dict: Per provider ("google") and provider/model ("google/gemini-2.5-flash"):
+            state, error_rate, latency_ms (EWMA over successful calls), calls and failures
+        """
+        with self._lock:
+            items = list(self._breakers.items())
+        stats = {}
+        for (provider_type, model_name), breaker in items:
+            name = provider_type.value if model_name is None else f"{provider_type.value}/{model_name}"
+            stats[name] = {
+                "state": breaker.state,
+                "error_rate": round(breaker.error_rate, 4),
+                "latency_ms": round(breaker.latency * 1000) if breaker.latency is not None else None,
+                "calls": breaker.calls,
+                "failures": breaker.failures,
+            }
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+_provider_health: Optional[ProviderHealth] = None
+_provider_health_lock = threading.Lock()
+
+
+def get_provider_health() -> ProviderHealth:
+    """Get the process-wide provider health tracker"""
+    global _provider_health
+    if _provider_health is None:
+        with _provider_health_lock:
+            if _provider_health is None:
+                _provider_health = ProviderHealth()
+    return _provider_health
@@ -4,17 +4,29 @@ import ipaddress
 import logging
 import os
 from abc import abstractmethod
+from collections.abc import AsyncIterator
 from typing import Optional
 from urllib.parse import urlparse
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from .base import (
     ModelCapabilities,
     ModelProvider,
     ModelResponse,
     ProviderType,
+    StreamChunk,
 )
+from .retry import RetryError, get_retry_engine
+from .transport import get_transport_manager
+
+# Where the OpenAI SDK sends requests when no base URL is configured
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _last_error(error: Exception) -> Exception:
+    """The error from the final attempt when the retry engine gave up, else the error itself."""
+    return error.last_error if isinstance(error, RetryError) else error
 
 
 class OpenAICompatibleProvider(ModelProvider):
@@ -39,6 +51,8 @@ class OpenAICompatibleProvider(ModelProvider):
         """
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._async_client = None
+        self._http_clients = []  # Shared httpx clients leased from the transport manager
         self.base_url = base_url
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
@@ -195,34 +209,70 @@ class OpenAICompatibleProvider(ModelProvider):
                 raise
             raise ValueError(f"Invalid base URL '{self.base_url}': {str(e)}")
 
+    def _client_kwargs(self) -> dict:
+        """Build the keyword arguments shared by the sync and async OpenAI clients."""
+        client_kwargs = {
+            "api_key": self.api_key,
+            "max_retries": 0,  # Retried by the shared retry engine in _create_completion
+        }
+
+        if self.base_url:
+            client_kwargs["base_url"] = self.base_url
+
+        if self.organization:
+            client_kwargs["organization"] = self.organization
+
+        # Add default headers if any
+        if self.DEFAULT_HEADERS:
+            client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+
+        # Add configured timeout settings
+        if hasattr(self, "timeout_config") and self.timeout_config:
+            client_kwargs["timeout"] = self.timeout_config
+            logging.debug(f"OpenAI client initialized with custom timeout: {self.timeout_config}")
+
+        return client_kwargs
+
+    def _acquire_http_client(self, asynchronous: bool = False):
+        """Lease the shared httpx client for this provider's API origin; released in close()."""
+        http_client = get_transport_manager().acquire(
+            self.base_url or OPENAI_DEFAULT_BASE_URL, asynchronous=asynchronous
+        )
+        self._http_clients.append(http_client)
+        return http_client
+
     @property
     def client(self):
         """Lazy initialization of OpenAI client with security checks and timeout configuration."""
         if self._client is None:
-            client_kwargs = {
-                "api_key": self.api_key,
-            }
+            self._client = OpenAI(http_client=self._acquire_http_client(), **self._client_kwargs())
 
-            if self.base_url:
-                client_kwargs["base_url"] = self.base_url
-
-            if self.organization:
-                client_kwargs["organization"] = self.organization
+        return self._client
 
-            # Add default headers if any
-            if self.DEFAULT_HEADERS:
-                client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+    @property
+    def async_client(self):
+        """Lazy initialization of the AsyncOpenAI client used by agenerate_content."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                http_client=self._acquire_http_client(asynchronous=True), **self._client_kwargs()
+            )
 
-            # Add configured timeout settings
-            if hasattr(self, "timeout_config") and self.timeout_config:
-                client_kwargs["timeout"] = self.timeout_config
-                logging.debug(f"OpenAI client initialized with custom timeout: {self.timeout_config}")
+        return self._async_client
 
-            self._client = OpenAI(**client_kwargs)
+    def close(self):
+        """Release the shared HTTP clients leased by this provider.
 
-        return self._client
+        The OpenAI clients are dropped rather than closed: closing them would close
+        connection pools that other providers share.
+        """
+        self._client = None
+        self._async_client = None
+        manager = get_transport_manager()
+        for http_client in self._http_clients:
+            manager.release(http_client)
+        self._http_clients.clear()
 
-    def generate_content(
+    def _build_completion_params(
         self,
         prompt: str,
         model_name: str,
@@ -230,8 +280,8 @@ class OpenAICompatibleProvider(ModelProvider):
         temperature: float = 0.7,
         max_output_tokens: Optional[int] = None,
         **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the OpenAI-compatible API.
+    ) -> dict:
+        """Validate the request and build chat completion parameters.
 
         Args:
             prompt: User prompt to send to the model
@@ -242,7 +292,7 @@ class OpenAICompatibleProvider(ModelProvider):
             **kwargs: Additional provider-specific parameters
 
         Returns:
-            ModelResponse with generated content and metadata
+            Keyword arguments for chat.completions.create
         """
         # Validate model name against allow-list
         if not self.validate_model_name(model_name):
@@ -307,77 +357,223 @@ class OpenAICompatibleProvider(ModelProvider):
             if key in ["top_p", "frequency_penalty", "presence_penalty", "seed", "stop", "stream", "service_tier"]:
                 completion_params[key] = value
 
-        try:
-            # Generate completion
-            response = self.client.chat.completions.create(**completion_params)
-
-            # Extract content and usage
-            content = response.choices[0].message.content
-            usage = self._extract_usage(response)
-
-            return ModelResponse(
-                content=content,
-                usage=usage,
-                model_name=model_name,
-                friendly_name=self.FRIENDLY_NAME,
-                provider=self.get_provider_type(),
-                metadata={
-                    "finish_reason": response.choices[0].finish_reason,
-                    "model": response.model,  # Actual model used
-                    "id": response.id,
-                    "created": response.created,
-                },
-            )
+        return completion_params
+
+    def _build_model_response(self, response, model_name: str, **metadata) -> ModelResponse:
+        """Convert a chat completion into a ModelResponse.
+
+        Args:
+            response: OpenAI chat completion
+            model_name: Name of the model that was requested
+            **metadata: Extra metadata entries (e.g. service_tier_fallback)
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        # Extract content and usage
+        content = response.choices[0].message.content
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": response.choices[0].finish_reason,
+                "model": response.model,  # Actual model used
+                "id": response.id,
+                "created": response.created,
+                **metadata,
+            },
+        )
+
+    def _is_flex_tier_failure(self, completion_params: dict, error: Exception) -> bool:
+        """Check whether an OpenAI request failed because the Flex Processing tier was unavailable."""
+        error_str = str(error).lower()
+        return (
+            completion_params.get("service_tier") == "flex"
+            and self.get_provider_type() == ProviderType.OPENAI
+            and ("service_tier" in error_str or "flex" in error_str or "invalid" in error_str)
+        )
+
+    def _without_service_tier(self, completion_params: dict, model_name: str, error: Exception) -> dict:
+        """Log the flex tier failure and return parameters for a standard tier retry."""
+        logging.warning(f"Flex Processing tier failed for {model_name}, retrying with standard tier: {str(error)}")
+        completion_params_retry = completion_params.copy()
+        del completion_params_retry["service_tier"]
+        return completion_params_retry
+
+    def _api_error(self, model_name: str, error: Exception, after_flex_fallback: bool = False) -> RuntimeError:
+        """Log and build the error raised when a completion request fails."""
+        attempts = ""
+        if isinstance(error, RetryError):
+            if error.attempts > 1:
+                attempts = f" after {error.attempts} attempts"
+            error = error.last_error
+        fallback = " (after flex fallback)" if after_flex_fallback else ""
+        error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name}{fallback}{attempts}: {str(error)}"
+        logging.error(error_msg)
+        return RuntimeError(error_msg)
+
+    def _create_completion(self, completion_params: dict, model_name: str):
+        """Create a chat completion, retrying transient failures through the shared retry engine."""
+        return get_retry_engine().call(
+            self.get_provider_type().value,
+            lambda: self.client.chat.completions.create(**completion_params),
+            description=f"{self.FRIENDLY_NAME} API error for model {model_name}",
+            is_retryable=self._is_error_retryable,
+        )
+
+    async def _acreate_completion(self, completion_params: dict, model_name: str):
+        """Async variant of _create_completion on the AsyncOpenAI client."""
+        return await get_retry_engine().acall(
+            self.get_provider_type().value,
+            lambda: self.async_client.chat.completions.create(**completion_params),
+            description=f"{self.FRIENDLY_NAME} API error for model {model_name}",
+            is_retryable=self._is_error_retryable,
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
 
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
+
+        try:
+            response = self._create_completion(completion_params, model_name)
+            return self._build_model_response(response, model_name)
         except Exception as e:
-            # Check if this is a service_tier=flex failure for OpenAI
-            error_str = str(e).lower()
-            if (
-                "service_tier" in completion_params
-                and completion_params["service_tier"] == "flex"
-                and self.get_provider_type() == ProviderType.OPENAI
-                and ("service_tier" in error_str or "flex" in error_str or "invalid" in error_str)
-            ):
-                # Log the flex tier failure
-                logging.warning(f"Flex Processing tier failed for {model_name}, retrying with standard tier: {str(e)}")
-
-                # Remove service_tier and retry
-                completion_params_retry = completion_params.copy()
-                del completion_params_retry["service_tier"]
+            # Retry OpenAI service_tier=flex failures on the standard tier, outside the retry loop
+            if self._is_flex_tier_failure(completion_params, _last_error(e)):
+                completion_params_retry = self._without_service_tier(completion_params, model_name, _last_error(e))
+                try:
+                    response = self._create_completion(completion_params_retry, model_name)
+                    return self._build_model_response(response, model_name, service_tier_fallback=True)
+                except Exception as retry_e:
+                    raise self._api_error(model_name, retry_e, after_flex_fallback=True) from _last_error(retry_e)
+
+            raise self._api_error(model_name, e) from _last_error(e)
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API without blocking the event loop.
+
+        Mirrors generate_content but awaits the request on the AsyncOpenAI client.
+        """
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
 
+        try:
+            response = await self._acreate_completion(completion_params, model_name)
+            return self._build_model_response(response, model_name)
+        except Exception as e:
+            if self._is_flex_tier_failure(completion_params, _last_error(e)):
+                completion_params_retry = self._without_service_tier(completion_params, model_name, _last_error(e))
                 try:
-                    response = self.client.chat.completions.create(**completion_params_retry)
+                    response = await self._acreate_completion(completion_params_retry, model_name)
+                    return self._build_model_response(response, model_name, service_tier_fallback=True)
+                except Exception as retry_e:
+                    raise self._api_error(model_name, retry_e, after_flex_fallback=True) from _last_error(retry_e)
 
-                    # Extract content and usage
-                    content = response.choices[0].message.content
-                    usage = self._extract_usage(response)
+            raise self._api_error(model_name, e) from _last_error(e)
 
-                    return ModelResponse(
-                        content=content,
-                        usage=usage,
-                        model_name=model_name,
-                        friendly_name=self.FRIENDLY_NAME,
-                        provider=self.get_provider_type(),
-                        metadata={
-                            "finish_reason": response.choices[0].finish_reason,
-                            "model": response.model,
-                            "id": response.id,
-                            "created": response.created,
-                            "service_tier_fallback": True,  # Indicate we fell back
-                        },
-                    )
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from the OpenAI-compatible API as it is generated.
+
+        Usage is requested in the final stream event. If the endpoint refuses to stream
+        the model (e.g. OpenAI models that require a verified organization to stream),
+        the response is returned as a single chunk instead.
+        """
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
+        completion_params["stream"] = True
+        completion_params["stream_options"] = {"include_usage": True}
+        metadata = {}
+
+        try:
+            stream = await self._acreate_completion(completion_params, model_name)
+        except Exception as e:
+            error = _last_error(e)
+            if self._is_flex_tier_failure(completion_params, error):
+                completion_params_retry = self._without_service_tier(completion_params, model_name, error)
+                try:
+                    stream = await self._acreate_completion(completion_params_retry, model_name)
                 except Exception as retry_e:
-                    # If retry also fails, raise the retry error
-                    error_msg = (
-                        f"{self.FRIENDLY_NAME} API error for model {model_name} (after flex fallback): {str(retry_e)}"
-                    )
-                    logging.error(error_msg)
-                    raise RuntimeError(error_msg) from retry_e
+                    raise self._api_error(model_name, retry_e, after_flex_fallback=True) from _last_error(retry_e)
+                metadata["service_tier_fallback"] = True
+            elif "stream" in str(error).lower():
+                logging.warning(f"Streaming unavailable for {model_name}, waiting for the full response: {str(error)}")
+                async for chunk in super().astream_content(
+                    prompt=prompt,
+                    model_name=model_name,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                    **kwargs,
+                ):
+                    yield chunk
+                return
+            else:
+                raise self._api_error(model_name, e) from error
 
-            # For non-flex errors or non-OpenAI providers, raise as before
-            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name}: {str(e)}"
-            logging.error(error_msg)
-            raise RuntimeError(error_msg) from e
+        try:
+            async with stream:
+                async for event in stream:
+                    usage = self._extract_usage(event)
+                    if not event.choices:
+                        # The usage event that ends the stream has no choices
+                        if usage:
+                            yield StreamChunk(usage=usage)
+                        continue
+
+                    choice = event.choices[0]
+                    yield StreamChunk(
+                        content=choice.delta.content or "",
+                        usage=usage,
+                        finish_reason=choice.finish_reason,
+                        metadata={"model": event.model, "id": event.id, "created": event.created, **metadata},
+                    )
+        except Exception as e:
+            raise self._api_error(model_name, e) from e
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text.
@@ -1,12 +1,14 @@
 """OpenAI model provider implementation."""
 
 import logging
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from .base import (
     ModelCapabilities,
     ModelResponse,
     ProviderType,
+    StreamChunk,
     create_temperature_constraint,
 )
 from .openai_compatible import OpenAICompatibleProvider
@@ -234,6 +236,51 @@ class OpenAIModelProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content with the same model name resolution."""
+        # Resolve model alias before making API call
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Streaming variant of generate_content that resolves aliases the same way."""
+        # Resolve model alias before making API call
+        resolved_model_name = self._resolve_model_name(model_name)
+
+        async for chunk in super().astream_content(
+            prompt=prompt,
+            model_name=resolved_model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        ):
+            yield chunk
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode."""
         # Currently no OpenAI models support extended thinking
@@ -2,6 +2,7 @@
 
 import logging
 import os
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from .base import (
@@ -9,6 +10,7 @@ from .base import (
     ModelResponse,
     ProviderType,
     RangeTemperatureConstraint,
+    StreamChunk,
 )
 from .openai_compatible import OpenAICompatibleProvider
 from .openrouter_registry import OpenRouterModelRegistry
@@ -193,6 +195,55 @@ class OpenRouterProvider(OpenAICompatibleProvider):
             **kwargs,
         )
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Async variant of generate_content that resolves aliases the same way."""
+        # Resolve model alias to actual OpenRouter model name
+        resolved_model = self._resolve_model_name(model_name)
+
+        # Always disable streaming for OpenRouter
+        if "stream" not in kwargs:
+            kwargs["stream"] = False
+
+        return await super().agenerate_content(
+            prompt=prompt,
+            model_name=resolved_model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Streaming variant of generate_content that resolves aliases the same way."""
+        # Resolve model alias to actual OpenRouter model name
+        resolved_model = self._resolve_model_name(model_name)
+
+        async for chunk in super().astream_content(
+            prompt=prompt,
+            model_name=resolved_model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        ):
+            yield chunk
+
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode.
 
@@ -5,6 +5,7 @@ import os
 from typing import TYPE_CHECKING, Optional
 
 from .base import ModelProvider, ProviderType
+from .health import get_provider_health
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
@@ -102,6 +103,10 @@ class ModelProviderRegistry:
         2. CUSTOM - For local/private models with specific endpoints
         3. OPENROUTER - Catch-all for cloud models via unified API
 
+        Providers whose circuit breaker is open (for the provider or for this model)
+        are skipped in favor of the next provider that serves the model. If every
+        such provider is open, the healthiest one is returned.
+
         Args:
             model_name: Name of the model (e.g., "gemini-2.5-flash", "o3-mini")
 
@@ -126,6 +131,9 @@ class ModelProviderRegistry:
         logging.debug(f"Registry instance: {instance}")
         logging.debug(f"Available providers in registry: {list(instance._providers.keys())}")
 
+        health = get_provider_health()
+        unhealthy = []
+
         for provider_type in PROVIDER_PRIORITY_ORDER:
             if provider_type in instance._providers:
                 logging.debug(f"Found {provider_type} in registry")
@@ -133,12 +141,26 @@ class ModelProviderRegistry:
                 provider = cls.get_provider(provider_type)
                 if provider and provider.validate_model_name(model_name):
                     logging.debug(f"{provider_type} validates model {model_name}")
-                    return provider
+                    if health.is_available(provider_type, model_name):
+                        if unhealthy:
+                            logging.info(
+                                f"Circuit open for {unhealthy[0].get_provider_type().value}; "
+                                f"routing {model_name} to {provider_type.value}"
+                            )
+                        return provider
+                    logging.debug(f"{provider_type} circuit is open for {model_name}, trying next provider")
+                    unhealthy.append(provider)
                 else:
                     logging.debug(f"{provider_type} does not validate model {model_name}")
             else:
                 logging.debug(f"{provider_type} not found in registry")
 
+        if unhealthy:
+            # Every provider for this model is failing; use the one failing least
+            provider = min(unhealthy, key=lambda p: health.score(p.get_provider_type(), model_name))
+            logging.warning(f"All providers for {model_name} have open circuits; using {provider.get_provider_type()}")
+            return provider
+
         logging.debug(f"No provider found for model {model_name}")
         return None
 
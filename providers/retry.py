@@ -0,0 +1,461 @@
+"""
+Shared retry engine for provider API calls
+
+Providers used to retry failed calls with their own fixed delay tables and
+time.sleep (blocking the event loop when called from async code), each with
+its own copy of the retryable-error classification. The engine here replaces
+them with one implementation:
+
+- errors are classified once (is_retryable_error): transient server and
+  network errors and plain rate limiting are retried; quota, token-limit and
+  other client errors are not
+- delays use exponential backoff with full jitter, so clients that failed
+  together do not retry together
+- a server-provided delay (Retry-After / retry-after-ms headers, or Gemini's
+  RetryInfo retryDelay) is honored; if it exceeds the maximum delay the call
+  fails instead of waiting
+- each provider has a retry budget: every request deposits a fraction of a
+  retry into a bucket and every retry withdraws one, so during an outage
+  retries fall to that fraction of traffic instead of multiplying it
+- acall sleeps with asyncio.sleep; call (for synchronous callers and worker
+  threads) with time.sleep
+
+Retry counters are kept per provider and exported through get_stats().
+
+Configuration (environment variables):
+- PROVIDER_RETRY_MAX_ATTEMPTS: Attempts per call, including the first (default: 4)
+- PROVIDER_RETRY_BASE_DELAY: Backoff base in seconds (default: 1.0)
+- PROVIDER_RETRY_MAX_DELAY: Longest single wait in seconds (default: 30)
+- PROVIDER_RETRY_BUDGET_RATIO: Retries earned per request (default: 0.2)
+"""
+
+import ast
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections.abc import Awaitable
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_BUDGET_RATIO = 0.2
+# Retries a provider can spend before the budget has to be earned back by requests
+RETRY_BUDGET_RESERVE = 10
+
+# 429 responses that will not succeed on retry (quota, token and size limits)
+_NON_RETRYABLE_RATE_LIMIT_INDICATORS = (
+    "quota exceeded",
+    "resource exhausted",
+    "context length",
+    "context_length_exceeded",
+    "token limit",
+    "request too large",
+    "invalid request",
+    "quota_exceeded",
+    "resource_exhausted",
+)
+_RETRYABLE_STATUS_CODES = frozenset({408, 500, 502, 503, 504})
+_RETRYABLE_INDICATORS = (
+    "timeout",
+    "connection",
+    "network",
+    "temporary",
+    "unavailable",
+    "retry",
+    "internal error",
+    "408",  # Request timeout
+    "500",  # Internal server error
+    "502",  # Bad gateway
+    "503",  # Service unavailable
+    "504",  # Gateway timeout
+    "ssl",  # SSL errors
+    "handshake",  # Handshake failures
+)
+# Gemini reports server-suggested delays in a RetryInfo detail, e.g. 'retryDelay': '17s'
+_RETRY_DELAY_PATTERN = re.compile(r"""["']retryDelay["']\s*:\s*["'](\d+(?:\.\d+)?)s["']""")
+
+
+def _get_float_from_env(name: str, default: float, minimum: float) -> float:
+    raw = os.getenv(name, "")
+    if not raw:
+        return default
+    try:
+        return max(minimum, float(raw))
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+
+
+def _get_int_from_env(name: str, default: int, minimum: int) -> int:
+    raw = os.getenv(name, "")
+    if not raw:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status from SDK errors (openai uses status_code, google-genai uses code)"""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _structured_error(error_str: str) -> dict:
+    """Parse the error object embedded in messages like "Error code: 429 - {'error': {...}}" """
+    start = error_str.find("{")
+    if start == -1:
+        return {}
+    payload = error_str[start:]
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(payload)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(parsed, dict):
+            inner = parsed.get("error", parsed)
+            return inner if isinstance(inner, dict) else {}
+    return {}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Decide whether a failed provider call is worth retrying
+
+    Args:
+        error: Exception raised by the provider SDK
+
+    Returns:
+        bool: True for transient failures (server errors, timeouts, connection
+        problems, plain rate limiting), False for errors that will recur
+    """
+    status = _status_code(error)
+    error_str = str(error)
+    lowered = error_str.lower()
+
+    if status is not None:
+        is_rate_limit = status == 429
+    else:
+        is_rate_limit = "429" in lowered or "quota" in lowered or "resource_exhausted" in lowered
+
+    if is_rate_limit:
+        # Token-per-minute limits mean the request itself is too large for the quota
+        structured = _structured_error(error_str)
+        if str(structured.get("type", "")).lower() == "tokens":
+            return False
+        if str(structured.get("code", "")).lower() == "context_length_exceeded":
+            return False
+
+        details = getattr(error, "details", None) or getattr(error, "reason", None)
+        searchable = f"{lowered} {str(details).lower()}" if details else lowered
+        if any(indicator in searchable for indicator in _NON_RETRYABLE_RATE_LIMIT_INDICATORS):
+            logger.debug(f"Non-retryable rate limit error: {error_str[:200]}")
+            return False
+        return True
+
+    if status is not None:
+        if status in _RETRYABLE_STATUS_CODES:
+            return True
+        if 400 <= status < 500:
+            return False
+
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(indicator in lowered for indicator in _RETRYABLE_INDICATORS)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Server-suggested delay before retrying, if the error carries one
+
+    Checks the retry-after-ms and Retry-After response headers (seconds or an
+    HTTP date) and Gemini's RetryInfo retryDelay.
+
+    Args:
+        error: Exception raised by the provider SDK
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the server did not say
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            retry_after = headers.get("retry-after")
+        except Exception:
+            retry_after_ms = retry_after = None
+
+        if retry_after_ms:
+            try:
+                return max(0.0, float(retry_after_ms) / 1000)
+            except (TypeError, ValueError):
+                pass
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except (TypeError, ValueError):
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class RetryError(Exception):
+    """Raised when a call fails for good; the last error is chained as __cause__"""
+
+    def __init__(self, last_error: Exception, attempts: int):
+        super().__init__(str(last_error))
+        self.last_error = last_error
+        self.attempts = attempts
+
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of requests"""
+
+    def __init__(self, ratio: float, reserve: int = RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.capacity = float(reserve)
+        self._tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class RetryEngine:
+    """Retries provider calls with jittered backoff under a per-provider budget"""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        budget_ratio: Optional[float] = None,
+        classifier: Callable[[Exception], bool] = is_retryable_error,
+    ):
+        self.max_attempts = max_attempts or _get_int_from_env(
+            "PROVIDER_RETRY_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS, minimum=1
+        )
+        self.base_delay = (
+            base_delay
+            if base_delay is not None
+            else _get_float_from_env("PROVIDER_RETRY_BASE_DELAY", DEFAULT_BASE_DELAY, minimum=0.0)
+        )
+        self.max_delay = (
+            max_delay
+            if max_delay is not None
+            else _get_float_from_env("PROVIDER_RETRY_MAX_DELAY", DEFAULT_MAX_DELAY, minimum=0.0)
+        )
+        self.budget_ratio = (
+            budget_ratio
+            if budget_ratio is not None
+            else _get_float_from_env("PROVIDER_RETRY_BUDGET_RATIO", DEFAULT_BUDGET_RATIO, minimum=0.0)
+        )
+        self.classifier = classifier
+        self._budgets: dict[str, RetryBudget] = {}
+        self._stats: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _budget(self, provider: str) -> RetryBudget:
+        with self._lock:
+            budget = self._budgets.get(provider)
+            if budget is None:
+                budget = self._budgets[provider] = RetryBudget(self.budget_ratio)
+            return budget
+
+    def _count(self, provider: str, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                provider,
+                {
+                    "requests": 0,
+                    "retries": 0,
+                    "recovered": 0,
+                    "non_retryable": 0,
+                    "exhausted": 0,
+                    "budget_exhausted": 0,
+                    "retry_after_honored": 0,
+                    "sleep_seconds": 0.0,
+                },
+            )
+            stats[counter] += amount
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform between 0 and base * 2^attempt, capped"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+    def _next_delay(
+        self,
+        provider: str,
+        error: Exception,
+        attempt: int,
+        description: str,
+        is_retryable: Optional[Callable[[Exception], bool]],
+    ) -> Optional[float]:
+        """Return how long to wait before the next attempt, or None to give up"""
+        if not (is_retryable or self.classifier)(error):
+            self._count(provider, "non_retryable")
+            return None
+        if attempt + 1 >= self.max_attempts:
+            self._count(provider, "exhausted")
+            return None
+
+        retry_after = get_retry_after(error)
+        if retry_after is not None and retry_after > self.max_delay:
+            logger.warning(
+                f"{description}: server asked to wait {retry_after:g}s, longer than the "
+                f"{self.max_delay:g}s retry limit; giving up"
+            )
+            self._count(provider, "exhausted")
+            return None
+
+        if not self._budget(provider).try_acquire():
+            logger.warning(f"{description}: retry budget for {provider} exhausted, not retrying: {error}")
+            self._count(provider, "budget_exhausted")
+            return None
+
+        if retry_after is not None:
+            delay = retry_after
+            self._count(provider, "retry_after_honored")
+        else:
+            delay = self.backoff(attempt)
+        self._count(provider, "retries")
+        self._count(provider, "sleep_seconds", delay)
+        logger.warning(
+            f"{description}, attempt {attempt + 1}/{self.max_attempts}: {error}. Retrying in {delay:.1f}s..."
+        )
+        return delay
+
+    def _start(self, provider: str) -> None:
+        self._budget(provider).record_request()
+        self._count(provider, "requests")
+
+    def call(
+        self,
+        provider: str,
+        func: Callable[[], T],
+        description: str = "API call",
+        is_retryable: Optional[Callable[[Exception], bool]] = None,
+    ) -> T:
+        """
+        Call func, retrying transient failures with blocking sleeps
+
+        Args:
+            provider: Budget and metrics key (e.g. the provider type value)
+            func: Performs one attempt
+            description: Prefix for retry log messages
+            is_retryable: Error classifier to use instead of the engine's
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            RetryError: When the error is not retryable, attempts or budget run out
+        """
+        self._start(provider)
+        for attempt in range(self.max_attempts):
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._next_delay(provider, e, attempt, description, is_retryable)
+                if delay is None:
+                    raise RetryError(e, attempt + 1) from e
+                time.sleep(delay)
+            else:
+                if attempt:
+                    self._count(provider, "recovered")
+                return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def acall(
+        self,
+        provider: str,
+        func: Callable[[], Awaitable[T]],
+        description: str = "API call",
+        is_retryable: Optional[Callable[[Exception], bool]] = None,
+    ) -> T:
+        """Async variant of call that waits with asyncio.sleep"""
+        self._start(provider)
+        for attempt in range(self.max_attempts):
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._next_delay(provider, e, attempt, description, is_retryable)
+                if delay is None:
+                    raise RetryError(e, attempt + 1) from e
+                await asyncio.sleep(delay)
+            else:
+                if attempt:
+                    self._count(provider, "recovered")
+                return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get retry metrics
+
+        Returns:
+            dict: Per provider: requests, retries, recovered (succeeded after a retry),
+            non_retryable, exhausted, budget_exhausted, retry_after_honored,
+            sleep_seconds and budget_available
+        """
+        with self._lock:
+            stats = {provider: dict(counters) for provider, counters in self._stats.items()}
+            budgets = dict(self._budgets)
+        for provider, counters in stats.items():
+            if provider in budgets:
+                counters["budget_available"] = budgets[provider].available
+        return stats
+
+    def reset(self) -> None:
+        with self._lock:
+            self._budgets.clear()
+            self._stats.clear()
+
+
+_retry_engine: Optional[RetryEngine] = None
+_retry_engine_lock = threading.Lock()
+
+
+def get_retry_engine() -> RetryEngine:
+    """Get the process-wide retry engine"""
+    global _retry_engine
+    if _retry_engine is None:
+        with _retry_engine_lock:
+            if _retry_engine is None:
+                _retry_engine = RetryEngine()
+    return _retry_engine
@@ -0,0 +1,290 @@
+"""
+Shared HTTP transports for provider API clients
+
+Every OpenAI-compatible provider created its own OpenAI clients, each with its
+own httpx connection pool at SDK defaults, and httpx closes idle connections
+after five seconds. Requests spaced further apart than that (the normal case
+for model calls) paid a fresh TCP connect and TLS handshake every time.
+
+The transport manager hands out one httpx client per API origin (scheme, host
+and port), shared by every provider and SDK client that talks to it:
+
+- pool size and keep-alive expiry are configurable, and idle connections are
+  kept long enough to be reused between tool calls
+- HTTP/2 is negotiated when enabled and the h2 package is installed, so
+  concurrent requests to one host share a single connection
+- clients are leased: each provider releases its lease on close and a client
+  is closed when its last lease is released
+- per-client counters (requests, connections opened, TLS handshakes) and the
+  pool's current active/idle connections are exported through get_stats()
+
+Synchronous and asynchronous SDK clients get separate httpx clients. Callers
+that need request hooks (DIAL strips the Authorization header the OpenAI SDK
+adds) use their own partition, since hooks apply to every request a client sends.
+
+Configuration (environment variables):
+- PROVIDER_HTTP_MAX_CONNECTIONS: Connections per pool (default: 100)
+- PROVIDER_HTTP_MAX_KEEPALIVE: Idle connections kept open per pool (default: 20)
+- PROVIDER_HTTP_KEEPALIVE_EXPIRY: Seconds an idle connection is kept open (default: 120)
+- PROVIDER_HTTP2: Use HTTP/2 when the h2 package is installed (default: true)
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 120.0
+# Used until the SDK applies its own per-request timeout
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=30.0)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+HTTPClient = Union[httpx.Client, httpx.AsyncClient]
+
+
+def _get_number_from_env(name: str, default: float, minimum: float, cast: Callable = float):
+    raw = os.getenv(name, "")
+    if not raw:
+        return default
+    try:
+        return max(minimum, cast(raw))
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+
+
+def _http2_from_env() -> bool:
+    if os.getenv("PROVIDER_HTTP2", "true").strip().lower() in ("0", "false", "no", "off"):
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.debug("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def get_origin(base_url: str) -> str:
+    """
+    Reduce an API base URL to the origin its connections are pooled by
+
+    Args:
+        base_url: Base URL of an API (e.g. https://api.openai.com/v1)
+
+    Returns:
+        str: scheme://host:port
+    """
+    parts = urlsplit(base_url)
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port or _DEFAULT_PORTS.get(scheme)
+    return f"{scheme}://{host}:{port}"
+
+
+class _SharedClient:
+    """A pooled httpx client with its leases and counters"""
+
+    def __init__(self, key: tuple[str, str, bool]):
+        self.key = key
+        self.client: Optional[HTTPClient] = None
+        self.leases = 0
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def trace(self, event_name: str, info: dict) -> None:
+        # httpcore reports connection setup through the request's "trace" extension
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def atrace(self, event_name: str, info: dict) -> None:
+        self.trace(event_name, info)
+
+    def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions.setdefault("trace", self.trace)
+
+    async def aon_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions.setdefault("trace", self.atrace)
+
+
+class TransportManager:
+    """Hands out shared, leased httpx clients per API origin"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.max_connections = max_connections or _get_number_from_env(
+            "PROVIDER_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, minimum=1, cast=int
+        )
+        self.max_keepalive = (
+            max_keepalive
+            if max_keepalive is not None
+            else _get_number_from_env("PROVIDER_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE, minimum=0, cast=int)
+        )
+        self.keepalive_expiry = (
+            keepalive_expiry
+            if keepalive_expiry is not None
+            else _get_number_from_env("PROVIDER_HTTP_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY, minimum=0.0)
+        )
+        self.http2 = _http2_from_env() if http2 is None else http2
+        self._clients: dict[tuple[str, str, bool], _SharedClient] = {}
+        self._lock = threading.Lock()
+
+    def _create_client(
+        self, entry: _SharedClient, asynchronous: bool, event_hooks: Optional[dict[str, list]]
+    ) -> HTTPClient:
+        hooks = {"request": [], "response": []}
+        for event, callbacks in (event_hooks or {}).items():
+            hooks[event].extend(callbacks)
+        hooks["request"].insert(0, entry.aon_request if asynchronous else entry.on_request)
+
+        client_class = httpx.AsyncClient if asynchronous else httpx.Client
+        return client_class(
+            timeout=DEFAULT_TIMEOUT,
+            follow_redirects=True,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            event_hooks=hooks,
+        )
+
+    def acquire(
+        self,
+        base_url: str,
+        asynchronous: bool = False,
+        partition: str = "default",
+        event_hooks: Optional[dict[str, list]] = None,
+    ) -> HTTPClient:
+        """
+        Lease the shared client for an API origin, creating it on first use
+
+        Args:
+            base_url: Base URL of the API; clients are shared per origin
+            asynchronous: Return an httpx.AsyncClient instead of an httpx.Client
+            partition: Separates clients that need different event hooks
+            event_hooks: httpx event hooks, applied when the partition's client is created
+
+        Returns:
+            httpx.Client or httpx.AsyncClient; pass it to release() when done
+        """
+        key = (get_origin(base_url), partition, asynchronous)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None or entry.client.is_closed:
+                entry = self._clients[key] = _SharedClient(key)
+                entry.client = self._create_client(entry, asynchronous, event_hooks)
+                logger.debug(
+                    f"Created shared {'async ' if asynchronous else ''}HTTP client for {key[0]} "
+                    f"(partition {partition}, http2={self.http2})"
+                )
+            entry.leases += 1
+            return entry.client
+
+    def release(self, client: HTTPClient) -> None:
+        """
+        Return a lease; the client is closed when its last lease is released
+
+        Args:
+            client: Client returned by acquire()
+        """
+        with self._lock:
+            entry = next((entry for entry in self._clients.values() if entry.client is client), None)
+            if entry is None:
+                return
+            entry.leases -= 1
+            if entry.leases > 0:
+                return
+            del self._clients[entry.key]
+        self._close(client)
+
+    def _close(self, client: HTTPClient) -> None:
+        try:
+            if isinstance(client, httpx.AsyncClient):
+                try:
+                    asyncio.get_running_loop().create_task(client.aclose())
+                except RuntimeError:
+                    asyncio.run(client.aclose())
+            else:
+                client.close()
+        except Exception as e:
+            logger.debug(f"Error closing shared HTTP client: {e}")
+
+    def close_all(self) -> None:
+        """Close every client regardless of outstanding leases"""
+        with self._lock:
+            clients = [entry.client for entry in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            self._close(client)
+
+    @staticmethod
+    def _pool_usage(client: HTTPClient) -> dict[str, int]:
+        # httpx does not expose pool state; read it from httpcore when available
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", None) or [])
+        idle = 0
+        for connection in connections:
+            try:
+                idle += bool(connection.is_idle())
+            except Exception:
+                pass
+        return {"connections": len(connections), "active": len(connections) - idle, "idle": idle}
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get pool statistics
+
+        Returns:
+            dict: Per client ("origin [partition]", with " async" for async clients):
+            leases, requests, connections_opened, tls_handshakes, the pool's current
+            connections/active/idle counts and its max_connections limit
+        """
+        with self._lock:
+            entries = list(self._clients.values())
+        stats = {}
+        for entry in entries:
+            origin, partition, asynchronous = entry.key
+            name = f"{origin} [{partition}]{' async' if asynchronous else ''}"
+            stats[name] = {
+                "leases": entry.leases,
+                "requests": entry.requests,
+                "connections_opened": entry.connections_opened,
+                "tls_handshakes": entry.tls_handshakes,
+                **self._pool_usage(entry.client),
+                "max_connections": self.max_connections,
+                "http2": self.http2,
+            }
+        return stats
+
+
+_transport_manager: Optional[TransportManager] = None
+_transport_manager_lock = threading.Lock()
+
+
+def get_transport_manager() -> TransportManager:
+    """Get the process-wide transport manager"""
+    global _transport_manager
+    if _transport_manager is None:
+        with _transport_manager_lock:
+            if _transport_manager is None:
+                _transport_manager = TransportManager()
+    return _transport_manager
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark for directory expansion on a large synthetic project tree.
+
+Builds a tree of roughly 100k source files (plus a .gitignore'd build output
+directory) and compares:
+- the previous os.walk-based expansion, which ignores .gitignore
+- expand_paths with a cold directory-listing cache
+- expand_paths with a warm cache, as on repeated tool calls for the same project
+
+Usage:
+    python scripts/benchmark_expand_paths.py [--dirs 50] [--subdirs 20] [--files 100] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_types import CODE_EXTENSIONS  # noqa: E402
+from utils.file_utils import expand_paths  # noqa: E402
+from utils.file_walker import get_directory_walker  # noqa: E402
+from utils.security_config import EXCLUDED_DIRS  # noqa: E402
+
+
+def build_tree(root: Path, dirs: int, subdirs: int, files: int) -> int:
+    """Create the synthetic project and return the number of files created"""
+    (root / ".gitignore").write_text("generated/\n*.min.js\n")
+    created = 0
+    for d in range(dirs):
+        for s in range(subdirs):
+            subdir = root / f"pkg{d:03d}" / f"mod{s:03d}"
+            subdir.mkdir(parents=True)
+            for f in range(files):
+                suffix = ".min.js" if f % 10 == 0 else ".py"
+                (subdir / f"file{f:04d}{suffix}").touch()
+                created += 1
+        generated = root / f"pkg{d:03d}" / "generated"
+        generated.mkdir()
+        for f in range(files):
+            (generated / f"out{f:04d}.py").touch()
+            created += 1
+
+    # Backdate directories so their listings are old enough to cache
+    past = time.time() - 60
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (past, past))
+    return created
+
+
+def legacy_expand(root: str) -> list[str]:
+    """The previous os.walk + Path based expansion (no ignore file support)"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in EXCLUDED_DIRS]
+        for name in filenames:
+            if name.startswith("."):
+                continue
+            file_path = Path(dirpath) / name
+            if file_path.suffix.lower() in CODE_EXTENSIONS:
+                found.append(str(file_path))
+    found.sort()
+    return found
+
+
+def timed(func, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(func())
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark expand_paths on a synthetic tree")
+    parser.add_argument("--dirs", type=int, default=50, help="Top-level packages")
+    parser.add_argument("--subdirs", type=int, default=20, help="Modules per package")
+    parser.add_argument("--files", type=int, default=100, help="Files per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="expand-bench-"))
+    try:
+        root = tmp / "project"
+        root.mkdir()
+        print(f"Building tree under {root} ...")
+        total = build_tree(root, args.dirs, args.subdirs, args.files)
+        print(f"{total:,} files\n")
+
+        walker = get_directory_walker()
+
+        def cold():
+            walker.clear()
+            return expand_paths([str(root)])
+
+        def warm():
+            return expand_paths([str(root)])
+
+        legacy_time, legacy_count = timed(lambda: legacy_expand(str(root)), args.repeat)
+        cold_time, cold_count = timed(cold, args.repeat)
+        warm()
+        warm_time, warm_count = timed(warm, args.repeat)
+
+        print(f"{'variant':<28} {'seconds':>9} {'files':>9}")
+        print(f"{'os.walk (no .gitignore)':<28} {legacy_time:>9.3f} {legacy_count:>9,}")
+        print(f"{'scandir walker, cold cache':<28} {cold_time:>9.3f} {cold_count:>9,}")
+        print(f"{'scandir walker, warm cache':<28} {warm_time:>9.3f} {warm_count:>9,}")
+        print(f"\nwarm cache stats: {walker.get_stats()}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
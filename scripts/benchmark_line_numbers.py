@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for formatting a large source file into its prompt block.
+
+Compares peak allocated memory (tracemalloc) and wall time of:
+- the previous path: read the whole file as str, normalize/number lines with
+  splitlines + join, then wrap it in the BEGIN/END markers with an f-string
+- the streaming formatter, which formats the memory-mapped bytes into one
+  preallocated buffer and decodes it once
+
+Usage:
+    python scripts/benchmark_line_numbers.py [--lines 300000] [--repeat 3] [--no-line-numbers]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_utils import _add_line_numbers, _format_file_block, _normalize_line_endings  # noqa: E402
+
+
+def legacy_format(path: Path, add_line_numbers: bool) -> str:
+    """The previous read -> format -> wrap sequence"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    if add_line_numbers:
+        content = _add_line_numbers(content)
+    else:
+        content = _normalize_line_endings(content)
+    return f"\n--- BEGIN FILE: {path} ---\n{content}\n--- END FILE: {path} ---\n"
+
+
+def streaming_format(path: Path, add_line_numbers: bool) -> str:
+    return _format_file_block(
+        path, f"\n--- BEGIN FILE: {path} ---\n", f"\n--- END FILE: {path} ---\n", add_line_numbers
+    )
+
+
+def measure(func, path: Path, add_line_numbers: bool, repeat: int) -> tuple[float, int, str]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path, add_line_numbers)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = func(path, add_line_numbers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark line numbering of a large file")
+    parser.add_argument("--lines", type=int, default=300_000, help="Lines in the synthetic source file")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per variant (best is reported)")
+    parser.add_argument("--no-line-numbers", action="store_true", help="Only normalize line endings")
+    args = parser.parse_args()
+    add_line_numbers = not args.no_line_numbers
+
+    with tempfile.TemporaryDirectory(prefix="line-number-bench-") as tmp:
+        path = Path(tmp) / "large_module.py"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for i in range(args.lines):
+                ending = "\r\n" if i % 7 == 0 else "\n"
+                f.write(f"    value_{i} = compute(value_{i - 1}, 'naïve')  # step {i}{ending}")
+        size = path.stat().st_size
+
+        legacy_time, legacy_peak, legacy_result = measure(legacy_format, path, add_line_numbers, args.repeat)
+        stream_time, stream_peak, stream_result = measure(streaming_format, path, add_line_numbers, args.repeat)
+        assert legacy_result == stream_result, "streaming output differs from the previous path"
+
+        # The returned str is the floor: it has to exist in full, at 1, 2 or 4 bytes per character
+        output = sys.getsizeof(stream_result)
+        print(f"input {size / 1e6:.1f} MB, output str {output / 1e6:.1f} MB ({args.lines:,} lines)\n")
+        print(f"{'variant':<12} {'seconds':>9} {'peak MB':>9} {'peak/output':>12}")
+        for name, seconds, peak in (
+            ("previous", legacy_time, legacy_peak),
+            ("streaming", stream_time, stream_peak),
+        ):
+            print(f"{name:<12} {seconds:>9.3f} {peak / 1e6:>9.1f} {peak / output:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
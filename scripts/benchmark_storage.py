@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the in-memory conversation storage backends.
+
+Compares the single-lock InMemoryStorage with the lock-striped
+ShardedInMemoryStorage under a conversation-like workload (mostly reads of
+thread headers and turn lists, some header writes and turn appends) at
+1, 4 and 16 worker threads.
+
+Usage:
+    python scripts/benchmark_storage.py [--ops 20000] [--threads 1 4 16] [--shards 16]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage_backend import InMemoryStorage, ShardedInMemoryStorage  # noqa: E402
+
+NUM_THREAD_IDS = 1000
+HEADER = "x" * 512
+TURN = "y" * 2048
+
+
+def populate(storage) -> list[str]:
+    """Seed the storage with conversation headers and turn lists"""
+    ids = [f"bench-{i}" for i in range(NUM_THREAD_IDS)]
+    for thread_id in ids:
+        storage.setex(f"thread:{thread_id}", 3600, HEADER)
+        storage.rpush(f"thread:{thread_id}:turns", TURN, TURN)
+        storage.expire(f"thread:{thread_id}:turns", 3600)
+    return ids
+
+
+def worker(storage, ids: list[str], ops: int, seed: int, barrier: threading.Barrier) -> None:
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(ops):
+        thread_id = rng.choice(ids)
+        roll = rng.random()
+        if roll < 0.6:
+            pipe = storage.pipeline(transaction=True)
+            pipe.get(f"thread:{thread_id}")
+            pipe.lrange(f"thread:{thread_id}:turns", 0, -1)
+            pipe.execute()
+        elif roll < 0.8:
+            storage.mget(*(f"thread:{rng.choice(ids)}" for _ in range(4)))
+        elif roll < 0.95:
+            storage.setex(f"thread:{thread_id}", 3600, HEADER)
+        else:
+            pipe = storage.pipeline(transaction=True)
+            pipe.rpush(f"thread:{thread_id}:turns", TURN)
+            pipe.expire(f"thread:{thread_id}:turns", 3600)
+            pipe.expire(f"thread:{thread_id}", 3600)
+            pipe.execute()
+
+
+def run(storage, num_threads: int, ops_per_thread: int) -> float:
+    """Run the workload and return throughput in operations per second"""
+    ids = populate(storage)
+    barrier = threading.Barrier(num_threads + 1)
+    threads = [
+        threading.Thread(target=worker, args=(storage, ids, ops_per_thread, seed, barrier))
+        for seed in range(num_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    storage.shutdown()
+    return (num_threads * ops_per_thread) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-memory storage backends")
+    parser.add_argument("--ops", type=int, default=20000, help="Operations per worker thread")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16], help="Worker thread counts")
+    parser.add_argument("--shards", type=int, default=16, help="Shard count for the sharded backend")
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'single-lock ops/s':>20} {'sharded ops/s':>16} {'speedup':>8}")
+    for num_threads in args.threads:
+        single = run(InMemoryStorage(max_bytes=0), num_threads, args.ops)
+        sharded = run(ShardedInMemoryStorage(num_shards=args.shards, max_bytes=0), num_threads, args.ops)
+        print(f"{num_threads:>8} {single:>20,.0f} {sharded:>16,.0f} {sharded / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
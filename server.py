@@ -25,7 +25,7 @@ import sys
 import time
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
-from typing import Any
+from typing import Any, Optional
 
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
@@ -51,6 +51,7 @@ from tools import (
     TracerTool,
 )
 from tools.models import ToolOutput
+from utils.progress import ProgressReporter, progress_reporting
 
 # Configure logging for server operations
 # Can be controlled via LOG_LEVEL environment variable (DEBUG, INFO, WARNING, ERROR)
@@ -362,6 +363,25 @@ async def handle_list_tools() -> list[Tool]:
     return tools
 
 
+def get_request_progress_reporter() -> Optional[ProgressReporter]:
+    """
+    Create a progress reporter if the client sent a progress token with the current tool call.
+
+    Returns:
+        ProgressReporter bound to the request's session, or None when no progress was requested
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        # Not called from within an MCP request (e.g. tests calling handlers directly)
+        return None
+
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        return None
+    return ProgressReporter(ctx.session, progress_token, related_request_id=ctx.request_id)
+
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """
@@ -417,7 +437,9 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     if name in TOOLS:
         logger.info(f"Executing tool '{name}' with {len(arguments)} parameter(s)")
         tool = TOOLS[name]
-        result = await tool.execute(arguments)
+        # Stream model output to the client as progress notifications when it asked for progress
+        with progress_reporting(get_request_progress_reporter()):
+            result = await tool.execute(arguments)
         logger.info(f"Tool '{name}' execution completed")
 
         # Log completion to activity file
@@ -84,6 +84,30 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "no_mock_provider: disable automatic provider mocking")
 
 
+@pytest.fixture(autouse=True)
+def reset_retry_engine():
+    """Start every test with an empty retry budget history and no retry metrics"""
+    from providers.retry import get_retry_engine
+
+    get_retry_engine().reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_transport_manager():
+    """Start every test without shared HTTP clients left over from other tests"""
+    from providers.transport import get_transport_manager
+
+    get_transport_manager().close_all()
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_health():
+    """Start every test with all provider circuits closed"""
+    from providers.health import get_provider_health
+
+    get_provider_health().reset()
+
+
 @pytest.fixture(autouse=True)
 def mock_provider_availability(request, monkeypatch):
     """
@@ -125,7 +149,7 @@ def mock_provider_availability(request, monkeypatch):
 
         ModelProviderRegistry.register_provider(ProviderType.CUSTOM, custom_provider_factory)
 
-    from unittest.mock import MagicMock
+    from unittest.mock import AsyncMock, MagicMock
 
     original_get_provider = ModelProviderRegistry.get_provider_for_model
 
@@ -142,6 +166,7 @@ def mock_provider_availability(request, monkeypatch):
 
             # Otherwise create a mock
             provider = MagicMock()
+            provider.agenerate_content = AsyncMock(side_effect=provider.generate_content)
             # Set up the model capabilities mock with actual values
             capabilities = MagicMock()
             if model_name == "local-llama":
@@ -1,8 +1,11 @@
 """Helper functions for test mocking."""
 
-from unittest.mock import Mock
+import threading
+import time
+from typing import Optional
+from unittest.mock import AsyncMock, Mock
 
-from providers.base import ModelCapabilities, ProviderType, RangeTemperatureConstraint
+from providers.base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, RangeTemperatureConstraint
 
 
 def create_mock_provider(model_name="gemini-2.5-flash", context_window=1_048_576):
@@ -28,7 +31,7 @@ def create_mock_provider(model_name="gemini-2.5-flash", context_window=1_048_576
     mock_provider.supports_thinking_mode.return_value = False
     mock_provider.validate_model_name.return_value = True
 
-    # Set up generate_content response
+    # Set up agenerate_content response
     mock_response = Mock()
     mock_response.content = "Test response"
     mock_response.usage = {"input_tokens": 10, "output_tokens": 20}
@@ -37,6 +40,65 @@ def create_mock_provider(model_name="gemini-2.5-flash", context_window=1_048_576
     mock_response.provider = ProviderType.GOOGLE
     mock_response.metadata = {"finish_reason": "STOP"}
 
-    mock_provider.generate_content.return_value = mock_response
+    mock_provider.agenerate_content = AsyncMock(return_value=mock_response)
 
     return mock_provider
+
+
+class FakeProvider(ModelProvider):
+    """
+    Real ModelProvider subclass for tests that exercise the base class behaviour.
+
+    generate_content answers "<provider type>:<prompt>" and records its keyword
+    arguments and thread. Set `error` to make calls raise, `delay` to make them block.
+    Serves the given models, or every model when models is None.
+    """
+
+    FRIENDLY_NAME = "Fake"
+
+    def __init__(
+        self,
+        api_key: str = "test-key",
+        provider_type: ProviderType = ProviderType.CUSTOM,
+        models: Optional[set[str]] = None,
+        delay: float = 0.0,
+        **kwargs,
+    ):
+        super().__init__(api_key, **kwargs)
+        self.provider_type = provider_type
+        self.models = models
+        self.delay = delay
+        self.error: Optional[Exception] = None
+        self.calls: list[dict] = []
+        self.threads: list[threading.Thread] = []
+
+    def get_capabilities(self, model_name: str) -> ModelCapabilities:
+        raise NotImplementedError
+
+    def generate_content(
+        self, prompt, model_name, system_prompt=None, temperature=0.7, max_output_tokens=None, **kwargs
+    ):
+        self.calls.append(kwargs)
+        self.threads.append(threading.current_thread())
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return ModelResponse(
+            content=f"{self.provider_type.value}:{prompt}",
+            usage={"input_tokens": 1, "output_tokens": 2, "total_tokens": 3},
+            model_name=model_name,
+            metadata={"finish_reason": "stop"},
+        )
+
+    def count_tokens(self, text: str, model_name: str) -> int:
+        return len(text)
+
+    def get_provider_type(self) -> ProviderType:
+        return self.provider_type
+
+    def validate_model_name(self, model_name: str) -> bool:
+        return self.models is None or model_name in self.models
+
+    def supports_thinking_mode(self, model_name: str) -> bool:
+        return False
@@ -0,0 +1,174 @@
+"""Tests for the native asyncio generate_content path."""
+
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse
+from providers.dial import DIALModelProvider
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.retry import get_retry_engine
+from tests.mock_helpers import FakeProvider
+
+
+def _chat_completion(content="Test response", model="o3-mini"):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = "stop"
+    response.model = model
+    response.id = "test-id"
+    response.created = 1234567890
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 5
+    response.usage.total_tokens = 15
+    return response
+
+
+class TestThreadOffloadFallback:
+    """Providers without an async client run generate_content on a worker thread"""
+
+    def test_fallback_passes_arguments_through(self):
+        provider = FakeProvider()
+
+        response = asyncio.run(provider.agenerate_content("hello", "model", thinking_mode="high"))
+
+        assert response.content == "custom:hello"
+        assert provider.calls[0]["thinking_mode"] == "high"
+        assert provider.threads[0] is not threading.main_thread()
+
+    def test_concurrent_calls_do_not_block_each_other(self):
+        provider = FakeProvider(delay=0.2)
+
+        async def run_both():
+            start = time.perf_counter()
+            await asyncio.gather(provider.agenerate_content("a", "model"), provider.agenerate_content("b", "model"))
+            return time.perf_counter() - start
+
+        # Sequential execution would take at least 0.4s
+        assert asyncio.run(run_both()) < 0.35
+
+
+class TestOpenAICompatibleAsync:
+    """OpenAI-compatible providers await the AsyncOpenAI client"""
+
+    def setup_method(self):
+        import utils.model_restrictions
+
+        utils.model_restrictions._restriction_service = None
+
+    def teardown_method(self):
+        import utils.model_restrictions
+
+        utils.model_restrictions._restriction_service = None
+
+    @patch("providers.openai_compatible.OpenAI")
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    def test_uses_async_client_and_resolves_alias(self, mock_async_openai_class, mock_openai_class):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=_chat_completion())
+        mock_async_openai_class.return_value = mock_client
+
+        provider = OpenAIModelProvider("test-key")
+        result = asyncio.run(provider.agenerate_content(prompt="Test prompt", model_name="o3mini", temperature=1.0))
+
+        call_kwargs = mock_client.chat.completions.create.call_args[1]
+        assert call_kwargs["model"] == "o3-mini"
+        assert call_kwargs["messages"] == [{"role": "user", "content": "Test prompt"}]
+        assert result.content == "Test response"
+        assert result.usage == {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+        assert result.metadata["finish_reason"] == "stop"
+        mock_openai_class.return_value.chat.completions.create.assert_not_called()
+
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    def test_flex_tier_failure_retries_on_standard_tier(self, mock_async_openai_class):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[Exception("invalid service_tier: flex"), _chat_completion()]
+        )
+        mock_async_openai_class.return_value = mock_client
+
+        provider = OpenAIModelProvider("test-key")
+        result = asyncio.run(
+            provider.agenerate_content(prompt="Test", model_name="o3-mini", temperature=1.0, service_tier="flex")
+        )
+
+        first_call, retry_call = mock_client.chat.completions.create.call_args_list
+        assert first_call[1]["service_tier"] == "flex"
+        assert "service_tier" not in retry_call[1]
+        assert result.metadata["service_tier_fallback"] is True
+
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    def test_api_error_is_wrapped(self, mock_async_openai_class):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("boom"))
+        mock_async_openai_class.return_value = mock_client
+
+        provider = OpenAIModelProvider("test-key")
+        with pytest.raises(RuntimeError, match="API error for model o3-mini: boom"):
+            asyncio.run(provider.agenerate_content(prompt="Test", model_name="o3-mini", temperature=1.0))
+
+    @patch.dict(os.environ, {"DIAL_API_KEY": "test-key"})
+    def test_dial_keeps_deployment_routing(self):
+        provider = DIALModelProvider("test-key")
+        expected = ModelResponse(content="routed", model_name="o3")
+
+        with patch.object(provider, "generate_content", return_value=expected) as mock_generate:
+            result = asyncio.run(provider.agenerate_content(prompt="Test", model_name="o3", images=["a.png"]))
+
+        assert result is expected
+        assert mock_generate.call_args[1]["images"] == ["a.png"]
+
+
+class TestGeminiAsync:
+    """Gemini awaits the google-genai aio client"""
+
+    def _provider_with_response(self, side_effect):
+        provider = GeminiModelProvider("test-key")
+        client = MagicMock()
+        client.aio.models.generate_content = AsyncMock(side_effect=side_effect)
+        provider._client = client
+        return provider, client
+
+    def test_uses_aio_client(self):
+        response = MagicMock()
+        response.text = "Gemini says hi"
+        response.candidates = [MagicMock(finish_reason="STOP")]
+        response.usage_metadata.prompt_token_count = 3
+        response.usage_metadata.candidates_token_count = 4
+        provider, client = self._provider_with_response([response])
+
+        result = asyncio.run(provider.agenerate_content(prompt="Hi", model_name="flash", system_prompt="Be brief"))
+
+        call_kwargs = client.aio.models.generate_content.call_args[1]
+        assert call_kwargs["model"] == "gemini-2.5-flash"
+        assert call_kwargs["contents"] == [{"parts": [{"text": "Be brief\n\nHi"}]}]
+        assert result.content == "Gemini says hi"
+        assert result.usage["total_tokens"] == 7
+        client.models.generate_content.assert_not_called()
+
+    def test_retries_with_asyncio_sleep(self):
+        response = MagicMock(text="ok", candidates=[])
+        provider, client = self._provider_with_response([Exception("503 unavailable"), response])
+
+        with patch("providers.retry.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with patch("providers.retry.time.sleep") as mock_time_sleep:
+                result = asyncio.run(provider.agenerate_content(prompt="Hi", model_name="flash"))
+
+        assert result.content == "ok"
+        mock_sleep.assert_awaited_once()
+        assert 0 <= mock_sleep.await_args[0][0] <= get_retry_engine().base_delay
+        mock_time_sleep.assert_not_called()
+
+    def test_non_retryable_error_fails_after_one_attempt(self):
+        provider, client = self._provider_with_response([Exception("invalid argument")])
+
+        with pytest.raises(RuntimeError, match="after 1 attempt: invalid argument"):
+            asyncio.run(provider.agenerate_content(prompt="Hi", model_name="flash"))
+
+        assert client.aio.models.generate_content.await_count == 1
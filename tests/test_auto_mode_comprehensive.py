@@ -2,7 +2,7 @@
 
 import importlib
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -235,7 +235,8 @@ class TestAutoModeComprehensive:
 
             # Mock provider to capture what model is requested
             mock_provider = MagicMock()
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content = AsyncMock()
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="test response", model_name="test-model", usage={"input_tokens": 10, "output_tokens": 5}
             )
 
@@ -586,13 +587,14 @@ class TestAutoModeComprehensive:
 
             # Mock the actual provider to simulate successful execution
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_response = MagicMock()
             mock_response.content = "test response"
             mock_response.model_name = "gemini-2.5-flash"  # The resolved name
             mock_response.usage = {"input_tokens": 10, "output_tokens": 5}
             # Mock _resolve_model_name to simulate alias resolution
             mock_provider._resolve_model_name = lambda alias: ("gemini-2.5-flash" if alias == "flash" else alias)
-            mock_provider.generate_content.return_value = mock_response
+            mock_provider.agenerate_content.return_value = mock_response
 
             with patch.object(ModelProviderRegistry, "get_provider_for_model", return_value=mock_provider):
                 chat_tool = ChatTool()
@@ -69,6 +69,31 @@ class TestChatTool:
         with pytest.raises(ValidationError):
             ChatRequest(model="anthropic/claude-3-opus")
 
+    def test_line_ranges(self):
+        """Test that per-file line ranges are part of the schema and validated"""
+        from pydantic import ValidationError
+
+        assert "line_ranges" in self.tool.get_input_schema()["properties"]
+
+        request = ChatRequest(prompt="Test", files=["/abs/app.py"], line_ranges={"/abs/app.py": [[1, 40], [-20, -1]]})
+        assert request.line_ranges == {"/abs/app.py": [(1, 40), (-20, -1)]}
+
+        with pytest.raises(ValidationError):
+            ChatRequest(prompt="Test", line_ranges={"/abs/app.py": [[0, 10]]})
+
+    def test_line_ranges_are_embedded(self, project_path):
+        """Test that requested line ranges replace the whole file in the prompt"""
+        source = project_path / "module.py"
+        source.write_text("".join(f"line {i}\n" for i in range(1, 101)), encoding="utf-8")
+
+        content, processed, _ = self.tool._prepare_file_content_for_prompt(
+            [str(source)], None, arguments={"line_ranges": {str(source): [[50, 51]]}}
+        )
+
+        assert processed == [str(source)]
+        assert "line 50\n" in content and "line 51\n" in content
+        assert "line 52\n" not in content
+
     def test_model_availability(self):
         """Test that model availability works"""
         models = self.tool._get_available_models()
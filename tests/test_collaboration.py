@@ -41,7 +41,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -123,7 +123,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=malformed_json, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -182,7 +182,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -348,7 +348,7 @@ class TestCollaborationWorkflow:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -415,7 +415,7 @@ class TestCollaborationWorkflow:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -470,7 +470,7 @@ class TestCollaborationWorkflow:
         **Root Cause:** The config.py file shows the database host is set to 'localhost' but the database is running on a different server.
         """
 
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=final_response, usage={}, model_name="gemini-2.5-flash", metadata={}
         )
 
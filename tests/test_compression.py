@@ -0,0 +1,113 @@
+"""
+Tests for transparent storage compression
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils import compression
+from utils.compression import HEADER_PREFIX, decode_value, encode_value, get_compression_stats
+from utils.storage_backend import InMemoryStorage
+
+LARGE_TEXT = "The quick brown fox jumps over the lazy dog. " * 500
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    compression.reset_compression_stats()
+    yield
+    compression.reset_compression_stats()
+
+
+class TestCompression:
+    """Test the format header, thresholds and counters"""
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "none"})
+    def test_disabled_by_default_setting(self):
+        assert encode_value(LARGE_TEXT) == LARGE_TEXT
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "1024"})
+    def test_zlib_round_trip(self):
+        stored = encode_value(LARGE_TEXT)
+
+        assert stored.startswith(f"{HEADER_PREFIX}z:")
+        assert len(stored) < len(LARGE_TEXT) / 5
+        assert decode_value(stored) == LARGE_TEXT
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "1024"})
+    def test_small_values_stay_plain(self):
+        assert encode_value('{"small": true}') == '{"small": true}'
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "0"})
+    def test_incompressible_values_stay_plain(self):
+        value = "x7"
+        assert encode_value(value) == value
+
+    def test_values_written_before_compression_are_readable(self):
+        assert decode_value('{"thread_id": "abc"}') == '{"thread_id": "abc"}'
+        assert decode_value("") == ""
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "none"})
+    def test_text_resembling_header_is_escaped(self):
+        value = f"{HEADER_PREFIX}z:not really compressed"
+        stored = encode_value(value)
+
+        assert stored != value
+        assert decode_value(stored) == value
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zstd"})
+    def test_zstd_falls_back_to_zlib_without_package(self):
+        with patch.object(compression, "_import_zstd", return_value=None):
+            assert compression.get_codec() == "zlib"
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "1024"})
+    def test_byte_counters(self):
+        stored = encode_value(LARGE_TEXT)
+        encode_value("tiny")
+        decode_value(stored)
+
+        stats = get_compression_stats()
+        assert stats["values_written"] == 2
+        assert stats["values_compressed"] == 1
+        assert stats["values_decompressed"] == 1
+        assert stats["uncompressed_bytes"] == len(LARGE_TEXT) + 4
+        assert stats["stored_bytes"] == len(stored) + 4
+        assert stats["ratio"] < 0.2
+        assert stats["codec"] == "zlib"
+
+
+class TestCompressedStorage:
+    """Conversation threads and stored files round-trip through compression"""
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "1024"})
+    def test_conversation_turns_are_compressed(self):
+        from utils.conversation_memory import add_turn, create_thread, get_thread
+
+        storage = InMemoryStorage()
+        with patch("utils.conversation_memory.get_storage", return_value=storage):
+            thread_id = create_thread("chat", {"prompt": LARGE_TEXT})
+            assert add_turn(thread_id, "assistant", LARGE_TEXT)
+
+            assert storage.get(f"thread:{thread_id}").startswith(HEADER_PREFIX)
+            assert storage.lrange(f"thread:{thread_id}:turns", 0, -1)[0].startswith(HEADER_PREFIX)
+
+            context = get_thread(thread_id)
+
+        assert context.initial_context["prompt"] == LARGE_TEXT
+        assert context.turns[0].content == LARGE_TEXT
+
+    @patch.dict(os.environ, {"STORAGE_COMPRESSION": "zlib", "STORAGE_COMPRESSION_THRESHOLD": "1024"})
+    def test_file_storage_round_trip(self):
+        from utils.file_storage import FileStorage
+
+        storage = InMemoryStorage()
+        with patch("utils.file_storage.get_redis_client", return_value=storage):
+            file_storage = FileStorage()
+            ref = file_storage.store_file("/src/app.py", LARGE_TEXT)
+            content, _ = file_storage.retrieve_file(ref.reference_id)
+
+        assert content == LARGE_TEXT
+        assert ref.size == len(LARGE_TEXT)
+        assert storage.get(f"mcp:blob:{ref.content_hash}").startswith(HEADER_PREFIX)
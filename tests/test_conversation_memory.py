@@ -6,6 +6,7 @@ discussions in stateless MCP environments.
 """
 
 import os
+import time
 from unittest.mock import Mock, patch
 
 import pytest
@@ -21,6 +22,15 @@ from utils.conversation_memory import (
     create_thread,
     get_thread,
 )
+from utils.storage_backend import InMemoryStorage
+
+
+@pytest.fixture
+def memory_storage():
+    """Real in-memory storage standing in for Redis"""
+    storage = InMemoryStorage()
+    with patch("utils.conversation_memory.get_storage", return_value=storage):
+        yield storage
 
 
 class TestConversationMemory:
@@ -43,12 +53,8 @@ class TestConversationMemory:
         assert call_args[0][0] == f"thread:{thread_id}"  # key
         assert call_args[0][1] == CONVERSATION_TIMEOUT_SECONDS  # TTL from configuration
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_get_thread_valid(self, mock_storage):
+    def test_get_thread_valid(self, memory_storage):
         """Test retrieving an existing thread"""
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
         test_uuid = "12345678-1234-1234-1234-123456789012"
 
         # Create valid ThreadContext and serialize it
@@ -60,14 +66,14 @@ class TestConversationMemory:
             turns=[],
             initial_context={"prompt": "test"},
         )
-        mock_client.get.return_value = context_obj.model_dump_json()
+        memory_storage.setex(f"thread:{test_uuid}", 60, context_obj.model_dump_json())
 
         context = get_thread(test_uuid)
 
         assert context is not None
         assert context.thread_id == test_uuid
         assert context.tool_name == "chat"
-        mock_client.get.assert_called_once_with(f"thread:{test_uuid}")
+        assert context.turns == []
 
     @patch("utils.conversation_memory.get_storage")
     def test_get_thread_invalid_uuid(self, mock_storage):
@@ -85,12 +91,8 @@ class TestConversationMemory:
         context = get_thread("12345678-1234-1234-1234-123456789012")
         assert context is None
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_add_turn_success(self, mock_storage):
-        """Test adding a turn to existing thread"""
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
+    def test_add_turn_success(self, memory_storage):
+        """Test adding a turn to existing thread appends without rewriting the header"""
         test_uuid = "12345678-1234-1234-1234-123456789012"
 
         # Create valid ThreadContext
@@ -102,14 +104,69 @@ class TestConversationMemory:
             turns=[],
             initial_context={"prompt": "test"},
         )
-        mock_client.get.return_value = context_obj.model_dump_json()
+        header = context_obj.model_dump_json()
+        memory_storage.setex(f"thread:{test_uuid}", 60, header)
 
         success = add_turn(test_uuid, "user", "Hello there")
 
         assert success is True
-        # Verify Redis get and setex were called
-        mock_client.get.assert_called_once()
-        mock_client.setex.assert_called_once()
+        # Header is untouched; the turn lives in the append-only turn list
+        assert memory_storage.get(f"thread:{test_uuid}") == header
+        assert memory_storage.llen(f"thread:{test_uuid}:turns") == 1
+
+        context = get_thread(test_uuid)
+        assert [t.content for t in context.turns] == ["Hello there"]
+        assert context.last_updated_at == context.turns[-1].timestamp
+
+    def test_add_turn_refreshes_ttl_of_header_and_turns(self, memory_storage):
+        """Appending a turn refreshes the TTL of both thread keys"""
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        memory_storage.expire(f"thread:{thread_id}", 5)
+
+        assert add_turn(thread_id, "assistant", "Hi") is True
+
+        header_expiry = memory_storage._store[f"thread:{thread_id}"][1]
+        turns_expiry = memory_storage._store[f"thread:{thread_id}:turns"][1]
+        assert header_expiry > time.time() + 5
+        assert abs(header_expiry - turns_expiry) < 1
+
+    def test_add_turn_to_legacy_thread(self, memory_storage):
+        """Threads stored with embedded turns keep them and count them toward the limit"""
+        test_uuid = "12345678-1234-1234-1234-123456789012"
+        legacy = ThreadContext(
+            thread_id=test_uuid,
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:01:00Z",
+            tool_name="chat",
+            turns=[
+                ConversationTurn(role="user", content=f"Turn {i}", timestamp="2023-01-01T00:00:00Z")
+                for i in range(MAX_CONVERSATION_TURNS - 1)
+            ],
+            initial_context={},
+        )
+        memory_storage.setex(f"thread:{test_uuid}", 60, legacy.model_dump_json())
+
+        assert add_turn(test_uuid, "assistant", "Last turn") is True
+        assert add_turn(test_uuid, "user", "Over the limit") is False
+
+        context = get_thread(test_uuid)
+        assert len(context.turns) == MAX_CONVERSATION_TURNS
+        assert context.turns[0].content == "Turn 0"
+        assert context.turns[-1].content == "Last turn"
+
+    def test_add_turn_limit_under_concurrent_writers(self, memory_storage):
+        """Racing writers never push a thread past MAX_CONVERSATION_TURNS"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(lambda i: add_turn(thread_id, "user", f"Turn {i}"), range(MAX_CONVERSATION_TURNS + 10))
+            )
+
+        assert results.count(True) == MAX_CONVERSATION_TURNS
+        assert len(get_thread(thread_id).turns) == MAX_CONVERSATION_TURNS
 
     @patch("utils.conversation_memory.get_storage")
     def test_add_turn_max_limit(self, mock_storage):
@@ -237,25 +294,12 @@ class TestConversationMemory:
 class TestConversationFlow:
     """Test complete conversation flows simulating stateless MCP requests"""
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_complete_conversation_cycle(self, mock_storage):
-        """Test a complete 5-turn conversation until limit reached"""
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
+    def test_complete_conversation_cycle(self, memory_storage):
+        """Test a complete conversation until limit reached"""
         # Simulate independent MCP request cycles
 
         # REQUEST 1: Initial request creates thread
         thread_id = create_thread("chat", {"prompt": "Analyze this code"})
-        initial_context = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:00:00Z",
-            tool_name="chat",
-            turns=[],
-            initial_context={"prompt": "Analyze this code"},
-        )
-        mock_client.get.return_value = initial_context.model_dump_json()
 
         # Add assistant response
         success = add_turn(
@@ -266,22 +310,8 @@ class TestConversationFlow:
         assert success is True
 
         # REQUEST 2: User responds to follow-up (independent request cycle)
-        # Simulate retrieving updated context from Redis
-        context_after_1 = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:01:00Z",
-            tool_name="chat",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="Code analysis complete",
-                    timestamp="2023-01-01T00:00:30Z",
-                )
-            ],
-            initial_context={"prompt": "Analyze this code"},
-        )
-        mock_client.get.return_value = context_after_1.model_dump_json()
+        context_after_1 = get_thread(thread_id)
+        assert [t.content for t in context_after_1.turns] == ["Code analysis complete"]
 
         success = add_turn(thread_id, "user", "Yes, check error handling")
         assert success is True
@@ -290,66 +320,23 @@ class TestConversationFlow:
         assert success is True
 
         # REQUEST 3-5: Continue conversation (simulating independent cycles)
-        # After turn 3
-        context_after_3 = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:03:00Z",
-            tool_name="chat",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="Code analysis complete",
-                    timestamp="2023-01-01T00:00:30Z",
-                ),
-                ConversationTurn(role="user", content="Yes, check error handling", timestamp="2023-01-01T00:01:30Z"),
-                ConversationTurn(
-                    role="assistant",
-                    content="Error handling reviewed",
-                    timestamp="2023-01-01T00:02:30Z",
-                ),
-            ],
-            initial_context={"prompt": "Analyze this code"},
-        )
-        mock_client.get.return_value = context_after_3.model_dump_json()
+        context_after_3 = get_thread(thread_id)
+        assert [t.role for t in context_after_3.turns] == ["assistant", "user", "assistant"]
 
-        success = add_turn(thread_id, "user", "Yes, check tests")
-        assert success is True
-
-        success = add_turn(thread_id, "assistant", "Test coverage analyzed")
-        assert success is True
+        # Fill the thread up to MAX_CONVERSATION_TURNS
+        for i in range(MAX_CONVERSATION_TURNS - 3):
+            success = add_turn(thread_id, "user" if i % 2 == 0 else "assistant", f"Turn {i + 4}")
+            assert success is True
 
         # REQUEST 6: Try to exceed MAX_CONVERSATION_TURNS limit - should fail
-        turns_at_limit = [
-            ConversationTurn(
-                role="assistant" if i % 2 == 0 else "user", content=f"Turn {i + 1}", timestamp="2023-01-01T00:00:30Z"
-            )
-            for i in range(MAX_CONVERSATION_TURNS)
-        ]
-
-        context_at_limit = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:05:00Z",
-            tool_name="chat",
-            turns=turns_at_limit,
-            initial_context={"prompt": "Analyze this code"},
-        )
-        mock_client.get.return_value = context_at_limit.model_dump_json()
-
-        # This should fail - conversation has reached limit
         success = add_turn(thread_id, "user", "This should be rejected")
         assert success is False  # CONVERSATION STOPS HERE
+        assert len(get_thread(thread_id).turns) == MAX_CONVERSATION_TURNS
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_invalid_continuation_id_error(self, mock_storage):
+    def test_invalid_continuation_id_error(self, memory_storage):
         """Test that invalid continuation IDs raise proper error for restart"""
         from server import reconstruct_thread_context
 
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-        mock_client.get.return_value = None  # Thread not found
-
         arguments = {"continuation_id": "invalid-uuid-12345", "prompt": "Continue conversation"}
 
         # Should raise ValueError asking to restart
@@ -439,88 +426,33 @@ class TestConversationFlow:
         expected_remaining = MAX_CONVERSATION_TURNS - 1
         assert f"({expected_remaining} exchanges remaining)" in instructions
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_complete_conversation_with_dynamic_turns(self, mock_storage):
+    def test_complete_conversation_with_dynamic_turns(self, memory_storage):
         """Test complete conversation respecting MAX_CONVERSATION_TURNS dynamically"""
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
         thread_id = create_thread("chat", {"prompt": "Start conversation"})
 
-        # Simulate conversation up to MAX_CONVERSATION_TURNS - 1
-        for turn_num in range(MAX_CONVERSATION_TURNS - 1):
-            # Mock context with current turns
-            turns = [
-                ConversationTurn(
-                    role="user" if i % 2 == 0 else "assistant",
-                    content=f"Turn {i + 1}",
-                    timestamp="2023-01-01T00:00:00Z",
-                )
-                for i in range(turn_num)
-            ]
-
-            context = ThreadContext(
-                thread_id=thread_id,
-                created_at="2023-01-01T00:00:00Z",
-                last_updated_at="2023-01-01T00:00:00Z",
-                tool_name="chat",
-                turns=turns,
-                initial_context={"prompt": "Start conversation"},
-            )
-            mock_client.get.return_value = context.model_dump_json()
+        # Simulate conversation up to MAX_CONVERSATION_TURNS
+        for turn_num in range(MAX_CONVERSATION_TURNS):
+            assert len(get_thread(thread_id).turns) == turn_num
 
             # Should succeed
             success = add_turn(thread_id, "user", f"User turn {turn_num + 1}")
             assert success is True, f"Turn {turn_num + 1} should succeed"
 
-        # Now we should be at the limit - create final context
-        final_turns = [
-            ConversationTurn(
-                role="user" if i % 2 == 0 else "assistant", content=f"Turn {i + 1}", timestamp="2023-01-01T00:00:00Z"
-            )
-            for i in range(MAX_CONVERSATION_TURNS)
-        ]
-
-        final_context = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:00:00Z",
-            tool_name="chat",
-            turns=final_turns,
-            initial_context={"prompt": "Start conversation"},
-        )
-        mock_client.get.return_value = final_context.model_dump_json()
-
         # This should fail - at the limit
         success = add_turn(thread_id, "user", "This should fail")
         assert success is False, f"Turn {MAX_CONVERSATION_TURNS + 1} should fail"
 
-    @patch("utils.conversation_memory.get_storage")
     @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
-    def test_conversation_with_files_and_context_preservation(self, mock_storage):
+    def test_conversation_with_files_and_context_preservation(self, memory_storage):
         """Test complete conversation flow with file tracking and context preservation"""
         from providers.registry import ModelProviderRegistry
 
         ModelProviderRegistry.clear_cache()
 
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
         # Start conversation with files using a simple tool
         thread_id = create_thread("chat", {"prompt": "Analyze this codebase", "files": ["/project/src/"]})
 
-        # Turn 1: Claude provides context with multiple files
-        initial_context = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:00:00Z",
-            tool_name="chat",
-            turns=[],
-            initial_context={"prompt": "Analyze this codebase", "files": ["/project/src/"]},
-        )
-        mock_client.get.return_value = initial_context.model_dump_json()
-
-        # Add Gemini's response
+        # Turn 1: Gemini's response with multiple files
         success = add_turn(
             thread_id,
             "assistant",
@@ -530,56 +462,13 @@ class TestConversationFlow:
         )
         assert success is True
 
-        # Turn 2: Claude responds with different files
-        context_turn_1 = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:01:00Z",
-            tool_name="analyze",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="I've analyzed your codebase structure.",
-                    timestamp="2023-01-01T00:00:30Z",
-                    files=["/project/src/main.py", "/project/src/utils.py"],
-                    tool_name="analyze",
-                )
-            ],
-            initial_context={"prompt": "Analyze this codebase", "relevant_files": ["/project/src/"]},
-        )
-        mock_client.get.return_value = context_turn_1.model_dump_json()
-
-        # User responds with test files
+        # Turn 2: User responds with test files
         success = add_turn(
             thread_id, "user", "Yes, check the test coverage", files=["/project/tests/", "/project/test_main.py"]
         )
         assert success is True
 
         # Turn 3: Gemini analyzes tests
-        context_turn_2 = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:02:00Z",
-            tool_name="analyze",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="I've analyzed your codebase structure.",
-                    timestamp="2023-01-01T00:00:30Z",
-                    files=["/project/src/main.py", "/project/src/utils.py"],
-                    tool_name="analyze",
-                ),
-                ConversationTurn(
-                    role="user",
-                    content="Yes, check the test coverage",
-                    timestamp="2023-01-01T00:01:30Z",
-                    files=["/project/tests/", "/project/test_main.py"],
-                ),
-            ],
-            initial_context={"prompt": "Analyze this codebase", "relevant_files": ["/project/src/"]},
-        )
-        mock_client.get.return_value = context_turn_2.model_dump_json()
-
         success = add_turn(
             thread_id,
             "assistant",
@@ -589,37 +478,8 @@ class TestConversationFlow:
         )
         assert success is True
 
-        # Build conversation history and verify chronological file preservation
-        final_context = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:03:00Z",
-            tool_name="analyze",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="I've analyzed your codebase structure.",
-                    timestamp="2023-01-01T00:00:30Z",
-                    files=["/project/src/main.py", "/project/src/utils.py"],
-                    tool_name="analyze",
-                ),
-                ConversationTurn(
-                    role="user",
-                    content="Yes, check the test coverage",
-                    timestamp="2023-01-01T00:01:30Z",
-                    files=["/project/tests/", "/project/test_main.py"],
-                ),
-                ConversationTurn(
-                    role="assistant",
-                    content="Test coverage analysis complete. Coverage is 85%.",
-                    timestamp="2023-01-01T00:02:30Z",
-                    files=["/project/tests/test_utils.py", "/project/coverage.html"],
-                    tool_name="analyze",
-                ),
-            ],
-            initial_context={"prompt": "Analyze this codebase", "relevant_files": ["/project/src/"]},
-        )
-
+        # Build conversation history from the stored thread
+        final_context = get_thread(thread_id)
         history, tokens = build_conversation_history(final_context)
 
         # Verify chronological order and speaker identification
@@ -648,49 +508,18 @@ class TestConversationFlow:
 
         assert turn_1_pos < turn_2_pos < turn_3_pos
 
-    @patch("utils.conversation_memory.get_storage")
-    def test_stateless_request_isolation(self, mock_storage):
-        """Test that each request cycle is independent but shares context via Redis"""
-        mock_client = Mock()
-        mock_storage.return_value = mock_client
-
-        # Simulate two different "processes" accessing same thread
-        thread_id = "12345678-1234-1234-1234-123456789012"
-
-        # Process 1: Creates thread
-        initial_context = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:00:00Z",
-            tool_name="thinkdeep",
-            turns=[],
-            initial_context={"prompt": "Think about architecture"},
-        )
-        mock_client.get.return_value = initial_context.model_dump_json()
+    def test_stateless_request_isolation(self, memory_storage):
+        """Test that each request cycle is independent but shares context via storage"""
+        # Process 1: Creates thread and adds a turn
+        thread_id = create_thread("thinkdeep", {"prompt": "Think about architecture"})
 
         success = add_turn(thread_id, "assistant", "Architecture analysis")
         assert success is True
 
         # Process 2: Different "request cycle" accesses same thread
-        context_from_redis = ThreadContext(
-            thread_id=thread_id,
-            created_at="2023-01-01T00:00:00Z",
-            last_updated_at="2023-01-01T00:01:00Z",
-            tool_name="thinkdeep",
-            turns=[
-                ConversationTurn(
-                    role="assistant",
-                    content="Architecture analysis",
-                    timestamp="2023-01-01T00:00:30Z",
-                )
-            ],
-            initial_context={"prompt": "Think about architecture"},
-        )
-        mock_client.get.return_value = context_from_redis.model_dump_json()
-
-        # Verify context continuity across "processes"
         retrieved_context = get_thread(thread_id)
         assert retrieved_context is not None
+        assert retrieved_context.tool_name == "thinkdeep"
         assert len(retrieved_context.turns) == 1
 
     @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
@@ -758,3 +587,291 @@ class TestConversationFlow:
 
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+class TestConversationHistoryCache:
+    """Test memoization of formatted turns and file blocks across continuations"""
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        from utils.conversation_memory import clear_history_cache
+
+        clear_history_cache()
+        yield
+        clear_history_cache()
+
+    @staticmethod
+    def _context(turns):
+        return ThreadContext(
+            thread_id="87654321-4321-4321-4321-210987654321",
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="chat",
+            turns=turns,
+            initial_context={},
+        )
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_only_new_turns_are_formatted(self):
+        """A continuation formats only the turns appended since the last build"""
+        import utils.conversation_memory as conversation_memory
+
+        turns = [
+            ConversationTurn(role="user", content=f"Turn {i}", timestamp=f"2023-01-01T00:00:0{i}Z") for i in range(3)
+        ]
+        first_history, _ = build_conversation_history(self._context(turns))
+
+        turns.append(ConversationTurn(role="assistant", content="Turn 3", timestamp="2023-01-01T00:00:03Z"))
+        with patch.object(conversation_memory, "_format_turn", wraps=conversation_memory._format_turn) as fmt:
+            history, _ = build_conversation_history(self._context(turns))
+
+        assert fmt.call_count == 1
+        assert "--- Turn 4 (Gemini) ---" in history
+        assert first_history.split("Previous conversation turns:")[1].split("=== END")[0].strip() in history
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_changed_turns_invalidate_cache(self):
+        """Cached turn blocks are discarded when the thread's turns no longer match"""
+        turns = [ConversationTurn(role="user", content="Original", timestamp="2023-01-01T00:00:00Z")]
+        build_conversation_history(self._context(turns))
+
+        turns = [ConversationTurn(role="user", content="Replaced", timestamp="2023-01-01T00:00:00Z")]
+        history, _ = build_conversation_history(self._context(turns))
+
+        assert "Replaced" in history
+        assert "Original" not in history
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_unchanged_files_are_not_reread(self, project_path):
+        """File blocks come from the shared file cache while mtime and size are unchanged"""
+        from utils.file_cache import get_file_cache
+
+        source = project_path / "module.py"
+        source.write_text("print('v1')\n")
+        turns = [ConversationTurn(role="user", content="Look", timestamp="2023-01-01T00:00:00Z", files=[str(source)])]
+        file_cache = get_file_cache()
+        file_cache.clear()
+
+        build_conversation_history(self._context(turns))
+        history, _ = build_conversation_history(self._context(turns))
+        assert file_cache.get_stats()["hits"] == 1
+        assert "print('v1')" in history
+
+        source.write_text("print('version two')\n")
+        history, _ = build_conversation_history(self._context(turns))
+        assert file_cache.get_stats()["misses"] == 2
+        assert "print('version two')" in history
+
+
+class TestThreadChain:
+    """Test batched loading of parent thread chains"""
+
+    @staticmethod
+    def _count_pipelines(storage):
+        return patch.object(storage, "pipeline", wraps=storage.pipeline)
+
+    def test_child_caches_ancestor_ids(self, memory_storage):
+        """Each child thread records its parent chain, nearest first"""
+        root = create_thread("chat", {"prompt": "root"})
+        middle = create_thread("chat", {"prompt": "middle"}, parent_thread_id=root)
+        leaf = create_thread("chat", {"prompt": "leaf"}, parent_thread_id=middle)
+
+        assert get_thread(root).ancestor_thread_ids == []
+        assert get_thread(leaf).ancestor_thread_ids == [middle, root]
+
+    def test_chain_loads_in_two_round_trips(self, memory_storage):
+        """The starting thread and all of its ancestors take two pipelined fetches"""
+        from utils.conversation_memory import get_thread_chain
+
+        thread_ids = [create_thread("chat", {"prompt": "root"})]
+        for i in range(5):
+            thread_ids.append(create_thread("chat", {"prompt": f"step {i}"}, parent_thread_id=thread_ids[-1]))
+            add_turn(thread_ids[-1], "user", f"turn {i}")
+
+        with self._count_pipelines(memory_storage) as pipeline:
+            chain = get_thread_chain(thread_ids[-1])
+
+        assert [thread.thread_id for thread in chain] == thread_ids
+        assert pipeline.call_count == 2
+
+        # With the starting thread already loaded, the ancestors take one fetch
+        with self._count_pipelines(memory_storage) as pipeline:
+            chain = get_thread_chain(thread_ids[-1], start_context=get_thread(thread_ids[-1]))
+        assert len(chain) == 6
+        assert pipeline.call_count == 2  # one for get_thread, one for the ancestors
+
+    def test_chain_without_cached_ancestors(self, memory_storage):
+        """Threads written before ancestor ids were cached are followed link by link"""
+        from utils.conversation_memory import get_thread_chain
+
+        root = create_thread("chat", {"prompt": "root"})
+        child = create_thread("chat", {"prompt": "child"}, parent_thread_id=root)
+        header = ThreadContext.model_validate_json(memory_storage.get(f"thread:{child}"))
+        header.ancestor_thread_ids = []
+        memory_storage.setex(f"thread:{child}", 60, header.model_dump_json())
+
+        chain = get_thread_chain(child)
+
+        assert [thread.thread_id for thread in chain] == [root, child]
+
+    def test_chain_respects_max_depth(self, memory_storage):
+        from utils.conversation_memory import get_thread_chain
+
+        thread_ids = [create_thread("chat", {"prompt": "root"})]
+        for i in range(4):
+            thread_ids.append(create_thread("chat", {"prompt": f"step {i}"}, parent_thread_id=thread_ids[-1]))
+
+        chain = get_thread_chain(thread_ids[-1], max_depth=3)
+
+        assert [thread.thread_id for thread in chain] == thread_ids[-3:]
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_history_collects_chain_files_in_order(self, memory_storage, project_path):
+        """Files from the whole chain are embedded once, in order of first appearance"""
+        paths = {}
+        for name in ("b.py", "a.py", "c.py"):
+            paths[name] = project_path / name
+            paths[name].write_text(f"# contents of {name}\n")
+
+        parent = create_thread("chat", {"prompt": "parent"})
+        add_turn(parent, "user", "first", files=[str(paths["b.py"]), str(paths["a.py"])])
+        child = create_thread("chat", {"prompt": "child"}, parent_thread_id=parent)
+        add_turn(child, "user", "second", files=[str(paths["a.py"]), str(paths["c.py"])])
+
+        history, _ = build_conversation_history(get_thread(child))
+
+        positions = [history.index(f"# contents of {name}") for name in ("b.py", "a.py", "c.py")]
+        assert positions == sorted(positions)
+        assert history.count("# contents of a.py") == 1
+        assert "first" in history and "second" in history
+
+
+class TestFileDeltas:
+    """Content hashes recorded per turn drive change detection and diffs"""
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        from utils.conversation_memory import clear_history_cache
+
+        clear_history_cache()
+        yield
+        clear_history_cache()
+
+    @staticmethod
+    def _write(path, count, changed_line=None):
+        lines = [f"line {i}" for i in range(count)]
+        if changed_line is not None:
+            lines[changed_line] = "line changed"
+        path.write_text("\n".join(lines) + "\n")
+
+    def test_add_turn_records_hashes_and_snapshots(self, memory_storage, project_path):
+        from utils.conversation_memory import get_changed_files, get_file_snapshot
+
+        source = project_path / "module.py"
+        self._write(source, 5)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "Look", files=[str(source), str(project_path)])
+
+        context = get_thread(thread_id)
+        file_hashes = context.turns[0].file_hashes
+        assert list(file_hashes) == [str(source)]
+        assert get_file_snapshot(file_hashes[str(source)]) == source.read_text()
+        assert get_changed_files(context, [str(source)]) == {}
+
+        self._write(source, 5, changed_line=2)
+        assert get_changed_files(context, [str(source)]) == {str(source): file_hashes[str(source)]}
+
+    def test_format_file_delta_only_when_smaller(self, memory_storage, project_path):
+        from utils.conversation_memory import format_file_delta
+
+        source = project_path / "module.py"
+        self._write(source, 200)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "Look", files=[str(source)])
+        previous_hash = get_thread(thread_id).turns[0].file_hashes[str(source)]
+
+        self._write(source, 200, changed_line=100)
+        delta = format_file_delta(str(source), previous_hash)
+        assert delta.startswith(f"\n--- BEGIN FILE CHANGES: {source} ---\n")
+        assert "-line 100\n+line changed\n" in delta
+        assert "line 10\n" not in delta
+
+        source.write_text("rewritten\n")
+        assert format_file_delta(str(source), previous_hash) is None
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_history_embeds_latest_recorded_version(self, memory_storage, project_path):
+        source = project_path / "module.py"
+        self._write(source, 50)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "Look", files=[str(source)])
+        self._write(source, 50, changed_line=7)
+        add_turn(thread_id, "user", "Look again", files=[str(source)])
+        self._write(source, 50, changed_line=9)
+
+        history, _ = build_conversation_history(get_thread(thread_id))
+
+        assert history.count(f"--- BEGIN FILE: {source} ---") == 1
+        assert "BEGIN FILE CHANGES" not in history
+        assert "line 7\n" not in history
+        assert "line 9\n" in history
+
+    def test_tool_embeds_changed_file_as_diff(self, memory_storage, project_path):
+        from tools.chat import ChatTool
+
+        unchanged = project_path / "unchanged.py"
+        changed = project_path / "changed.py"
+        self._write(unchanged, 200)
+        self._write(changed, 200)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "assistant", "Reviewed", files=[str(unchanged), str(changed)])
+        self._write(changed, 200, changed_line=3)
+        tool = ChatTool()
+
+        files_to_embed, changed_files = tool.filter_new_files([str(unchanged), str(changed)], thread_id)
+        assert files_to_embed == [str(changed)]
+        assert list(changed_files) == [str(changed)]
+
+        content_parts, processed = [], []
+        remaining = tool._embed_file_changes(files_to_embed, changed_files, content_parts, processed)
+        assert remaining == []
+        assert processed == [str(changed)]
+        assert "+line changed" in content_parts[0]
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENAI_API_KEY": ""}, clear=False)
+    def test_changed_file_is_sent_once_plus_diff(self, memory_storage, project_path):
+        from tools.chat import ChatTool
+        from utils.file_utils import read_file_content
+
+        source = project_path / "module.py"
+        self._write(source, 500)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "assistant", "Reviewed", files=[str(source)])
+        self._write(source, 500, changed_line=3)
+
+        history, _ = build_conversation_history(get_thread(thread_id))
+        file_content, processed, _ = ChatTool()._prepare_file_content_for_prompt(
+            [str(source)], thread_id, max_tokens=100_000
+        )
+        full_file, _ = read_file_content(str(source))
+
+        assert processed == [str(source)]
+        assert "already available in our conversation context" not in file_content
+        prompt = history + file_content
+        assert prompt.count("line 499\n") == 1
+        assert len(prompt) < len(history) + len(full_file) // 4
+
+    def test_unchanged_files_are_not_rehashed_or_rewritten(self, memory_storage, project_path):
+        from utils import file_utils
+
+        source = project_path / "module.py"
+        self._write(source, 5)
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        add_turn(thread_id, "user", "Look", files=[str(source)])
+
+        with patch.object(file_utils.Path, "read_bytes", side_effect=AssertionError("re-read")):
+            with patch.object(memory_storage, "set", wraps=memory_storage.set) as mock_set:
+                add_turn(thread_id, "assistant", "Again", files=[str(source)])
+
+        mock_set.assert_not_called()
+        assert get_thread(thread_id).turns[1].file_hashes == get_thread(thread_id).turns[0].file_hashes
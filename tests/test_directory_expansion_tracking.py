@@ -8,7 +8,7 @@ continuations.
 """
 
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 import pytest
 
@@ -16,6 +16,7 @@ from tests.mock_helpers import create_mock_provider
 from tools.chat import ChatTool
 from tools.models import ToolOutput
 from utils.conversation_memory import add_turn, create_thread
+from utils.storage_backend import InMemoryStorage
 
 
 class TestDirectoryExpansionTracking:
@@ -37,8 +38,7 @@ class TestDirectoryExpansionTracking:
         files = []
         for i in range(5):
             swift_file = temp_path / f"File{i}.swift"
-            swift_file.write_text(
-                f"""
+            swift_file.write_text(f"""
 import Foundation
 
 class TestClass{i} {{
@@ -46,18 +46,15 @@ class TestClass{i} {{
         return "test{i}"
     }}
 }}
-"""
-            )
+""")
             files.append(str(swift_file))
 
         # Create a Python file as well
         python_file = temp_path / "helper.py"
-        python_file.write_text(
-            """
+        python_file.write_text("""
 def helper_function():
     return "helper"
-"""
-        )
+""")
         files.append(str(python_file))
 
         try:
@@ -127,20 +124,8 @@ def helper_function():
         self, mock_get_provider, mock_storage, tool, temp_directory_with_files
     ):
         """Test that conversation continuation works correctly with directory expansion"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use real in-memory storage in place of Redis
+        mock_storage.return_value = InMemoryStorage()
 
         # Setup mock provider
         mock_provider = create_mock_provider()
@@ -176,8 +161,8 @@ def helper_function():
 
         def capture_filtering_mock(requested_files, continuation_id):
             nonlocal filtered_files
-            filtered_files = original_filter_new_files(requested_files, continuation_id)
-            return filtered_files
+            filtered_files, changed_files = original_filter_new_files(requested_files, continuation_id)
+            return filtered_files, changed_files
 
         with patch.object(tool, "filter_new_files", side_effect=capture_filtering_mock):
             # Execute continuation - this should not re-embed the same files
@@ -199,20 +184,8 @@ def helper_function():
     @patch("utils.conversation_memory.get_storage")
     def test_get_conversation_embedded_files_with_expanded_files(self, mock_storage, tool, temp_directory_with_files):
         """Test that get_conversation_embedded_files returns expanded files"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use real in-memory storage in place of Redis
+        mock_storage.return_value = InMemoryStorage()
 
         directory = temp_directory_with_files["directory"]
         expected_files = temp_directory_with_files["files"]
@@ -240,20 +213,8 @@ def helper_function():
     @patch("utils.conversation_memory.get_storage")
     def test_file_filtering_with_mixed_files_and_directories(self, mock_storage, tool, temp_directory_with_files):
         """Test file filtering when request contains both individual files and directories"""
-        # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
-        redis_storage = {}  # Simulate Redis storage
-
-        def mock_get(key):
-            return redis_storage.get(key)
-
-        def mock_setex(key, ttl, value):
-            redis_storage[key] = value
-            return True
-
-        mock_client.get.side_effect = mock_get
-        mock_client.setex.side_effect = mock_setex
-        mock_storage.return_value = mock_client
+        # Use real in-memory storage in place of Redis
+        mock_storage.return_value = InMemoryStorage()
 
         directory = temp_directory_with_files["directory"]
         python_file = temp_directory_with_files["python_file"]
@@ -274,7 +235,7 @@ def helper_function():
 
         # Request with both directory and individual file
         mixed_request = [directory, python_file]
-        filtered_files = tool.filter_new_files(mixed_request, thread_id)
+        filtered_files, _ = tool.filter_new_files(mixed_request, thread_id)
 
         # The directory should expand to individual files, and since Swift files
         # are already embedded, only the python file should be new
@@ -0,0 +1,107 @@
+"""
+Tests for the shared file content cache
+"""
+
+import os
+
+import pytest
+
+from utils.file_cache import FileContentCache, get_file_cache
+from utils.file_utils import read_file_content
+
+
+@pytest.fixture
+def file_cache():
+    cache = get_file_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+class TestFileContentCache:
+    """Test LRU eviction and counters"""
+
+    def test_hit_and_miss_counters(self):
+        cache = FileContentCache(max_bytes=1000)
+        key = ("/src/a.py", 1, 10, True)
+
+        assert cache.get(key, "/src/a.py") is None
+        cache.put(key, "/src/a.py", "content", 1)
+
+        assert cache.get(key, "/src/a.py") == ("content", 1)
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes_resident"] == len("content")
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = FileContentCache(max_bytes=20)
+        keys = [(f"/src/{name}.py", 1, 10, False) for name in "abc"]
+        cache.put(keys[0], "/src/a.py", "a" * 8, 2)
+        cache.put(keys[1], "/src/b.py", "b" * 8, 2)
+        cache.get(keys[0], "/src/a.py")
+
+        cache.put(keys[2], "/src/c.py", "c" * 8, 2)
+
+        assert cache.get(keys[1], "/src/b.py") is None
+        assert cache.get(keys[0], "/src/a.py") is not None
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["bytes_resident"] == 16
+
+    def test_oversized_and_disabled(self):
+        cache = FileContentCache(max_bytes=4)
+        cache.put(("/src/a.py", 1, 10, False), "/src/a.py", "too large", 2)
+        assert cache.get_stats()["entries"] == 0
+
+        disabled = FileContentCache(max_bytes=0)
+        assert not disabled.enabled
+        disabled.put(("/src/a.py", 1, 10, False), "/src/a.py", "x", 0)
+        assert disabled.get_stats()["entries"] == 0
+
+
+class TestReadFileContentCache:
+    """read_file_content serves unchanged files from the cache"""
+
+    def test_unchanged_file_is_served_from_cache(self, project_path, file_cache):
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+
+        first = read_file_content(str(source))
+        second = read_file_content(str(source))
+
+        assert first == second
+        assert file_cache.get_stats()["hits"] == 1
+
+    def test_modified_file_is_reread(self, project_path, file_cache):
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+        read_file_content(str(source))
+
+        source.write_text("value = 22\n", encoding="utf-8")
+        content, _ = read_file_content(str(source))
+
+        assert "value = 22" in content
+        assert file_cache.get_stats()["hits"] == 0
+
+    def test_same_size_rewrite_with_new_mtime_is_reread(self, project_path, file_cache):
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+        read_file_content(str(source))
+
+        source.write_text("value = 2\n", encoding="utf-8")
+        stat_result = source.stat()
+        os.utime(source, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000))
+        content, _ = read_file_content(str(source))
+
+        assert "value = 2" in content
+
+    def test_line_number_flag_is_part_of_key(self, project_path, file_cache):
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+
+        numbered, _ = read_file_content(str(source), include_line_numbers=True)
+        plain, _ = read_file_content(str(source), include_line_numbers=False)
+
+        assert "1│" in numbered
+        assert "1│" not in plain
+        assert file_cache.get_stats()["entries"] == 2
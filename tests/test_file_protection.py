@@ -63,7 +63,7 @@ class TestMCPDirectoryDetection:
 
     def test_mcp_directory_excluded_from_scan(self, tmp_path):
         """Test that MCP directories are excluded during path expansion."""
-        # For this test, we need to mock is_mcp_directory since we can't
+        # For this test, we need to mock the server directory since we can't
         # actually create the MCP directory structure in tmp_path
         from unittest.mock import patch as mock_patch
 
@@ -81,12 +81,8 @@ class TestMCPDirectoryDetection:
         (fake_mcp_dir / "server.py").write_text("# MCP server")
         (fake_mcp_dir / "test.py").write_text("# Should not be included")
 
-        # Mock is_mcp_directory to return True for our fake MCP dir
-        def mock_is_mcp(path):
-            return str(path).endswith("gemini-mcp-server")
-
-        # Scan the project with mocked MCP detection
-        with mock_patch("utils.file_utils.is_mcp_directory", side_effect=mock_is_mcp):
+        # Pretend the fake MCP dir is where the server runs from
+        with mock_patch("utils.file_utils._get_mcp_server_dir", return_value=fake_mcp_dir.resolve()):
             files = expand_paths([str(project_root)])
 
         # Verify project files are included but MCP files are not
@@ -276,11 +272,8 @@ class TestIntegrationScenarios:
         node_modules.mkdir()
         (node_modules / "package.json").write_text("{}")
 
-        # Mock is_mcp_directory for this test
-        def mock_is_mcp(path):
-            return "gemini-mcp-server" in str(path)
-
-        with patch("utils.file_utils.is_mcp_directory", side_effect=mock_is_mcp):
+        # Pretend the clone is where the server runs from
+        with patch("utils.file_utils._get_mcp_server_dir", return_value=mcp.resolve()):
             files = expand_paths([str(user_project)])
 
         file_paths = [str(f) for f in files]
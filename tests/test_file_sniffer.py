@@ -0,0 +1,128 @@
+"""
+Tests for first-block binary and encoding detection
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils.file_sniffer import BINARY, UTF8, FileSniffer, SniffResult, get_file_sniffer, sniff_bytes
+from utils.file_utils import is_text_file, read_file_content
+
+
+@pytest.fixture(autouse=True)
+def clean_sniffer():
+    from utils.file_cache import get_file_cache
+
+    get_file_sniffer().clear()
+    get_file_cache().clear()
+    yield
+    get_file_sniffer().clear()
+
+
+class TestSniffBytes:
+    """Test classification of a first block"""
+
+    @pytest.mark.parametrize(
+        "block,expected",
+        [
+            (b"", UTF8),
+            (b"print('hello')\n", UTF8),
+            ("naïve café".encode(), UTF8),
+            # A multi-byte character cut at the end of the block is still UTF-8
+            ("café".encode()[:-1], UTF8),
+            (b"\xef\xbb\xbfwith bom", SniffResult(False, "utf-8-sig")),
+            ("text".encode("utf-16"), SniffResult(False, "utf-16")),
+            ("text".encode("utf-32"), SniffResult(False, "utf-32")),
+            (b"\x7fELF\x02\x01\x01\x00\x00\x00", BINARY),
+            (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", BINARY),
+            (bytes([1, 2, 3, 4, 5, 6, 7]) * 10 + b"\xff", BINARY),
+        ],
+    )
+    def test_blocks(self, block, expected):
+        assert sniff_bytes(block) == expected
+
+    def test_legacy_encoding_uses_charset_detection(self):
+        block = "Ça coûte très cher, déjà évalué à la hâte.\n".encode("cp1252") * 20
+
+        with patch("utils.file_sniffer._detect_charset", return_value="cp1252") as detect:
+            assert sniff_bytes(block) == SniffResult(False, "cp1252")
+        detect.assert_called_once()
+
+        with patch.dict(os.environ, {"FILE_CHARSET_DETECTION": "false"}):
+            assert sniff_bytes(block) == UTF8
+
+
+class TestFileSniffer:
+    """Test the verdict cache"""
+
+    def test_cache_is_validated_by_mtime_and_size(self, tmp_path):
+        sniffer = FileSniffer()
+        source = tmp_path / "data.py"
+        source.write_bytes(b"value = 1\n")
+
+        assert sniffer.sniff(source) == UTF8
+        assert sniffer.sniff(source) == UTF8
+        assert sniffer.get_stats()["hits"] == 1
+
+        source.write_bytes(b"\x00\x01binary now")
+        assert sniffer.sniff(source) == BINARY
+        assert sniffer.get_stats() == {"entries": 1, "hits": 1, "misses": 2, "binary": 1}
+
+    def test_cache_is_bounded(self, tmp_path):
+        sniffer = FileSniffer(max_entries=2)
+        for name in ("a.py", "b.py", "c.py"):
+            (tmp_path / name).write_text(name)
+            sniffer.sniff(tmp_path / name)
+
+        assert sniffer.get_stats()["entries"] == 2
+
+
+class TestReadFileContent:
+    """read_file_content rejects binaries and decodes with the detected encoding"""
+
+    def test_binary_with_code_extension_is_rejected(self, project_path):
+        source = project_path / "blob.py"
+        source.write_bytes(b"\x00" * 100 + b"print('hidden')")
+
+        content, _ = read_file_content(str(source))
+
+        assert "--- BINARY FILE:" in content
+        assert "print('hidden')" not in content
+
+    def test_utf8_bom_is_stripped(self, project_path):
+        source = project_path / "bom.py"
+        source.write_bytes(b"\xef\xbb\xbfx = 1\r\ny = 2")
+
+        content, _ = read_file_content(str(source), include_line_numbers=True)
+
+        assert "   1│ x = 1\n   2│ y = 2\n--- END FILE:" in content
+        assert "﻿" not in content
+
+    def test_utf16_file_is_decoded(self, project_path):
+        source = project_path / "wide.py"
+        source.write_text("first = 1\nsecond = 2\n", encoding="utf-16")
+
+        content, _ = read_file_content(str(source), include_line_numbers=True)
+
+        assert "   1│ first = 1\n   2│ second = 2\n   3│ \n--- END FILE:" in content
+
+    def test_utf16_partial_file_has_accurate_line_numbers(self, project_path):
+        source = project_path / "wide.py"
+        source.write_text("\n".join(f"row {i}" for i in range(1, 501)), encoding="utf-16")
+
+        content, _ = read_file_content(str(source), include_line_numbers=True, line_ranges=[(-1, None)])
+
+        assert "showing line 500 of 500" in content
+        assert " 500│ row 500" in content
+
+    def test_is_text_file_sniffs_unknown_extensions(self, tmp_path):
+        text = tmp_path / "NOTES"
+        text.write_text("plain notes\n")
+        blob = tmp_path / "data.unknownext"
+        blob.write_bytes(b"\x00\x01\x02")
+
+        assert is_text_file(str(text))
+        assert not is_text_file(str(blob))
+        assert not is_text_file(str(tmp_path / "missing.unknownext"))
@@ -0,0 +1,313 @@
+"""
+Tests for content-addressed file storage
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from utils.file_storage import FileStorage
+from utils.storage_backend import InMemoryStorage
+
+
+@pytest.fixture
+def redis_store():
+    return InMemoryStorage()
+
+
+@pytest.fixture
+def file_storage(redis_store):
+    with patch("utils.file_storage.get_redis_client", return_value=redis_store):
+        yield FileStorage()
+
+
+class TestFileStorageBlobs:
+    """Test blob deduplication and reference counting"""
+
+    def test_store_and_retrieve(self, file_storage):
+        ref = file_storage.store_file("/src/app.py", "print('hi')\n", summary="App")
+
+        content, stored_ref = file_storage.retrieve_file(ref.reference_id)
+
+        assert content == "print('hi')\n"
+        assert stored_ref.file_path == "/src/app.py"
+        assert stored_ref.summary == "App"
+        assert stored_ref.content_hash == FileStorage.content_hash("print('hi')\n")
+
+    def test_same_content_from_two_paths_shares_one_blob(self, file_storage, redis_store):
+        first = file_storage.store_file("/src/a.py", "shared = True\n")
+        second = file_storage.store_file("/vendor/a.py", "shared = True\n")
+
+        assert first.reference_id != second.reference_id
+        assert first.content_hash == second.content_hash
+        assert redis_store.smembers(f"mcp:blobrefs:{first.content_hash}") == {
+            first.reference_id,
+            second.reference_id,
+        }
+        assert file_storage.retrieve_file(second.reference_id)[0] == "shared = True\n"
+
+    def test_restoring_unchanged_file_only_touches_metadata(self, file_storage, redis_store):
+        content = "x = 1\n" * 1000
+        file_storage.store_file("/src/big.py", content)
+
+        with patch.object(redis_store, "setex", wraps=redis_store.setex) as setex:
+            ref = file_storage.store_file("/src/big.py", content, summary="Updated summary")
+
+        written_keys = [call.args[0] for call in setex.call_args_list]
+        assert written_keys == [f"mcp:fileref:{ref.reference_id}"]
+        assert file_storage.get_reference(ref.reference_id).summary == "Updated summary"
+
+    def test_blob_deleted_with_last_reference(self, file_storage, redis_store):
+        first = file_storage.store_file("/src/a.py", "shared = True\n")
+        second = file_storage.store_file("/vendor/a.py", "shared = True\n")
+        blob_key = f"mcp:blob:{first.content_hash}"
+
+        assert file_storage.delete_file(first.reference_id)
+        assert redis_store.get(blob_key) is not None
+        assert file_storage.retrieve_file(first.reference_id) is None
+
+        assert file_storage.delete_file(second.reference_id)
+        assert redis_store.get(blob_key) is None
+
+    def test_legacy_reference_is_readable(self, file_storage, redis_store):
+        """References written before blobs were shared keep their own content key"""
+        legacy = {
+            "file_path": "/src/old.py",
+            "reference_id": "file_legacy_0001",
+            "size": 9,
+            "summary": "Old",
+            "metadata": {},
+            "created_at": "2024-01-01T00:00:00",
+        }
+        redis_store.setex("mcp:fileref:file_legacy_0001", 60, json.dumps(legacy))
+        redis_store.setex("mcp:file:file_legacy_0001", 60, "old = 1\n")
+
+        content, ref = file_storage.retrieve_file("file_legacy_0001")
+
+        assert content == "old = 1\n"
+        assert ref.content_hash is None
+        assert file_storage.delete_file("file_legacy_0001")
+        assert redis_store.get("mcp:file:file_legacy_0001") is None
+
+
+class TestFileStorageIndex:
+    """Test indexed listing and expiry sweeps"""
+
+    @staticmethod
+    def _store_many(file_storage, count, continuation_id=None):
+        refs = []
+        for i in range(count):
+            metadata = {"continuation_id": continuation_id} if continuation_id else None
+            refs.append(file_storage.store_file(f"/src/module_{i}.py", f"value = {i}\n", metadata=metadata))
+        return refs
+
+    def test_list_newest_first_with_pagination(self, file_storage, redis_store):
+        refs = self._store_many(file_storage, 5)
+        for i, ref in enumerate(refs):
+            redis_store.zadd(file_storage.created_index_key, {ref.reference_id: 1000 + i})
+
+        listed = file_storage.list_references()
+        page = file_storage.list_references(offset=1, limit=2)
+
+        assert [ref.file_path for ref in listed] == [f"/src/module_{i}.py" for i in range(4, -1, -1)]
+        assert [ref.file_path for ref in page] == ["/src/module_3.py", "/src/module_2.py"]
+
+    def test_list_by_thread(self, file_storage):
+        thread_refs = self._store_many(file_storage, 2, continuation_id="thread-a")
+        self._store_many(file_storage, 3)
+
+        listed = file_storage.list_references(continuation_id="thread-a")
+
+        assert {ref.reference_id for ref in listed} == {ref.reference_id for ref in thread_refs}
+
+    def test_list_by_pattern(self, file_storage):
+        refs = self._store_many(file_storage, 3)
+
+        listed = file_storage.list_references(pattern=refs[1].reference_id)
+
+        assert [ref.reference_id for ref in listed] == [refs[1].reference_id]
+
+    def test_expired_references_are_pruned_from_listing(self, file_storage, redis_store):
+        refs = self._store_many(file_storage, 2)
+        redis_store.delete(f"mcp:fileref:{refs[0].reference_id}")
+
+        assert [ref.reference_id for ref in file_storage.list_references()] == [refs[1].reference_id]
+        assert redis_store.zcard(file_storage.created_index_key) == 1
+
+    def test_cleanup_sweeps_only_expired_entries(self, file_storage, redis_store):
+        expired, live = self._store_many(file_storage, 2)
+        member = f"{expired.reference_id}:{expired.content_hash}:0"
+        redis_store.zadd(file_storage.expiry_index_key, {member: 1})
+        redis_store.expire(f"mcp:fileref:{expired.reference_id}", -1)
+
+        assert file_storage.cleanup_expired() == 1
+
+        assert redis_store.get(f"mcp:blob:{expired.content_hash}") is None
+        assert redis_store.zcard(file_storage.expiry_index_key) == 1
+        assert [ref.reference_id for ref in file_storage.list_references()] == [live.reference_id]
+        assert file_storage.cleanup_expired() == 0
+
+
+class TestFileStorageChunks:
+    """Test chunked storage and ranged retrieval"""
+
+    @pytest.fixture
+    def chunked_storage(self, redis_store):
+        with patch("utils.file_storage.get_redis_client", return_value=redis_store):
+            yield FileStorage(chunk_size=50)
+
+    CONTENT = "".join(f"line {i:03d} of the stored file\n" for i in range(1, 41))
+
+    def test_large_content_is_stored_in_chunks(self, chunked_storage, redis_store):
+        ref = chunked_storage.store_file("/src/big.py", self.CONTENT)
+
+        assert ref.chunk_count == -(-len(self.CONTENT) // 50)
+        assert sum(ref.chunk_line_counts) == 40
+        assert redis_store.get(f"mcp:blob:{ref.content_hash}") is None
+        assert redis_store.get(f"mcp:blob:{ref.content_hash}:0") == self.CONTENT[:50]
+        assert chunked_storage.retrieve_file(ref.reference_id)[0] == self.CONTENT
+
+    def test_character_range_reads_only_overlapping_chunks(self, chunked_storage, redis_store):
+        ref = chunked_storage.store_file("/src/big.py", self.CONTENT)
+
+        with patch.object(redis_store, "pipeline", wraps=redis_store.pipeline) as pipeline:
+            content, _ = chunked_storage.retrieve_range(ref.reference_id, offset=120, length=60)
+
+        assert content == self.CONTENT[120:180]
+        assert pipeline.call_count == 1
+        assert chunked_storage.retrieve_range(ref.reference_id, offset=len(self.CONTENT) - 5)[0] == self.CONTENT[-5:]
+        assert chunked_storage.retrieve_range(ref.reference_id, offset=len(self.CONTENT) + 10)[0] == ""
+
+    @pytest.mark.parametrize("start_line,end_line", [(1, 1), (3, 7), (12, 12), (39, None), (None, 2), (40, 45)])
+    def test_line_range_matches_splitlines(self, chunked_storage, start_line, end_line):
+        ref = chunked_storage.store_file("/src/big.py", self.CONTENT)
+        lines = self.CONTENT.splitlines(keepends=True)
+        expected = "".join(lines[(start_line or 1) - 1 : end_line])
+
+        content, _ = chunked_storage.retrieve_range(ref.reference_id, start_line=start_line, end_line=end_line)
+
+        assert content == expected
+
+    def test_line_range_on_unchunked_content(self, file_storage):
+        ref = file_storage.store_file("/src/small.py", "a\nb\nc")
+
+        assert file_storage.retrieve_range(ref.reference_id, start_line=2, end_line=3)[0] == "b\nc"
+
+    @pytest.mark.parametrize("separator", ["\x0c", "\r", "\u2028"])
+    def test_only_newlines_end_lines(self, chunked_storage, file_storage, separator):
+        content = "".join(f"line{i}{separator}X\n" for i in range(1, 11))
+
+        for storage in (chunked_storage, file_storage):
+            ref = storage.store_file("/src/feed.txt", content)
+            assert storage.retrieve_range(ref.reference_id, start_line=3, end_line=3)[0] == f"line3{separator}X\n"
+            assert storage.retrieve_lines(ref.reference_id, start_line=10)[0] == f"line10{separator}X\n"
+
+    def test_line_window_is_capped_by_characters(self, chunked_storage, redis_store):
+        ref = chunked_storage.store_file("/src/big.py", self.CONTENT)
+        lines = self.CONTENT.splitlines(keepends=True)
+        line_length = len(lines[0])
+
+        with patch.object(redis_store, "get", wraps=redis_store.get) as get:
+            content, _, offset = chunked_storage.retrieve_lines(ref.reference_id, start_line=5, max_chars=80)
+
+        assert content == "".join(lines[4:6])
+        assert offset == 4 * line_length
+        assert get.call_count < ref.chunk_count
+        # A single line longer than the window is cut rather than returned whole
+        assert chunked_storage.retrieve_lines(ref.reference_id, start_line=5, max_chars=10)[0] == lines[4][:10]
+
+    def test_delete_removes_all_chunks(self, chunked_storage, redis_store):
+        ref = chunked_storage.store_file("/src/big.py", self.CONTENT)
+
+        assert chunked_storage.delete_file(ref.reference_id)
+
+        for i in range(ref.chunk_count):
+            assert redis_store.get(f"mcp:blob:{ref.content_hash}:{i}") is None
+
+
+class TestFileRetrieveTool:
+    """Test the direct, ranged fileretrieve path"""
+
+    @pytest.fixture
+    def tool(self, file_storage):
+        from tools.fileretrieve import FileRetrieveTool
+
+        tool = FileRetrieveTool()
+        tool.file_storage = file_storage
+        return tool
+
+    @pytest.mark.asyncio
+    async def test_direct_line_range_skips_model(self, tool, file_storage):
+        ref = file_storage.store_file("/src/app.py", "one\ntwo\nthree\nfour\n")
+
+        with patch.object(tool, "get_model_provider") as get_model_provider:
+            result = await tool.execute({"reference_id": ref.reference_id, "start_line": 2, "end_line": 3})
+
+        output = json.loads(result[0].text)
+        assert output["status"] == "success"
+        assert output["content"] == "two\nthree\n"
+        assert output["metadata"]["start_line"] == 2
+        assert output["metadata"]["end_line"] == 3
+        assert output["metadata"]["file_path"] == "/src/app.py"
+        get_model_provider.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_direct_offset_reports_next_offset(self, tool, file_storage):
+        ref = file_storage.store_file("/src/app.py", "0123456789")
+
+        result = await tool.execute({"reference_id": ref.reference_id, "offset": 2, "length": 4})
+
+        output = json.loads(result[0].text)
+        assert output["content"] == "2345"
+        assert output["metadata"]["truncated"] is True
+        assert output["metadata"]["next_offset"] == 6
+
+    @pytest.mark.asyncio
+    async def test_line_range_pages_by_characters(self, tool, file_storage):
+        lines = [f"{i:09d}\n" for i in range(1, 31)]
+        ref = file_storage.store_file("/src/app.py", "".join(lines))
+
+        with patch("tools.fileretrieve.DEFAULT_WINDOW_CHARS", 100):
+            first = json.loads((await tool.execute({"reference_id": ref.reference_id, "start_line": 1}))[0].text)
+            last = json.loads((await tool.execute({"reference_id": ref.reference_id, "start_line": 21}))[0].text)
+
+        assert first["content"] == "".join(lines[:10])
+        assert first["metadata"]["end_line"] == 10
+        assert first["metadata"]["has_more"] is True
+        assert first["metadata"]["next_start_line"] == 11
+        assert last["content"] == "".join(lines[20:])
+        assert last["metadata"]["has_more"] is False
+        assert last["metadata"]["next_start_line"] is None
+
+    @pytest.mark.asyncio
+    async def test_line_range_counts_only_newlines(self, tool, file_storage):
+        ref = file_storage.store_file("/src/app.py", "one\x0cpage\ntwo\rthree\nfour\n")
+
+        output = json.loads(
+            (await tool.execute({"reference_id": ref.reference_id, "start_line": 1, "end_line": 2}))[0].text
+        )
+
+        assert output["content"] == "one\x0cpage\ntwo\rthree\n"
+        assert output["metadata"]["end_line"] == 2
+        assert output["metadata"]["next_start_line"] == 3
+
+    @pytest.mark.asyncio
+    async def test_line_range_past_the_end_and_reversed(self, tool, file_storage):
+        ref = file_storage.store_file("/src/app.py", "one\ntwo\n")
+
+        past_end = json.loads((await tool.execute({"reference_id": ref.reference_id, "start_line": 5}))[0].text)
+        reversed_range = await tool.execute({"reference_id": ref.reference_id, "start_line": 3, "end_line": 2})
+
+        assert past_end["content"] == ""
+        assert past_end["metadata"]["end_line"] is None
+        assert past_end["metadata"]["has_more"] is False
+        output = json.loads(reversed_range[0].text)
+        assert output["status"] == "error"
+        assert "must not be greater than end_line" in output["content"]
+
+    @pytest.mark.asyncio
+    async def test_missing_reference(self, tool):
+        result = await tool.execute({"reference_id": "file_missing_0000"})
+
+        assert json.loads(result[0].text)["status"] == "error"
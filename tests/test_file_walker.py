@@ -0,0 +1,147 @@
+"""
+Tests for the gitignore-aware directory walker
+"""
+
+import os
+import time
+
+import pytest
+
+from utils.file_utils import expand_paths
+from utils.file_walker import DirectoryWalker, _RuleSet, get_directory_walker, parse_ignore_rules
+
+
+def _matches(pattern: str, path: str, is_dir: bool = False) -> bool:
+    stack = [("/base", _RuleSet(1, parse_ignore_rules(pattern)))]
+    return DirectoryWalker._is_ignored(stack, f"/base/{path}", is_dir)
+
+
+def _age(path, seconds: float = 60) -> None:
+    """Backdate a directory so its listing is old enough to cache"""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def walker():
+    walker = get_directory_walker()
+    walker.clear()
+    yield walker
+    walker.clear()
+
+
+class TestIgnoreRules:
+    """Test gitignore pattern semantics"""
+
+    @pytest.mark.parametrize(
+        "pattern,path,expected",
+        [
+            ("*.log", "debug.log", True),
+            ("*.log", "logs/debug.log", True),
+            ("*.log", "debug.log.txt", False),
+            ("/root.txt", "root.txt", True),
+            ("/root.txt", "sub/root.txt", False),
+            ("docs/*.md", "docs/a.md", True),
+            ("docs/*.md", "docs/sub/a.md", False),
+            ("**/gen/*.py", "a/b/gen/x.py", True),
+            ("**/gen/*.py", "gen/x.py", True),
+            ("src/**/tmp.py", "src/tmp.py", True),
+            ("src/**/tmp.py", "src/a/b/tmp.py", True),
+            ("data/**", "data/a/b.csv", True),
+            ("file?.py", "file1.py", True),
+            ("file[0-9].py", "file7.py", True),
+            ("file[!0-9].py", "file7.py", False),
+            ("\\#notes", "#notes", True),
+            ("# comment", "# comment", False),
+        ],
+    )
+    def test_patterns(self, pattern, path, expected):
+        assert _matches(pattern, path) is expected
+
+    def test_directory_only_pattern(self):
+        assert _matches("build/", "build", is_dir=True)
+        assert not _matches("build/", "build", is_dir=False)
+
+    def test_negation_last_match_wins(self):
+        rules = "*.py\n!keep.py\n"
+        assert _matches(rules, "drop.py")
+        assert not _matches(rules, "keep.py")
+
+
+class TestDirectoryWalker:
+    """Test walking with ignore files and the listing cache"""
+
+    def test_gitignore_and_ignore_files(self, project_path, walker):
+        (project_path / ".gitignore").write_text("generated/\n*.gen.py\n")
+        (project_path / "main.py").write_text("")
+        (project_path / "model.gen.py").write_text("")
+        generated = project_path / "generated"
+        generated.mkdir()
+        (generated / "out.py").write_text("")
+        sub = project_path / "sub"
+        sub.mkdir()
+        (sub / ".ignore").write_text("scratch.py\n!keep.gen.py\n")
+        (sub / "scratch.py").write_text("")
+        (sub / "keep.gen.py").write_text("")
+        (sub / "lib.py").write_text("")
+
+        files = expand_paths([str(project_path)])
+
+        names = sorted(os.path.relpath(f, project_path) for f in files)
+        assert names == ["main.py", os.path.join("sub", "keep.gen.py"), os.path.join("sub", "lib.py")]
+
+    def test_gitignore_above_walk_root_inside_repository(self, project_path, walker):
+        (project_path / ".git").mkdir()
+        (project_path / ".gitignore").write_text("*.tmp.py\n")
+        src = project_path / "src"
+        src.mkdir()
+        (src / "app.py").write_text("")
+        (src / "scratch.tmp.py").write_text("")
+
+        files = expand_paths([str(src)])
+
+        assert [os.path.basename(f) for f in files] == ["app.py"]
+
+    def test_excluded_and_hidden_dirs_are_skipped(self, project_path, walker):
+        for name in ("node_modules", ".hidden", "src"):
+            (project_path / name).mkdir()
+            (project_path / name / "a.py").write_text("")
+
+        files = expand_paths([str(project_path)])
+
+        assert [os.path.relpath(f, project_path) for f in files] == [os.path.join("src", "a.py")]
+
+    def test_listing_cache_is_validated_by_mtime(self, project_path, walker):
+        src = project_path / "src"
+        src.mkdir()
+        (src / "a.py").write_text("")
+        _age(src)
+        _age(project_path)
+
+        assert len(expand_paths([str(project_path)])) == 1
+        misses = walker.get_stats()["misses"]
+        assert len(expand_paths([str(project_path)])) == 1
+        assert walker.get_stats()["misses"] == misses
+        assert walker.get_stats()["hits"] >= 2
+
+        (src / "b.py").write_text("")
+        assert len(expand_paths([str(project_path)])) == 2
+
+    def test_recently_modified_directories_are_not_cached(self, project_path, walker):
+        (project_path / "a.py").write_text("")
+
+        expand_paths([str(project_path)])
+
+        assert walker.get_stats()["cached_dirs"] == 0
+
+    def test_edited_gitignore_is_reloaded(self, project_path, walker):
+        (project_path / "a.py").write_text("")
+        (project_path / "b.py").write_text("")
+        gitignore = project_path / ".gitignore"
+        gitignore.write_text("a.py\n")
+        _age(project_path)
+
+        assert [os.path.basename(f) for f in expand_paths([str(project_path)])] == ["b.py"]
+
+        gitignore.write_text("b.py\n")
+        assert [os.path.basename(f) for f in expand_paths([str(project_path)])] == ["a.py"]
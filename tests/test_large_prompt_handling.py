@@ -10,7 +10,7 @@ import json
 import os
 import shutil
 import tempfile
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from mcp.types import TextContent
@@ -243,9 +243,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Success",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash",
@@ -286,9 +287,10 @@ class TestLargePromptHandling:
         # Mock the model provider to avoid real API calls
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Response to the large prompt",
                 usage={"input_tokens": 12000, "output_tokens": 10, "total_tokens": 12010},
                 model_name="gemini-2.5-flash",
@@ -318,9 +320,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Success",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash",
@@ -346,7 +349,7 @@ class TestLargePromptHandling:
         ):
 
             mock_provider = create_mock_provider(model_name="gemini-2.5-flash", context_window=1_048_576)
-            mock_provider.generate_content.return_value.content = "Success"
+            mock_provider.agenerate_content.return_value.content = "Success"
             mock_get_provider.return_value = mock_provider
 
             # Mock ModelContext to avoid the comparison issue
@@ -392,7 +395,7 @@ class TestLargePromptHandling:
             from tests.mock_helpers import create_mock_provider
 
             mock_provider = create_mock_provider(model_name="flash")
-            mock_provider.generate_content.return_value.content = "Weather is sunny"
+            mock_provider.agenerate_content.return_value.content = "Weather is sunny"
             mock_get_provider.return_value = mock_provider
 
             # Mock ModelContext to avoid the comparison issue
@@ -435,8 +438,8 @@ class TestLargePromptHandling:
             assert "Weather is sunny" in output["content"]
 
             # Verify the model was actually called with the huge prompt
-            mock_provider.generate_content.assert_called_once()
-            call_kwargs = mock_provider.generate_content.call_args[1]
+            mock_provider.agenerate_content.assert_called_once()
+            call_kwargs = mock_provider.agenerate_content.call_args[1]
             actual_prompt = call_kwargs.get("prompt")
 
             # Verify internal prompt was huge (proving we don't limit internal processing)
@@ -510,7 +513,7 @@ class TestLargePromptHandling:
             from tests.mock_helpers import create_mock_provider
 
             mock_provider = create_mock_provider(model_name="flash")
-            mock_provider.generate_content.return_value.content = "Continuing our conversation..."
+            mock_provider.agenerate_content.return_value.content = "Continuing our conversation..."
             mock_get_provider.return_value = mock_provider
 
             # Mock ModelContext to avoid the comparison issue
@@ -570,8 +573,8 @@ class TestLargePromptHandling:
                 assert "Continuing our conversation" in output["content"]
 
                 # Verify the model was called with the complete prompt (including huge history)
-                mock_provider.generate_content.assert_called_once()
-                call_kwargs = mock_provider.generate_content.call_args[1]
+                mock_provider.agenerate_content.assert_called_once()
+                call_kwargs = mock_provider.agenerate_content.call_args[1]
                 final_prompt = call_kwargs.get("prompt")
 
                 # The final prompt should contain both history and user input
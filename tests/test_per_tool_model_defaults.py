@@ -3,7 +3,7 @@ Test per-tool model default selection functionality
 """
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -484,7 +484,8 @@ class TestUnavailableModelFallback:
                 with patch.object(ModelProviderRegistry, "get_provider_for_model") as mock_get_provider:
                     # Model is available
                     mock_provider = MagicMock()
-                    mock_provider.generate_content.return_value = MagicMock(content="Test response", metadata={})
+                    mock_provider.agenerate_content = AsyncMock()
+                    mock_provider.agenerate_content.return_value = MagicMock(content="Test response", metadata={})
                     mock_get_provider.return_value = mock_provider
 
                     # Mock the provider lookup in BaseTool.get_model_provider
@@ -160,7 +160,7 @@ TEMPERATURE_ANALYTICAL = 0.2  # For code review, debugging
             thread_id = create_thread("precommit", {"files": [config_path]})
 
             # Test that file embedding works
-            files_to_embed = tool.filter_new_files([config_path], None)
+            files_to_embed, _ = tool.filter_new_files([config_path], None)
             assert config_path in files_to_embed, "New conversation should embed all files"
 
             # Add a turn to the conversation
@@ -169,7 +169,7 @@ TEMPERATURE_ANALYTICAL = 0.2  # For code review, debugging
             # Second request with continuation - should skip already embedded files
             PrecommitRequest(path=temp_dir, files=[config_path], continuation_id=thread_id, prompt="Follow-up review")
 
-            files_to_embed_2 = tool.filter_new_files([config_path], thread_id)
+            files_to_embed_2, _ = tool.filter_new_files([config_path], thread_id)
             assert len(files_to_embed_2) == 0, "Continuation should skip already embedded files"
 
     @pytest.mark.asyncio
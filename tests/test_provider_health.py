@@ -0,0 +1,207 @@
+"""Tests for provider health tracking, circuit breaking and registry failover."""
+
+import asyncio
+import functools
+from unittest.mock import patch
+
+import pytest
+
+from providers.base import ProviderType
+from providers.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth, get_provider_health
+from providers.registry import ModelProviderRegistry
+from tests.mock_helpers import FakeProvider
+from utils.progress import agenerate_with_progress
+
+
+class TestCircuitBreaker:
+    """Error-rate EWMA and circuit states"""
+
+    def _fail(self, health, provider, model_name, error, times):
+        for _ in range(times):
+            with pytest.raises(type(error)):
+                with health.track(provider, model_name):
+                    raise error
+
+    def test_provider_failures_open_the_circuit(self):
+        health = ProviderHealth(error_threshold=0.5, cooldown=30, enabled=True)
+        provider = FakeProvider(provider_type=ProviderType.OPENAI, models={"fake-model"})
+
+        self._fail(health, provider, "fake-model", RuntimeError("503 Service Unavailable"), 3)
+        assert health.is_available(ProviderType.OPENAI, "fake-model")
+
+        self._fail(health, provider, "fake-model", RuntimeError("503 Service Unavailable"), 1)
+
+        assert not health.is_available(ProviderType.OPENAI, "fake-model")
+        assert not health.is_available(ProviderType.OPENAI, "other-model")  # Provider-wide circuit
+        stats = health.get_stats()
+        assert stats["openai"]["state"] == OPEN
+        assert stats["openai/fake-model"]["failures"] == 4
+
+    def test_client_errors_do_not_count(self):
+        health = ProviderHealth(error_threshold=0.5, cooldown=30, enabled=True)
+        provider = FakeProvider(provider_type=ProviderType.OPENAI, models={"fake-model"})
+
+        self._fail(health, provider, "fake-model", ValueError("context length exceeded: invalid request"), 10)
+
+        assert health.is_available(ProviderType.OPENAI, "fake-model")
+        assert health.get_stats()["openai"]["failures"] == 0
+
+    def test_wrapped_errors_are_classified_by_cause(self):
+        health = ProviderHealth(error_threshold=0.5, cooldown=30, enabled=True)
+        provider = FakeProvider(provider_type=ProviderType.GOOGLE, models={"fake-model"})
+
+        def wrapped():
+            try:
+                raise ConnectionResetError()
+            except ConnectionResetError as e:
+                raise RuntimeError("Gemini API error for model fake-model after 4 attempts") from e
+
+        for _ in range(4):
+            with pytest.raises(RuntimeError):
+                with health.track(provider, "fake-model"):
+                    wrapped()
+
+        assert health.get_stats()["google"]["state"] == OPEN
+
+    def test_half_open_probe_closes_or_reopens(self):
+        health = ProviderHealth(error_threshold=0.5, cooldown=30, enabled=True)
+        provider = FakeProvider(provider_type=ProviderType.OPENAI, models={"fake-model"})
+        self._fail(health, provider, "fake-model", TimeoutError(), 4)
+
+        with patch("providers.health.time.monotonic", side_effect=lambda: 10_000.0):
+            assert health.is_available(ProviderType.OPENAI, "fake-model")
+            assert health.get_stats()["openai"]["state"] == HALF_OPEN
+            with health.track(provider, "fake-model"):
+                # Only one probe at a time
+                assert not health.is_available(ProviderType.OPENAI, "fake-model")
+            assert health.get_stats()["openai"]["state"] == CLOSED
+
+        self._fail(health, provider, "fake-model", TimeoutError(), 4)
+        with patch("providers.health.time.monotonic", side_effect=lambda: 20_000.0):
+            assert health.is_available(ProviderType.OPENAI, "fake-model")
+            self._fail(health, provider, "fake-model", TimeoutError(), 1)
+            assert health.get_stats()["openai"]["state"] == OPEN
+            assert not health.is_available(ProviderType.OPENAI, "fake-model")
+
+    def test_latency_ewma(self):
+        health = ProviderHealth(enabled=True)
+        provider = FakeProvider(provider_type=ProviderType.XAI, models={"fake-model"})
+
+        with patch("providers.health.time.monotonic", side_effect=[0.0, 2.0, 2.0, 10.0, 11.0, 11.0]):
+            with health.track(provider, "fake-model"):
+                pass
+            with health.track(provider, "fake-model"):
+                pass
+
+        assert health.get_stats()["xai/fake-model"]["latency_ms"] == 1800
+
+    def test_disabled_breaker_always_routes(self):
+        health = ProviderHealth(error_threshold=0.5, cooldown=30, enabled=False)
+        provider = FakeProvider(provider_type=ProviderType.OPENAI, models={"fake-model"})
+
+        self._fail(health, provider, "fake-model", TimeoutError(), 10)
+
+        assert health.is_available(ProviderType.OPENAI, "fake-model")
+
+
+class TestRegistryFailover:
+    """get_provider_for_model skips providers with open circuits"""
+
+    def setup_method(self):
+        self._saved_registry = ModelProviderRegistry._instance
+        ModelProviderRegistry._instance = None
+        self.openai_class = functools.partial(FakeProvider, provider_type=ProviderType.OPENAI, models={"fake-model"})
+        self.openrouter_class = functools.partial(
+            FakeProvider, provider_type=ProviderType.OPENROUTER, models={"fake-model", "router-only"}
+        )
+        ModelProviderRegistry.register_provider(ProviderType.OPENAI, self.openai_class)
+        ModelProviderRegistry.register_provider(ProviderType.OPENROUTER, self.openrouter_class)
+
+    def teardown_method(self):
+        ModelProviderRegistry._instance = self._saved_registry
+
+    def _open_circuit(self, provider_type, model_name="fake-model"):
+        provider = ModelProviderRegistry.get_provider(provider_type)
+        provider.error = TimeoutError("timed out")
+        for _ in range(4):
+            with pytest.raises(TimeoutError):
+                asyncio.run(agenerate_with_progress(provider, prompt="hi", model_name=model_name))
+        provider.error = None
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_fails_over_to_next_provider_for_the_model(self):
+        assert ModelProviderRegistry.get_provider_for_model("fake-model").get_provider_type() == ProviderType.OPENAI
+
+        self._open_circuit(ProviderType.OPENAI)
+
+        provider = ModelProviderRegistry.get_provider_for_model("fake-model")
+        assert provider.get_provider_type() == ProviderType.OPENROUTER
+        response = asyncio.run(agenerate_with_progress(provider, prompt="hi", model_name="fake-model"))
+        assert response.content == "openrouter:hi"
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_routes_back_after_successful_probe(self):
+        self._open_circuit(ProviderType.OPENAI)
+
+        with patch("providers.health.time.monotonic", side_effect=lambda: 10_000.0):
+            provider = ModelProviderRegistry.get_provider_for_model("fake-model")
+            assert provider.get_provider_type() == ProviderType.OPENAI
+            asyncio.run(agenerate_with_progress(provider, prompt="hi", model_name="fake-model"))
+
+        assert get_provider_health().get_stats()["openai"]["state"] == CLOSED
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_lookups_do_not_claim_the_probe(self):
+        # Workflow tools look the model up more than once before calling it
+        self._open_circuit(ProviderType.OPENAI)
+
+        with patch("providers.health.time.monotonic", side_effect=lambda: 10_000.0):
+            ModelProviderRegistry.get_provider_for_model("fake-model")
+            provider = ModelProviderRegistry.get_provider_for_model("fake-model")
+            assert provider.get_provider_type() == ProviderType.OPENAI
+            asyncio.run(agenerate_with_progress(provider, prompt="hi", model_name="fake-model"))
+
+        assert get_provider_health().get_stats()["openai"]["state"] == CLOSED
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_lookups_fail_over_while_the_probe_is_in_flight(self):
+        self._open_circuit(ProviderType.OPENAI)
+        health = get_provider_health()
+
+        with patch("providers.health.time.monotonic", side_effect=lambda: 10_000.0):
+            provider = ModelProviderRegistry.get_provider_for_model("fake-model")
+            with health.track(provider, "fake-model"):
+                fallback = ModelProviderRegistry.get_provider_for_model("fake-model")
+                assert fallback.get_provider_type() == ProviderType.OPENROUTER
+                assert health.get_stats()["openai"]["state"] == HALF_OPEN
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_healthiest_provider_when_all_circuits_are_open(self):
+        self._open_circuit(ProviderType.OPENAI)
+        self._open_circuit(ProviderType.OPENROUTER)
+        openrouter = ModelProviderRegistry.get_provider(ProviderType.OPENROUTER)
+        openrouter.error = TimeoutError("timed out")
+        for _ in range(3):
+            with pytest.raises(TimeoutError):
+                asyncio.run(agenerate_with_progress(openrouter, prompt="hi", model_name="fake-model"))
+
+        provider = ModelProviderRegistry.get_provider_for_model("fake-model")
+
+        assert provider.get_provider_type() == ProviderType.OPENAI
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "key", "OPENROUTER_API_KEY": "key"})
+    def test_model_circuit_only_affects_that_model(self):
+        health = get_provider_health()
+        openrouter = ModelProviderRegistry.get_provider(ProviderType.OPENROUTER)
+        for _ in range(4):
+            openrouter.error = TimeoutError("timed out")
+            with pytest.raises(TimeoutError):
+                asyncio.run(agenerate_with_progress(openrouter, prompt="hi", model_name="fake-model"))
+            openrouter.error = None
+            for _ in range(2):
+                asyncio.run(agenerate_with_progress(openrouter, prompt="hi", model_name="router-only"))
+
+        # Successes on another model keep the provider-wide circuit closed
+        assert health.get_stats()["openrouter"]["state"] == CLOSED
+        assert health.get_stats()["openrouter/fake-model"]["state"] == OPEN
+        assert ModelProviderRegistry.get_provider_for_model("router-only") is openrouter
@@ -0,0 +1,96 @@
+"""
+Tests for the pooled Redis client manager
+"""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils import redis_manager
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    """Each test starts and ends with no pooled clients"""
+    redis_manager.reset_redis_clients()
+    yield
+    redis_manager.reset_redis_clients()
+
+
+class TestRedisManager:
+    """Test process-wide Redis connection pooling"""
+
+    def test_client_is_shared(self):
+        """Repeated calls return the same pooled client"""
+        first = redis_manager.get_redis_client()
+        second = redis_manager.get_redis_client()
+
+        assert first is second
+        assert first.connection_pool is redis_manager.get_redis_pool()
+
+    def test_conversation_memory_uses_pool(self):
+        """conversation_memory.get_redis_client returns the pooled client"""
+        from utils.conversation_memory import get_redis_client
+
+        assert get_redis_client() is redis_manager.get_redis_client()
+
+    @patch.dict(
+        os.environ,
+        {
+            "REDIS_URL": "redis://example.invalid:6390/2",
+            "REDIS_MAX_CONNECTIONS": "7",
+            "REDIS_HEALTH_CHECK_INTERVAL": "5",
+        },
+    )
+    def test_pool_configuration_from_env(self):
+        """Pool size, health check interval and URL come from the environment"""
+        pool = redis_manager.get_redis_pool()
+
+        assert pool.max_connections == 7
+        assert pool.connection_kwargs["health_check_interval"] == 5
+        assert pool.connection_kwargs["host"] == "example.invalid"
+        assert pool.connection_kwargs["port"] == 6390
+        assert pool.connection_kwargs["db"] == 2
+        assert pool.connection_kwargs["decode_responses"] is True
+
+    @patch.dict(os.environ, {"REDIS_MAX_CONNECTIONS": "not-a-number"})
+    def test_invalid_pool_size_falls_back_to_default(self):
+        """Bad REDIS_MAX_CONNECTIONS values use the default"""
+        assert redis_manager.get_redis_pool().max_connections == 50
+
+    def test_pool_stats(self):
+        """Stats report the sync pool once it exists"""
+        assert redis_manager.get_pool_stats() == {"sync": None, "async": []}
+
+        redis_manager.get_redis_client()
+        stats = redis_manager.get_pool_stats()
+
+        assert stats["sync"]["max_connections"] == 50
+        assert stats["sync"]["created_connections"] == 0
+        assert stats["sync"]["in_use_connections"] == 0
+
+    def test_reset_builds_new_pool(self):
+        """reset_redis_clients drops the shared pool"""
+        before = redis_manager.get_redis_client()
+        redis_manager.reset_redis_clients()
+
+        assert redis_manager.get_redis_client() is not before
+
+    def test_async_client_per_event_loop(self):
+        """asyncio clients are shared within a loop and separate across loops"""
+
+        async def get_twice():
+            return redis_manager.get_async_redis_client(), redis_manager.get_async_redis_client()
+
+        a1, a2 = asyncio.run(get_twice())
+        b1, _ = asyncio.run(get_twice())
+
+        assert a1 is a2
+        assert a1 is not b1
+
+    def test_async_client_requires_running_loop(self):
+        """Calling the async accessor outside a loop is an error"""
+        with pytest.raises(RuntimeError):
+            redis_manager.get_async_redis_client()
@@ -3,7 +3,7 @@ Tests for the refactor tool functionality
 """
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -136,9 +136,10 @@ class TestRefactorTool:
         """Test basic refactor tool execution"""
         with patch.object(refactor_tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="test")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             # Mock file processing
@@ -165,9 +166,10 @@ class TestRefactorTool:
         """Test refactor tool execution with style guide examples"""
         with patch.object(refactor_tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="test")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             # Mock file processing
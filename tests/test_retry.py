@@ -0,0 +1,294 @@
+"""Tests for the shared provider retry engine."""
+
+import asyncio
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.dial import DIALModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from providers.retry import RetryBudget, RetryEngine, RetryError, get_retry_after, is_retryable_error
+
+
+class StatusError(Exception):
+    """SDK-style error carrying an HTTP status and response headers"""
+
+    def __init__(self, message, status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def _engine(**kwargs):
+    kwargs.setdefault("max_attempts", 4)
+    kwargs.setdefault("base_delay", 1.0)
+    kwargs.setdefault("max_delay", 30.0)
+    kwargs.setdefault("budget_ratio", 0.2)
+    return RetryEngine(**kwargs)
+
+
+def _failing(errors, result="ok"):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    func.calls = calls
+    return func
+
+
+class TestClassification:
+    """Which errors are retried"""
+
+    def test_status_code_takes_precedence_over_message(self):
+        assert is_retryable_error(StatusError("Service Unavailable", status_code=503))
+        assert not is_retryable_error(StatusError("Request timed out upstream", status_code=401))
+        assert not is_retryable_error(StatusError("Bad request", status_code=400))
+
+    def test_rate_limits_with_structured_bodies(self):
+        tokens = "Error code: 429 - {'error': {'message': 'Slow down', 'type': 'tokens'}}"
+        requests = "Error code: 429 - {'error': {'message': 'Slow down', 'type': 'requests'}}"
+
+        assert not is_retryable_error(StatusError(tokens, status_code=429))
+        assert is_retryable_error(StatusError(requests, status_code=429))
+
+    def test_connection_errors_are_retryable(self):
+        assert is_retryable_error(TimeoutError())
+        assert is_retryable_error(ConnectionResetError())
+        assert not is_retryable_error(ValueError("invalid argument"))
+
+
+class TestRetryAfter:
+    """Server-suggested delays"""
+
+    def test_header_forms(self):
+        assert get_retry_after(StatusError("429", headers={"retry-after-ms": "1500"})) == 1.5
+        assert get_retry_after(StatusError("429", headers={"retry-after": "7"})) == 7.0
+
+        http_date = formatdate(time.time() + 20, usegmt=True)
+        assert 15 < get_retry_after(StatusError("429", headers={"retry-after": http_date})) <= 20
+
+    def test_gemini_retry_info(self):
+        error = Exception("429 RESOURCE_EXHAUSTED. {'@type': 'RetryInfo', 'retryDelay': '12s'}")
+
+        assert get_retry_after(error) == 12.0
+        assert get_retry_after(Exception("503 unavailable")) is None
+
+
+class TestRetryEngine:
+    """Backoff, budgets and metrics"""
+
+    def test_backoff_is_full_jitter_and_capped(self):
+        engine = _engine(base_delay=2.0, max_delay=5.0)
+
+        delays = [engine.backoff(attempt) for attempt in (0, 3) for _ in range(200)]
+
+        assert all(0 <= delay <= 2.0 for delay in delays[:200])
+        assert all(0 <= delay <= 5.0 for delay in delays[200:])
+        assert len(set(delays)) > 100
+
+    def test_retries_until_success(self):
+        engine = _engine()
+        func = _failing([Exception("503 unavailable"), Exception("connection reset")])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            assert engine.call("gemini", func) == "ok"
+
+        assert len(func.calls) == 3
+        assert mock_sleep.call_count == 2
+        stats = engine.get_stats()["gemini"]
+        assert stats["requests"] == 1
+        assert stats["retries"] == 2
+        assert stats["recovered"] == 1
+
+    def test_non_retryable_error_is_not_retried(self):
+        engine = _engine()
+        func = _failing([ValueError("invalid argument")])
+
+        with pytest.raises(RetryError) as exc_info:
+            engine.call("gemini", func)
+
+        assert exc_info.value.attempts == 1
+        assert isinstance(exc_info.value.__cause__, ValueError)
+        assert engine.get_stats()["gemini"]["non_retryable"] == 1
+
+    def test_attempts_are_exhausted(self):
+        engine = _engine(max_attempts=3)
+        func = _failing([Exception("503 unavailable")] * 5)
+
+        with patch("providers.retry.time.sleep"):
+            with pytest.raises(RetryError) as exc_info:
+                engine.call("dial", func)
+
+        assert exc_info.value.attempts == 3
+        assert engine.get_stats()["dial"]["exhausted"] == 1
+
+    def test_retry_after_is_honored(self):
+        engine = _engine()
+        func = _failing([StatusError("rate limited", status_code=429, headers={"retry-after": "4"})])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            engine.call("gemini", func)
+
+        mock_sleep.assert_called_once_with(4.0)
+        assert engine.get_stats()["gemini"]["retry_after_honored"] == 1
+
+    def test_retry_after_beyond_max_delay_fails_fast(self):
+        engine = _engine(max_delay=10.0)
+        func = _failing([StatusError("rate limited", status_code=429, headers={"retry-after": "600"})])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            with pytest.raises(RetryError):
+                engine.call("gemini", func)
+
+        mock_sleep.assert_not_called()
+
+    def test_budget_stops_retry_storms(self):
+        engine = _engine(max_attempts=2, budget_ratio=0.0)
+
+        with patch("providers.retry.time.sleep"):
+            for _ in range(15):
+                with pytest.raises(RetryError):
+                    engine.call("openai", _failing([Exception("503 unavailable")] * 2))
+
+        stats = engine.get_stats()["openai"]
+        assert stats["retries"] == 10  # The reserve
+        assert stats["budget_exhausted"] == 5
+        assert stats["budget_available"] < 1
+
+    def test_budgets_are_per_provider(self):
+        engine = _engine(max_attempts=2, budget_ratio=0.0)
+
+        with patch("providers.retry.time.sleep"):
+            for _ in range(12):
+                with pytest.raises(RetryError):
+                    engine.call("openai", _failing([Exception("503 unavailable")] * 2))
+            assert engine.call("gemini", _failing([Exception("503 unavailable")])) == "ok"
+
+        assert engine.get_stats()["gemini"]["retries"] == 1
+
+    def test_requests_refill_the_budget(self):
+        budget = RetryBudget(ratio=0.5, reserve=1)
+
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_acquire()
+
+    def test_async_call_uses_asyncio_sleep(self):
+        engine = _engine()
+        func = AsyncMock(side_effect=[Exception("503 unavailable"), "ok"])
+
+        with patch("providers.retry.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with patch("providers.retry.time.sleep") as mock_time_sleep:
+                assert asyncio.run(engine.acall("gemini", func)) == "ok"
+
+        mock_sleep.assert_awaited_once()
+        mock_time_sleep.assert_not_called()
+
+    def test_custom_classifier(self):
+        engine = _engine()
+        func = _failing([ValueError("flaky")])
+
+        with patch("providers.retry.time.sleep"):
+            assert engine.call("custom", func, is_retryable=lambda error: True) == "ok"
+
+
+class TestDIALRetries:
+    """DIAL retries through the shared engine"""
+
+    def _provider(self, side_effect):
+        provider = DIALModelProvider("test-key")
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content="routed"), finish_reason="stop")]
+        response.usage = MagicMock(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [response if item == "response" else item for item in side_effect]
+        provider._get_deployment_client = MagicMock(return_value=client)
+        return provider, client
+
+    def test_transient_error_is_retried(self):
+        provider, client = self._provider([Exception("503 unavailable"), "response"])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            response = provider.generate_content(prompt="Hi", model_name="o3")
+
+        assert response.content == "routed"
+        assert client.chat.completions.create.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_non_retryable_error_is_raised_immediately(self):
+        provider, client = self._provider([Exception("401 Unauthorized")])
+
+        with pytest.raises(ValueError, match="DIAL API error for model o3: 401 Unauthorized"):
+            provider.generate_content(prompt="Hi", model_name="o3")
+
+        assert client.chat.completions.create.call_count == 1
+
+
+class TestOpenAICompatibleRetries:
+    """OpenAI-compatible providers retry through the shared engine instead of the SDK"""
+
+    def _provider(self, side_effect):
+        provider = OpenAIModelProvider("test-key")
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content="done"), finish_reason="stop")]
+        response.usage = MagicMock(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [response if item == "response" else item for item in side_effect]
+        provider._client = client
+        return provider, client
+
+    def test_sdk_retries_are_disabled(self):
+        assert OpenAIModelProvider("test-key")._client_kwargs()["max_retries"] == 0
+
+    def test_transient_error_is_retried(self):
+        provider, client = self._provider([StatusError("Service Unavailable", status_code=503), "response"])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            response = provider.generate_content(prompt="Hi", model_name="o3-mini")
+
+        assert response.content == "done"
+        assert client.chat.completions.create.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_exhausted_retries_report_attempts(self):
+        provider, client = self._provider([StatusError("Service Unavailable", status_code=503)] * 5)
+
+        with patch("providers.retry.time.sleep"):
+            with pytest.raises(RuntimeError, match="after 4 attempts: Service Unavailable") as exc_info:
+                provider.generate_content(prompt="Hi", model_name="o3-mini")
+
+        assert isinstance(exc_info.value.__cause__, StatusError)
+
+    def test_flex_fallback_runs_outside_the_retry_loop(self):
+        provider, client = self._provider([StatusError("Invalid service_tier: flex", status_code=400), "response"])
+
+        with patch("providers.retry.time.sleep") as mock_sleep:
+            response = provider.generate_content(prompt="Hi", model_name="o3-mini", service_tier="flex")
+
+        assert response.metadata["service_tier_fallback"] is True
+        assert "service_tier" not in client.chat.completions.create.call_args_list[1].kwargs
+        mock_sleep.assert_not_called()
+
+    def test_async_path_uses_the_engine(self):
+        provider, _ = self._provider([])
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content="done"), finish_reason="stop")]
+        response.usage = MagicMock(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(side_effect=[TimeoutError(), response])
+        provider._async_client = async_client
+
+        with patch("providers.retry.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            result = asyncio.run(provider.agenerate_content(prompt="Hi", model_name="o3-mini"))
+
+        assert result.content == "done"
+        mock_sleep.assert_awaited_once()
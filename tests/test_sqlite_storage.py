@@ -0,0 +1,162 @@
+"""
+Tests for the SQLite conversation storage backend
+"""
+
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils.sqlite_storage import SQLiteStorage
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "conversations.db"
+
+
+@pytest.fixture
+def storage(db_path):
+    storage = SQLiteStorage(path=db_path, commit_interval=60)
+    yield storage
+    storage.shutdown()
+
+
+class TestSQLiteStorage:
+    """Test the Redis-compatible surface of SQLiteStorage"""
+
+    def test_wal_mode(self, storage, db_path):
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_setex_and_get(self, storage):
+        storage.setex("key", 60, "value")
+        assert storage.get("key") == "value"
+        assert storage.mget("key", "missing") == ["value", None]
+
+    def test_expired_key_is_gone(self, storage):
+        storage.setex("key", 60, "value")
+        storage.expire("key", -1)
+        assert storage.get("key") is None
+        assert storage.expire("key", 60) is False
+
+    def test_set_nx_leaves_existing_key(self, storage):
+        assert storage.set("key", "first", ex=60, nx=True) is True
+        assert storage.set("key", "second", ex=60, nx=True) is None
+        assert storage.get("key") == "first"
+        storage.expire("key", -1)
+        assert storage.set("key", "second", ex=60, nx=True) is True
+        assert storage.get("key") == "second"
+
+    def test_list_commands(self, storage):
+        assert storage.rpush("list", "a") == 1
+        assert storage.rpush("list", "b", "c") == 3
+        assert storage.lrange("list", 0, -1) == ["a", "b", "c"]
+        assert storage.lrange("list", 1, 1) == ["b"]
+        assert storage.llen("list") == 3
+        assert storage.lrange("missing", 0, -1) == []
+
+    def test_lrem_from_tail(self, storage):
+        storage.rpush("list", "x", "y", "x", "x")
+        assert storage.lrem("list", -1, "x") == 1
+        assert storage.lrange("list", 0, -1) == ["x", "y", "x"]
+        assert storage.lrem("list", 0, "x") == 2
+        assert storage.lrange("list", 0, -1) == ["y"]
+
+    def test_delete(self, storage):
+        storage.rpush("list", "a")
+        storage.setex("key", 60, "value")
+        assert storage.delete("list", "key", "missing") == 2
+        assert storage.llen("list") == 0
+        assert storage.get("key") is None
+
+    def test_pipeline_returns_results_in_order(self, storage):
+        storage.setex("header", 60, "h")
+        pipe = storage.pipeline(transaction=True)
+        pipe.get("header")
+        pipe.rpush("list", "a")
+        pipe.expire("list", 60)
+        assert pipe.execute() == ["h", 1, True]
+
+    def test_failed_pipeline_rolls_back_its_writes(self, storage, db_path):
+        storage.setex("before", 60, "kept")
+        pipe = storage.pipeline(transaction=True)
+        pipe.setex("thread", 60, "partial")
+        pipe.rpush("turns", "t1")
+
+        with patch.object(storage, "rpush", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with pytest.raises(sqlite3.OperationalError):
+                pipe.execute()
+
+        assert storage.get("thread") is None
+        assert storage.get("before") == "kept"
+        storage.flush()
+        other = sqlite3.connect(db_path)
+        assert other.execute("SELECT key FROM kv").fetchall() == [("before",)]
+        other.close()
+
+    def test_writes_are_batched(self, db_path):
+        storage = SQLiteStorage(path=db_path, commit_interval=60, commit_batch_size=1000)
+        try:
+            storage.setex("key", 60, "value")
+            # Not yet visible to another connection until the batch is committed
+            other = sqlite3.connect(db_path)
+            assert other.execute("SELECT COUNT(*) FROM kv").fetchone()[0] == 0
+            storage.flush()
+            assert other.execute("SELECT COUNT(*) FROM kv").fetchone()[0] == 1
+            other.close()
+            assert storage.get_stats()["commits"] >= 1
+        finally:
+            storage.shutdown()
+
+    def test_data_survives_restart(self, db_path):
+        first = SQLiteStorage(path=db_path, commit_interval=60)
+        first.setex("thread:abc", 60, "header")
+        first.rpush("thread:abc:turns", "t1", "t2")
+        first.shutdown()
+
+        second = SQLiteStorage(path=db_path, commit_interval=60)
+        try:
+            assert second.get("thread:abc") == "header"
+            assert second.lrange("thread:abc:turns", 0, -1) == ["t1", "t2"]
+        finally:
+            second.shutdown()
+
+    def test_expired_keys_purged_on_open(self, db_path):
+        first = SQLiteStorage(path=db_path, commit_interval=60)
+        first.setex("old", 60, "value")
+        first.rpush("old:list", "a")
+        first.expire("old:list", 60)
+        first._conn.execute("UPDATE kv SET expires_at = ?", (time.time() - 1,))
+        first.shutdown()
+
+        second = SQLiteStorage(path=db_path, commit_interval=60)
+        try:
+            assert second._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0] == 0
+            assert second._conn.execute("SELECT COUNT(*) FROM list_items").fetchone()[0] == 0
+        finally:
+            second.shutdown()
+
+
+class TestSQLiteConversationMemory:
+    """Conversation threads persist across storage restarts"""
+
+    def test_thread_continues_after_restart(self, db_path):
+        from utils import conversation_memory, sqlite_storage
+
+        env = {"CONVERSATION_STORAGE": "sqlite", "SQLITE_STORAGE_PATH": str(db_path)}
+        with patch.dict(os.environ, env), patch.object(sqlite_storage, "_storage_instance", None):
+            thread_id = conversation_memory.create_thread("chat", {"prompt": "Hello"})
+            assert conversation_memory.add_turn(thread_id, "user", "First question")
+            sqlite_storage._storage_instance.shutdown()
+
+        with patch.dict(os.environ, env), patch.object(sqlite_storage, "_storage_instance", None):
+            context = conversation_memory.get_thread(thread_id)
+            sqlite_storage._storage_instance.shutdown()
+
+        assert context is not None
+        assert context.tool_name == "chat"
+        assert [turn.content for turn in context.turns] == ["First question"]
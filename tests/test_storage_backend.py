@@ -0,0 +1,293 @@
+"""
+Tests for the in-memory storage backend
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils import storage_backend
+from utils.storage_backend import InMemoryStorage, ShardedInMemoryStorage
+
+
+@pytest.fixture
+def storage():
+    return InMemoryStorage()
+
+
+class TestInMemoryStorage:
+    """Test the Redis-compatible surface of InMemoryStorage"""
+
+    def test_setex_and_get(self, storage):
+        storage.setex("key", 60, "value")
+        assert storage.get("key") == "value"
+
+    def test_expired_key_is_gone(self, storage):
+        storage.setex("key", 60, "value")
+        storage._store["key"] = ("value", time.time() - 1)
+        assert storage.get("key") is None
+
+    def test_list_commands(self, storage):
+        assert storage.rpush("list", "a") == 1
+        assert storage.rpush("list", "b", "c") == 3
+        assert storage.lrange("list", 0, -1) == ["a", "b", "c"]
+        assert storage.lrange("list", 1, 1) == ["b"]
+        assert storage.llen("list") == 3
+        assert storage.lrange("missing", 0, -1) == []
+
+    def test_lrem_from_tail(self, storage):
+        storage.rpush("list", "x", "y", "x", "x")
+        assert storage.lrem("list", -1, "x") == 1
+        assert storage.lrange("list", 0, -1) == ["x", "y", "x"]
+        assert storage.lrem("list", 0, "x") == 2
+        assert storage.lrange("list", 0, -1) == ["y"]
+
+    def test_expire_and_delete(self, storage):
+        storage.rpush("list", "a")
+        assert storage.expire("list", 60) is True
+        assert storage.expire("missing", 60) is False
+        assert storage.delete("list", "missing") == 1
+        assert storage.llen("list") == 0
+
+    def test_pipeline_returns_results_in_order(self, storage):
+        storage.setex("header", 60, "h")
+        pipe = storage.pipeline(transaction=True)
+        pipe.get("header")
+        pipe.rpush("list", "a")
+        pipe.expire("list", 60)
+        assert pipe.execute() == ["h", 1, True]
+
+    def test_pipeline_rejects_unknown_commands(self, storage):
+        with pytest.raises(AttributeError):
+            storage.pipeline().not_a_command("key")
+
+    def test_mget(self, storage):
+        storage.setex("a", 60, "1")
+        storage.setex("b", 60, "2")
+        assert storage.mget("a", "missing", "b") == ["1", None, "2"]
+
+    def test_setex_accepts_timedelta(self, storage):
+        from datetime import timedelta
+
+        storage.setex("key", timedelta(minutes=1), "value")
+        assert storage.get("key") == "value"
+
+    def test_set_nx_leaves_existing_key(self, storage):
+        assert storage.set("key", "first", ex=60, nx=True) is True
+        assert storage.set("key", "second", ex=60, nx=True) is None
+        assert storage.get("key") == "first"
+        assert storage.set("key", "second") is True
+        assert storage.get("key") == "second"
+
+
+class TestInMemoryStorageBudget:
+    """Test byte-budgeted LRU eviction, heap expiry and counters"""
+
+    def test_lru_eviction_over_budget(self):
+        storage = InMemoryStorage(max_bytes=600)
+        storage.setex("a", 60, "x" * 150)
+        storage.setex("b", 60, "x" * 150)
+        # Touch "a" so "b" becomes least recently used
+        assert storage.get("a") is not None
+        storage.setex("c", 60, "x" * 150)
+
+        assert storage.get("b") is None
+        assert storage.get("a") is not None
+        assert storage.get("c") is not None
+        stats = storage.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes_resident"] <= 600
+
+    def test_key_just_written_is_not_evicted(self):
+        storage = InMemoryStorage(max_bytes=100)
+        storage.setex("small", 60, "x")
+        storage.setex("big", 60, "x" * 1000)
+
+        assert storage.get("big") is not None
+        assert storage.get("small") is None
+
+    def test_list_growth_is_accounted(self):
+        storage = InMemoryStorage(max_bytes=0)
+        storage.rpush("list", "a" * 100)
+        grown = storage.get_stats()["bytes_resident"]
+        storage.rpush("list", "b" * 100)
+        assert storage.get_stats()["bytes_resident"] > grown
+
+        storage.lrem("list", 0, "b" * 100)
+        assert storage.get_stats()["bytes_resident"] == grown
+
+        storage.delete("list")
+        assert storage.get_stats()["bytes_resident"] == 0
+
+    def test_cleanup_only_pops_expired(self):
+        storage = InMemoryStorage()
+        storage.setex("live", 60, "value")
+        storage.setex("dead", 60, "value")
+        storage.expire("dead", -1)
+
+        storage._cleanup_expired()
+
+        stats = storage.get_stats()
+        assert stats["keys"] == 1
+        assert stats["expirations"] == 1
+        assert storage.get("live") == "value"
+
+    def test_refreshed_ttl_survives_stale_heap_entry(self):
+        storage = InMemoryStorage()
+        storage.setex("key", 60, "value")
+        # Old heap entry becomes stale once the TTL is refreshed
+        storage._expiry_heap[0] = (time.time() - 1, "key")
+        storage.expire("key", 60)
+
+        storage._cleanup_expired()
+
+        assert storage.get("key") == "value"
+
+    def test_hit_and_miss_counters(self, storage):
+        storage.setex("key", 60, "value")
+        storage.get("key")
+        storage.get("missing")
+        storage.lrange("missing", 0, -1)
+
+        stats = storage.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+
+class TestShardedInMemoryStorage:
+    """Test the lock-striped storage backend"""
+
+    @pytest.fixture
+    def sharded(self):
+        storage = ShardedInMemoryStorage(num_shards=8, max_bytes=0)
+        yield storage
+        storage.shutdown()
+
+    def test_thread_keys_share_a_shard(self, sharded):
+        assert sharded._shard_index("thread:abc") == sharded._shard_index("thread:abc:turns")
+
+    def test_redis_surface(self, sharded):
+        sharded.setex("thread:a", 60, "header")
+        sharded.rpush("thread:a:turns", "t1", "t2")
+        assert sharded.get("thread:a") == "header"
+        assert sharded.lrange("thread:a:turns", 0, -1) == ["t1", "t2"]
+        assert sharded.lrem("thread:a:turns", -1, "t2") == 1
+        assert sharded.llen("thread:a:turns") == 1
+        assert sharded.expire("thread:a:turns", 60) is True
+
+    def test_mget_and_delete_span_shards(self, sharded):
+        keys = [f"thread:{i}" for i in range(32)]
+        for i, key in enumerate(keys):
+            sharded.setex(key, 60, str(i))
+
+        assert sharded.mget(*keys, "thread:missing") == [str(i) for i in range(32)] + [None]
+        assert sharded.delete(*keys) == 32
+        assert sharded.get_stats()["keys"] == 0
+
+    def test_pipeline_across_shards(self, sharded):
+        sharded.setex("thread:a", 60, "a")
+        sharded.setex("thread:b", 60, "b")
+        pipe = sharded.pipeline(transaction=True)
+        pipe.get("thread:a")
+        pipe.get("thread:b")
+        pipe.mget("thread:a", "thread:b")
+        pipe.delete("thread:a", "thread:b")
+        assert pipe.execute() == ["a", "b", ["a", "b"], 2]
+
+    def test_stats_are_summed(self, sharded):
+        sharded.setex("thread:a", 60, "a")
+        sharded.get("thread:a")
+        sharded.get("thread:missing")
+
+        stats = sharded.get_stats()
+        assert stats["shards"] == 8
+        assert stats["keys"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_concurrent_appends(self, sharded):
+        def append(thread_num):
+            for i in range(200):
+                pipe = sharded.pipeline(transaction=True)
+                pipe.rpush(f"thread:{thread_num % 4}:turns", str(i))
+                pipe.expire(f"thread:{thread_num % 4}:turns", 60)
+                pipe.execute()
+
+        workers = [threading.Thread(target=append, args=(n,)) for n in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert sum(sharded.llen(f"thread:{n}:turns") for n in range(4)) == 1600
+
+    def test_backend_selection_from_env(self):
+        with patch.object(storage_backend, "_storage_instance", None):
+            with patch.dict("os.environ", {"MEMORY_STORAGE_SHARDS": "4"}):
+                backend = storage_backend.get_storage_backend()
+            assert isinstance(backend, ShardedInMemoryStorage)
+            backend.shutdown()
+
+        with patch.object(storage_backend, "_storage_instance", None):
+            with patch.dict("os.environ", {"MEMORY_STORAGE_SHARDS": "1"}):
+                backend = storage_backend.get_storage_backend()
+            assert isinstance(backend, InMemoryStorage)
+            backend.shutdown()
+
+
+class TestInMemorySets:
+    """Test the Redis-style set commands"""
+
+    def test_set_commands(self, storage):
+        assert storage.sadd("set", "a", "b", "a") == 2
+        assert storage.sadd("set", "b", "c") == 1
+        assert storage.smembers("set") == {"a", "b", "c"}
+        assert storage.scard("set") == 3
+        assert storage.srem("set", "a", "missing") == 1
+        assert storage.scard("set") == 2
+
+    def test_empty_set_is_deleted(self, storage):
+        storage.sadd("set", "a")
+        storage.srem("set", "a")
+        assert storage.get_stats()["keys"] == 0
+        assert storage.smembers("set") == set()
+
+
+class TestInMemorySortedSets:
+    """Test the Redis-style sorted set commands"""
+
+    def test_zadd_and_ranges(self, storage):
+        assert storage.zadd("z", {"a": 3, "b": 1, "c": 2}) == 3
+        assert storage.zadd("z", {"a": 0}) == 0
+        assert storage.zrange("z", 0, -1) == ["a", "b", "c"]
+        assert storage.zrevrange("z", 0, 1) == ["c", "b"]
+        assert storage.zrangebyscore("z", 1, 2) == ["b", "c"]
+        assert storage.zrangebyscore("z", "-inf", "+inf", start=1, num=1) == ["b"]
+        assert storage.zrange("z", 0, 0, withscores=True) == [("a", 0.0)]
+        assert storage.zcard("z") == 3
+
+    def test_zrem_and_zremrangebyscore(self, storage):
+        storage.zadd("z", {"a": 1, "b": 2, "c": 3})
+        assert storage.zrem("z", "a", "missing") == 1
+        assert storage.zremrangebyscore("z", 0, 2) == 1
+        assert storage.zrange("z", 0, -1) == ["c"]
+
+    def test_order_is_maintained_across_updates(self, storage):
+        storage.zadd("z", {"b": 2, "a": 2, "c": 5, "d": float("inf")})
+        storage.zadd("z", {"c": 1, "b": 2})
+        storage.zrem("z", "a")
+
+        assert storage.zrange("z", 0, -1, withscores=True) == [("c", 1.0), ("b", 2.0), ("d", float("inf"))]
+        assert storage.zrangebyscore("z", 2, "+inf") == ["b", "d"]
+        assert storage.zrangebyscore("z", "-inf", 1.5) == ["c"]
+        assert storage.zrevrange("z", 1, -1) == ["b", "c"]
+        assert storage.zrange("z", -2, -1, desc=True) == ["b", "c"]
+        assert storage.zrange("missing", 0, -1) == []
+
+    def test_pipeline_passes_keyword_arguments(self, storage):
+        storage.zadd("z", {"a": 1, "b": 2})
+        pipe = storage.pipeline()
+        pipe.zrange("z", 0, -1, desc=True)
+        assert pipe.execute() == [["b", "a"]]
@@ -0,0 +1,255 @@
+"""Tests for streamed model output and MCP progress notifications."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse, StreamChunk
+from providers.gemini import GeminiModelProvider
+from providers.openai_provider import OpenAIModelProvider
+from tests.mock_helpers import FakeProvider, create_mock_provider
+from utils.progress import ProgressReporter, agenerate_with_progress, get_progress_reporter, progress_reporting
+
+
+class FakeAsyncStream:
+    """Stands in for openai.AsyncStream"""
+
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self.events:
+            yield event
+
+
+def _completion_event(content=None, finish_reason=None, usage=None, choices=True):
+    choice = SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)
+    return SimpleNamespace(
+        choices=[choice] if choices else [],
+        usage=usage,
+        model="o3-mini",
+        id="chatcmpl-1",
+        created=1234567890,
+    )
+
+
+class FakeSession:
+    def __init__(self, fail=False):
+        self.notifications = []
+        self.fail = fail
+
+    async def send_progress_notification(self, progress_token, progress, total=None, message=None, **kwargs):
+        if self.fail:
+            raise RuntimeError("client went away")
+        self.notifications.append((progress_token, progress, message))
+
+
+class TestProviderStreaming:
+    """Streaming iterators and response assembly"""
+
+    def test_default_stream_is_a_single_chunk(self):
+        provider = FakeProvider()
+
+        async def collect():
+            return [chunk async for chunk in provider.astream_content("hi", "model")]
+
+        chunks = asyncio.run(collect())
+
+        assert len(chunks) == 1
+        assert chunks[0].content == "custom:hi"
+        assert chunks[0].finish_reason == "stop"
+        assert chunks[0].usage["total_tokens"] == 3
+
+    def test_streaming_response_is_assembled(self):
+        provider = FakeProvider()
+        seen = []
+
+        async def on_chunk(chunk):
+            seen.append(chunk.content)
+
+        response = asyncio.run(provider.agenerate_content_streaming("hi", "model", on_chunk=on_chunk))
+
+        assert seen == ["custom:hi"]
+        assert response.content == "custom:hi"
+        assert response.friendly_name == "Fake"
+        assert response.metadata["finish_reason"] == "stop"
+
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    def test_openai_compatible_streams_deltas_and_usage(self, mock_async_openai_class):
+        usage = SimpleNamespace(prompt_tokens=7, completion_tokens=3, total_tokens=10)
+        stream = FakeAsyncStream(
+            [
+                _completion_event("Hel"),
+                _completion_event("lo"),
+                _completion_event(None, finish_reason="stop"),
+                _completion_event(usage=usage, choices=False),
+            ]
+        )
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=stream)
+        mock_async_openai_class.return_value = mock_client
+        provider = OpenAIModelProvider("test-key")
+        seen = []
+
+        async def on_chunk(chunk):
+            seen.append(chunk)
+
+        response = asyncio.run(
+            provider.agenerate_content_streaming(prompt="Hi", model_name="o3mini", temperature=1.0, on_chunk=on_chunk)
+        )
+
+        call_kwargs = mock_client.chat.completions.create.call_args[1]
+        assert call_kwargs["model"] == "o3-mini"
+        assert call_kwargs["stream"] is True
+        assert call_kwargs["stream_options"] == {"include_usage": True}
+        assert [chunk.content for chunk in seen[:2]] == ["Hel", "lo"]
+        assert response.content == "Hello"
+        assert response.usage == {"input_tokens": 7, "output_tokens": 3, "total_tokens": 10}
+        assert response.metadata["finish_reason"] == "stop"
+        assert response.model_name == "o3-mini"
+        assert stream.closed
+
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    def test_openai_compatible_falls_back_when_streaming_is_refused(self, mock_async_openai_class):
+        completion = MagicMock()
+        completion.choices = [MagicMock()]
+        completion.choices[0].message.content = "Whole response"
+        completion.choices[0].finish_reason = "stop"
+        completion.usage = None
+
+        async def create(**kwargs):
+            if kwargs.get("stream"):
+                raise Exception("Your organization must be verified to stream this model")
+            return completion
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=create)
+        mock_async_openai_class.return_value = mock_client
+        provider = OpenAIModelProvider("test-key")
+
+        response = asyncio.run(provider.agenerate_content_streaming(prompt="Hi", model_name="o3-mini", temperature=1.0))
+
+        assert response.content == "Whole response"
+        assert mock_client.chat.completions.create.await_count == 2
+
+    def test_gemini_streams_chunks(self):
+        def chunk(text, finish_reason=None, output_tokens=None):
+            response = MagicMock()
+            response.text = text
+            response.candidates = [SimpleNamespace(finish_reason=finish_reason)]
+            response.usage_metadata = SimpleNamespace(
+                prompt_token_count=5, candidates_token_count=output_tokens, total_token_count=None
+            )
+            return response
+
+        async def stream():
+            yield chunk("Hello ")
+            yield chunk("world", finish_reason="STOP", output_tokens=2)
+
+        provider = GeminiModelProvider("test-key")
+        client = MagicMock()
+        client.aio.models.generate_content_stream = AsyncMock(return_value=stream())
+        provider._client = client
+
+        response = asyncio.run(provider.agenerate_content_streaming(prompt="Hi", model_name="flash"))
+
+        assert response.content == "Hello world"
+        assert response.metadata["finish_reason"] == "STOP"
+        assert response.usage["output_tokens"] == 2
+        assert response.model_name == "gemini-2.5-flash"
+        assert response.friendly_name == "Gemini"
+
+
+class TestProgressReporter:
+    """Throttled progress notifications"""
+
+    def test_first_and_last_chunks_are_sent_and_the_rest_batched(self):
+        session = FakeSession()
+        reporter = ProgressReporter(session, "token-1", min_interval=60)
+
+        async def stream():
+            await reporter.on_chunk(StreamChunk(content="a"))
+            await reporter.on_chunk(StreamChunk(content="bc"))
+            await reporter.on_chunk(StreamChunk(content="d"))
+            await reporter.on_chunk(StreamChunk(finish_reason="stop"))
+
+        asyncio.run(stream())
+
+        assert session.notifications == [("token-1", 1.0, "a"), ("token-1", 4.0, "bcd")]
+
+    def test_send_failure_disables_reporting(self):
+        session = FakeSession(fail=True)
+        reporter = ProgressReporter(session, "token-1", min_interval=0)
+
+        async def stream():
+            await reporter.on_chunk(StreamChunk(content="a"))
+            await reporter.on_chunk(StreamChunk(content="b", finish_reason="stop"))
+
+        asyncio.run(stream())
+
+        assert reporter.notifications == 0
+        assert reporter.received_chars == 2
+
+    def test_agenerate_with_progress_streams_only_with_a_reporter(self):
+        provider = create_mock_provider()
+        provider.agenerate_content_streaming = AsyncMock(return_value=ModelResponse(content="streamed"))
+
+        assert asyncio.run(agenerate_with_progress(provider, prompt="Hi", model_name="flash")).content == (
+            "Test response"
+        )
+        provider.agenerate_content_streaming.assert_not_called()
+
+        reporter = ProgressReporter(FakeSession(), "token-1")
+        with progress_reporting(reporter):
+            response = asyncio.run(agenerate_with_progress(provider, prompt="Hi", model_name="flash"))
+        assert get_progress_reporter() is None
+
+        assert response.content == "streamed"
+        assert provider.agenerate_content_streaming.call_args[1]["on_chunk"] == reporter.on_chunk
+
+
+class TestServerProgress:
+    """The server streams tool output when the client sends a progress token"""
+
+    def test_no_reporter_outside_a_request(self):
+        from server import get_request_progress_reporter
+
+        assert get_request_progress_reporter() is None
+
+    @pytest.mark.asyncio
+    @patch("tools.base.BaseTool.get_model_provider")
+    async def test_chat_sends_progress_notifications(self, mock_get_provider):
+        from server import handle_call_tool
+
+        session = FakeSession()
+
+        async def stream_response(on_chunk=None, **kwargs):
+            await on_chunk(StreamChunk(content="Streamed "))
+            await on_chunk(StreamChunk(content="answer", finish_reason="STOP"))
+            return ModelResponse(content="Streamed answer", metadata={"finish_reason": "STOP"})
+
+        mock_provider = create_mock_provider()
+        mock_provider.agenerate_content_streaming = AsyncMock(side_effect=stream_response)
+        mock_get_provider.return_value = mock_provider
+
+        with patch("server.get_request_progress_reporter", return_value=ProgressReporter(session, "token-1")):
+            result = await handle_call_tool("chat", {"prompt": "Hello", "model": "flash"})
+
+        output = json.loads(result[0].text)
+        assert output["status"] in ["success", "continuation_available"]
+        assert "Streamed answer" in output["content"]
+        assert [message for _, _, message in session.notifications] == ["Streamed ", "answer"]
+        mock_provider.agenerate_content.assert_not_called()
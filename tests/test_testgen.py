@@ -149,7 +149,7 @@ class TestComprehensive(unittest.TestCase):
         # Mock provider
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Generated comprehensive test suite with edge cases",
             usage={"input_tokens": 100, "output_tokens": 200},
             model_name="gemini-2.5-flash-preview-05-20",
@@ -172,7 +172,7 @@ class TestComprehensive(unittest.TestCase):
     async def test_execute_with_test_examples(self, mock_get_provider, tool, temp_files):
         """Test execution with test examples"""
         mock_provider = create_mock_provider()
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Generated tests following the provided examples",
             usage={"input_tokens": 150, "output_tokens": 250},
             model_name="gemini-2.5-flash-preview-05-20",
@@ -202,7 +202,7 @@ class TestComprehensive(unittest.TestCase):
     def test_process_test_examples_budget_allocation(self, tool, temp_files):
         """Test token budget allocation for test examples"""
         with patch.object(tool, "filter_new_files") as mock_filter:
-            mock_filter.return_value = [temp_files["small_test"], temp_files["large_test"]]
+            mock_filter.return_value = ([temp_files["small_test"], temp_files["large_test"]], {})
 
             with patch.object(tool, "_prepare_file_content_for_prompt") as mock_prepare:
                 mock_prepare.return_value = (
@@ -225,7 +225,7 @@ class TestComprehensive(unittest.TestCase):
         """Test that test examples are sorted by size (smallest first)"""
         with patch.object(tool, "filter_new_files") as mock_filter:
             # Return files in random order
-            mock_filter.return_value = [temp_files["large_test"], temp_files["small_test"]]
+            mock_filter.return_value = ([temp_files["large_test"], temp_files["small_test"]], {})
 
             with patch.object(tool, "_prepare_file_content_for_prompt") as mock_prepare:
                 mock_prepare.return_value = ("test content", [temp_files["small_test"], temp_files["large_test"]], None)
@@ -0,0 +1,244 @@
+"""
+Tests for deadline-bounded file reads
+"""
+
+import asyncio
+import errno
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils import timed_reader
+from utils.timed_reader import LatencyHistogram, TimedReader
+
+
+@pytest.fixture
+def reader():
+    reader = TimedReader(max_workers=2)
+    yield reader
+    reader.shutdown()
+
+
+class TestTimedReader:
+    """Test reads, deadlines and the latency histogram"""
+
+    def test_read_text(self, reader, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_bytes(b"caf\xc3\xa9 \xff")
+
+        assert reader.read_text(source) == "café �"
+        assert reader.get_stats()["latency"]["count"] == 1
+
+    def test_read_from_worker_thread(self, reader, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("from a thread", encoding="utf-8")
+        results = []
+
+        thread = threading.Thread(target=lambda: results.append(reader.read_text(source)))
+        thread.start()
+        thread.join()
+
+        assert results == ["from a thread"]
+
+    def test_async_read(self, reader, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("async", encoding="utf-8")
+
+        assert asyncio.run(reader.aread_text(source)) == "async"
+
+    def test_timeout_raises_etimedout(self, reader, tmp_path):
+        release = threading.Event()
+
+        def stuck_read(path):
+            release.wait(5)
+            return ""
+
+        try:
+            with patch.object(timed_reader, "_read_text", side_effect=stuck_read):
+                with pytest.raises(OSError) as exc_info:
+                    reader.read_text(tmp_path / "stuck.txt", timeout=0.05)
+        finally:
+            release.set()
+
+        assert exc_info.value.errno == errno.ETIMEDOUT
+        assert reader.get_stats()["timeouts"] == 1
+
+    def test_async_timeout_raises_etimedout(self, reader, tmp_path):
+        release = threading.Event()
+
+        def stuck_read(path):
+            release.wait(5)
+            return ""
+
+        try:
+            with patch.object(timed_reader, "_read_text", side_effect=stuck_read):
+                with pytest.raises(OSError) as exc_info:
+                    asyncio.run(reader.aread_text(tmp_path / "stuck.txt", timeout=0.05))
+        finally:
+            release.set()
+
+        assert exc_info.value.errno == errno.ETIMEDOUT
+
+    def test_deadline_covers_time_queued(self, tmp_path):
+        reader = TimedReader(max_workers=2)
+        source = tmp_path / "a.txt"
+        source.write_text("queued", encoding="utf-8")
+        release = threading.Event()
+
+        def stuck_read(path):
+            release.wait(5)
+            return ""
+
+        try:
+            # Both workers block on reads nobody waits for
+            for i in range(2):
+                reader.submit(stuck_read, tmp_path / f"stuck{i}.txt")
+            start = time.monotonic()
+            with pytest.raises(OSError) as exc_info:
+                reader.submit(timed_reader._read_text, source, timeout=0.2).result()
+            assert exc_info.value.errno == errno.ETIMEDOUT
+            assert time.monotonic() - start < 1
+        finally:
+            release.set()
+            reader.shutdown()
+
+    def test_overdue_reads_are_abandoned_without_a_waiter(self, tmp_path):
+        reader = TimedReader(max_workers=1, max_stuck=2)
+        source = tmp_path / "a.txt"
+        source.write_text("healthy", encoding="utf-8")
+        release = threading.Event()
+
+        def stuck_read(path):
+            release.wait(5)
+            return ""
+
+        try:
+            stuck = reader.submit(stuck_read, tmp_path / "stuck.txt", timeout=0.05)
+            deadline = time.monotonic() + 2
+            while not stuck.future.done() and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert reader.get_stats()["stuck"] == 1
+            # A replacement worker serves new reads
+            assert reader.read_text(source, timeout=1) == "healthy"
+        finally:
+            release.set()
+            reader.shutdown()
+
+    def test_stuck_reads_beyond_pool_size(self, tmp_path):
+        reader = TimedReader(max_workers=2, max_stuck=3)
+        source = tmp_path / "a.txt"
+        source.write_text("healthy", encoding="utf-8")
+        release = threading.Event()
+
+        def stuck_read(path):
+            release.wait(5)
+            return ""
+
+        try:
+            # More stuck reads than workers: each abandoned worker is replaced
+            for i in range(2):
+                with pytest.raises(OSError) as exc_info:
+                    reader.run(stuck_read, tmp_path / f"stuck{i}.txt", timeout=0.05)
+                assert exc_info.value.errno == errno.ETIMEDOUT
+            assert reader.read_text(source, timeout=1) == "healthy"
+            assert reader.get_stats()["stuck"] == 2
+
+            # Once max_stuck reads are blocked, new reads fail fast instead of queueing
+            with pytest.raises(OSError):
+                reader.run(stuck_read, tmp_path / "stuck2.txt", timeout=0.05)
+            start = time.monotonic()
+            with pytest.raises(OSError) as exc_info:
+                reader.read_text(source, timeout=1)
+            assert exc_info.value.errno == errno.EAGAIN
+            assert time.monotonic() - start < 0.5
+            assert reader.get_stats()["rejected"] == 1
+        finally:
+            release.set()
+
+        # Stuck reads that finish free their slots
+        deadline = time.monotonic() + 5
+        while reader.get_stats()["stuck"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert reader.read_text(source) == "healthy"
+        reader.shutdown()
+
+    def test_nested_reads_run_on_the_worker(self, reader, tmp_path):
+        source = tmp_path / "a.txt"
+        source.write_text("nested", encoding="utf-8")
+        outer = TimedReader(max_workers=1)
+        threads = []
+
+        def inner_read(path):
+            threads.append(threading.current_thread())
+            return path.read_text()
+
+        def read_on_worker(path):
+            threads.append(threading.current_thread())
+            return reader.run(inner_read, path)
+
+        try:
+            assert outer.run(read_on_worker, source) == "nested"
+        finally:
+            outer.shutdown()
+
+        assert threads[0] is threads[1]
+
+    def test_errors_are_counted(self, reader, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            reader.read_text(tmp_path / "missing.txt")
+
+        assert reader.get_stats()["errors"] == 1
+
+
+class TestLatencyHistogram:
+    """Test bucket assignment"""
+
+    def test_buckets(self):
+        histogram = LatencyHistogram(buckets_ms=(1, 10))
+        for seconds in (0.0005, 0.001, 0.005, 0.5):
+            histogram.record(seconds)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot["buckets"] == {"<=1ms": 2, "<=10ms": 1, ">10ms": 1}
+        assert snapshot["count"] == 4
+        assert snapshot["max_seconds"] == 0.5
+
+
+class TestReadFileContentTimeout:
+    """read_file_content uses the timed reader from any thread"""
+
+    def test_read_in_worker_thread_does_not_install_signal_handler(self, project_path):
+        from utils.file_cache import get_file_cache
+        from utils.file_utils import read_file_content
+
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+        get_file_cache().clear()
+        results = []
+
+        with patch("signal.signal") as install_handler:
+            thread = threading.Thread(target=lambda: results.append(read_file_content(str(source))))
+            thread.start()
+            thread.join()
+
+        assert "value = 1" in results[0][0]
+        install_handler.assert_not_called()
+
+    def test_timeout_is_reported_as_error_content(self, project_path):
+        from utils.file_cache import get_file_cache
+        from utils.file_utils import read_file_content
+
+        source = project_path / "module.py"
+        source.write_text("value = 1\n", encoding="utf-8")
+        get_file_cache().clear()
+        timeout_error = OSError(errno.ETIMEDOUT, "File read timed out after 30 seconds")
+
+        with patch.object(TimedReader, "run", side_effect=timeout_error):
+            content, _ = read_file_content(str(source))
+
+        assert "--- ERROR READING FILE:" in content
+        assert "timed out" in content
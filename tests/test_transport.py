@@ -0,0 +1,144 @@
+"""Tests for the shared HTTP transport manager."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from providers.openai_provider import OpenAIModelProvider
+from providers.transport import TransportManager, get_origin, get_transport_manager
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_origin_normalization():
+    assert get_origin("https://api.openai.com/v1") == "https://api.openai.com:443"
+    assert get_origin("HTTPS://API.openai.com:443/other") == "https://api.openai.com:443"
+    assert get_origin("http://localhost:11434/v1") == "http://localhost:11434"
+
+
+class TestLeases:
+    """Clients are shared per origin and closed with their last lease"""
+
+    def test_same_origin_shares_a_client(self):
+        manager = TransportManager(http2=False)
+
+        first = manager.acquire("https://api.x.ai/v1")
+        second = manager.acquire("https://api.x.ai/v2")
+        other_host = manager.acquire("https://openrouter.ai/api/v1")
+        async_client = manager.acquire("https://api.x.ai/v1", asynchronous=True)
+        partitioned = manager.acquire("https://api.x.ai/v1", partition="dial")
+
+        assert first is second
+        assert len({id(first), id(other_host), id(async_client), id(partitioned)}) == 4
+        assert isinstance(async_client, httpx.AsyncClient)
+        manager.close_all()
+
+    def test_last_release_closes_the_client(self):
+        manager = TransportManager(http2=False)
+        first = manager.acquire("https://api.x.ai/v1")
+        manager.acquire("https://api.x.ai/v1")
+
+        manager.release(first)
+        assert not first.is_closed
+        manager.release(first)
+        assert first.is_closed
+
+        replacement = manager.acquire("https://api.x.ai/v1")
+        assert replacement is not first
+        manager.close_all()
+
+    def test_pool_limits_come_from_the_environment(self):
+        env = {
+            "PROVIDER_HTTP_MAX_CONNECTIONS": "7",
+            "PROVIDER_HTTP_KEEPALIVE_EXPIRY": "45",
+            "PROVIDER_HTTP_MAX_KEEPALIVE": "not-a-number",
+        }
+        with patch.dict("os.environ", env):
+            manager = TransportManager()
+
+        assert manager.max_connections == 7
+        assert manager.keepalive_expiry == 45.0
+        assert manager.max_keepalive == 20
+
+    def test_http2_needs_the_h2_package(self):
+        with patch("providers.transport.importlib.util.find_spec", return_value=None):
+            assert TransportManager().http2 is False
+        with patch.dict("os.environ", {"PROVIDER_HTTP2": "false"}):
+            assert TransportManager().http2 is False
+
+
+class TestKeepAlive:
+    """Steady-state requests reuse pooled connections"""
+
+    def test_requests_reuse_one_connection(self, local_server):
+        manager = TransportManager(http2=False)
+        client = manager.acquire(local_server)
+
+        for _ in range(3):
+            assert client.get(f"{local_server}/v1/models").text == "ok"
+
+        stats = manager.get_stats()[f"{get_origin(local_server)} [default]"]
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+        assert stats["tls_handshakes"] == 0
+        assert stats["connections"] == 1
+        assert stats["idle"] == 1
+        assert stats["leases"] == 1
+        manager.close_all()
+
+    def test_request_hooks_run_on_a_partition(self, local_server):
+        seen = []
+        manager = TransportManager(http2=False)
+        client = manager.acquire(
+            local_server, partition="hooked", event_hooks={"request": [lambda request: seen.append(request.url.path)]}
+        )
+
+        client.get(f"{local_server}/deployments/a")
+
+        assert seen == ["/deployments/a"]
+        assert manager.get_stats()[f"{get_origin(local_server)} [hooked]"]["requests"] == 1
+        manager.close_all()
+
+
+class TestProviderClients:
+    """OpenAI-compatible providers lease shared clients"""
+
+    def test_providers_share_the_pool_and_release_on_close(self):
+        first = OpenAIModelProvider("key-1")
+        second = OpenAIModelProvider("key-2")
+
+        assert first.client._client is second.client._client
+        assert first.async_client._client is second.async_client._client
+        assert first.client.api_key != second.client.api_key
+
+        shared = first.client._client
+        first.close()
+        assert not shared.is_closed
+        second.close()
+        assert shared.is_closed
+        assert get_transport_manager().get_stats() == {}
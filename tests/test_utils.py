@@ -2,6 +2,13 @@
 Tests for utility functions
 """
 
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
 from utils import check_token_limit, estimate_tokens, read_file_content, read_files
 
 
@@ -177,10 +184,11 @@ class TestFileUtils:
 
         content = read_files([str(large_file)])
 
-        assert "--- FILE TOO LARGE:" in content
-        assert "2,000,000 bytes" in content
-        # File too large message should be present
-        assert "--- FILE TOO LARGE:" in content
+        # Only the start of the single over-budget line is embedded
+        assert "[PARTIAL FILE: file exceeds remaining token budget; showing line 1 of 1]" in content
+        assert "more characters]" in content
+        assert "SKIPPED FILES" not in content
+        assert len(content) < 1_000_000
 
     def test_read_files_file_extensions(self, project_path):
         """Test file extension filtering"""
@@ -200,6 +208,236 @@ class TestFileUtils:
         assert "binary.exe" not in content
         assert "image.jpg" not in content
 
+    def test_read_files_parallel_preserves_order(self, project_path):
+        """Files finishing out of order are still emitted in sorted order"""
+        for i in range(12):
+            (project_path / f"file{i:02d}.py").write_text(f"value = {i}\n", encoding="utf-8")
+
+        from utils import file_utils
+
+        original = file_utils.read_file_content
+
+        def slow_early_files(file_path, **kwargs):
+            # Earlier files finish last
+            time.sleep(0.002 * (12 - int(file_path[-5:-3])))
+            return original(file_path, **kwargs)
+
+        with patch.object(file_utils, "read_file_content", side_effect=slow_early_files):
+            content = read_files([str(project_path)])
+
+        positions = [content.index(f"file{i:02d}.py") for i in range(12)]
+        assert positions == sorted(positions)
+
+    def test_read_files_cancels_reads_after_budget_exhausted(self, project_path, monkeypatch):
+        """Reads queued beyond the budget cursor are cancelled"""
+        monkeypatch.setenv("FILE_READ_WORKERS", "2")
+        for i in range(40):
+            (project_path / f"file{i:02d}.txt").write_text("x" * 4000, encoding="utf-8")
+
+        from utils import file_utils
+
+        original = file_utils.read_file_content
+        read_paths = []
+        lock = threading.Lock()
+
+        def tracking_read(file_path, **kwargs):
+            with lock:
+                read_paths.append(file_path)
+            return original(file_path, **kwargs)
+
+        with (
+            patch.object(file_utils, "_read_executor", None),
+            patch.object(file_utils, "read_file_content", side_effect=tracking_read),
+            # Plan every file, as if their sizes had been underestimated
+            patch.object(file_utils, "plan_files_for_budget", side_effect=lambda files, *args, **kwargs: (files, [])),
+        ):
+            # Budget for exactly one file
+            _, file_tokens = original(str(project_path / "file00.txt"))
+            content = read_files([str(project_path)], max_tokens=50_000 + file_tokens)
+            file_utils._read_executor.shutdown(wait=True)
+
+        assert "--- SKIPPED FILES (TOKEN LIMIT) ---" in content
+        assert content.count("--- BEGIN FILE:") == 1
+        # Only the read-ahead window was ever started
+        assert len(read_paths) <= 2 * file_utils.FILE_READ_AHEAD_FACTOR + 2
+
+    def test_read_files_planner_skips_without_reading(self, project_path):
+        """Files that cannot fit are skipped from their size alone"""
+        from utils import file_utils
+
+        (project_path / "small.txt").write_text("s" * 400, encoding="utf-8")
+        (project_path / "huge.txt").write_text("h" * 40_000, encoding="utf-8")
+
+        with patch.object(file_utils, "read_file_content", wraps=file_utils.read_file_content) as reader:
+            content = read_files([str(project_path)], max_tokens=51_000)
+
+        assert [call.args[0] for call in reader.call_args_list] == [str(project_path / "small.txt")]
+        assert "s" * 400 in content
+        assert "--- SKIPPED FILES (TOKEN LIMIT) ---" in content
+        assert "huge.txt" in content
+
+    def test_read_files_explicit_files_claim_budget_first(self, project_path):
+        """A file named directly wins over larger-budget directory contents"""
+        docs = project_path / "docs"
+        docs.mkdir()
+        (docs / "a.txt").write_text("a" * 2400, encoding="utf-8")
+        named = project_path / "named.txt"
+        named.write_text("n" * 2400, encoding="utf-8")
+
+        # Room for one of the two files
+        content = read_files([str(docs), str(named)], max_tokens=50_800)
+
+        assert "n" * 2400 in content
+        assert "a" * 2400 not in content
+
+    def test_plan_files_for_budget_priority(self, project_path):
+        """Recent files first, then smaller ones, filling around files that do not fit"""
+        from utils.file_utils import plan_files_for_budget
+
+        paths = {}
+        for name, size, age in [("old.txt", 400, 300), ("new_big.txt", 4000, 0), ("new_small.txt", 400, 10)]:
+            path = project_path / name
+            path.write_text("x" * size, encoding="utf-8")
+            mtime = time.time() - age
+            os.utime(path, (mtime, mtime))
+            paths[name] = str(path)
+        files = sorted(paths.values())
+
+        selected, skipped = plan_files_for_budget(files, 400)
+        assert selected == [paths["new_small.txt"], paths["old.txt"]]
+        assert skipped == [paths["new_big.txt"]]
+
+        selected, _ = plan_files_for_budget(files, 1150, priority=("recent",))
+        assert selected == [paths["new_big.txt"]]
+
+        with pytest.raises(ValueError):
+            plan_files_for_budget(files, 100, priority=("largest",))
+
+
+class TestStreamingFormatter:
+    """The mmap-based formatter matches the decode-then-format path"""
+
+    CASES = [
+        b"",
+        b"a",
+        b"a\n",
+        b"\n\n",
+        b"\r",
+        b"one\r\ntwo\rthree\nfour",
+        b"ends with cr\r",
+        b"caf\xc3\xa9 \xff\xfe invalid",
+        b"truncated \xe2\x82",
+        b"\xef\xbb\xbfbom first",
+        b"\n".join(b"line %d" % i for i in range(12000)),
+    ]
+
+    @staticmethod
+    def _expected(data: bytes, add_line_numbers: bool) -> str:
+        from utils.file_utils import _add_line_numbers, _normalize_line_endings
+
+        text = data.decode("utf-8", errors="replace")
+        body = _add_line_numbers(text) if add_line_numbers else _normalize_line_endings(text)
+        return f"<{body}>"
+
+    @pytest.mark.parametrize("add_line_numbers", [True, False])
+    @pytest.mark.parametrize("chunk_bytes", [3, 64 * 1024])
+    def test_matches_in_memory_formatting(self, tmp_path, add_line_numbers, chunk_bytes):
+        from utils.file_utils import _format_file_block
+
+        source = tmp_path / "source.txt"
+        with patch("utils.file_utils.FORMAT_CHUNK_BYTES", chunk_bytes):
+            for data in self.CASES:
+                source.write_bytes(data)
+                formatted = _format_file_block(source, "<", ">", add_line_numbers)
+                assert formatted == self._expected(data, add_line_numbers), data[:40]
+
+    def test_crlf_split_across_chunks(self, tmp_path):
+        from utils.file_utils import _format_file_block
+
+        source = tmp_path / "source.txt"
+        data = b"ab\r\ncd\r\r\nef"
+        source.write_bytes(data)
+        for chunk_bytes in range(1, len(data) + 1):
+            with patch("utils.file_utils.FORMAT_CHUNK_BYTES", chunk_bytes):
+                assert _format_file_block(source, "<", ">", True) == self._expected(data, True)
+
+
+class TestPartialFiles:
+    """Oversized files are embedded partially with accurate line numbers"""
+
+    @staticmethod
+    def _write_lines(path, count, ending="\n"):
+        path.write_text(ending.join(f"line {i}" for i in range(1, count + 1)), encoding="utf-8", newline="")
+
+    def test_file_over_max_size_embeds_head_and_tail(self, project_path):
+        source = project_path / "big.py"
+        self._write_lines(source, 1000)
+
+        content, _ = read_file_content(str(source), max_size=2000, include_line_numbers=True)
+
+        assert "[PARTIAL FILE: file too large (" in content
+        assert "   1│ line 1\n" in content
+        assert "1000│ line 1000\n--- END FILE:" in content
+        assert "omitted] ..." in content
+        assert "--- FILE TOO LARGE" not in content
+
+    def test_line_numbers_match_full_file(self, project_path):
+        from utils.file_utils import _add_line_numbers
+
+        source = project_path / "mixed.py"
+        source.write_bytes(b"".join(b"row %d%s" % (i, (b"\r\n", b"\r", b"\n")[i % 3]) for i in range(500)))
+        numbered = set(_add_line_numbers(source.read_bytes().decode()).split("\n"))
+
+        content, _ = read_file_content(str(source), max_size=1000, include_line_numbers=True)
+
+        lines = [line for line in content.split("\n") if "│" in line]
+        assert lines and all(line in numbered for line in lines)
+
+    def test_line_ranges(self, project_path):
+        source = project_path / "module.py"
+        self._write_lines(source, 100)
+
+        content, _ = read_file_content(str(source), include_line_numbers=True, line_ranges=[(10, 12), (-2, None)])
+
+        assert "showing lines 10-12, 99-100 of 100" in content
+        assert "... [lines 1-9 omitted] ..." in content
+        assert "  10│ line 10\n  11│ line 11\n  12│ line 12\n... [lines 13-98 omitted] ..." in content
+        assert " 100│ line 100" in content
+        assert "line 13\n" not in content
+
+    def test_line_range_zero_is_an_error(self, project_path):
+        source = project_path / "module.py"
+        self._write_lines(source, 10)
+
+        content, _ = read_file_content(str(source), line_ranges=[(0, 3)])
+
+        assert "--- ERROR READING FILE:" in content
+
+    def test_read_files_line_ranges(self, project_path):
+        source = project_path / "module.py"
+        other = project_path / "other.py"
+        self._write_lines(source, 100)
+        other.write_text("other = 1\n", encoding="utf-8")
+
+        content = read_files([str(project_path)], line_ranges={str(source): [(50, 51)]}, include_line_numbers=True)
+
+        assert "showing lines 50-51 of 100" in content
+        assert "other = 1" in content
+
+    def test_read_files_fills_budget_with_partial_file(self, project_path):
+        small = project_path / "a_small.py"
+        large = project_path / "b_large.py"
+        small.write_text("small = 1\n", encoding="utf-8")
+        self._write_lines(large, 20_000)
+
+        content = read_files([str(project_path)], max_tokens=60_000, reserve_tokens=50_000)
+
+        assert "small = 1" in content
+        assert "[PARTIAL FILE: file exceeds remaining token budget; showing lines 1-" in content
+        assert "line 20000\n--- END FILE:" in content
+        assert "SKIPPED FILES" not in content
+        assert estimate_tokens(content) <= 10_000
+
 
 class TestTokenUtils:
     """Test token counting utilities"""
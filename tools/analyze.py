@@ -12,7 +12,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import ANALYZE_PROMPT
 
-from .base import BaseTool, ToolRequest
+from .base import LINE_RANGES_FIELD_SCHEMA, BaseTool, ToolRequest
 
 
 class AnalyzeRequest(ToolRequest):
@@ -92,6 +92,7 @@ class AnalyzeTool(BaseTool):
                     "default": "embedded",
                     "description": "How to handle file content in responses. 'embedded' includes full content (default), 'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs.",
                 },
+                "line_ranges": LINE_RANGES_FIELD_SCHEMA,
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -20,7 +20,7 @@ from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Literal, Optional
 
 from mcp.types import TextContent
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
@@ -38,11 +38,29 @@ from utils.conversation_memory import (
 )
 from utils.file_storage import FileReference, FileStorage
 from utils.file_utils import read_file_content, read_files
+from utils.progress import agenerate_with_progress
 
 from .models import SPECIAL_STATUS_MODELS, ContinuationOffer, ToolOutput
+from .shared.base_tool import BaseTool as SharedBaseTool
 
 logger = logging.getLogger(__name__)
 
+LINE_RANGES_DESCRIPTION = (
+    "Optional line ranges to embed instead of whole files, keyed by a path also listed in files: "
+    "1-based inclusive [start, end] pairs, where negative numbers count from the end of the file "
+    '(e.g. {"/abs/path/app.py": [[1, 40], [-20, -1]]}). Other files are embedded whole.'
+)
+
+# Schema for the line_ranges field, for tools whose schemas list file_handling_mode
+LINE_RANGES_FIELD_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {
+        "type": "array",
+        "items": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+    },
+    "description": LINE_RANGES_DESCRIPTION,
+}
+
 
 class ToolRequest(BaseModel):
     """
@@ -93,6 +111,14 @@ class ToolRequest(BaseModel):
             "'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs."
         ),
     )
+    line_ranges: Optional[dict[str, list[tuple[int, int]]]] = Field(None, description=LINE_RANGES_DESCRIPTION)
+
+    @field_validator("line_ranges")
+    @classmethod
+    def line_numbers_start_at_one(cls, v):
+        if v and any(0 in pair for ranges in v.values() for pair in ranges):
+            raise ValueError("Line numbers start at 1 (use negative numbers to count from the end)")
+        return v
 
 
 class BaseTool(ABC):
@@ -500,68 +526,9 @@ class BaseTool(ABC):
         logger.debug(f"[FILES] {self.name}: Found {len(embedded_files)} embedded files")
         return embedded_files
 
-    def filter_new_files(self, requested_files: list[str], continuation_id: Optional[str]) -> list[str]:
-        """
-        Filter out files that are already embedded in conversation history.
-
-        This method prevents duplicate file embeddings by filtering out files that have
-        already been embedded in the conversation history. This optimizes token usage
-        while ensuring tools still have logical access to all requested files through
-        conversation history references.
-
-        Args:
-            requested_files: List of files requested for current tool execution
-            continuation_id: Thread continuation ID, or None for new conversations
-
-        Returns:
-            list[str]: List of files that need to be embedded (not already in history)
-        """
-        logger.debug(f"[FILES] {self.name}: Filtering {len(requested_files)} requested files")
-
-        if not continuation_id:
-            # New conversation, all files are new
-            logger.debug(f"[FILES] {self.name}: New conversation, all {len(requested_files)} files are new")
-            return requested_files
-
-        try:
-            embedded_files = set(self.get_conversation_embedded_files(continuation_id))
-            logger.debug(f"[FILES] {self.name}: Found {len(embedded_files)} embedded files in conversation")
-
-            # Safety check: If no files are marked as embedded but we have a continuation_id,
-            # this might indicate an issue with conversation history. Be conservative.
-            if not embedded_files:
-                logger.debug(f"{self.name} tool: No files found in conversation history for thread {continuation_id}")
-                logger.debug(
-                    f"[FILES] {self.name}: No embedded files found, returning all {len(requested_files)} requested files"
-                )
-                return requested_files
-
-            # Return only files that haven't been embedded yet
-            new_files = [f for f in requested_files if f not in embedded_files]
-            logger.debug(
-                f"[FILES] {self.name}: After filtering: {len(new_files)} new files, {len(requested_files) - len(new_files)} already embedded"
-            )
-            logger.debug(f"[FILES] {self.name}: New files to embed: {new_files}")
-
-            # Log filtering results for debugging
-            if len(new_files) < len(requested_files):
-                skipped = [f for f in requested_files if f in embedded_files]
-                logger.debug(
-                    f"{self.name} tool: Filtering {len(skipped)} files already in conversation history: {', '.join(skipped)}"
-                )
-                logger.debug(f"[FILES] {self.name}: Skipped (already embedded): {skipped}")
-
-            return new_files
-
-        except Exception as e:
-            # If there's any issue with conversation history lookup, be conservative
-            # and include all files rather than risk losing access to needed files
-            logger.warning(f"{self.name} tool: Error checking conversation history for {continuation_id}: {e}")
-            logger.warning(f"{self.name} tool: Including all requested files as fallback")
-            logger.debug(
-                f"[FILES] {self.name}: Exception in filter_new_files, returning all {len(requested_files)} files as fallback"
-            )
-            return requested_files
+    # Conversation-aware file filtering and changed-file diffs are shared with tools.shared.base_tool
+    filter_new_files = SharedBaseTool.filter_new_files
+    _embed_file_changes = SharedBaseTool._embed_file_changes
 
     def _prepare_file_content_for_prompt(
         self,
@@ -730,7 +697,7 @@ class BaseTool(ABC):
         # Ensure we have a reasonable minimum budget
         effective_max_tokens = max(1000, effective_max_tokens)
 
-        files_to_embed = self.filter_new_files(request_files, continuation_id)
+        files_to_embed, changed_files = self.filter_new_files(request_files, continuation_id)
         logger.debug(f"[FILES] {self.name}: Will embed {len(files_to_embed)} files after filtering")
 
         # Log the specific files for debugging/testing
@@ -762,6 +729,9 @@ class BaseTool(ABC):
         self._current_images = image_files
         logger.debug(f"[FILES] {self.name}: Separated {len(text_files)} text files and {len(image_files)} image files")
 
+        # Changed files are sent as a diff against the version embedded earlier where possible
+        text_files = self._embed_file_changes(text_files, changed_files, content_parts, actually_processed_files)
+
         # Read content of new text files only (images are handled separately)
         if text_files:
             logger.debug(f"{self.name} tool embedding {len(text_files)} new text files: {', '.join(text_files)}")
@@ -777,11 +747,13 @@ class BaseTool(ABC):
                     f"[FILES] {self.name}: Expanded {len(text_files)} text file paths to {len(expanded_files)} individual files"
                 )
 
+                args_to_use = arguments or getattr(self, "_current_arguments", {})
                 file_content = read_files(
                     text_files,
                     max_tokens=effective_max_tokens + reserve_tokens,
                     reserve_tokens=reserve_tokens,
                     include_line_numbers=self.wants_line_numbers_by_default(),
+                    line_ranges=args_to_use.get("line_ranges"),
                 )
                 self._validate_token_limit(file_content, context_description)
                 content_parts.append(file_content)
@@ -820,7 +792,8 @@ class BaseTool(ABC):
         # Generate note about files already in conversation history
         if continuation_id and len(files_to_embed) < len(request_files):
             embedded_files = self.get_conversation_embedded_files(continuation_id)
-            skipped_files = [f for f in request_files if f in embedded_files]
+            # Changed files were sent above, so only unchanged ones are available from the history
+            skipped_files = [f for f in request_files if f in embedded_files and f not in changed_files]
             if skipped_files:
                 logger.debug(
                     f"{self.name} tool skipping {len(skipped_files)} files already in conversation history: {', '.join(skipped_files)}"
@@ -1411,7 +1384,8 @@ When recommending searches, be specific about what information you need and why
             # Get images if any were separated during file processing
             images = getattr(self, "_current_images", None)
 
-            model_response = provider.generate_content(
+            model_response = await agenerate_with_progress(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -1481,7 +1455,8 @@ When recommending searches, be specific about what information you need and why
                 logger.warning(f"500 INTERNAL error in {self.name} - attempting retry")
                 try:
                     # Single retry attempt using provider
-                    retry_response = provider.generate_content(
+                    retry_response = await agenerate_with_progress(
+                        provider,
                         prompt=prompt,
                         model_name=model_name,
                         system_prompt=system_prompt,
@@ -12,7 +12,7 @@ if TYPE_CHECKING:
 from config import TEMPERATURE_BALANCED
 from systemprompts import CHAT_PROMPT
 
-from .base import BaseTool, ToolRequest
+from .base import LINE_RANGES_FIELD_SCHEMA, BaseTool, ToolRequest
 
 
 class ChatRequest(ToolRequest):
@@ -76,6 +76,7 @@ class ChatTool(BaseTool):
                     "default": "embedded",
                     "description": "How to handle file content in responses. 'embedded' includes full content (default), 'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs.",
                 },
+                "line_ranges": LINE_RANGES_FIELD_SCHEMA,
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
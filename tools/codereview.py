@@ -21,7 +21,7 @@ from pydantic import Field
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CODEREVIEW_PROMPT
 
-from .base import BaseTool, ToolRequest
+from .base import LINE_RANGES_FIELD_SCHEMA, BaseTool, ToolRequest
 
 
 class CodeReviewRequest(ToolRequest):
@@ -128,6 +128,7 @@ class CodeReviewTool(BaseTool):
                     "default": "embedded",
                     "description": "How to handle file content in responses. 'embedded' includes full content (default), 'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs.",
                 },
+                "line_ranges": LINE_RANGES_FIELD_SCHEMA,
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -29,6 +29,7 @@ from mcp.types import TextContent
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import CONSENSUS_PROMPT
 from tools.shared.base_models import WorkflowRequest
+from utils.progress import agenerate_with_progress
 
 from .workflow.base import WorkflowTool
 
@@ -553,7 +554,8 @@ of the evidence, even when it strongly points in one direction.""",
             system_prompt = self._get_stance_enhanced_prompt(stance, stance_prompt)
 
             # Call the model
-            response = provider.generate_content(
+            response = await agenerate_with_progress(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
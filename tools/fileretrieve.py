@@ -3,23 +3,56 @@ File retrieval tool for accessing stored file content.
 
 This tool allows Claude to retrieve files that were stored using the
 summary or reference file handling modes.
+
+By default the content is returned directly, without a model call. A
+character range (offset/length) or line range (start_line/end_line) fetches
+only the stored chunks that overlap it, so paging through a large stored file
+stays cheap.
 """
 
 import logging
 from typing import Any, Optional
 
-from pydantic import Field
+from mcp.types import TextContent
+from pydantic import Field, model_validator
 
 from tools.base import BaseTool, ToolRequest
-from utils.file_storage import FileStorage
+from tools.models import ToolOutput
+from utils.file_storage import FileStorage, split_lines
 
 logger = logging.getLogger(__name__)
 
+# Characters returned when no range is requested, so a large file is paged rather than sent whole
+DEFAULT_WINDOW_CHARS = 100_000
+
 
 class FileRetrieveRequest(ToolRequest):
     """Request model for file retrieval"""
 
     reference_id: str = Field(..., description="The file reference ID to retrieve")
+    offset: Optional[int] = Field(None, ge=0, description="First character to return (default: 0)")
+    length: Optional[int] = Field(
+        None, ge=0, description=f"Number of characters to return (default: {DEFAULT_WINDOW_CHARS:,})"
+    )
+    start_line: Optional[int] = Field(
+        None, ge=1, description="First line to return (1-based). Takes precedence over offset/length"
+    )
+    end_line: Optional[int] = Field(
+        None,
+        ge=1,
+        description=f"Last line to return, inclusive (default: end of file). Capped at {DEFAULT_WINDOW_CHARS:,} characters",
+    )
+    direct: bool = Field(
+        True,
+        description="Return the content directly without a model call. Set to false to have the model present it",
+    )
+
+    @model_validator(mode="after")
+    def validate_line_range(self):
+        """Ensure a line range is not reversed."""
+        if self.start_line is not None and self.end_line is not None and self.start_line > self.end_line:
+            raise ValueError(f"start_line ({self.start_line}) must not be greater than end_line ({self.end_line})")
+        return self
 
 
 class FileRetrieveTool(BaseTool):
@@ -34,7 +67,9 @@ class FileRetrieveTool(BaseTool):
 
     def get_description(self) -> str:
         return (
-            "FILERETRIEVE - Get stored file content by reference ID."
+            "FILERETRIEVE - Get stored file content by reference ID. "
+            "Supports offset/length or start_line/end_line to fetch part of a large file; "
+            "the result metadata includes next_offset (or next_start_line for line ranges) when more content remains."
         )
 
     def get_input_schema(self) -> dict[str, Any]:
@@ -54,11 +89,93 @@ Be clear and concise in your responses."""
     def get_default_temperature(self) -> float:
         return 0.1  # Very low temperature for consistent retrieval
 
+    def _retrieve(self, request: FileRetrieveRequest) -> Optional[tuple[str, Any, dict[str, Any]]]:
+        """
+        Fetch the requested range of a stored file.
+
+        Returns:
+            Tuple of (content, FileReference, range metadata) or None if not found
+        """
+        if request.start_line is not None or request.end_line is not None:
+            start_line = request.start_line or 1
+            result = self.file_storage.retrieve_lines(
+                request.reference_id, start_line=start_line, end_line=request.end_line, max_chars=DEFAULT_WINDOW_CHARS
+            )
+            if not result:
+                return None
+            content, file_ref, offset = result
+            line_count = len(split_lines(content))
+            end = offset + len(content)
+            has_more = end < file_ref.size
+            range_info = {
+                "start_line": start_line,
+                "end_line": start_line + line_count - 1 if line_count else None,
+                "has_more": has_more,
+                "next_start_line": start_line + line_count if has_more else None,
+                # Where to continue with offset/length when a single line was longer than the window
+                "next_offset": end if has_more and not content.endswith("\n") else None,
+            }
+            return content, file_ref, range_info
+
+        offset = request.offset or 0
+        length = request.length if request.length is not None else DEFAULT_WINDOW_CHARS
+        result = self.file_storage.retrieve_range(request.reference_id, offset=offset, length=length)
+        if not result:
+            return None
+        content, file_ref = result
+        end = offset + len(content)
+        range_info = {
+            "offset": offset,
+            "length": len(content),
+            "truncated": end < file_ref.size,
+            "next_offset": end if end < file_ref.size else None,
+        }
+        return content, file_ref, range_info
+
+    async def execute(self, arguments: dict[str, Any]) -> list[TextContent]:
+        """Return the stored content locally unless a model-formatted response was requested"""
+        if not arguments.get("direct", True):
+            return await super().execute(arguments)
+
+        try:
+            request = FileRetrieveRequest(**arguments)
+        except Exception as e:
+            tool_output = ToolOutput(status="error", content=f"Invalid request: {e}", content_type="text")
+            return [TextContent(type="text", text=tool_output.model_dump_json())]
+
+        result = self._retrieve(request)
+        if not result:
+            tool_output = ToolOutput(
+                status="error",
+                content=(
+                    f"The file with reference ID '{request.reference_id}' was not found. "
+                    "It may have expired (files are stored for 24 hours) or the reference ID is incorrect."
+                ),
+                content_type="text",
+                metadata={"tool_name": self.name, "reference_id": request.reference_id},
+            )
+            return [TextContent(type="text", text=tool_output.model_dump_json())]
+
+        content, file_ref, range_info = result
+        tool_output = ToolOutput(
+            status="success",
+            content=content,
+            content_type="text",
+            metadata={
+                "tool_name": self.name,
+                "reference_id": file_ref.reference_id,
+                "file_path": file_ref.file_path,
+                "size": file_ref.size,
+                **range_info,
+            },
+        )
+        return [TextContent(type="text", text=tool_output.model_dump_json())]
+
     async def prepare_prompt(self, request: FileRetrieveRequest) -> str:
         """Prepare prompt for file retrieval"""
 
-        # Retrieve the file
-        result = self.file_storage.retrieve_file(request.reference_id)
+        # Retrieve the requested range of the file
+        result = self._retrieve(request)
 
         if not result:
             return f"""The file with reference ID '{request.reference_id}' was not found.
@@ -70,7 +187,8 @@ This could mean:
 
 Please check the reference ID and try again."""
 
-        content, file_ref = result
+        content, file_ref, range_info = result
+        range_desc = ", ".join(f"{key}={value}" for key, value in range_info.items() if value is not None)
 
         # Format the prompt
         prompt = f"""Retrieved file content:
@@ -81,6 +199,7 @@ Reference ID: {file_ref.reference_id}
 Size: {file_ref.size:,} bytes
 Summary: {file_ref.summary}
 Created: {file_ref.created_at}
+Range: {range_desc}
 
 === FILE CONTENT ===
 {content}
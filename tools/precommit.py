@@ -20,7 +20,7 @@ from systemprompts import PRECOMMIT_PROMPT
 from utils.git_utils import find_git_repositories, get_git_status, run_git_command
 from utils.token_utils import estimate_tokens
 
-from .base import BaseTool, ToolRequest
+from .base import LINE_RANGES_FIELD_SCHEMA, BaseTool, ToolRequest
 
 # Conservative fallback for token limits
 DEFAULT_CONTEXT_WINDOW = 200_000
@@ -169,6 +169,7 @@ class Precommit(BaseTool):
                     "default": "embedded",
                     "description": "How to handle file content in responses. 'embedded' includes full content (default), 'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs.",
                 },
+                "line_ranges": LINE_RANGES_FIELD_SCHEMA,
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -24,6 +24,8 @@ from providers import ModelProvider, ModelProviderRegistry
 from utils import check_token_limit
 from utils.conversation_memory import (
     ConversationTurn,
+    format_file_delta,
+    get_changed_files,
     get_conversation_file_list,
     get_thread,
 )
@@ -657,7 +659,9 @@ class BaseTool(ABC):
         logger.debug(f"[FILES] {self.name}: Found {len(embedded_files)} embedded files")
         return embedded_files
 
-    def filter_new_files(self, requested_files: list[str], continuation_id: Optional[str]) -> list[str]:
+    def filter_new_files(
+        self, requested_files: list[str], continuation_id: Optional[str]
+    ) -> tuple[list[str], dict[str, str]]:
         """
         Filter out files that are already embedded in conversation history.
 
@@ -666,19 +670,23 @@ class BaseTool(ABC):
         while ensuring tools still have logical access to all requested files through
         conversation history references.
 
+        Embedded files whose content changed on disk since they were recorded are kept,
+        so they can be sent as a diff against the recorded version (see _embed_file_changes).
+
         Args:
             requested_files: List of files requested for current tool execution
             continuation_id: Thread continuation ID, or None for new conversations
 
         Returns:
-            list[str]: List of files that need to be embedded (not already in history)
+            tuple[list[str], dict[str, str]]: (files that need to be embedded, new or changed
+            since embedded; changed file path to the content hash recorded for it)
         """
         logger.debug(f"[FILES] {self.name}: Filtering {len(requested_files)} requested files")
 
         if not continuation_id:
             # New conversation, all files are new
             logger.debug(f"[FILES] {self.name}: New conversation, all {len(requested_files)} files are new")
-            return requested_files
+            return requested_files, {}
 
         try:
             embedded_files = set(self.get_conversation_embedded_files(continuation_id))
@@ -691,10 +699,15 @@ class BaseTool(ABC):
                 logger.debug(
                     f"[FILES] {self.name}: No embedded files found, returning all {len(requested_files)} requested files"
                 )
-                return requested_files
-
-            # Return only files that haven't been embedded yet
-            new_files = [f for f in requested_files if f not in embedded_files]
+                return requested_files, {}
+
+            # Return only files that haven't been embedded yet, or have changed since
+            changed_files = {}
+            thread_context = get_thread(continuation_id)
+            if thread_context:
+                changed_files = get_changed_files(thread_context, [f for f in requested_files if f in embedded_files])
+                logger.debug(f"[FILES] {self.name}: Found {len(changed_files)} changed embedded files")
+            new_files = [f for f in requested_files if f not in embedded_files or f in changed_files]
             logger.debug(
                 f"[FILES] {self.name}: After filtering: {len(new_files)} new files, {len(requested_files) - len(new_files)} already embedded"
             )
@@ -702,13 +715,13 @@ class BaseTool(ABC):
 
             # Log filtering results for debugging
             if len(new_files) < len(requested_files):
-                skipped = [f for f in requested_files if f in embedded_files]
+                skipped = [f for f in requested_files if f not in new_files]
                 logger.debug(
                     f"{self.name} tool: Filtering {len(skipped)} files already in conversation history: {', '.join(skipped)}"
                 )
                 logger.debug(f"[FILES] {self.name}: Skipped (already embedded): {skipped}")
 
-            return new_files
+            return new_files, changed_files
 
         except Exception as e:
             # If there's any issue with conversation history lookup, be conservative
@@ -718,7 +731,7 @@ class BaseTool(ABC):
             logger.debug(
                 f"[FILES] {self.name}: Exception in filter_new_files, returning all {len(requested_files)} files as fallback"
             )
-            return requested_files
+            return requested_files, {}
 
     def format_conversation_turn(self, turn: ConversationTurn) -> list[str]:
         """
@@ -868,6 +881,36 @@ class BaseTool(ABC):
             }
         return None
 
+    def _embed_file_changes(
+        self,
+        files: list[str],
+        changed_files: dict[str, str],
+        content_parts: list[str],
+        processed_files: list[str],
+    ) -> list[str]:
+        """
+        Add diffs for changed files found by filter_new_files.
+
+        Args:
+            files: Files about to be embedded
+            changed_files: Changed file path to recorded content hash, from filter_new_files
+            content_parts: Prompt parts to append the FILE CHANGES blocks to
+            processed_files: Files embedded so far, extended with the diffed files
+
+        Returns:
+            list[str]: Files that still need their full content embedded
+        """
+        remaining = []
+        for file_path in files:
+            delta = format_file_delta(file_path, changed_files[file_path]) if file_path in changed_files else None
+            if delta is None:
+                remaining.append(file_path)
+                continue
+            logger.debug(f"[FILES] {self.name}: Embedding changes to {file_path} instead of the whole file")
+            content_parts.append(delta)
+            processed_files.append(file_path)
+        return remaining
+
     def _prepare_file_content_for_prompt(
         self,
         request_files: list[str],
@@ -946,7 +989,7 @@ class BaseTool(ABC):
         # Ensure we have a reasonable minimum budget
         effective_max_tokens = max(1000, effective_max_tokens)
 
-        files_to_embed = self.filter_new_files(request_files, continuation_id)
+        files_to_embed, changed_files = self.filter_new_files(request_files, continuation_id)
         logger.debug(f"[FILES] {self.name}: Will embed {len(files_to_embed)} files after filtering")
 
         # Log the specific files for debugging/testing
@@ -962,6 +1005,11 @@ class BaseTool(ABC):
         content_parts = []
         actually_processed_files = []
 
+        # Changed files are sent as a diff against the version embedded earlier where possible
+        files_to_embed = self._embed_file_changes(
+            files_to_embed, changed_files, content_parts, actually_processed_files
+        )
+
         # Read content of new files only
         if files_to_embed:
             logger.debug(f"{self.name} tool embedding {len(files_to_embed)} new files: {', '.join(files_to_embed)}")
@@ -1010,7 +1058,8 @@ class BaseTool(ABC):
         # Generate note about files already in conversation history
         if continuation_id and len(files_to_embed) < len(request_files):
             embedded_files = self.get_conversation_embedded_files(continuation_id)
-            skipped_files = [f for f in request_files if f in embedded_files]
+            # Changed files were sent above, so only unchanged ones are available from the history
+            skipped_files = [f for f in request_files if f in embedded_files and f not in changed_files]
             if skipped_files:
                 logger.debug(
                     f"{self.name} tool skipping {len(skipped_files)} files already in conversation history: {', '.join(skipped_files)}"
@@ -18,6 +18,7 @@ from typing import Any, Optional
 from tools.shared.base_models import ToolRequest
 from tools.shared.base_tool import BaseTool
 from tools.shared.schema_builders import SchemaBuilder
+from utils.progress import agenerate_with_progress
 
 
 class SimpleTool(BaseTool):
@@ -429,7 +430,8 @@ class SimpleTool(BaseTool):
             logger.debug(f"Prompt length: {len(prompt)} characters (~{estimated_tokens:,} tokens)")
 
             # Generate content with provider abstraction
-            model_response = provider.generate_content(
+            model_response = await agenerate_with_progress(
+                provider,
                 prompt=prompt,
                 model_name=self._current_model_name,
                 system_prompt=system_prompt,
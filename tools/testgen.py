@@ -22,7 +22,7 @@ from pydantic import Field
 from config import TEMPERATURE_ANALYTICAL
 from systemprompts import TESTGEN_PROMPT
 
-from .base import BaseTool, ToolRequest
+from .base import LINE_RANGES_FIELD_SCHEMA, BaseTool, ToolRequest
 
 logger = logging.getLogger(__name__)
 
@@ -108,6 +108,7 @@ class TestGenTool(BaseTool):
                     "default": "embedded",
                     "description": "How to handle file content in responses. 'embedded' includes full content (default), 'summary' returns only summaries to save tokens, 'reference' stores files and returns IDs.",
                 },
+                "line_ranges": LINE_RANGES_FIELD_SCHEMA,
                 "continuation_id": {
                     "type": "string",
                     "description": (
@@ -159,7 +160,7 @@ class TestGenTool(BaseTool):
             return "", ""
 
         # Use existing file filtering to avoid duplicates in continuation
-        examples_to_process = self.filter_new_files(test_examples, continuation_id)
+        examples_to_process, _ = self.filter_new_files(test_examples, continuation_id)
         logger.debug(f"[TESTGEN] After filtering: {len(examples_to_process)} new test examples to process")
 
         if not examples_to_process:
@@ -30,6 +30,7 @@ from mcp.types import TextContent
 
 from config import MCP_PROMPT_SIZE_LIMIT
 from utils.conversation_memory import add_turn, create_thread
+from utils.progress import agenerate_with_progress
 
 from ..shared.base_models import ConsolidatedFindings
 
@@ -1465,7 +1466,8 @@ class BaseWorkflowMixin(ABC):
                 logger.warning(warning)
 
             # Generate AI response - use request parameters if available
-            model_response = provider.generate_content(
+            model_response = await agenerate_with_progress(
+                provider,
                 prompt=prompt,
                 model_name=model_name,
                 system_prompt=system_prompt,
@@ -0,0 +1,193 @@
+"""
+Transparent compression for values written to conversation and file storage
+
+Stored values are strings (Redis clients run with decode_responses=True), so a
+compressed value is written as a short format header followed by the base64 of
+the compressed bytes:
+
+    \\x1fZC1z:<base64>   zlib
+    \\x1fZC1s:<base64>   zstd (requires the optional zstandard package)
+    \\x1fZC1r:<text>     raw text that happens to start with the header prefix
+
+Values without the header are returned unchanged, so data written before
+compression was enabled (or with it disabled) stays readable, and turning
+compression off never strands compressed data.
+
+Configuration (environment variables):
+- STORAGE_COMPRESSION: none (default), zlib or zstd
+- STORAGE_COMPRESSION_THRESHOLD: Minimum value size in bytes worth compressing (default: 4096)
+"""
+
+import base64
+import logging
+import os
+import threading
+import zlib
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+HEADER_PREFIX = "\x1fZC1"
+_ZLIB = "z"
+_ZSTD = "s"
+_RAW = "r"
+
+DEFAULT_THRESHOLD = 4096
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_warned: set[str] = set()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "values_written": 0,
+    "values_compressed": 0,
+    "uncompressed_bytes": 0,
+    "stored_bytes": 0,
+    "values_decompressed": 0,
+}
+
+
+def _import_zstd():
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+def _warn_once(message: str) -> None:
+    if message not in _warned:
+        _warned.add(message)
+        logger.warning(message)
+
+
+def get_codec() -> str:
+    """
+    Get the configured compression codec
+
+    Returns:
+        str: "none", "zlib" or "zstd" ("zstd" falls back to "zlib" if zstandard is missing)
+    """
+    codec = os.getenv("STORAGE_COMPRESSION", "none").strip().lower() or "none"
+    if codec not in ("none", "zlib", "zstd"):
+        _warn_once(f"Unknown STORAGE_COMPRESSION value ('{codec}'), storing values uncompressed")
+        return "none"
+    if codec == "zstd" and _import_zstd() is None:
+        _warn_once("STORAGE_COMPRESSION=zstd requires the zstandard package, using zlib")
+        return "zlib"
+    return codec
+
+
+def get_threshold() -> int:
+    """Minimum UTF-8 size in bytes before a value is compressed"""
+    raw = os.getenv("STORAGE_COMPRESSION_THRESHOLD", "")
+    if not raw:
+        return DEFAULT_THRESHOLD
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        _warn_once(f"Invalid STORAGE_COMPRESSION_THRESHOLD value ('{raw}'), using default of {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+
+
+def encode_value(value: str) -> str:
+    """
+    Encode a value for storage, compressing it when configured and worthwhile
+
+    Values below the threshold, or that do not shrink, are stored as-is.
+
+    Args:
+        value: Text to store
+
+    Returns:
+        str: Text to write to storage
+    """
+    raw = value.encode("utf-8")
+    stored = value
+    compressed_value = False
+    codec = get_codec()
+
+    if codec != "none" and len(raw) >= get_threshold():
+        if codec == "zstd":
+            compressed = _import_zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+            marker = _ZSTD
+        else:
+            compressed = zlib.compress(raw, ZLIB_LEVEL)
+            marker = _ZLIB
+        candidate = f"{HEADER_PREFIX}{marker}:{base64.b64encode(compressed).decode('ascii')}"
+        if len(candidate) < len(raw):
+            stored = candidate
+            compressed_value = True
+
+    if not compressed_value and value.startswith(HEADER_PREFIX):
+        # Escape text that would otherwise be mistaken for an encoded value
+        stored = f"{HEADER_PREFIX}{_RAW}:{value}"
+
+    with _stats_lock:
+        _stats["values_written"] += 1
+        _stats["uncompressed_bytes"] += len(raw)
+        _stats["stored_bytes"] += len(raw) if stored is value else len(stored.encode("utf-8"))
+        _stats["values_compressed"] += compressed_value
+    return stored
+
+
+def decode_value(stored: str) -> str:
+    """
+    Decode a value read from storage
+
+    Args:
+        stored: Text as read from storage (encoded or written before compression)
+
+    Returns:
+        str: The original text
+
+    Raises:
+        ValueError: If the value is zstd-compressed and zstandard is not installed
+    """
+    if not stored or not stored.startswith(HEADER_PREFIX):
+        return stored
+
+    marker = stored[len(HEADER_PREFIX)]
+    payload = stored[len(HEADER_PREFIX) + 2 :]
+    if marker == _RAW:
+        return payload
+
+    data = base64.b64decode(payload)
+    if marker == _ZLIB:
+        value = zlib.decompress(data).decode("utf-8")
+    elif marker == _ZSTD:
+        zstandard = _import_zstd()
+        if zstandard is None:
+            raise ValueError("zstandard package required to read zstd-compressed values")
+        value = zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    else:
+        raise ValueError(f"Unknown compression format '{marker}'")
+
+    with _stats_lock:
+        _stats["values_decompressed"] += 1
+    return value
+
+
+def get_compression_stats() -> dict[str, Any]:
+    """
+    Get compression counters for sizing storage memory
+
+    Returns:
+        dict: values written/compressed/decompressed, uncompressed and stored byte
+        totals, the resulting ratio and the active codec and threshold
+    """
+    with _stats_lock:
+        stats: dict[str, Any] = dict(_stats)
+    stats["ratio"] = stats["stored_bytes"] / stats["uncompressed_bytes"] if stats["uncompressed_bytes"] else 1.0
+    stats["codec"] = get_codec()
+    stats["threshold"] = get_threshold()
+    return stats
+
+
+def reset_compression_stats() -> None:
+    """Zero all compression counters"""
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -48,12 +48,16 @@ This enables true AI-to-AI collaboration across the entire tool ecosystem.
 
 import logging
 import os
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any, Optional
 
 from pydantic import BaseModel
 
+from utils.compression import decode_value, encode_value
+
 logger = logging.getLogger(__name__)
 
 # Configuration constants
@@ -85,6 +89,13 @@ except ValueError:
 
 CONVERSATION_TIMEOUT_SECONDS = CONVERSATION_TIMEOUT_HOURS * 3600
 
+# Maximum number of threads followed through parent_thread_id links
+MAX_THREAD_CHAIN_DEPTH = 20
+
+# Files up to this size are snapshotted when a turn references them, so later turns
+# can show what changed instead of only re-embedding the whole file
+FILE_SNAPSHOT_MAX_BYTES = 1_000_000
+
 
 class ConversationTurn(BaseModel):
     """
@@ -98,6 +109,7 @@ class ConversationTurn(BaseModel):
         content: The actual message content/response
         timestamp: ISO timestamp when this turn was created
         files: List of file paths referenced in this specific turn
+        file_hashes: SHA-256 of each file's content when the turn was recorded
         images: List of image file paths for vision models (PNG, JPEG, GIF, WebP)
         tool_name: Which tool generated this turn (for cross-tool tracking)
         model_provider: Provider used (e.g., "google", "openai")
@@ -109,6 +121,7 @@ class ConversationTurn(BaseModel):
     content: str
     timestamp: str
     files: Optional[list[str]] = None  # Files referenced in this turn
+    file_hashes: Optional[dict[str, str]] = None  # Content hash per file (snapshots stored by hash)
     images: Optional[list[str]] = None  # Image files for vision models
     tool_name: Optional[str] = None  # Tool used for this turn
     model_provider: Optional[str] = None  # Model provider (google, openai, etc)
@@ -127,6 +140,8 @@ class ThreadContext(BaseModel):
     Attributes:
         thread_id: UUID identifying this conversation thread
         parent_thread_id: UUID of parent thread (for conversation chains)
+        ancestor_thread_ids: Parent chain ids, nearest first, cached at creation so
+            the whole chain can be fetched in one batch
         created_at: ISO timestamp when thread was created
         last_updated_at: ISO timestamp of last modification
         tool_name: Name of the tool that initiated this thread
@@ -136,6 +151,7 @@ class ThreadContext(BaseModel):
 
     thread_id: str
     parent_thread_id: Optional[str] = None  # Parent thread for conversation chains
+    ancestor_thread_ids: list[str] = []  # parent, grandparent, ... (empty for older threads)
     created_at: str
     last_updated_at: str
     tool_name: str  # Tool that created this thread (preserved for attribution)
@@ -147,22 +163,64 @@ def get_redis_client():
     """
     Get Redis client from environment configuration
 
-    Creates a Redis client using the REDIS_URL environment variable.
-    Defaults to localhost:6379/0 if not specified.
+    Returns the shared client backed by the process-wide connection pool in
+    utils.redis_manager (configured via REDIS_URL, REDIS_MAX_CONNECTIONS and
+    REDIS_HEALTH_CHECK_INTERVAL), so repeated calls reuse pooled connections
+    instead of opening new ones.
 
     Returns:
-        redis.Redis: Configured Redis client with decode_responses=True
+        redis.Redis: Pooled Redis client with decode_responses=True
 
     Raises:
         ValueError: If redis package is not installed
     """
-    try:
-        import redis
+    from utils.redis_manager import get_redis_client as _get_pooled_redis_client
+
+    return _get_pooled_redis_client()
+
+
+def get_storage():
+    """
+    Get the storage client used for conversation threads
+
+    The returned client exposes the Redis command subset used by this module
+    (get, set, setex, expire, rpush, lrange, lrem and transactional pipelines).
+    CONVERSATION_STORAGE selects the backend:
+
+    - "redis" (default): shared pooled Redis client
+    - "memory": process-local utils.storage_backend store, lost on restart
+    - "sqlite": utils.sqlite_storage database file, survives server restarts
+
+    Returns:
+        Redis-compatible storage client
+    """
+    backend = os.getenv("CONVERSATION_STORAGE", "redis").strip().lower()
+    if backend == "sqlite":
+        from utils.sqlite_storage import get_sqlite_storage
+
+        return get_sqlite_storage()
+    if backend == "memory":
+        from utils.storage_backend import get_storage_backend
+
+        return get_storage_backend()
+    if backend != "redis":
+        logger.warning(f"Unknown CONVERSATION_STORAGE value ('{backend}'), using redis")
+    return get_redis_client()
+
+
+def _thread_key(thread_id: str) -> str:
+    """Key holding the thread header (ThreadContext without appended turns)"""
+    return f"thread:{thread_id}"
+
+
+def _snapshot_key(content_hash: str) -> str:
+    """Storage key for the file content with the given hash (shared by all threads)"""
+    return f"file_snapshot:{content_hash}"
 
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        return redis.from_url(redis_url, decode_responses=True)
-    except ImportError:
-        raise ValueError("redis package required. Install with: pip install redis")
+
+def _turns_key(thread_id: str) -> str:
+    """Key holding the append-only list of serialized ConversationTurn entries"""
+    return f"thread:{thread_id}:turns"
 
 
 def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread_id: Optional[str] = None) -> str:
@@ -197,9 +255,24 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
         if k not in ["temperature", "thinking_mode", "model", "continuation_id"]
     }
 
+    storage = get_storage()
+
+    # Cache the parent chain on the child so get_thread_chain can batch-fetch it
+    ancestor_thread_ids = []
+    if parent_thread_id:
+        ancestor_thread_ids = [parent_thread_id]
+        parent_header = storage.get(_thread_key(parent_thread_id)) if _is_valid_uuid(parent_thread_id) else None
+        if parent_header:
+            try:
+                parent = ThreadContext.model_validate_json(decode_value(parent_header))
+                ancestor_thread_ids.extend(parent.ancestor_thread_ids[: MAX_THREAD_CHAIN_DEPTH - 2])
+            except Exception:
+                logger.debug(f"[THREAD] Could not read ancestors of parent thread {parent_thread_id}")
+
     context = ThreadContext(
         thread_id=thread_id,
         parent_thread_id=parent_thread_id,  # Link to parent for conversation chains
+        ancestor_thread_ids=ancestor_thread_ids,
         created_at=now,
         last_updated_at=now,
         tool_name=tool_name,  # Track which tool initiated this conversation
@@ -207,10 +280,9 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
         initial_context=filtered_context,
     )
 
-    # Store in Redis with configurable TTL to prevent indefinite accumulation
-    client = get_redis_client()
-    key = f"thread:{thread_id}"
-    client.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())
+    # Store the thread header with configurable TTL to prevent indefinite accumulation.
+    # Turns are appended separately to the thread's turn list by add_turn().
+    storage.setex(_thread_key(thread_id), CONVERSATION_TIMEOUT_SECONDS, encode_value(context.model_dump_json()))
 
     logger.debug(f"[THREAD] Created new thread {thread_id} with parent {parent_thread_id}")
 
@@ -232,6 +304,12 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
         ThreadContext: Complete conversation context if found
         None: If thread doesn't exist, expired, or invalid UUID
 
+    Storage layout:
+        The header (thread:<id>) and the turn list (thread:<id>:turns) are read
+        together in one transactional pipeline. Turns embedded in the header by
+        older versions are kept and precede the appended turns. last_updated_at
+        reflects the most recent turn, since appending does not rewrite the header.
+
     Security:
         - Validates UUID format to prevent injection attacks
         - Handles Redis connection failures gracefully
@@ -241,18 +319,42 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
         return None
 
     try:
-        client = get_redis_client()
-        key = f"thread:{thread_id}"
-        data = client.get(key)
-
-        if data:
-            return ThreadContext.model_validate_json(data)
-        return None
+        return _fetch_threads(get_storage(), [thread_id]).get(thread_id)
     except Exception:
         # Silently handle errors to avoid exposing Redis details
         return None
 
 
+def _parse_thread(header: str, turn_items: list[str]) -> ThreadContext:
+    """Build a ThreadContext from its stored header and appended turn list"""
+    context = ThreadContext.model_validate_json(decode_value(header))
+    if turn_items:
+        context.turns.extend(ConversationTurn.model_validate_json(decode_value(item)) for item in turn_items)
+        context.last_updated_at = context.turns[-1].timestamp
+    return context
+
+
+def _fetch_threads(storage, thread_ids: list[str]) -> dict[str, ThreadContext]:
+    """
+    Load several threads in a single pipelined round trip
+
+    Each thread's header and turn list are queued on one transactional pipeline.
+    Threads that are missing or expired are absent from the result.
+    """
+    pipe = storage.pipeline(transaction=True)
+    for thread_id in thread_ids:
+        pipe.get(_thread_key(thread_id))
+        pipe.lrange(_turns_key(thread_id), 0, -1)
+    results = pipe.execute()
+
+    threads = {}
+    for i, thread_id in enumerate(thread_ids):
+        header, turn_items = results[2 * i], results[2 * i + 1]
+        if header:
+            threads[thread_id] = _parse_thread(header, turn_items)
+    return threads
+
+
 def add_turn(
     thread_id: str,
     role: str,
@@ -291,84 +393,175 @@ def add_turn(
         - Redis connection failure
 
     Note:
-        - Refreshes thread TTL to configured timeout on successful update
-        - Turn limits prevent runaway conversations
+        - Appends to the thread's turn list without rewriting the thread header,
+          so the cost is proportional to the new turn, not the whole thread
+        - The append and TTL refresh of header and turn list run in one
+          transaction, so a thread never ends up with mismatched expiries
+        - Turn limits prevent runaway conversations and hold under concurrent
+          writers: a writer whose append lands past the limit withdraws its turn
         - File references are preserved for cross-tool access
         - Model information enables cross-provider conversations
     """
     logger.debug(f"[FLOW] Adding {role} turn to {thread_id} ({tool_name})")
 
-    context = get_thread(thread_id)
-    if not context:
-        logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
-        return False
-
-    # Check turn limit to prevent runaway conversations
-    if len(context.turns) >= MAX_CONVERSATION_TURNS:
-        logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+    if not thread_id or not _is_valid_uuid(thread_id):
+        logger.debug(f"[FLOW] Invalid thread ID {thread_id} for turn addition")
         return False
 
-    # Create new turn with complete metadata
-    turn = ConversationTurn(
-        role=role,
-        content=content,
-        timestamp=datetime.now(timezone.utc).isoformat(),
-        files=files,  # Preserved for cross-tool file context
-        images=images,  # Preserved for vision model context
-        tool_name=tool_name,  # Track which tool generated this turn
-        model_provider=model_provider,  # Track model provider
-        model_name=model_name,  # Track specific model
-        model_metadata=model_metadata,  # Additional model info
-    )
-
-    context.turns.append(turn)
-    context.last_updated_at = datetime.now(timezone.utc).isoformat()
-
-    # Save back to Redis and refresh TTL
     try:
-        client = get_redis_client()
-        key = f"thread:{thread_id}"
-        client.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())  # Refresh TTL to configured timeout
+        storage = get_storage()
+        header = storage.get(_thread_key(thread_id))
+        if not header:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+
+        # The header only carries turns for threads written by older versions
+        legacy_turn_count = len(ThreadContext.model_validate_json(decode_value(header)).turns)
+        turn_limit = MAX_CONVERSATION_TURNS - legacy_turn_count
+        if turn_limit <= 0:
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+            return False
+
+        # Record the version of each file this turn refers to, so later turns can detect changes
+        from utils.file_utils import file_content_hash
+
+        file_hashes = {}
+        for file_path in files or ():
+            content_hash = file_content_hash(file_path, FILE_SNAPSHOT_MAX_BYTES)
+            if content_hash is not None:
+                file_hashes[file_path] = content_hash
+        if file_hashes:
+            _store_file_snapshots(storage, file_hashes)
+
+        # Create new turn with complete metadata
+        turn = ConversationTurn(
+            role=role,
+            content=content,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            files=files,  # Preserved for cross-tool file context
+            file_hashes=file_hashes or None,
+            images=images,  # Preserved for vision model context
+            tool_name=tool_name,  # Track which tool generated this turn
+            model_provider=model_provider,  # Track model provider
+            model_name=model_name,  # Track specific model
+            model_metadata=model_metadata,  # Additional model info
+        )
+        # Compressed when STORAGE_COMPRESSION is enabled and the turn is large enough
+        turn_json = encode_value(turn.model_dump_json())
+
+        # Append and refresh TTL of both keys atomically
+        pipe = storage.pipeline(transaction=True)
+        pipe.rpush(_turns_key(thread_id), turn_json)
+        pipe.expire(_turns_key(thread_id), CONVERSATION_TIMEOUT_SECONDS)
+        pipe.expire(_thread_key(thread_id), CONVERSATION_TIMEOUT_SECONDS)
+        new_length = pipe.execute()[0]
+
+        if new_length > turn_limit:
+            # Concurrent writers raced past the limit; every append beyond it is
+            # withdrawn, so the turns within the limit are never disturbed
+            storage.lrem(_turns_key(thread_id), -1, turn_json)
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
+            return False
+
         return True
     except Exception as e:
         logger.debug(f"[FLOW] Failed to save turn to Redis: {type(e).__name__}")
         return False
 
 
-def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]:
+def _store_file_snapshots(storage, file_hashes: dict[str, str]) -> None:
+    """
+    Keep the content recorded under each hash for the conversation timeout
+
+    Snapshots are keyed by content hash and shared by every turn that saw the same
+    content: existing ones only have their TTL refreshed, and only missing ones are
+    read and written (with SET NX, so a concurrent writer's copy is left alone).
+
+    Args:
+        storage: Conversation storage client
+        file_hashes: File path to content hash; updated if a file changed since it was hashed
+    """
+    from utils.file_utils import snapshot_file
+
+    hashes = list(dict.fromkeys(file_hashes.values()))
+    pipe = storage.pipeline(transaction=False)
+    for content_hash in hashes:
+        pipe.expire(_snapshot_key(content_hash), CONVERSATION_TIMEOUT_SECONDS)
+    missing = {content_hash for content_hash, exists in zip(hashes, pipe.execute()) if not exists}
+    if not missing:
+        return
+
+    pipe = storage.pipeline(transaction=False)
+    for file_path, content_hash in list(file_hashes.items()):
+        if content_hash not in missing:
+            continue
+        snapshot = snapshot_file(file_path, FILE_SNAPSHOT_MAX_BYTES)
+        if snapshot is None:
+            del file_hashes[file_path]
+            continue
+        # Record the content actually stored, even if the file changed since it was hashed
+        file_hashes[file_path], text = snapshot
+        pipe.set(_snapshot_key(snapshot[0]), encode_value(text), ex=CONVERSATION_TIMEOUT_SECONDS, nx=True)
+    pipe.execute()
+
+
+def get_thread_chain(
+    thread_id: str, max_depth: int = MAX_THREAD_CHAIN_DEPTH, start_context: Optional[ThreadContext] = None
+) -> list[ThreadContext]:
     """
     Traverse the parent chain to get all threads in conversation sequence.
 
     Retrieves the complete conversation chain by following parent_thread_id
     links. Returns threads in chronological order (oldest first).
 
+    Threads cache their ancestor ids at creation, so after the starting thread
+    is loaded all ancestors are fetched together in one pipelined round trip.
+    Older threads without cached ancestors fall back to one fetch per link.
+
     Args:
         thread_id: Starting thread ID
         max_depth: Maximum chain depth to prevent infinite loops
+        start_context: Already-loaded context for thread_id, saving its fetch
 
     Returns:
         list[ThreadContext]: All threads in chain, oldest first
     """
     chain = []
-    current_id = thread_id
     seen_ids = set()
+    fetched: dict[str, ThreadContext] = {}
+    if start_context is not None and start_context.thread_id == thread_id:
+        fetched[thread_id] = start_context
 
-    # Build chain from current to oldest
-    while current_id and len(chain) < max_depth:
-        # Prevent circular references
-        if current_id in seen_ids:
-            logger.warning(f"[THREAD] Circular reference detected in thread chain at {current_id}")
-            break
-
-        seen_ids.add(current_id)
-
-        context = get_thread(current_id)
-        if not context:
-            logger.debug(f"[THREAD] Thread {current_id} not found in chain traversal")
-            break
-
-        chain.append(context)
-        current_id = context.parent_thread_id
+    try:
+        storage = get_storage()
+        current_id = thread_id
+
+        # Build chain from current to oldest
+        while current_id and len(chain) < max_depth:
+            # Prevent circular references
+            if current_id in seen_ids:
+                logger.warning(f"[THREAD] Circular reference detected in thread chain at {current_id}")
+                break
+
+            seen_ids.add(current_id)
+
+            if current_id not in fetched:
+                # Fetch this thread together with every cached ancestor still needed
+                hint = chain[-1].ancestor_thread_ids if chain else []
+                if hint[:1] != [current_id]:
+                    hint = [current_id]
+                batch = [tid for tid in hint if tid not in fetched and _is_valid_uuid(tid)]
+                fetched.update(_fetch_threads(storage, batch[: max_depth - len(chain)]))
+
+            context = fetched.get(current_id)
+            if not context:
+                logger.debug(f"[THREAD] Thread {current_id} not found in chain traversal")
+                break
+
+            chain.append(context)
+            current_id = context.parent_thread_id
+    except Exception as e:
+        logger.debug(f"[THREAD] Failed to load thread chain: {type(e).__name__}")
 
     # Reverse to get chronological order (oldest first)
     chain.reverse()
@@ -418,6 +611,222 @@ def get_conversation_file_list(context: ThreadContext) -> list[str]:
     return unique_files
 
 
+def _file_hash_history(turns: list[ConversationTurn]) -> dict[str, list[str]]:
+    """Successive distinct content hashes recorded for each file, oldest first"""
+    history: dict[str, list[str]] = {}
+    for turn in turns:
+        for file_path, content_hash in (turn.file_hashes or {}).items():
+            hashes = history.setdefault(file_path, [])
+            if not hashes or hashes[-1] != content_hash:
+                hashes.append(content_hash)
+    return history
+
+
+def get_conversation_file_hashes(context: ThreadContext) -> dict[str, str]:
+    """
+    Get the content hash most recently recorded for each file in a conversation.
+
+    Args:
+        context: ThreadContext containing the complete conversation
+
+    Returns:
+        dict[str, str]: File path to content hash (files from turns without hashes are absent)
+    """
+    return {file_path: hashes[-1] for file_path, hashes in _file_hash_history(context.turns).items()}
+
+
+def get_file_snapshot(content_hash: str) -> Optional[str]:
+    """
+    Get the file content recorded under a content hash.
+
+    Args:
+        content_hash: Hash from ConversationTurn.file_hashes
+
+    Returns:
+        Optional[str]: Content with normalized line endings, or None if it has expired
+    """
+    try:
+        value = get_storage().get(_snapshot_key(content_hash))
+    except Exception as e:
+        logger.debug(f"[FILES] Failed to load file snapshot: {type(e).__name__}")
+        return None
+    return decode_value(value) if value else None
+
+
+def get_changed_files(context: ThreadContext, files: list[str]) -> dict[str, str]:
+    """
+    Find files whose content changed since they were last recorded in a conversation.
+
+    Args:
+        context: ThreadContext containing the complete conversation
+        files: Files to check
+
+    Returns:
+        dict[str, str]: Changed file path to the content hash recorded for it. Files never
+        recorded with a hash are not included.
+    """
+    from utils.file_utils import file_content_hash
+
+    recorded = get_conversation_file_hashes(context)
+    changed = {}
+    for file_path in files:
+        previous_hash = recorded.get(file_path)
+        if previous_hash is not None and file_content_hash(file_path, FILE_SNAPSHOT_MAX_BYTES) != previous_hash:
+            changed[file_path] = previous_hash
+    return changed
+
+
+def format_file_delta(file_path: str, previous_hash: str) -> Optional[str]:
+    """
+    Diff a file's current content against the version recorded earlier in the conversation.
+
+    Args:
+        file_path: File to compare
+        previous_hash: Content hash recorded for the earlier version
+
+    Returns:
+        Optional[str]: FILE CHANGES block, or None when the earlier version is no longer
+        stored, the file cannot be read, or the diff would not be smaller than the file
+    """
+    from utils.file_utils import format_file_diff, snapshot_file
+
+    previous = get_file_snapshot(previous_hash)
+    current = snapshot_file(file_path, FILE_SNAPSHOT_MAX_BYTES)
+    if previous is None or current is None:
+        return None
+    delta = format_file_diff(file_path, previous, current[1])
+    return delta if len(delta) < len(current[1]) else None
+
+
+def _format_recorded_file(file_path: str, content_hash: str) -> Optional[str]:
+    """File block with the content recorded under a hash, or None if the snapshot has expired"""
+    content = get_file_snapshot(content_hash)
+    if content is None:
+        return None
+    return f"\n--- BEGIN FILE: {file_path} ---\n{content}\n--- END FILE: {file_path} ---\n"
+
+
+# Number of threads whose formatted history is memoized between continuations
+HISTORY_CACHE_MAX_THREADS = 128
+
+
+class _HistoryCacheEntry:
+    """
+    Memoized building blocks of one thread's conversation history
+
+    Formatted turn blocks and their token counts are kept for the turns seen so
+    far, so a continuation only formats the turns appended since the last build.
+    File blocks come from the process-wide file content cache (utils.file_cache).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.turn_signatures: list[int] = []
+        self.turn_blocks: list[tuple[str, int]] = []  # (formatted turn, tokens)
+
+
+_history_cache: "OrderedDict[tuple[str, str, int, int], _HistoryCacheEntry]" = OrderedDict()
+_history_cache_lock = threading.Lock()
+
+
+def _get_history_cache_entry(thread_id: str, model_name: str, max_file_tokens: int, max_history_tokens: int):
+    """Get (or create) the cache entry for a thread under a given model token budget"""
+    key = (thread_id, model_name, max_file_tokens, max_history_tokens)
+    with _history_cache_lock:
+        entry = _history_cache.get(key)
+        if entry is None:
+            entry = _HistoryCacheEntry()
+            _history_cache[key] = entry
+            while len(_history_cache) > HISTORY_CACHE_MAX_THREADS:
+                _history_cache.popitem(last=False)
+        else:
+            _history_cache.move_to_end(key)
+        return entry
+
+
+def clear_history_cache() -> None:
+    """Drop all memoized conversation history blocks"""
+    with _history_cache_lock:
+        _history_cache.clear()
+
+
+def _turn_signature(turn: ConversationTurn) -> int:
+    """Identity of a turn's rendered content, used to validate cached turn blocks"""
+    return hash(
+        (
+            turn.role,
+            turn.timestamp,
+            turn.content,
+            turn.tool_name,
+            turn.model_provider,
+            turn.model_name,
+            tuple(turn.files or ()),
+            tuple(turn.images or ()),
+        )
+    )
+
+
+def _format_turn(turn: ConversationTurn, turn_num: int) -> str:
+    """Format a single conversation turn for the history prompt"""
+    role_label = "Claude" if turn.role == "user" else "Gemini"
+
+    # Build the complete turn content
+    turn_parts = []
+
+    # Add turn header with tool attribution for cross-tool tracking
+    turn_header = f"\n--- Turn {turn_num} ({role_label}"
+    if turn.tool_name:
+        turn_header += f" using {turn.tool_name}"
+
+    # Add model info if available
+    if turn.model_provider and turn.model_name:
+        turn_header += f" via {turn.model_provider}/{turn.model_name}"
+
+    turn_header += ") ---"
+    turn_parts.append(turn_header)
+
+    # Add files context if present - but just reference which files were used
+    # (the actual contents are embedded separately)
+    if turn.files:
+        turn_parts.append(f"Files used in this turn: {', '.join(turn.files)}")
+        turn_parts.append("")  # Empty line for readability
+
+    # Add images context if present
+    if turn.images:
+        turn_parts.append(f"Images used in this turn: {', '.join(turn.images)}")
+        turn_parts.append("")  # Empty line for readability
+
+    # Add the actual content
+    turn_parts.append(turn.content)
+
+    return "\n".join(turn_parts)
+
+
+def _get_turn_blocks(cache_entry: _HistoryCacheEntry, all_turns: list[ConversationTurn], model_context):
+    """
+    Return (formatted turn, tokens) for every turn, formatting only uncached turns
+
+    Cached blocks are reused while the cached prefix still matches the thread's
+    turns; turns are append-only, so normally only the newest turns are formatted.
+    """
+    signatures = [_turn_signature(turn) for turn in all_turns]
+    cached = len(cache_entry.turn_signatures)
+    if cached > len(signatures) or cache_entry.turn_signatures != signatures[:cached]:
+        logger.debug("[HISTORY] Cached turn blocks no longer match thread, rebuilding")
+        cache_entry.turn_signatures = []
+        cache_entry.turn_blocks = []
+        cached = 0
+
+    for idx in range(cached, len(all_turns)):
+        turn_content = _format_turn(all_turns[idx], idx + 1)
+        cache_entry.turn_blocks.append((turn_content, model_context.estimate_tokens(turn_content)))
+        cache_entry.turn_signatures.append(signatures[idx])
+
+    if cached:
+        logger.debug(f"[HISTORY] Reused {cached} cached turn blocks, formatted {len(all_turns) - cached} new")
+    return cache_entry.turn_blocks
+
+
 def build_conversation_history(context: ThreadContext, model_context=None, read_files_func=None) -> tuple[str, int]:
     """
     Build formatted conversation history for tool prompts with embedded file contents.
@@ -450,48 +859,38 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         This formatted history allows tools to "see" both conversation context AND
         file contents from previous tools, enabling true cross-tool collaboration
         while preventing duplicate file embeddings.
+
+    Caching:
+        Formatted turn blocks, their token counts and file blocks are memoized per
+        thread and model token budget. A continuation only formats the turns added
+        since the previous build. Files are embedded as recorded by add_turn (see
+        ConversationTurn.file_hashes), so a file changed since is shown once as
+        recorded and the tool sends the changes as a diff; files without a recorded
+        snapshot are read from disk, re-read only when their mtime or size changed.
     """
     # Get the complete thread chain
     if context.parent_thread_id:
-        # This thread has a parent, get the full chain
-        chain = get_thread_chain(context.thread_id)
-
-        # Collect all turns from all threads in chain
-        all_turns = []
-        all_files_set = set()
-        total_turns = 0
-
-        for thread in chain:
-            all_turns.extend(thread.turns)
-            total_turns += len(thread.turns)
-
-            # Collect files and images from this thread
-            for turn in thread.turns:
-                if turn.files:
-                    all_files_set.update(turn.files)
-
-        all_files = list(all_files_set)
-
-        # Also collect images from all threads
-        all_images_set = set()
-        for thread in chain:
-            for turn in thread.turns:
-                if turn.images:
-                    all_images_set.update(turn.images)
-        all_images = list(all_images_set)
-        logger.debug(f"[THREAD] Built history from {len(chain)} threads with {total_turns} total turns")
+        # This thread has a parent, get the full chain (the current thread is already loaded)
+        chain = get_thread_chain(context.thread_id, start_context=context)
+        logger.debug(f"[THREAD] Building history from {len(chain)} threads")
     else:
         # Single thread, no parent chain
-        all_turns = context.turns
-        total_turns = len(context.turns)
-        all_files = get_conversation_file_list(context)
-
-        # Also collect images from turns
-        all_images_set = set()
-        for turn in context.turns:
+        chain = [context]
+
+    # Collect turns, files and images in one pass, preserving order of first appearance
+    all_turns = []
+    files_seen: dict[str, None] = {}
+    images_seen: dict[str, None] = {}
+    for thread in chain:
+        for turn in thread.turns:
+            all_turns.append(turn)
+            if turn.files:
+                files_seen.update(dict.fromkeys(turn.files))
             if turn.images:
-                all_images_set.update(turn.images)
-        all_images = list(all_images_set)
+                images_seen.update(dict.fromkeys(turn.images))
+    all_files = list(files_seen)
+    all_images = list(images_seen)
+    total_turns = len(all_turns)
 
     if not all_turns:
         return "", 0
@@ -520,6 +919,10 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     max_file_tokens = token_allocation.file_tokens
     max_history_tokens = token_allocation.history_tokens
 
+    cache_entry = _get_history_cache_entry(
+        context.thread_id, model_context.model_name, max_file_tokens, max_history_tokens
+    )
+
     logger.debug(f"[HISTORY] Using model-specific limits for {model_context.model_name}:")
     logger.debug(f"[HISTORY]   Max file tokens: {max_file_tokens:,}")
     logger.debug(f"[HISTORY]   Max history tokens: {max_history_tokens:,}")
@@ -554,11 +957,20 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
             files_included = 0
             files_truncated = 0
 
+            # Files are shown as last recorded in the conversation; a tool sends later changes as a diff
+            recorded_hashes = {file_path: hashes[-1] for file_path, hashes in _file_hash_history(all_turns).items()}
+
             for file_path in all_files:
                 try:
                     logger.debug(f"[FILES] Processing file {file_path}")
-                    # Correctly unpack the tuple returned by read_file_content
-                    formatted_content, content_tokens = read_file_content(file_path)
+                    formatted_content = None
+                    if file_path in recorded_hashes:
+                        formatted_content = _format_recorded_file(file_path, recorded_hashes[file_path])
+                    if formatted_content is not None:
+                        content_tokens = model_context.estimate_tokens(formatted_content)
+                    else:
+                        # Unchanged files are served from the shared file content cache instead of being re-read
+                        formatted_content, content_tokens = read_file_content(file_path)
                     if formatted_content:
                         # read_file_content already returns formatted content, use it directly
                         # Check if adding this file would exceed the limit
@@ -656,44 +1068,14 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     total_turn_tokens = 0
     file_embedding_tokens = sum(model_context.estimate_tokens(part) for part in history_parts)
 
+    # Formatted turns and token counts are memoized; only new turns are formatted here
+    with cache_entry.lock:
+        turn_blocks = list(_get_turn_blocks(cache_entry, all_turns, model_context))
+
     # Process turns in reverse order (most recent first) to prioritize recent context
     for idx in range(len(all_turns) - 1, -1, -1):
-        turn = all_turns[idx]
         turn_num = idx + 1
-        role_label = "Claude" if turn.role == "user" else "Gemini"
-
-        # Build the complete turn content
-        turn_parts = []
-
-        # Add turn header with tool attribution for cross-tool tracking
-        turn_header = f"\n--- Turn {turn_num} ({role_label}"
-        if turn.tool_name:
-            turn_header += f" using {turn.tool_name}"
-
-        # Add model info if available
-        if turn.model_provider and turn.model_name:
-            turn_header += f" via {turn.model_provider}/{turn.model_name}"
-
-        turn_header += ") ---"
-        turn_parts.append(turn_header)
-
-        # Add files context if present - but just reference which files were used
-        # (the actual contents are already embedded above)
-        if turn.files:
-            turn_parts.append(f"Files used in this turn: {', '.join(turn.files)}")
-            turn_parts.append("")  # Empty line for readability
-
-        # Add images context if present
-        if turn.images:
-            turn_parts.append(f"Images used in this turn: {', '.join(turn.images)}")
-            turn_parts.append("")  # Empty line for readability
-
-        # Add the actual content
-        turn_parts.append(turn.content)
-
-        # Calculate tokens for this turn
-        turn_content = "\n".join(turn_parts)
-        turn_tokens = model_context.estimate_tokens(turn_content)
+        turn_content, turn_tokens = turn_blocks[idx]
 
         # Check if adding this turn would exceed history budget
         if file_embedding_tokens + total_turn_tokens + turn_tokens > max_history_tokens:
@@ -0,0 +1,134 @@
+"""
+Process-wide cache of formatted file content
+
+The same files are read and formatted repeatedly within a server process: by
+read_files for each tool call, when conversation history is rebuilt on every
+continuation, for workflow expert analysis and once per model by consensus.
+This cache keeps the formatted block and its token estimate so those reads
+are served from memory while the file is unchanged.
+
+Entries are keyed by (resolved path, mtime_ns, size, line-number flag). A
+modified file gets a new key, so stale content is never returned; the old
+entry simply ages out of the LRU. The cache is bounded by a character budget.
+
+Configuration (environment variables):
+- FILE_CACHE_MAX_BYTES: Budget for cached content (default: 64MB, 0 disables the cache)
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+FileCacheKey = tuple[str, int, int, bool]
+
+
+def _get_max_bytes_from_env() -> int:
+    """Read FILE_CACHE_MAX_BYTES, falling back to the default on invalid values"""
+    raw = os.getenv("FILE_CACHE_MAX_BYTES", "")
+    if not raw:
+        return DEFAULT_MAX_BYTES
+    try:
+        value = int(raw)
+        if value < 0:
+            raise ValueError
+        return value
+    except ValueError:
+        logger.warning(f"Invalid FILE_CACHE_MAX_BYTES value ('{raw}'), using default of {DEFAULT_MAX_BYTES}")
+        return DEFAULT_MAX_BYTES
+
+
+class FileContentCache:
+    """Thread-safe LRU of formatted file content bounded by total size"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self._max_bytes = _get_max_bytes_from_env() if max_bytes is None else max_bytes
+        self._entries: OrderedDict[FileCacheKey, tuple[str, str, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def get(self, key: FileCacheKey, file_path: str) -> Optional[tuple[str, int]]:
+        """
+        Look up a formatted file
+
+        Args:
+            key: (resolved path, mtime_ns, size, line-number flag)
+            file_path: Path as requested; the cached block embeds it in its delimiters
+
+        Returns:
+            Tuple of (formatted_content, estimated_tokens) or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != file_path:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: FileCacheKey, file_path: str, content: str, tokens: int) -> None:
+        """Store a formatted file, evicting least recently used entries beyond the budget"""
+        size = len(content)
+        if not self.enabled or size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._entries[key] = (file_path, content, tokens)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get cache counters for diagnostics
+
+        Returns:
+            dict: hits, misses, evictions, entries, bytes_resident and max_bytes
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes_resident": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+
+_file_cache: Optional[FileContentCache] = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileContentCache:
+    """Get the process-wide file content cache"""
+    global _file_cache
+    if _file_cache is None:
+        with _file_cache_lock:
+            if _file_cache is None:
+                _file_cache = FileContentCache()
+    return _file_cache
@@ -0,0 +1,190 @@
+"""
+Binary and encoding detection from the first block of a file
+
+read_file_content used to decode every file as UTF-8 with replacement
+characters, so a binary blob with a source-code extension was embedded as
+pages of U+FFFD. The sniffer reads only the first block of a file and decides:
+
+- a byte order mark selects its decoder (UTF-8 with BOM, UTF-16, UTF-32)
+- NUL bytes, or a high share of other control bytes, mean binary
+- a block that is valid UTF-8 (allowing a multi-byte sequence cut at the end)
+  is decoded as UTF-8
+- anything else is passed to charset-normalizer when it is installed and
+  FILE_CHARSET_DETECTION is enabled, and otherwise decoded as UTF-8 with
+  replacement characters as before
+
+Verdicts are cached by (device, inode) and validated by mtime and size, so
+repeated scans of the same tree do not reopen unchanged files.
+
+Configuration (environment variables):
+- FILE_CHARSET_DETECTION: Use charset-normalizer for non-UTF-8 text (default: true)
+"""
+
+import codecs
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the start of a file to classify it
+SNIFF_BYTES = 8192
+# Files whose verdict is remembered
+SNIFF_CACHE_MAX_ENTRIES = 50_000
+# Share of control bytes (other than whitespace, backspace, form feed and escape) that marks a block as binary
+BINARY_CONTROL_RATIO = 0.3
+
+# UTF-32 marks are checked first: the UTF-32 LE mark starts with the UTF-16 LE mark
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_TEXT_CONTROL_BYTES = frozenset(b"\t\n\r\b\f\x1b")
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in _TEXT_CONTROL_BYTES) + b"\x7f"
+
+
+class SniffResult(NamedTuple):
+    is_binary: bool
+    encoding: Optional[str]  # Decoder for text files, None for binary files
+
+
+BINARY = SniffResult(True, None)
+UTF8 = SniffResult(False, "utf-8")
+
+
+def _charset_detection_enabled() -> bool:
+    return os.getenv("FILE_CHARSET_DETECTION", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _detect_charset(block: bytes) -> Optional[str]:
+    """Best guess at a legacy encoding using charset-normalizer, if installed"""
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return None
+    match = from_bytes(block).best()
+    return match.encoding if match is not None else None
+
+
+def sniff_bytes(block: bytes) -> SniffResult:
+    """
+    Classify the first block of a file
+
+    Args:
+        block: Up to SNIFF_BYTES bytes from the start of the file
+
+    Returns:
+        SniffResult: Whether the content is binary and which decoder to use
+    """
+    for bom, encoding in _BOMS:
+        if block.startswith(bom):
+            return SniffResult(False, encoding)
+
+    if b"\x00" in block:
+        return BINARY
+
+    try:
+        # Not final: the block may end in the middle of a multi-byte sequence
+        codecs.getincrementaldecoder("utf-8")().decode(block, final=False)
+        return UTF8
+    except UnicodeDecodeError:
+        pass
+
+    control = len(block) - len(block.translate(None, _CONTROL_BYTES))
+    if control > len(block) * BINARY_CONTROL_RATIO:
+        return BINARY
+
+    if _charset_detection_enabled():
+        encoding = _detect_charset(block)
+        if encoding is not None:
+            return SniffResult(False, encoding)
+    return UTF8
+
+
+class FileSniffer:
+    """Classifies files from their first block, caching verdicts by inode and mtime"""
+
+    def __init__(self, max_entries: int = SNIFF_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple[int, int], tuple[int, int, SniffResult]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._binary = 0
+
+    def sniff(self, path: Union[str, Path], stat_result: Optional[os.stat_result] = None) -> SniffResult:
+        """
+        Classify a file, reading its first block only when no valid cached verdict exists
+
+        Args:
+            path: File to classify
+            stat_result: The file's os.stat result, if the caller already has it
+
+        Returns:
+            SniffResult: Whether the content is binary and which decoder to use
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        if stat_result is None:
+            stat_result = os.stat(path)
+        key = (stat_result.st_dev, stat_result.st_ino)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached[2]
+            self._misses += 1
+
+        with open(path, "rb") as f:
+            result = sniff_bytes(f.read(SNIFF_BYTES))
+        if result.is_binary:
+            logger.debug(f"[FILES] Detected binary content in {path}")
+        elif result.encoding != "utf-8":
+            logger.debug(f"[FILES] Detected {result.encoding} encoding for {path}")
+
+        with self._lock:
+            self._binary += result.is_binary
+            self._cache[key] = (stat_result.st_mtime_ns, stat_result.st_size, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
+            self._binary = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get cache statistics
+
+        Returns:
+            dict: entries, hits, misses and binary (files found binary when sniffed)
+        """
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self._hits, "misses": self._misses, "binary": self._binary}
+
+
+_file_sniffer: Optional[FileSniffer] = None
+_file_sniffer_lock = threading.Lock()
+
+
+def get_file_sniffer() -> FileSniffer:
+    """Get the process-wide file sniffer"""
+    global _file_sniffer
+    if _file_sniffer is None:
+        with _file_sniffer_lock:
+            if _file_sniffer is None:
+                _file_sniffer = FileSniffer()
+    return _file_sniffer
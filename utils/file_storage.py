@@ -2,16 +2,51 @@
 File storage mechanism for MCP server.
 Stores file contents in Redis with references, allowing tools to process files
 without exposing full content to the initiating AI (Claude).
+
+Contents are stored once per distinct content (a blob keyed by its SHA-256),
+and each reference records the path, metadata and the hash of its blob. The
+same content stored from several paths, or stored again unchanged, only
+writes the small reference record and extends the blob's TTL. A set of
+reference ids per blob acts as its refcount, so deleting the last reference
+deletes the blob.
+
+References are indexed in sorted sets scored by creation and expiry time, plus
+a set per conversation thread, so listing, pagination and expiry sweeps touch
+only the references involved and fetch them in pipelined batches.
+
+Contents larger than one chunk (FILE_CHUNK_SIZE characters) are stored as a
+sequence of chunk keys. References record the chunk size and the number of
+newlines in each chunk, so a character or line range is served by fetching
+only the chunks that overlap it.
 """
 
+import bisect
+import fnmatch
 import hashlib
 import json
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
+from .compression import decode_value, encode_value
 from .redis_manager import get_redis_client
 
+# Characters per stored chunk; contents up to this size are stored as a single blob
+FILE_CHUNK_SIZE = 256 * 1024
+
+
+def split_lines(content: str) -> list[str]:
+    """
+    Split text into lines, keeping line endings.
+
+    Only "\n" ends a line, matching FileReference.chunk_line_counts; str.splitlines()
+    would also split on form feeds, lone carriage returns and other separators.
+    """
+    lines = [line + "\n" for line in content.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
 
 class FileReference:
     """Represents a stored file reference."""
@@ -23,10 +58,16 @@ class FileReference:
         size: int,
         summary: Optional[str] = None,
         metadata: Optional[dict] = None,
+        content_hash: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        chunk_line_counts: Optional[list[int]] = None,
     ):
         self.file_path = file_path
         self.reference_id = reference_id
         self.size = size
+        self.content_hash = content_hash  # None for references stored before blobs were shared
+        self.chunk_size = chunk_size  # Set only when the content is stored in several chunks
+        self.chunk_line_counts = chunk_line_counts  # Newlines per chunk, used to locate line ranges
         self.summary = summary or f"File: {os.path.basename(file_path)} ({size} bytes)"
         self.metadata = metadata or {}
         self.created_at = datetime.utcnow().isoformat()
@@ -40,6 +81,9 @@ class FileReference:
             "summary": self.summary,
             "metadata": self.metadata,
             "created_at": self.created_at,
+            "content_hash": self.content_hash,
+            "chunk_size": self.chunk_size,
+            "chunk_line_counts": self.chunk_line_counts,
         }
 
     @classmethod
@@ -51,30 +95,51 @@ class FileReference:
             size=data["size"],
             summary=data.get("summary"),
             metadata=data.get("metadata", {}),
+            content_hash=data.get("content_hash"),
+            chunk_size=data.get("chunk_size"),
+            chunk_line_counts=data.get("chunk_line_counts"),
         )
         ref.created_at = data.get("created_at", datetime.utcnow().isoformat())
         return ref
 
+    @property
+    def chunk_count(self) -> int:
+        """Number of stored chunks (0 when the content is a single blob)."""
+        return len(self.chunk_line_counts) if self.chunk_line_counts else 0
+
 
 class FileStorage:
     """Manages file storage and retrieval using Redis."""
 
-    def __init__(self, ttl_hours: int = 24):
+    def __init__(self, ttl_hours: int = 24, chunk_size: int = FILE_CHUNK_SIZE):
         """
         Initialize file storage.
 
         Args:
             ttl_hours: Time-to-live for stored files in hours
+            chunk_size: Characters per stored chunk for large contents
         """
         self.redis_client = get_redis_client()
         self.ttl = timedelta(hours=ttl_hours)
-        self.file_prefix = "mcp:file:"
+        self.chunk_size = chunk_size
+        self.file_prefix = "mcp:file:"  # Per-reference content written by older versions
         self.ref_prefix = "mcp:fileref:"
-
-    def generate_reference_id(self, file_path: str, content: str) -> str:
+        self.blob_prefix = "mcp:blob:"
+        self.blob_refs_prefix = "mcp:blobrefs:"
+        self.created_index_key = "mcp:fileindex:created"  # reference_id scored by creation time
+        # "<reference_id>:<content_hash>:<chunk_count>" scored by expiry time
+        self.expiry_index_key = "mcp:fileindex:expiry"
+        self.thread_index_prefix = "mcp:fileindex:thread:"  # continuation_id -> set of reference_ids
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """SHA-256 of the content, used as its blob key."""
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def generate_reference_id(self, file_path: str, content: str, content_hash: Optional[str] = None) -> str:
         """Generate a unique reference ID for a file."""
         # Use file path and content hash to generate consistent IDs
-        content_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
+        content_hash = (content_hash or self.content_hash(content))[:16]
         path_hash = hashlib.sha256(file_path.encode()).hexdigest()[:8]
         return f"file_{path_hash}_{content_hash}"
 
@@ -84,6 +149,9 @@ class FileStorage:
         """
         Store a file and return a reference.
 
+        Content already stored (from any path) is not uploaded again: only the
+        reference record is written and the blob's TTL is extended.
+
         Args:
             file_path: Path to the file
             content: File content
@@ -93,22 +161,77 @@ class FileStorage:
         Returns:
             FileReference object
         """
-        reference_id = self.generate_reference_id(file_path, content)
+        content_hash = self.content_hash(content)
+        reference_id = self.generate_reference_id(file_path, content, content_hash)
+        blob_refs_key = f"{self.blob_refs_prefix}{content_hash}"
 
-        # Store file content
-        content_key = f"{self.file_prefix}{reference_id}"
-        self.redis_client.setex(content_key, self.ttl, content)
+        chunks = [content]
+        if len(content) > self.chunk_size:
+            chunks = [content[i : i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
 
-        # Create and store reference
         file_ref = FileReference(
-            file_path=file_path, reference_id=reference_id, size=len(content), summary=summary, metadata=metadata
+            file_path=file_path,
+            reference_id=reference_id,
+            size=len(content),
+            summary=summary,
+            metadata=metadata,
+            content_hash=content_hash,
+            chunk_size=self.chunk_size if len(chunks) > 1 else None,
+            chunk_line_counts=[chunk.count("\n") for chunk in chunks] if len(chunks) > 1 else None,
         )
-
-        ref_key = f"{self.ref_prefix}{reference_id}"
-        self.redis_client.setex(ref_key, self.ttl, json.dumps(file_ref.to_dict()))
+        blob_keys = self._blob_keys(file_ref)
+
+        # Write and index the reference, and extend the blob if it is already stored
+        now = time.time()
+        pipe = self.redis_client.pipeline(transaction=True)
+        for blob_key in blob_keys:
+            pipe.expire(blob_key, self.ttl)
+        pipe.sadd(blob_refs_key, reference_id)
+        pipe.expire(blob_refs_key, self.ttl)
+        pipe.setex(f"{self.ref_prefix}{reference_id}", self.ttl, json.dumps(file_ref.to_dict()))
+        pipe.zadd(self.created_index_key, {reference_id: now})
+        pipe.zadd(self.expiry_index_key, {self._expiry_member(file_ref): now + self.ttl.total_seconds()})
+        continuation_id = file_ref.metadata.get("continuation_id")
+        if continuation_id:
+            thread_key = f"{self.thread_index_prefix}{continuation_id}"
+            pipe.sadd(thread_key, reference_id)
+            pipe.expire(thread_key, self.ttl)
+        blob_exists = pipe.execute()[: len(blob_keys)]
+
+        if not all(blob_exists):
+            pipe = self.redis_client.pipeline(transaction=True)
+            for blob_key, chunk in zip(blob_keys, chunks):
+                pipe.setex(blob_key, self.ttl, encode_value(chunk))
+            pipe.execute()
 
         return file_ref
 
+    def _blob_keys(self, file_ref: FileReference) -> list[str]:
+        """Storage keys holding the reference's content, in order."""
+        blob_key = f"{self.blob_prefix}{file_ref.content_hash}"
+        if not file_ref.chunk_count:
+            return [blob_key]
+        return [f"{blob_key}:{i}" for i in range(file_ref.chunk_count)]
+
+    @staticmethod
+    def _expiry_member(file_ref: FileReference) -> str:
+        return f"{file_ref.reference_id}:{file_ref.content_hash}:{file_ref.chunk_count}"
+
+    def _read_chunks(self, file_ref: FileReference, first: int = 0, last: Optional[int] = None) -> Optional[str]:
+        """Fetch chunks first..last (inclusive) in one round trip; None if any has expired."""
+        if not file_ref.content_hash:
+            content = self.redis_client.get(f"{self.file_prefix}{file_ref.reference_id}")
+            return decode_value(content) if content else None
+
+        blob_keys = self._blob_keys(file_ref)[first : None if last is None else last + 1]
+        pipe = self.redis_client.pipeline(transaction=False)
+        for blob_key in blob_keys:
+            pipe.get(blob_key)
+        parts = pipe.execute()
+        if not all(parts):
+            return None
+        return "".join(decode_value(part) for part in parts)
+
     def retrieve_file(self, reference_id: str) -> Optional[tuple[str, FileReference]]:
         """
         Retrieve file content and reference by ID.
@@ -119,18 +242,152 @@ class FileStorage:
         Returns:
             Tuple of (content, FileReference) or None if not found
         """
-        content_key = f"{self.file_prefix}{reference_id}"
-        ref_key = f"{self.ref_prefix}{reference_id}"
+        file_ref = self.get_reference(reference_id)
+        if not file_ref:
+            return None
 
-        content = self.redis_client.get(content_key)
-        ref_data = self.redis_client.get(ref_key)
+        content = self._read_chunks(file_ref)
+        if content is None:
+            return None
+
+        return content, file_ref
+
+    def retrieve_range(
+        self,
+        reference_id: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+    ) -> Optional[tuple[str, FileReference]]:
+        """
+        Retrieve part of a stored file, fetching only the chunks that overlap it.
+
+        Either a character range (offset/length) or a line range (start_line and
+        end_line, 1-based and inclusive) can be requested; a line range takes
+        precedence.
 
-        if not content or not ref_data:
+        Args:
+            reference_id: The file reference ID
+            offset: First character to return
+            length: Number of characters to return (None for the rest of the file)
+            start_line: First line to return (defaults to 1 when end_line is given)
+            end_line: Last line to return (defaults to the end of the file)
+
+        Returns:
+            Tuple of (content, FileReference) or None if not found
+        """
+        file_ref = self.get_reference(reference_id)
+        if not file_ref:
             return None
 
-        file_ref = FileReference.from_dict(json.loads(ref_data))
+        if start_line is not None or end_line is not None:
+            result = self._read_line_range(file_ref, max(1, start_line or 1), end_line)
+            content = None if result is None else result[0]
+        else:
+            content = self._read_char_range(file_ref, max(0, offset), length)
+
+        if content is None:
+            return None
         return content, file_ref
 
+    def retrieve_lines(
+        self, reference_id: str, start_line: int = 1, end_line: Optional[int] = None, max_chars: Optional[int] = None
+    ) -> Optional[tuple[str, FileReference, int]]:
+        """
+        Retrieve whole lines of a stored file, stopping before max_chars is exceeded.
+
+        At least one line is returned; a single line longer than max_chars is cut
+        at max_chars. Only the chunks that can hold the returned text are fetched.
+
+        Args:
+            reference_id: The file reference ID
+            start_line: First line to return (1-based)
+            end_line: Last line to return, inclusive (defaults to the end of the file)
+            max_chars: Most characters to return (None for no limit)
+
+        Returns:
+            Tuple of (content, FileReference, offset of the content's first character)
+            or None if not found
+        """
+        file_ref = self.get_reference(reference_id)
+        if not file_ref:
+            return None
+        result = self._read_line_range(file_ref, max(1, start_line), end_line, max_chars)
+        if result is None:
+            return None
+        content, offset = result
+        return content, file_ref, offset
+
+    def _read_char_range(self, file_ref: FileReference, offset: int, length: Optional[int]) -> Optional[str]:
+        end = file_ref.size if length is None else min(file_ref.size, offset + max(0, length))
+        if offset >= end:
+            return ""
+        if not file_ref.chunk_count:
+            content = self._read_chunks(file_ref)
+            return None if content is None else content[offset:end]
+
+        first, last = offset // file_ref.chunk_size, (end - 1) // file_ref.chunk_size
+        content = self._read_chunks(file_ref, first, last)
+        base = first * file_ref.chunk_size
+        return None if content is None else content[offset - base : end - base]
+
+    @staticmethod
+    def _take_lines(lines: list[str], max_chars: Optional[int]) -> str:
+        """Join whole lines up to max_chars; the first line is cut if it alone is longer."""
+        if max_chars is None:
+            return "".join(lines)
+        total = 0
+        for count, line in enumerate(lines):
+            if total + len(line) > max_chars:
+                return "".join(lines[:count]) if count else line[:max_chars]
+            total += len(line)
+        return "".join(lines)
+
+    def _read_line_range(
+        self, file_ref: FileReference, start_line: int, end_line: Optional[int], max_chars: Optional[int] = None
+    ) -> Optional[tuple[str, int]]:
+        """Lines start_line..end_line as (text, offset of its first character); None if expired."""
+        if end_line is not None and end_line < start_line:
+            return "", 0
+        if not file_ref.chunk_count:
+            content = self._read_chunks(file_ref)
+            if content is None:
+                return None
+            lines = split_lines(content)
+            offset = sum(len(line) for line in lines[: start_line - 1])
+            return self._take_lines(lines[start_line - 1 : end_line], max_chars), offset
+
+        # cumulative[i] = newlines before chunk i; newline k (1-based) lies in chunk bisect_left(cumulative, k) - 1
+        cumulative = [0]
+        for count in file_ref.chunk_line_counts:
+            cumulative.append(cumulative[-1] + count)
+        total_newlines = cumulative[-1]
+        last_chunk = file_ref.chunk_count - 1
+
+        if start_line - 1 > total_newlines:
+            return "", file_ref.size
+        first = 0 if start_line == 1 else bisect.bisect_left(cumulative, start_line - 1) - 1
+        if end_line is None or end_line > total_newlines:
+            last = last_chunk
+        else:
+            last = bisect.bisect_left(cumulative, end_line) - 1
+        if max_chars is not None:
+            # The text starts inside chunk `first`, so max_chars more characters end within this many chunks
+            last = min(last, first + max_chars // file_ref.chunk_size + 1)
+
+        content = self._read_chunks(file_ref, first, last)
+        if content is None:
+            return None
+        # The fetched text starts inside line cumulative[first] + 1
+        lines = split_lines(content)
+        skip = start_line - 1 - cumulative[first]
+        offset = first * file_ref.chunk_size + sum(len(line) for line in lines[:skip])
+        return (
+            self._take_lines(lines[skip : None if end_line is None else end_line - cumulative[first]], max_chars),
+            offset,
+        )
+
     def get_reference(self, reference_id: str) -> Optional[FileReference]:
         """Get file reference without content."""
         ref_key = f"{self.ref_prefix}{reference_id}"
@@ -141,41 +398,120 @@ class FileStorage:
 
         return FileReference.from_dict(json.loads(ref_data))
 
-    def list_references(self, pattern: str = "*") -> list[FileReference]:
-        """List all stored file references matching pattern."""
-        references = []
+    def _fetch_references(self, reference_ids: list[str]) -> list[Optional[FileReference]]:
+        """Fetch several references in one pipelined round trip (None for missing ones)."""
+        if not reference_ids:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for reference_id in reference_ids:
+            pipe.get(f"{self.ref_prefix}{reference_id}")
+        return [FileReference.from_dict(json.loads(data)) if data else None for data in pipe.execute()]
 
-        # Find all reference keys
-        ref_pattern = f"{self.ref_prefix}{pattern}"
-        for key in self.redis_client.scan_iter(match=ref_pattern):
-            ref_data = self.redis_client.get(key)
-            if ref_data:
-                references.append(FileReference.from_dict(json.loads(ref_data)))
+    def list_references(
+        self,
+        pattern: str = "*",
+        continuation_id: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> list[FileReference]:
+        """
+        List stored file references, newest first.
 
+        Args:
+            pattern: Glob pattern matched against reference IDs
+            continuation_id: Only list references stored for this conversation thread
+            offset: Number of matching references to skip
+            limit: Maximum number of references to return (None for all)
+
+        Returns:
+            list[FileReference]: Matching references that have not expired
+        """
+        stop = -1 if limit is None else offset + limit - 1
+        if continuation_id:
+            # Per-thread sets are small; order them by creation time after fetching
+            candidates = list(self.redis_client.smembers(f"{self.thread_index_prefix}{continuation_id}"))
+        elif pattern == "*":
+            candidates = self.redis_client.zrevrange(self.created_index_key, offset, stop)
+        else:
+            candidates = self.redis_client.zrevrange(self.created_index_key, 0, -1)
+
+        if pattern != "*":
+            candidates = [reference_id for reference_id in candidates if fnmatch.fnmatchcase(reference_id, pattern)]
+
+        fetched = self._fetch_references(candidates)
+        references = [ref for ref in fetched if ref is not None]
+
+        # Drop index entries whose reference has expired
+        missing = [reference_id for reference_id, ref in zip(candidates, fetched) if ref is None]
+        if missing:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zrem(self.created_index_key, *missing)
+            if continuation_id:
+                pipe.srem(f"{self.thread_index_prefix}{continuation_id}", *missing)
+            pipe.execute()
+
+        if continuation_id:
+            references.sort(key=lambda ref: ref.created_at, reverse=True)
+        if continuation_id or pattern != "*":
+            references = references[offset : None if limit is None else offset + limit]
         return references
 
     def delete_file(self, reference_id: str) -> bool:
-        """Delete a stored file and its reference."""
-        content_key = f"{self.file_prefix}{reference_id}"
-        ref_key = f"{self.ref_prefix}{reference_id}"
+        """Delete a stored file reference, and its blob once no other reference uses it."""
+        file_ref = self.get_reference(reference_id)
 
         deleted = 0
-        deleted += self.redis_client.delete(content_key)
-        deleted += self.redis_client.delete(ref_key)
+        deleted += self.redis_client.delete(f"{self.ref_prefix}{reference_id}")
+        deleted += self.redis_client.delete(f"{self.file_prefix}{reference_id}")
+
+        if file_ref and file_ref.content_hash:
+            blob_refs_key = f"{self.blob_refs_prefix}{file_ref.content_hash}"
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.zrem(self.created_index_key, reference_id)
+            pipe.zrem(self.expiry_index_key, self._expiry_member(file_ref))
+            continuation_id = file_ref.metadata.get("continuation_id")
+            if continuation_id:
+                pipe.srem(f"{self.thread_index_prefix}{continuation_id}", reference_id)
+            pipe.srem(blob_refs_key, reference_id)
+            pipe.scard(blob_refs_key)
+            remaining = pipe.execute()[-1]
+            if not remaining:
+                self.redis_client.delete(*self._blob_keys(file_ref), blob_refs_key)
 
         return deleted > 0
 
     def cleanup_expired(self) -> int:
-        """Clean up expired files. Returns count of deleted files."""
-        # Redis handles TTL automatically, this is for manual cleanup if needed
-        deleted = 0
-
-        # Check all file references
-        for key in self.redis_client.scan_iter(match=f"{self.ref_prefix}*"):
-            if not self.redis_client.ttl(key):
-                # TTL expired or not set
-                ref_id = key.decode().replace(self.ref_prefix, "")
-                if self.delete_file(ref_id):
-                    deleted += 1
+        """
+        Sweep references whose TTL has passed. Returns count of swept references.
 
-        return deleted
+        Redis expires the reference keys on its own; this removes them from the
+        indexes and releases their blobs. Only expired index entries are read.
+        """
+        expired = self.redis_client.zrangebyscore(self.expiry_index_key, "-inf", time.time())
+        if not expired:
+            return 0
+
+        # Members written before chunking have no chunk count
+        entries = [(member.split(":") + ["0"])[:3] for member in expired]
+        pipe = self.redis_client.pipeline(transaction=True)
+        for reference_id, content_hash, _ in entries:
+            pipe.delete(f"{self.ref_prefix}{reference_id}")
+            pipe.zrem(self.created_index_key, reference_id)
+            pipe.srem(f"{self.blob_refs_prefix}{content_hash}", reference_id)
+        pipe.zrem(self.expiry_index_key, *expired)
+        pipe.execute()
+
+        # Delete blobs that no remaining reference points to
+        chunk_counts = {content_hash: int(chunk_count) for _, content_hash, chunk_count in entries}
+        pipe = self.redis_client.pipeline(transaction=False)
+        for content_hash in chunk_counts:
+            pipe.scard(f"{self.blob_refs_prefix}{content_hash}")
+        blob_keys = []
+        for (content_hash, chunk_count), remaining in zip(chunk_counts.items(), pipe.execute()):
+            if not remaining:
+                ref = FileReference("", "", 0, content_hash=content_hash, chunk_line_counts=[0] * chunk_count)
+                blob_keys.extend(self._blob_keys(ref))
+        if blob_keys:
+            self.redis_client.delete(*blob_keys)
+
+        return len(expired)
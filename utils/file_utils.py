@@ -37,14 +37,35 @@ multi-turn file handling:
    - Error handling preserves conversation flow when files become unavailable
 """
 
+import codecs
+import contextlib
+import difflib
+import functools
+import hashlib
 import json
 import logging
+import mmap
 import os
+import stat
+import threading
+from collections import deque
+from collections.abc import Iterator, Sequence
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-
-from .file_types import BINARY_EXTENSIONS, CODE_EXTENSIONS, IMAGE_EXTENSIONS, TEXT_EXTENSIONS
+from typing import Optional, Union
+
+from .file_cache import get_file_cache
+from .file_sniffer import get_file_sniffer
+from .file_types import (
+    BINARY_EXTENSIONS,
+    CODE_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    TEXT_EXTENSIONS,
+    get_token_estimation_ratio,
+)
+from .file_walker import get_directory_walker
 from .security_config import EXCLUDED_DIRS, is_dangerous_path
+from .timed_reader import TimedReader, get_timed_reader
 from .token_utils import DEFAULT_CONTEXT_WINDOW, estimate_tokens
 
 
@@ -79,6 +100,63 @@ def _is_builtin_custom_models_config(path_str: str) -> bool:
 
 logger = logging.getLogger(__name__)
 
+# Files read concurrently by read_files (FILE_READ_WORKERS); reads run this far ahead of the token budget cursor
+DEFAULT_FILE_READ_WORKERS = 8
+FILE_READ_AHEAD_FACTOR = 2
+# Bytes formatted per step when streaming a file into its prompt block
+FORMAT_CHUNK_BYTES = 64 * 1024
+_LINE_NUMBER_SEPARATOR = "│ ".encode()
+
+# Seconds before a single file read is abandoned (30 seconds is more than enough for any reasonable file)
+FILE_READ_TIMEOUT = 30.0
+
+# Order in which read_files fills the token budget: files named directly in the request,
+# then the most recently modified, then the smallest
+DEFAULT_FILE_PRIORITY = ("explicit", "recent", "smallest")
+# Approximate growth of file content from the "  123│ " line number prefixes
+LINE_NUMBER_OVERHEAD = 0.2
+# Smallest remaining budget (tokens) worth filling with part of a file that does not fit whole
+PARTIAL_FILE_MIN_TOKENS = 1_000
+# Characters kept free for the partial file note and omitted-lines markers
+PARTIAL_FILE_MARKER_RESERVE = 512
+# Content hashes memoized by (path, mtime, size), so unchanged files are not re-read to be hashed
+FILE_HASH_CACHE_SIZE = 1024
+
+_read_executor: Optional[TimedReader] = None
+_read_executor_lock = threading.Lock()
+
+
+def _get_file_read_workers() -> int:
+    raw = os.getenv("FILE_READ_WORKERS", "")
+    if not raw:
+        return DEFAULT_FILE_READ_WORKERS
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        logger.warning(f"Invalid FILE_READ_WORKERS value ('{raw}'), using default of {DEFAULT_FILE_READ_WORKERS}")
+        return DEFAULT_FILE_READ_WORKERS
+
+
+def _get_read_executor() -> TimedReader:
+    """
+    Get the shared pool used to read files ahead of the token budget cursor
+
+    Each file is read under one deadline on this pool; the timed reads inside
+    read_file_content run inline on the worker rather than hopping to the I/O pool.
+    """
+    global _read_executor
+    if _read_executor is None:
+        with _read_executor_lock:
+            if _read_executor is None:
+                _read_executor = TimedReader(max_workers=_get_file_read_workers(), name="file-reader")
+    return _read_executor
+
+
+@functools.lru_cache(maxsize=1)
+def _get_mcp_server_dir() -> Path:
+    """The directory the MCP server runs from (utils/file_utils.py -> server root)"""
+    return Path(__file__).parent.parent.resolve()
+
 
 def is_mcp_directory(path: Path) -> bool:
     """
@@ -96,9 +174,7 @@ def is_mcp_directory(path: Path) -> bool:
     if not path.is_dir():
         return False
 
-    # Get the directory where the MCP server is running from
-    # __file__ is utils/file_utils.py, so parent.parent is the MCP root
-    mcp_server_dir = Path(__file__).parent.parent.resolve()
+    mcp_server_dir = _get_mcp_server_dir()
 
     # Check if the given path is the MCP server directory or a subdirectory
     try:
@@ -278,6 +354,307 @@ def _add_line_numbers(content: str) -> str:
     return "\n".join(numbered_lines)
 
 
+def _format_file_block(path: Path, header: str, footer: str, add_line_numbers: bool, encoding: str = "utf-8") -> str:
+    """
+    Read a file straight into its formatted block without intermediate full copies.
+
+    Produces the same text as decoding the file (UTF-8, invalid bytes replaced),
+    applying _add_line_numbers or _normalize_line_endings and wrapping it in
+    header and footer, but works on the raw bytes: the file is memory-mapped,
+    scanned once to count lines (for the line number width), then formatted
+    chunk by chunk into one preallocated buffer that is decoded once at the end.
+    Line endings and line number prefixes are ASCII, so inserting them between
+    lines does not change how invalid byte sequences are replaced.
+
+    Files in other encodings (see utils.file_sniffer) are decoded whole and
+    formatted as text.
+
+    Args:
+        path: File to read
+        header: Text placed before the content
+        footer: Text placed after the content
+        add_line_numbers: Whether to prefix each line with its number
+        encoding: Decoder chosen for the file
+
+    Returns:
+        str: header + formatted content + footer
+    """
+    if encoding in ("utf-8", "utf-8-sig", "ascii"):
+        with _mapped_file(path) as source:
+            start = len(codecs.BOM_UTF8) if encoding == "utf-8-sig" else 0
+            return _format_bytes(source, header, footer, add_line_numbers, start)
+
+    content = path.read_bytes().decode(encoding, errors="replace")
+    content = _add_line_numbers(content) if add_line_numbers else _normalize_line_endings(content)
+    return f"{header}{content}{footer}"
+
+
+@contextlib.contextmanager
+def _mapped_file(path: Path) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Memory-map a file for reading, falling back to its bytes for files that cannot be mapped"""
+    with open(path, "rb") as f:
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files (and special files) cannot be mapped
+            yield f.read()
+            return
+        try:
+            yield source
+        finally:
+            source.close()
+
+
+def _count_lines(source: Union[mmap.mmap, bytes], offset: int = 0) -> int:
+    """Count lines as _add_line_numbers does: \\n, \\r\\n and lone \\r each end a line"""
+    newlines = returns = crlf = 0
+    previous_cr = False
+    for start in range(offset, len(source), FORMAT_CHUNK_BYTES):
+        chunk = source[start : start + FORMAT_CHUNK_BYTES]
+        newlines += chunk.count(b"\n")
+        returns += chunk.count(b"\r")
+        # A \r\n pair may straddle two chunks
+        crlf += chunk.count(b"\r\n") + (previous_cr and chunk[:1] == b"\n")
+        previous_cr = chunk[-1:] == b"\r"
+    return newlines + returns - crlf + 1
+
+
+def _format_bytes(
+    source: Union[mmap.mmap, bytes], header: str, footer: str, add_line_numbers: bool, offset: int = 0
+) -> str:
+    size = len(source) - offset
+    header_bytes = header.encode("utf-8")
+    footer_bytes = footer.encode("utf-8")
+
+    width = 0
+    total_lines = 0
+    if add_line_numbers:
+        total_lines = _count_lines(source, offset)
+        width = max(len(str(total_lines)), 4)  # Minimum padding for readability
+
+    prefix_size = width + len(_LINE_NUMBER_SEPARATOR)
+    buffer = bytearray(len(header_bytes) + size + total_lines * prefix_size + len(footer_bytes))
+    buffer[: len(header_bytes)] = header_bytes
+    pos = len(header_bytes)
+    line_format = b"%*d" + _LINE_NUMBER_SEPARATOR + b"%s\n"
+
+    carry = b""  # Start of a line continuing into the next chunk
+    pending_cr = False  # Chunk ended in \r, which may be the first half of \r\n
+    line_number = 1
+    for start in range(offset, len(source), FORMAT_CHUNK_BYTES):
+        chunk = source[start : start + FORMAT_CHUNK_BYTES]
+        if pending_cr:
+            chunk = b"\r" + chunk
+        pending_cr = chunk.endswith(b"\r")
+        if pending_cr:
+            chunk = chunk[:-1]
+        chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        if add_line_numbers:
+            lines = chunk.split(b"\n")
+            lines[0] = carry + lines[0]
+            carry = lines.pop()
+            if lines:
+                chunk = b"".join([line_format % (width, n, line) for n, line in enumerate(lines, line_number)])
+                line_number += len(lines)
+            else:
+                chunk = b""
+        buffer[pos : pos + len(chunk)] = chunk
+        pos += len(chunk)
+
+    if add_line_numbers:
+        if pending_cr:
+            tail = line_format % (width, line_number, carry)
+            line_number += 1
+            carry = b""
+        else:
+            tail = b""
+        tail += b"%*d" % (width, line_number) + _LINE_NUMBER_SEPARATOR + carry
+    else:
+        tail = b"\n" if pending_cr else b""
+    tail += footer_bytes
+    buffer[pos : pos + len(tail)] = tail
+    pos += len(tail)
+
+    del buffer[pos:]
+    return buffer.decode("utf-8", errors="replace")
+
+
+def _resolve_line_ranges(line_ranges: Sequence[tuple[int, Optional[int]]], total_lines: int) -> list[tuple[int, int]]:
+    """
+    Resolve requested line ranges against a file's line count.
+
+    Args:
+        line_ranges: 1-based inclusive (start, end) pairs; negative values count
+            from the end of the file (-1 is the last line) and an end of None
+            means the end of the file
+        total_lines: Number of lines in the file
+
+    Returns:
+        Sorted, merged ranges clamped to the file, e.g. [(1, 20), (480, 500)]
+
+    Raises:
+        ValueError: If a range uses line 0
+    """
+    resolved = []
+    for start, end in line_ranges:
+        if start == 0 or end == 0:
+            raise ValueError("Line numbers start at 1 (use negative numbers to count from the end)")
+        if end is None:
+            end = total_lines
+        start = start + total_lines + 1 if start < 0 else start
+        end = end + total_lines + 1 if end < 0 else end
+        start, end = max(start, 1), min(end, total_lines)
+        if start <= end:
+            resolved.append((start, end))
+
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(resolved):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _iter_capped_lines(f, limit: int) -> Iterator[tuple[str, int]]:
+    """
+    Yield the lines of a text file opened with universal newlines, as _add_line_numbers splits them.
+
+    Lines longer than limit characters are cut so a huge line (minified code,
+    a log without newlines) is never held in memory whole.
+
+    Yields:
+        Tuple of (line without its ending, number of characters cut from it)
+    """
+    at_line_start = True
+    while True:
+        line = f.readline(limit)
+        if not line:
+            if at_line_start:
+                # Content ending in a newline (or empty) has a final empty line
+                yield "", 0
+            return
+        if line.endswith("\n"):
+            yield line[:-1], 0
+            continue
+
+        cut = 0
+        while True:
+            rest = f.readline(limit)
+            if not rest:
+                yield line, cut
+                return
+            if rest.endswith("\n"):
+                yield line, cut + len(rest) - 1
+                break
+            cut += len(rest)
+
+
+def _format_partial_block(
+    path: Path,
+    header: str,
+    footer: str,
+    add_line_numbers: bool,
+    max_chars: int,
+    line_ranges: Optional[Sequence[tuple[int, Optional[int]]]] = None,
+    reason: str = "",
+    encoding: str = "utf-8",
+) -> str:
+    """
+    Embed part of a file: requested line ranges, or its first and last lines.
+
+    Without line_ranges, the first lines of the file fill half of max_chars
+    and its last lines fill the rest. With line_ranges, the requested lines are
+    embedded in order until max_chars is used. Lines keep their real numbers
+    and every gap is marked, so the model knows exactly what it did not see.
+
+    Args:
+        path: File to read
+        header: Text placed before the content
+        footer: Text placed after the content
+        add_line_numbers: Whether to prefix each line with its number
+        max_chars: Approximate size of the embedded lines
+        line_ranges: Lines to embed (see _resolve_line_ranges)
+        reason: Why the file is partial, shown in the partial file note
+        encoding: Decoder chosen for the file
+
+    Returns:
+        str: header + partial file note + selected lines and gap markers + footer
+    """
+    if codecs.lookup(encoding).name.startswith(("utf-16", "utf-32")):
+        # Line endings are not single bytes in these encodings, so count decoded lines
+        with open(path, encoding=encoding, errors="replace") as f:
+            total_lines = sum(1 for _ in _iter_capped_lines(f, FORMAT_CHUNK_BYTES))
+    else:
+        with _mapped_file(path) as source:
+            total_lines = _count_lines(source, len(codecs.BOM_UTF8) if encoding == "utf-8-sig" else 0)
+
+    width = max(len(str(total_lines)), 4) if add_line_numbers else 0
+    prefix_size = width + 2 if add_line_numbers else 0  # "│ " separator
+    ranges = _resolve_line_ranges(line_ranges, total_lines) if line_ranges is not None else None
+    head_budget = max_chars if ranges is not None else max_chars // 2
+
+    head: list[tuple[int, str]] = []
+    tail: deque[tuple[int, str]] = deque()
+    used = tail_used = 0
+    head_open = True
+    range_index = 0
+    with open(path, encoding=encoding, errors="replace") as f:
+        for number, (line, cut) in enumerate(_iter_capped_lines(f, max(head_budget, 1)), 1):
+            if ranges is not None:
+                while range_index < len(ranges) and number > ranges[range_index][1]:
+                    range_index += 1
+                if range_index == len(ranges):
+                    break
+                if number < ranges[range_index][0]:
+                    continue
+
+            if cut:
+                line += f" … [{cut:,} more characters]"
+            cost = prefix_size + len(line) + 1
+            if head_open and (used + cost <= head_budget or not head):
+                head.append((number, line))
+                used += cost
+                continue
+            head_open = False
+            if ranges is not None:
+                # Requested lines beyond the budget are reported as omitted
+                break
+
+            tail.append((number, line))
+            tail_used += cost
+            while tail and tail_used > max_chars - used:
+                tail_used -= prefix_size + len(tail.popleft()[1]) + 1
+
+    selected = head + list(tail)
+    spans: list[tuple[int, int]] = []
+    for number, _ in selected:
+        if spans and number == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], number)
+        else:
+            spans.append((number, number))
+    shown = ", ".join(f"{start:,}-{end:,}" if start != end else f"{start:,}" for start, end in spans) or "none"
+    label = "line" if len(selected) == 1 else "lines"
+    note = f"[PARTIAL FILE: {reason + '; ' if reason else ''}showing {label} {shown} of {total_lines:,}]"
+
+    output = [note]
+    next_line = 1
+    for number, line in selected:
+        if number > next_line:
+            output.append(_omitted_lines_marker(next_line, number - 1))
+        output.append(f"{number:{width}d}│ {line}" if add_line_numbers else line)
+        next_line = number + 1
+    if next_line <= total_lines:
+        output.append(_omitted_lines_marker(next_line, total_lines))
+    return header + "\n".join(output) + footer
+
+
+def _omitted_lines_marker(start: int, end: int) -> str:
+    lines = f"line {start:,}" if start == end else f"lines {start:,}-{end:,}"
+    return f"... [{lines} omitted] ..."
+
+
 def resolve_and_validate_path(path_str: str) -> Path:
     """
     Resolves and validates a path against security policies.
@@ -328,8 +705,9 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     Expand paths to individual files, handling both files and directories.
 
     This function recursively walks directories to find all matching files.
-    It automatically filters out hidden files and common non-code directories
-    like __pycache__ to avoid including generated or system files.
+    It automatically filters out hidden files, common non-code directories
+    like __pycache__ and anything excluded by .gitignore/.ignore files to avoid
+    including generated or system files (see utils.file_walker).
 
     Args:
         paths: List of file or directory paths (must be absolute)
@@ -376,40 +754,14 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
                 seen.add(str(path_obj))
 
         elif path_obj.is_dir():
-            # Walk directory recursively to find all files
-            for root, dirs, files in os.walk(path_obj):
-                # Filter directories in-place to skip hidden and excluded directories
-                # This prevents descending into .git, .venv, __pycache__, node_modules, etc.
-                original_dirs = dirs[:]
-                dirs[:] = []
-                for d in original_dirs:
-                    # Skip hidden directories
-                    if d.startswith("."):
-                        continue
-                    # Skip excluded directories
-                    if d in EXCLUDED_DIRS:
-                        continue
-                    # Skip MCP directories found during traversal
-                    dir_path = Path(root) / d
-                    if is_mcp_directory(dir_path):
-                        logger.debug(f"Skipping MCP directory during traversal: {dir_path}")
-                        continue
-                    dirs.append(d)
-
-                for file in files:
-                    # Skip hidden files (e.g., .DS_Store, .gitignore)
-                    if file.startswith("."):
-                        continue
-
-                    file_path = Path(root) / file
-
-                    # Filter by extension if specified
-                    if not extensions or file_path.suffix.lower() in extensions:
-                        full_path = str(file_path)
-                        # Use set to prevent duplicates
-                        if full_path not in seen:
-                            expanded_files.append(full_path)
-                            seen.add(full_path)
+            # Walk directory recursively, skipping hidden, excluded and ignored entries and the MCP's own code
+            for full_path in get_directory_walker().walk_files(
+                str(path_obj), extensions, excluded_dirs=EXCLUDED_DIRS, skip_dir=str(_get_mcp_server_dir())
+            ):
+                # Use set to prevent duplicates
+                if full_path not in seen:
+                    expanded_files.append(full_path)
+                    seen.add(full_path)
 
     # Sort for consistent ordering across different runs
     # This makes output predictable and easier to debug
@@ -418,7 +770,12 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
 
 
 def read_file_content(
-    file_path: str, max_size: int = 5_000_000, *, include_line_numbers: Optional[bool] = None
+    file_path: str,
+    max_size: int = 5_000_000,
+    *,
+    include_line_numbers: Optional[bool] = None,
+    line_ranges: Optional[Sequence[tuple[int, Optional[int]]]] = None,
+    max_tokens: Optional[int] = None,
 ) -> tuple[str, int]:
     """
     Read a single file and format it for inclusion in AI prompts.
@@ -427,10 +784,17 @@ def read_file_content(
     returns formatted content, even for errors. This ensures the AI model
     gets context about what files were attempted but couldn't be read.
 
+    Files larger than max_size, or than max_tokens, are embedded partially:
+    their first and last lines with a marker for the omitted middle (see
+    _format_partial_block). line_ranges embeds only the requested lines.
+
     Args:
         file_path: Path to file (must be absolute)
-        max_size: Maximum file size to read (default 5MB to prevent memory issues)
+        max_size: Maximum file size to embed in full (default 5MB to prevent memory issues)
         include_line_numbers: Whether to add line numbers. If None, auto-detects based on file type
+        line_ranges: Only embed these 1-based inclusive (start, end) line ranges; negative
+            numbers count from the end of the file and an end of None means the last line
+        max_tokens: Embed only the head and tail of the file if it would exceed this many tokens
 
     Returns:
         Tuple of (formatted_content, estimated_tokens)
@@ -463,97 +827,98 @@ def read_file_content(
             return content, estimate_tokens(content)
 
         # Check file size to prevent memory exhaustion
-        file_size = path.stat().st_size
+        stat_result = path.stat()
+        file_size = stat_result.st_size
         logger.debug(f"[FILES] File size for {file_path}: {file_size:,} bytes")
-        if file_size > max_size:
-            logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
-            content = f"\n--- FILE TOO LARGE: {file_path} ---\nFile size: {file_size:,} bytes (max: {max_size:,})\n--- END FILE ---\n"
+
+        # Reject binary content and pick the decoder from the first block (cached by inode and mtime)
+        verdict = get_timed_reader().run(get_file_sniffer().sniff, path, stat_result, timeout=FILE_READ_TIMEOUT)
+        if verdict.is_binary:
+            logger.debug(f"[FILES] Binary content in {file_path}")
+            content = f"\n--- BINARY FILE: {file_path} ---\nError: File content is binary, not text ({file_size:,} bytes)\n--- END FILE ---\n"
             return content, estimate_tokens(content)
 
         # Determine if we should add line numbers
         add_line_numbers = should_add_line_numbers(file_path, include_line_numbers)
         logger.debug(f"[FILES] Line numbers for {file_path}: {'enabled' if add_line_numbers else 'disabled'}")
 
-        # Read the file with UTF-8 encoding, replacing invalid characters
-        # This ensures we can handle files with mixed encodings
-        logger.debug(f"[FILES] Reading file content for {file_path}")
-
-        # Add timeout protection for file reading to prevent hanging on unresponsive filesystems
-        # Use platform-specific approach
-        import platform
-
-        if platform.system() != "Windows":
-            # Unix-based systems support SIGALRM
-            import errno
-            import signal
-
-            def timeout_handler(signum, frame):
-                raise OSError(errno.ETIMEDOUT, f"File read timed out after 30 seconds: {file_path}")
-
-            # Set up timeout (30 seconds should be more than enough for any reasonable file)
-            old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(30)
-
-            try:
-                with open(path, encoding="utf-8", errors="replace") as f:
-                    file_content = f.read()
-            finally:
-                # Always restore the original handler and cancel the alarm
-                signal.alarm(0)
-                signal.signal(signal.SIGALRM, old_handler)
-        else:
-            # Windows doesn't support SIGALRM, use threading-based timeout
-            import queue
-            import threading
-
-            result_queue = queue.Queue()
-            exception_queue = queue.Queue()
-
-            def read_file_thread():
-                try:
-                    with open(path, encoding="utf-8", errors="replace") as f:
-                        content = f.read()
-                    result_queue.put(content)
-                except Exception as e:
-                    exception_queue.put(e)
-
-            thread = threading.Thread(target=read_file_thread)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=30)  # 30 second timeout
-
-            if thread.is_alive():
-                # Thread is still running after timeout
-                raise OSError(f"File read timed out after 30 seconds: {file_path}")
-
-            # Check for exceptions
-            if not exception_queue.empty():
-                raise exception_queue.get()
-
-            # Get the result
-            if not result_queue.empty():
-                file_content = result_queue.get()
-            else:
-                raise OSError(f"File read failed: {file_path}")
-
-        logger.debug(f"[FILES] Successfully read {len(file_content)} characters from {file_path}")
-
-        # Add line numbers if requested or auto-detected
-        if add_line_numbers:
-            file_content = _add_line_numbers(file_content)
-            logger.debug(f"[FILES] Added line numbers to {file_path}")
-        else:
-            # Still normalize line endings for consistency
-            file_content = _normalize_line_endings(file_content)
-
         # Format with clear delimiters that help the AI understand file boundaries
         # Using consistent markers makes it easier for the model to parse
         # NOTE: These markers ("--- BEGIN FILE: ... ---") are distinct from git diff markers
         # ("--- BEGIN DIFF: ... ---") to allow AI to distinguish between complete file content
         # vs. partial diff content when files appear in both sections
-        formatted = f"\n--- BEGIN FILE: {file_path} ---\n{file_content}\n--- END FILE: {file_path} ---\n"
+        header = f"\n--- BEGIN FILE: {file_path} ---\n"
+        footer = f"\n--- END FILE: {file_path} ---\n"
+
+        # Embed only part of the file if it is too large or only some lines were requested
+        partial_chars = None
+        reason = ""
+        if file_size > max_size:
+            logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
+            partial_chars = max_size
+            reason = f"file too large ({file_size:,} bytes, max: {max_size:,})"
+        elif line_ranges is not None:
+            partial_chars = max_size
+        budget_chars = None
+        if max_tokens is not None:
+            budget_chars = max(max_tokens * 4 - len(header) - len(footer) - PARTIAL_FILE_MARKER_RESERVE, 0)
+            # Decoded characters never outnumber bytes, so this bounds the size of the full embedding
+            full_chars = file_size * (1 + LINE_NUMBER_OVERHEAD if add_line_numbers else 1) + len(header) + len(footer)
+            if full_chars // 4 > max_tokens and (partial_chars is None or budget_chars < partial_chars):
+                partial_chars = budget_chars
+                reason = reason or "file exceeds remaining token budget"
+
+        if partial_chars is None:
+            # Serve unchanged files from the shared cache; a modified file has a new mtime/size and misses
+            file_cache = get_file_cache()
+            cache_key = (str(path), stat_result.st_mtime_ns, file_size, add_line_numbers)
+            cached = file_cache.get(cache_key, file_path) if file_cache.enabled else None
+            if cached is not None:
+                logger.debug(f"[FILES] Using cached content for {file_path}")
+                formatted, tokens = cached
+            else:
+                # Read the file with UTF-8 encoding, replacing invalid characters
+                # This ensures we can handle files with mixed encodings
+                logger.debug(f"[FILES] Reading file content for {file_path}")
+
+                # Stream the file into its formatted block (normalizing line endings and adding line
+                # numbers if requested) on the shared I/O pool, with a deadline to prevent hanging
+                # on unresponsive filesystems
+                formatted = get_timed_reader().run(
+                    _format_file_block,
+                    path,
+                    header,
+                    footer,
+                    add_line_numbers,
+                    verdict.encoding,
+                    timeout=FILE_READ_TIMEOUT,
+                )
+                logger.debug(f"[FILES] Successfully read {file_size:,} bytes from {file_path}")
+
+                tokens = estimate_tokens(formatted)
+                logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
+                file_cache.put(cache_key, file_path, formatted, tokens)
+
+            if max_tokens is None or tokens <= max_tokens:
+                return formatted, tokens
+            # Line numbers added more than estimated; fall back to the head and tail
+            partial_chars = budget_chars
+            reason = "file exceeds remaining token budget"
+
+        formatted = get_timed_reader().run(
+            _format_partial_block,
+            path,
+            header,
+            footer,
+            add_line_numbers,
+            partial_chars,
+            line_ranges,
+            reason,
+            verdict.encoding,
+            timeout=FILE_READ_TIMEOUT,
+        )
         tokens = estimate_tokens(formatted)
-        logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
+        logger.debug(f"[FILES] Partial content for {file_path}: {len(formatted)} chars, {tokens} tokens")
         return formatted, tokens
 
     except Exception as e:
@@ -564,6 +929,124 @@ def read_file_content(
         return content, tokens
 
 
+def plan_files_for_budget(
+    files: list[str],
+    max_tokens: int,
+    *,
+    include_line_numbers: bool = False,
+    explicit_files: Optional[set[str]] = None,
+    priority: Sequence[str] = DEFAULT_FILE_PRIORITY,
+) -> tuple[list[str], list[str]]:
+    """
+    Choose which files fit a token budget using only os.stat, before reading any.
+
+    Token counts are estimated from file size with file-type aware ratios. Files
+    are considered in priority order and each one that still fits is selected,
+    so a large file that does not fit does not stop smaller ones from filling
+    the remaining budget.
+
+    Args:
+        files: Candidate file paths
+        max_tokens: Token budget to fill
+        include_line_numbers: Whether the files will be read with line numbers
+        explicit_files: Files named directly by the caller (rather than found in a directory)
+        priority: Ordering criteria, any of "explicit", "recent" and "smallest"
+
+    Returns:
+        Tuple of (selected files, skipped files), each in the order of files
+    """
+    explicit_files = explicit_files or set()
+    unknown = set(priority) - set(DEFAULT_FILE_PRIORITY)
+    if unknown:
+        raise ValueError(f"Unknown file priority criteria: {', '.join(sorted(unknown))}")
+
+    estimates = {}
+    sort_keys = {}
+    for file_path in files:
+        try:
+            stat_result = os.stat(file_path)
+            size, mtime = stat_result.st_size, stat_result.st_mtime_ns
+        except OSError:
+            # Unreadable files are embedded as a short error block
+            size, mtime = 0, 0
+        tokens = size / get_token_estimation_ratio(file_path)
+        if should_add_line_numbers(file_path, include_line_numbers):
+            tokens *= 1 + LINE_NUMBER_OVERHEAD
+        # Account for the BEGIN/END FILE delimiters around the content
+        estimates[file_path] = int(tokens) + (2 * len(file_path) + 40) // 4
+
+        criteria = {"explicit": file_path not in explicit_files, "recent": -mtime, "smallest": size}
+        sort_keys[file_path] = tuple(criteria[name] for name in priority)
+
+    selected = set()
+    remaining = max_tokens
+    for file_path in sorted(files, key=sort_keys.__getitem__):
+        if estimates[file_path] <= remaining:
+            selected.add(file_path)
+            remaining -= estimates[file_path]
+
+    logger.debug(
+        f"[FILES] Planned {len(selected)} of {len(files)} files for {max_tokens:,} tokens "
+        f"(~{max_tokens - remaining:,} estimated)"
+    )
+    return [f for f in files if f in selected], [f for f in files if f not in selected]
+
+
+def _iter_file_contents(file_paths: list[str], include_line_numbers: bool = False) -> Iterator[tuple[str, int]]:
+    """
+    Read files in order, running reads ahead of the consumer on a bounded pool.
+
+    Results are yielded in the order of file_paths regardless of which read
+    finishes first. Closing the iterator cancels reads that have not started
+    and abandons running reads that are past their deadline.
+
+    Args:
+        file_paths: Files to read, in output order
+        include_line_numbers: Whether to add line numbers to file content
+
+    Yields:
+        Tuple of (formatted_content, estimated_tokens) for each file
+    """
+    workers = _get_file_read_workers()
+    if workers == 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield read_file_content(file_path, include_line_numbers=include_line_numbers)
+        return
+
+    executor = _get_read_executor()
+    read = functools.partial(read_file_content, include_line_numbers=include_line_numbers)
+
+    def submit(file_path: str):
+        try:
+            return executor.submit(read, file_path, timeout=FILE_READ_TIMEOUT)
+        except OSError as e:
+            return e
+
+    remaining = iter(file_paths)
+    pending = deque((file_path, submit(file_path)) for file_path in islice(remaining, workers * FILE_READ_AHEAD_FACTOR))
+    try:
+        while pending:
+            file_path, timed_read = pending.popleft()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append((next_path, submit(next_path)))
+            try:
+                if isinstance(timed_read, OSError):
+                    raise timed_read
+                result = timed_read.result()
+            except OSError as e:
+                # Timed out, or refused while earlier reads are stuck on an unresponsive filesystem
+                logger.debug(f"[FILES] Read of {file_path} failed: {e}")
+                content = f"\n--- ERROR READING FILE: {file_path} ---\nError: {str(e)}\n--- END FILE ---\n"
+                result = content, estimate_tokens(content)
+            yield result
+    finally:
+        # Running reads within their deadline are left to the reader's watchdog
+        cancelled = sum(timed_read.cancel() for _, timed_read in pending if not isinstance(timed_read, OSError))
+        if cancelled:
+            logger.debug(f"[FILES] Cancelled or abandoned {cancelled} outstanding file reads")
+
+
 def read_files(
     file_paths: list[str],
     code: Optional[str] = None,
@@ -571,14 +1054,19 @@ def read_files(
     reserve_tokens: int = 50_000,
     *,
     include_line_numbers: bool = False,
+    file_priority: Sequence[str] = DEFAULT_FILE_PRIORITY,
+    line_ranges: Optional[dict[str, Sequence[tuple[int, Optional[int]]]]] = None,
 ) -> str:
     """
     Read multiple files and optional direct code with smart token management.
 
     This function implements intelligent token budgeting to maximize the amount
     of relevant content that can be included in an AI prompt while staying
-    within token limits. It prioritizes direct code and reads files until
-    the token budget is exhausted.
+    within token limits. It prioritizes direct code and requested line ranges,
+    then plans which files fit the remaining budget from their sizes (see
+    plan_files_for_budget) and reads only those. Budget left over after that is
+    filled with the head and tail of files too large to embed whole. Files are
+    emitted in sorted order whichever were selected.
 
     Args:
         file_paths: List of file or directory paths (absolute paths required)
@@ -586,6 +1074,8 @@ def read_files(
         max_tokens: Maximum tokens to use (defaults to DEFAULT_CONTEXT_WINDOW)
         reserve_tokens: Tokens to reserve for prompt and response (default 50K)
         include_line_numbers: Whether to add line numbers to file content
+        file_priority: Order in which files claim the budget (see DEFAULT_FILE_PRIORITY)
+        line_ranges: Per-file line ranges to embed instead of the whole file (see read_file_content)
 
     Returns:
         str: All file contents formatted for AI consumption
@@ -627,28 +1117,102 @@ def read_files(
             logger.debug("[FILES] No files found from provided paths")
             content_parts.append(f"\n--- NO FILES FOUND ---\nProvided paths: {', '.join(file_paths)}\n--- END ---\n")
         else:
-            # Read files sequentially until token limit is reached
-            logger.debug(f"[FILES] Reading {len(all_files)} files with token budget {available_tokens:,}")
-            for i, file_path in enumerate(all_files):
-                if total_tokens >= available_tokens:
-                    logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(all_files) - i} files")
-                    files_skipped.extend(all_files[i:])
+            # Explicitly named files (rather than directory contents) claim the budget first
+            explicit_files = set()
+            for path in file_paths:
+                try:
+                    path_obj = resolve_and_validate_path(path)
+                except (ValueError, PermissionError):
+                    continue
+                if path_obj.is_file():
+                    explicit_files.add(str(path_obj))
+
+            file_contents = {}
+            candidates = all_files
+
+            # Requested line ranges are read first, like direct code
+            if line_ranges:
+                ranged_files = {}
+                for path, ranges in line_ranges.items():
+                    try:
+                        ranged_files[str(resolve_and_validate_path(path))] = ranges
+                    except (ValueError, PermissionError):
+                        continue
+                for file_path in all_files:
+                    if file_path not in ranged_files:
+                        continue
+                    file_content, file_tokens = read_file_content(
+                        file_path,
+                        include_line_numbers=include_line_numbers,
+                        line_ranges=ranged_files[file_path],
+                        max_tokens=available_tokens - total_tokens,
+                    )
+                    if total_tokens + file_tokens <= available_tokens:
+                        file_contents[file_path] = file_content
+                        total_tokens += file_tokens
+                    else:
+                        files_skipped.append(file_path)
+                candidates = [f for f in all_files if f not in ranged_files]
+
+            # Plan from file sizes, read only the selected files, and re-plan any budget
+            # left over when files turn out smaller than estimated
+            while candidates and total_tokens < available_tokens:
+                selected, candidates = plan_files_for_budget(
+                    candidates,
+                    available_tokens - total_tokens,
+                    include_line_numbers=include_line_numbers,
+                    explicit_files=explicit_files,
+                    priority=file_priority,
+                )
+                if not selected:
                     break
 
-                file_content, file_tokens = read_file_content(file_path, include_line_numbers=include_line_numbers)
-                logger.debug(f"[FILES] File {file_path}: {file_tokens:,} tokens")
+                logger.debug(f"[FILES] Reading {len(selected)} files with token budget {available_tokens:,}")
+                contents = _iter_file_contents(selected, include_line_numbers=include_line_numbers)
+                for i, file_path in enumerate(selected):
+                    if total_tokens >= available_tokens:
+                        logger.debug(f"[FILES] Token budget exhausted, skipping remaining {len(selected) - i} files")
+                        files_skipped.extend(selected[i:])
+                        break
+
+                    file_content, file_tokens = next(contents)
+                    logger.debug(f"[FILES] File {file_path}: {file_tokens:,} tokens")
+
+                    # Check if adding this file would exceed limit
+                    if total_tokens + file_tokens <= available_tokens:
+                        file_contents[file_path] = file_content
+                        total_tokens += file_tokens
+                        logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
+                    else:
+                        # File larger than estimated and too large for remaining budget
+                        logger.debug(
+                            f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {available_tokens - total_tokens:,} remaining)"
+                        )
+                        files_skipped.append(file_path)
+                contents.close()
+
+            files_skipped.extend(candidates)
 
-                # Check if adding this file would exceed limit
-                if total_tokens + file_tokens <= available_tokens:
-                    content_parts.append(file_content)
+            # Rather than dropping files that do not fit, embed the head and tail of as many as the
+            # remaining budget allows (explicitly named files first)
+            for file_path in sorted(files_skipped, key=lambda f: f not in explicit_files):
+                remaining_tokens = available_tokens - total_tokens
+                if remaining_tokens < PARTIAL_FILE_MIN_TOKENS:
+                    break
+                if line_ranges and file_path in ranged_files:
+                    continue
+                file_content, file_tokens = read_file_content(
+                    file_path, include_line_numbers=include_line_numbers, max_tokens=remaining_tokens
+                )
+                if file_tokens <= remaining_tokens:
+                    file_contents[file_path] = file_content
                     total_tokens += file_tokens
-                    logger.debug(f"[FILES] Added file {file_path}, total tokens: {total_tokens:,}")
-                else:
-                    # File too large for remaining budget
-                    logger.debug(
-                        f"[FILES] File {file_path} too large for remaining budget ({file_tokens:,} tokens, {available_tokens - total_tokens:,} remaining)"
-                    )
-                    files_skipped.append(file_path)
+                    logger.debug(f"[FILES] Added partial file {file_path}, total tokens: {total_tokens:,}")
+            files_skipped = [f for f in files_skipped if f not in file_contents]
+
+            content_parts.extend(file_contents[f] for f in all_files if f in file_contents)
+            skipped = set(files_skipped)
+            files_skipped = [f for f in all_files if f in skipped]
 
     # Add informative note about skipped files to help users understand
     # what was omitted and why
@@ -669,6 +1233,82 @@ def read_files(
     return result
 
 
+@functools.lru_cache(maxsize=FILE_HASH_CACHE_SIZE)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """SHA-256 of a file's bytes; keyed by its stat so a modified file is hashed again"""
+    data = get_timed_reader().run(Path.read_bytes, Path(path), timeout=FILE_READ_TIMEOUT)
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_content_hash(file_path: str, max_size: int = 1_000_000) -> Optional[str]:
+    """
+    Hash a file's content, reading it only when its mtime or size changed since it was last hashed.
+
+    Args:
+        file_path: Path to file (must be absolute)
+        max_size: Larger files are not hashed
+
+    Returns:
+        SHA-256 of the raw bytes, or None if the path is not an accessible regular
+        file of at most max_size bytes
+    """
+    try:
+        path = resolve_and_validate_path(file_path)
+        stat_result = path.stat()
+        if not stat.S_ISREG(stat_result.st_mode) or stat_result.st_size > max_size:
+            return None
+        return _hash_file(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+    except (ValueError, PermissionError, OSError):
+        return None
+
+
+def snapshot_file(file_path: str, max_size: int = 1_000_000) -> Optional[tuple[str, str]]:
+    """
+    Read a file's content and hash it for later comparison.
+
+    Args:
+        file_path: Path to file (must be absolute)
+        max_size: Larger files are not snapshotted
+
+    Returns:
+        Tuple of (SHA-256 of the raw bytes, text with normalized line endings), or None
+        if the path is not an accessible regular file of at most max_size bytes
+    """
+    try:
+        path = resolve_and_validate_path(file_path)
+        if not path.is_file() or path.stat().st_size > max_size:
+            return None
+        data = get_timed_reader().run(Path.read_bytes, path, timeout=FILE_READ_TIMEOUT)
+    except (ValueError, PermissionError, OSError):
+        return None
+    return hashlib.sha256(data).hexdigest(), _normalize_line_endings(data.decode("utf-8", errors="replace"))
+
+
+def format_file_diff(file_path: str, previous: str, current: str) -> str:
+    """
+    Format the changes between two versions of a file as a unified diff block.
+
+    Args:
+        file_path: Path shown in the block markers
+        previous: Content the model saw earlier in the conversation
+        current: Content now
+
+    Returns:
+        str: Diff wrapped in BEGIN/END FILE CHANGES markers
+    """
+    diff = "\n".join(
+        difflib.unified_diff(
+            previous.split("\n"),
+            current.split("\n"),
+            fromfile=f"{file_path} (previously embedded)",
+            tofile=f"{file_path} (current)",
+            lineterm="",
+        )
+    )
+    # Distinct from "--- BEGIN FILE:" (full content) and "--- BEGIN DIFF:" (git changes) markers
+    return f"\n--- BEGIN FILE CHANGES: {file_path} ---\n{diff}\n--- END FILE CHANGES: {file_path} ---\n"
+
+
 def estimate_file_tokens(file_path: str) -> int:
     """
     Estimate tokens for a file using file-type aware ratios.
@@ -811,15 +1451,26 @@ def is_text_file(file_path: str) -> bool:
     """
     Check if a file is likely a text file based on extension and content.
 
+    Known text and binary extensions decide directly; other files are
+    classified from their first block (see utils.file_sniffer).
+
     Args:
         file_path: Path to the file
 
     Returns:
         True if file appears to be text, False otherwise
     """
+    from .file_types import is_binary_file
     from .file_types import is_text_file as check_text_type
 
-    return check_text_type(file_path)
+    if check_text_type(file_path):
+        return True
+    if is_binary_file(file_path):
+        return False
+    try:
+        return not get_file_sniffer().sniff(file_path).is_binary
+    except OSError:
+        return False
 
 
 def read_file_safely(file_path: str, max_size: int = 5 * 1024 * 1024) -> Optional[str]:
@@ -0,0 +1,405 @@
+"""
+Directory walker for expand_paths that honours .gitignore and .ignore files
+
+Directories are listed with os.scandir and the listings, along with each
+directory's filtered result, are cached and validated by the directory's
+mtime: adding, removing or renaming an entry updates the mtime, so a repeated
+expansion of the same project tree costs one stat per directory (plus one per
+ignore file) instead of a full listing and re-filtering. Listings whose mtime
+is too recent to be trusted (the filesystem's timestamp granularity could hide
+a further change) are not cached.
+
+Ignore files are read from every walked directory and from the directories
+above the walk root up to the enclosing repository root (the nearest directory
+containing .git). Rules follow gitignore syntax: comments, negation with "!",
+directory-only patterns ending in "/", patterns anchored by a "/" and "**"
+wildcards. Rules from .ignore are applied after those from .gitignore in the
+same directory, so they take precedence, and deeper files take precedence over
+shallower ones. As in git, files inside an ignored directory cannot be
+re-included.
+"""
+
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+# Cached directory listings and parsed ignore files
+DIR_CACHE_MAX_ENTRIES = 100_000
+# Listings whose directory changed more recently than this are not cached
+RACY_MTIME_SECONDS = 2.0
+# Ancestor directories searched for the repository root
+MAX_ANCESTOR_DEPTH = 64
+
+
+class IgnoreRule(NamedTuple):
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+class _RuleSet(NamedTuple):
+    version: int  # Unique per parse, so cached results can tell when an ignore file changed
+    rules: list[IgnoreRule]
+
+
+class _Listing(NamedTuple):
+    mtime_ns: int
+    dirs: list[str]
+    files: list[str]
+    ignore_files: list[str]
+    cacheable: bool
+
+
+_rule_versions = itertools.count(1)
+
+
+def _suffix(name: str) -> str:
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slashes) to a regex"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                after = i + 2
+                if after == n:
+                    out.append(".*")
+                    i = after
+                    continue
+                if pattern[after] == "/":
+                    out.append("(?:.*/)?")
+                    i = after + 1
+                    continue
+            out.append("[^/]*")
+            while i < n and pattern[i] == "*":
+                i += 1
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1 : i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_ignore_rules(text: str) -> list[IgnoreRule]:
+    """
+    Parse the contents of a .gitignore/.ignore file
+
+    Args:
+        text: File contents
+
+    Returns:
+        list[IgnoreRule]: Rules in file order; paths are matched relative to the file's directory
+    """
+    rules = []
+    for raw in text.splitlines():
+        line = raw.rstrip("\r")
+        if not line or line.startswith("#"):
+            continue
+        # Trailing spaces are ignored unless escaped
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+
+        negate = False
+        if line.startswith("!"):
+            negate, line = True, line[1:]
+        elif line.startswith(("\\!", "\\#")):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        # A slash anywhere but the end anchors the pattern to the ignore file's directory
+        anchored = "/" in line
+        regex = _translate_glob(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        try:
+            rules.append(IgnoreRule(re.compile(f"^{regex}$"), negate, dir_only))
+        except re.error:
+            logger.debug(f"Skipping invalid ignore pattern: {raw}")
+    return rules
+
+
+class DirectoryWalker:
+    """Walks directory trees using cached, mtime-validated listings"""
+
+    def __init__(self, max_entries: int = DIR_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._listings: OrderedDict[str, _Listing] = OrderedDict()
+        self._rules: OrderedDict[str, tuple[tuple[int, int], _RuleSet]] = OrderedDict()
+        # path -> (validation signature, matching files, subdirectories to descend into)
+        self._results: OrderedDict[str, tuple[tuple, list[str], list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _cache_put(self, cache: OrderedDict, key: str, value) -> None:
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self._max_entries:
+                cache.popitem(last=False)
+
+    def _list_dir(self, path: str) -> Optional[_Listing]:
+        """List a directory, reusing the cached listing while its mtime is unchanged"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._listings.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                self._listings.move_to_end(path)
+                self._hits += 1
+                return cached
+            self._misses += 1
+
+        dirs, files, ignore_files = [], [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name in IGNORE_FILE_NAMES:
+                        ignore_files.append(name)
+                    # Hidden entries are never expanded
+                    if name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            # Like os.walk, symlinked directories are not followed
+                            if not entry.is_symlink():
+                                dirs.append(name)
+                        else:
+                            files.append(name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Cannot list directory {path}: {e}")
+            return None
+
+        ignore_files.sort(key=IGNORE_FILE_NAMES.index)
+        listing = _Listing(mtime_ns, dirs, files, ignore_files, time.time_ns() - mtime_ns > RACY_MTIME_SECONDS * 1e9)
+        if listing.cacheable:
+            self._cache_put(self._listings, path, listing)
+        return listing
+
+    def _load_rules(self, file_path: str) -> Optional[_RuleSet]:
+        """Parse an ignore file, reusing the parsed rules while its mtime and size are unchanged"""
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return None
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            cached = self._rules.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                rule_set = _RuleSet(next(_rule_versions), parse_ignore_rules(f.read()))
+        except OSError:
+            return None
+        self._cache_put(self._rules, file_path, (signature, rule_set))
+        return rule_set
+
+    def _dir_rules(self, path: str, names: list[str]) -> Optional[_RuleSet]:
+        """Combined rules of a directory's ignore files (.ignore after .gitignore)"""
+        rule_sets = [rule_set for name in names if (rule_set := self._load_rules(os.path.join(path, name)))]
+        if not rule_sets:
+            return None
+        if len(rule_sets) == 1:
+            return rule_sets[0]
+        # Versions are positive, so a negative combined version cannot collide with a single file's
+        return _RuleSet(
+            -hash(tuple(rule_set.version for rule_set in rule_sets)),
+            [rule for rule_set in rule_sets for rule in rule_set.rules],
+        )
+
+    def _ancestor_rules(self, root: str) -> list[tuple[str, _RuleSet]]:
+        """Ignore rules from directories above root, up to the enclosing repository root"""
+        stack = []
+        current = root
+        for _ in range(MAX_ANCESTOR_DEPTH):
+            if os.path.exists(os.path.join(current, ".git")):
+                stack.reverse()
+                return stack
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+            names = [name for name in IGNORE_FILE_NAMES if os.path.isfile(os.path.join(current, name))]
+            rule_set = self._dir_rules(current, names)
+            if rule_set and rule_set.rules:
+                stack.append((current, rule_set))
+        # Not inside a repository: only ignore files within the walked tree apply
+        return []
+
+    @staticmethod
+    def _is_ignored(stack: list[tuple[str, _RuleSet]], path: str, is_dir: bool) -> bool:
+        # The deepest ignore file's last matching rule decides
+        for base, rule_set in reversed(stack):
+            rel_path = path[len(base) + 1 :]
+            if os.sep != "/":
+                rel_path = rel_path.replace(os.sep, "/")
+            for rule in reversed(rule_set.rules):
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.regex.match(rel_path):
+                    return not rule.negate
+        return False
+
+    def walk_files(
+        self,
+        root: str,
+        extensions: Optional[set[str]] = None,
+        excluded_dirs: Optional[set[str]] = None,
+        skip_dir: Optional[str] = None,
+    ) -> list[str]:
+        """
+        List the files under a directory, honouring ignore files
+
+        Args:
+            root: Resolved directory to walk
+            extensions: Lower-case file suffixes to include (None or empty for all)
+            excluded_dirs: Directory names never descended into
+            skip_dir: Resolved directory whose subtree is excluded (e.g. the server's own code)
+
+        Returns:
+            list[str]: File paths in walk order (callers sort)
+        """
+        excluded_dirs = excluded_dirs or set()
+        skip_prefix = skip_dir + os.sep if skip_dir else None
+        # Cached per-directory results are only valid for the same filtering options
+        options = hash((frozenset(extensions or ()), frozenset(excluded_dirs), skip_dir))
+        files_found = []
+
+        pending = [(root, self._ancestor_rules(root))]
+        while pending:
+            path, stack = pending.pop()
+            listing = self._list_dir(path)
+            if listing is None:
+                continue
+            if listing.ignore_files:
+                rule_set = self._dir_rules(path, listing.ignore_files)
+                if rule_set and rule_set.rules:
+                    stack = stack + [(path, rule_set)]
+
+            signature = (listing.mtime_ns, options, tuple((base, rule_set.version) for base, rule_set in stack))
+            with self._lock:
+                cached = self._results.get(path)
+            if cached is not None and cached[0] == signature:
+                files, subdirs = cached[1], cached[2]
+            else:
+                files, subdirs = self._filter_listing(path, listing, stack, extensions, excluded_dirs, skip_prefix)
+                if listing.cacheable:
+                    self._cache_put(self._results, path, (signature, files, subdirs))
+
+            files_found.extend(files)
+            pending.extend((subdir, stack) for subdir in reversed(subdirs))
+
+        return files_found
+
+    def _filter_listing(
+        self,
+        path: str,
+        listing: _Listing,
+        stack: list[tuple[str, _RuleSet]],
+        extensions: Optional[set[str]],
+        excluded_dirs: set[str],
+        skip_prefix: Optional[str],
+    ) -> tuple[list[str], list[str]]:
+        """Apply extension, exclusion and ignore rules to one directory listing"""
+        prefix = path + os.sep
+        files = []
+        for name in listing.files:
+            if extensions and _suffix(name) not in extensions:
+                continue
+            file_path = prefix + name
+            if stack and self._is_ignored(stack, file_path, False):
+                continue
+            files.append(file_path)
+
+        subdirs = []
+        for name in listing.dirs:
+            if name in excluded_dirs:
+                continue
+            dir_path = prefix + name
+            if skip_prefix and (dir_path + os.sep).startswith(skip_prefix):
+                logger.debug(f"Skipping MCP directory during traversal: {dir_path}")
+                continue
+            if stack and self._is_ignored(stack, dir_path, True):
+                continue
+            subdirs.append(dir_path)
+        return files, subdirs
+
+    def clear(self) -> None:
+        """Drop cached listings and ignore rules and reset counters"""
+        with self._lock:
+            self._listings.clear()
+            self._rules.clear()
+            self._results.clear()
+            self._hits = self._misses = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get listing cache counters for diagnostics
+
+        Returns:
+            dict: hits, misses, cached_dirs and cached_ignore_files
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "cached_dirs": len(self._listings),
+                "cached_ignore_files": len(self._rules),
+            }
+
+
+_walker: Optional[DirectoryWalker] = None
+_walker_lock = threading.Lock()
+
+
+def get_directory_walker() -> DirectoryWalker:
+    """Get the process-wide directory walker"""
+    global _walker
+    if _walker is None:
+        with _walker_lock:
+            if _walker is None:
+                _walker = DirectoryWalker()
+    return _walker
@@ -0,0 +1,130 @@
+"""
+MCP progress notifications for streamed model output
+
+Model calls take tens of seconds to minutes, and a tool's result is only sent
+when the call completes. When the client asks for progress (by sending a
+progress token with the tool call), the server installs a ProgressReporter
+for the duration of the call and tools stream the model's output through it.
+Each notification carries the text received since the previous one as its
+message and the number of characters received so far as its progress, so the
+client sees output from the first chunk on instead of after the full
+completion.
+
+Notifications are throttled, and a failure to send one never fails the tool
+call: the reporter disables itself and the call continues.
+
+The reporter is held in a context variable, so concurrent tool calls on the
+same event loop each see their own.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Union
+
+from providers.base import ModelProvider, ModelResponse, StreamChunk
+from providers.health import get_provider_health
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between notifications; text arriving in between is batched into the next one
+PROGRESS_MIN_INTERVAL = 0.25
+
+_current_reporter: ContextVar[Optional["ProgressReporter"]] = ContextVar("progress_reporter", default=None)
+
+
+class ProgressReporter:
+    """Sends streamed model output to the client as MCP progress notifications"""
+
+    def __init__(
+        self,
+        session: Any,
+        progress_token: Union[str, int],
+        related_request_id: Optional[Union[str, int]] = None,
+        min_interval: float = PROGRESS_MIN_INTERVAL,
+    ):
+        self.session = session
+        self.progress_token = progress_token
+        self.related_request_id = related_request_id
+        self.min_interval = min_interval
+        self.received_chars = 0
+        self.notifications = 0
+        self._pending: list[str] = []
+        self._last_sent = 0.0
+        self._failed = False
+
+    async def _send(self, message: Optional[str]) -> None:
+        if self._failed:
+            return
+        try:
+            await self.session.send_progress_notification(
+                self.progress_token,
+                float(self.received_chars),
+                message=message,
+                related_request_id=self.related_request_id,
+            )
+            self.notifications += 1
+        except Exception as e:
+            # Progress is best-effort: keep the tool call running without it
+            logger.debug(f"Disabling progress notifications after send failure: {e}")
+            self._failed = True
+        self._last_sent = time.monotonic()
+
+    async def on_chunk(self, chunk: StreamChunk) -> None:
+        """
+        Record a streamed chunk and notify the client when due
+
+        The first chunk and the last one (with a finish reason) are sent immediately;
+        chunks in between are batched so at most one notification goes out per interval.
+
+        Args:
+            chunk: Chunk from ModelProvider.astream_content
+        """
+        if chunk.content:
+            self._pending.append(chunk.content)
+            self.received_chars += len(chunk.content)
+
+        first = self.notifications == 0 and self._pending
+        due = time.monotonic() - self._last_sent >= self.min_interval
+        if chunk.finish_reason is not None or first or (self._pending and due):
+            message = "".join(self._pending) or None
+            self._pending.clear()
+            await self._send(message)
+
+
+def get_progress_reporter() -> Optional[ProgressReporter]:
+    """Get the reporter for the current tool call, if the client asked for progress"""
+    return _current_reporter.get()
+
+
+@contextmanager
+def progress_reporting(reporter: Optional[ProgressReporter]):
+    """Install a reporter for the duration of a tool call"""
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
+
+
+async def agenerate_with_progress(provider: ModelProvider, **kwargs) -> ModelResponse:
+    """
+    Generate content, streaming it to the client when progress was requested
+
+    Without a reporter this is provider.agenerate_content; with one, the response is
+    streamed through the reporter and assembled into the same ModelResponse. The
+    outcome and latency are recorded for the provider's circuit breaker.
+
+    Args:
+        provider: Provider to call
+        **kwargs: Arguments for agenerate_content
+
+    Returns:
+        ModelResponse with generated content and metadata
+    """
+    reporter = get_progress_reporter()
+    with get_provider_health().track(provider, kwargs.get("model_name")):
+        if reporter is None:
+            return await provider.agenerate_content(**kwargs)
+        return await provider.agenerate_content_streaming(on_chunk=reporter.on_chunk, **kwargs)
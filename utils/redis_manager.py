@@ -1,10 +1,212 @@
 """
 Redis manager for centralized Redis client management.
+
+All Redis access in the server (conversation memory, file storage) goes through
+this module so that a single process-wide connection pool is shared by every
+caller instead of constructing a new client (and new TCP connections) per call.
+
+Key Features:
+- One shared synchronous ConnectionPool per process, created lazily
+- Per-event-loop asyncio pools for async callers (asyncio pools are loop-bound)
+- Periodic connection health checks (PING on idle connections)
+- Configurable maximum pool size
+- Pool statistics for diagnostics
+
+Configuration (environment variables):
+- REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+- REDIS_MAX_CONNECTIONS: Maximum connections per pool (default: 50)
+- REDIS_HEALTH_CHECK_INTERVAL: Seconds an idle connection may sit before it is
+  health-checked on checkout (default: 30, 0 disables)
 """
 
-from utils.conversation_memory import get_redis_client as _get_redis_client
+import logging
+import os
+import threading
+import weakref
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+
+
+def _get_int_env(name: str, default: int, minimum: int = 0) -> int:
+    """Read a non-negative integer from the environment, falling back to default on bad values"""
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Invalid {name} value ('{raw}'), using default of {default}")
+        return default
+    if value < minimum:
+        logger.warning(f"Invalid {name} value ({value}), using default of {default}")
+        return default
+    return value
+
+
+def _pool_kwargs() -> dict[str, Any]:
+    """Connection pool settings shared by the sync and asyncio pools"""
+    return {
+        "max_connections": _get_int_env("REDIS_MAX_CONNECTIONS", 50, minimum=1),
+        "health_check_interval": _get_int_env("REDIS_HEALTH_CHECK_INTERVAL", 30),
+        "decode_responses": True,
+    }
+
+
+def _import_redis():
+    try:
+        import redis
+
+        return redis
+    except ImportError:
+        raise ValueError("redis package required. Install with: pip install redis")
+
+
+# Process-wide sync pool/client
+_sync_pool = None
+_sync_client = None
+_sync_lock = threading.Lock()
+
+# asyncio pools are bound to the event loop that created their connections
+_async_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def get_redis_pool():
+    """
+    Get the process-wide synchronous Redis connection pool
+
+    Returns:
+        redis.ConnectionPool: Shared pool configured from the environment
+
+    Raises:
+        ValueError: If redis package is not installed
+    """
+    global _sync_pool
+    if _sync_pool is None:
+        redis = _import_redis()
+        with _sync_lock:
+            if _sync_pool is None:
+                redis_url = os.getenv("REDIS_URL", DEFAULT_REDIS_URL)
+                kwargs = _pool_kwargs()
+                _sync_pool = redis.ConnectionPool.from_url(redis_url, **kwargs)
+                logger.info(
+                    f"Initialized Redis connection pool (max {kwargs['max_connections']} connections, "
+                    f"health check every {kwargs['health_check_interval']}s)"
+                )
+    return _sync_pool
+
+
+def get_redis_client():
+    """
+    Get the shared synchronous Redis client
+
+    The client is backed by the process-wide connection pool, so it is safe to
+    call this on every operation: connections are reused rather than re-created.
+
+    Returns:
+        redis.Redis: Client with decode_responses=True
+
+    Raises:
+        ValueError: If redis package is not installed
+    """
+    global _sync_client
+    if _sync_client is None:
+        redis = _import_redis()
+        pool = get_redis_pool()
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = redis.Redis(connection_pool=pool)
+    return _sync_client
+
+
+def get_async_redis_client():
+    """
+    Get the shared asyncio Redis client for the running event loop
+
+    asyncio connections cannot be shared across event loops, so one pool is kept
+    per loop. Within a loop all coroutines share the same pool.
+
+    Returns:
+        redis.asyncio.Redis: Client with decode_responses=True
+
+    Raises:
+        ValueError: If redis package is not installed
+        RuntimeError: If called outside a running event loop
+    """
+    import asyncio
+
+    _import_redis()
+    from redis import asyncio as redis_asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _async_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                redis_url = os.getenv("REDIS_URL", DEFAULT_REDIS_URL)
+                pool = redis_asyncio.ConnectionPool.from_url(redis_url, **_pool_kwargs())
+                client = redis_asyncio.Redis(connection_pool=pool)
+                _async_clients[loop] = client
+                logger.debug("Initialized asyncio Redis connection pool for event loop")
+    return client
+
+
+def _describe_pool(pool) -> dict[str, Any]:
+    available = getattr(pool, "_available_connections", [])
+    in_use = getattr(pool, "_in_use_connections", set())
+    return {
+        "max_connections": pool.max_connections,
+        "created_connections": getattr(pool, "_created_connections", len(available) + len(in_use)),
+        "available_connections": len(available),
+        "in_use_connections": len(in_use),
+    }
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """
+    Get connection pool statistics for diagnostics
+
+    Returns:
+        dict: {"sync": {...} or None, "async": [{...}, ...]} with connection counts per pool
+    """
+    stats: dict[str, Any] = {"sync": None, "async": []}
+    if _sync_pool is not None:
+        stats["sync"] = _describe_pool(_sync_pool)
+    for client in list(_async_clients.values()):
+        stats["async"].append(_describe_pool(client.connection_pool))
+    return stats
+
+
+def reset_redis_clients() -> None:
+    """
+    Disconnect and forget all pooled clients
+
+    Used on shutdown and by tests that change REDIS_URL or pool settings. The next
+    get_redis_client()/get_async_redis_client() call builds fresh pools.
+    """
+    global _sync_pool, _sync_client
+    with _sync_lock:
+        if _sync_pool is not None:
+            try:
+                _sync_pool.disconnect()
+            except Exception as e:
+                logger.debug(f"Error disconnecting Redis pool: {type(e).__name__}")
+        _sync_pool = None
+        _sync_client = None
+    with _async_lock:
+        # asyncio pools must be closed from their own loop; dropping them lets
+        # the loop-bound connections be collected with the loop
+        _async_clients.clear()
 
-# Re-export the existing get_redis_client function
-get_redis_client = _get_redis_client
 
-__all__ = ["get_redis_client"]
+__all__ = [
+    "get_redis_client",
+    "get_async_redis_client",
+    "get_redis_pool",
+    "get_pool_stats",
+    "reset_redis_clients",
+]
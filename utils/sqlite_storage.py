@@ -0,0 +1,402 @@
+"""
+SQLite storage backend for conversation threads
+
+This module provides a persistent, single-machine alternative to Redis for
+storing conversation contexts. Threads are written to a local SQLite database,
+so conversations can be continued after the MCP server is restarted by the
+client without running a Redis server.
+
+Key Features:
+- WAL journal mode so readers never block the writer and commits are cheap
+- TTL column with a partial expiry index; expired keys are invisible to reads
+  and purged periodically using the index instead of a table scan
+- Batched commits: writes are grouped into one transaction that is committed
+  after SQLITE_COMMIT_INTERVAL_MS or a fixed number of writes, whichever comes first
+- Redis-style string and list commands plus transactional pipelines, covering
+  the interface utils.conversation_memory uses
+
+Configuration (environment variables):
+- CONVERSATION_STORAGE=sqlite selects this backend (see utils.conversation_memory.get_storage)
+- SQLITE_STORAGE_PATH: Database file (default: ~/.zen-mcp-server/conversations.db)
+- SQLITE_COMMIT_INTERVAL_MS: Maximum time a write waits to be committed (default: 100)
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from utils.storage_backend import InMemoryPipeline, _cleanup_interval_seconds, _ttl_seconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path.home() / ".zen-mcp-server" / "conversations.db"
+DEFAULT_COMMIT_INTERVAL_MS = 100
+DEFAULT_COMMIT_BATCH_SIZE = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS kv_expires_at ON kv (expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS list_items (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (key, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _get_commit_interval_from_env() -> float:
+    """Read SQLITE_COMMIT_INTERVAL_MS in seconds, falling back to the default on invalid values"""
+    raw = os.getenv("SQLITE_COMMIT_INTERVAL_MS", "")
+    if not raw:
+        return DEFAULT_COMMIT_INTERVAL_MS / 1000
+    try:
+        value = int(raw)
+        if value < 0:
+            raise ValueError
+        return value / 1000
+    except ValueError:
+        logger.warning(
+            f"Invalid SQLITE_COMMIT_INTERVAL_MS value ('{raw}'), using default of {DEFAULT_COMMIT_INTERVAL_MS}"
+        )
+        return DEFAULT_COMMIT_INTERVAL_MS / 1000
+
+
+class SQLiteStorage:
+    """
+    Persistent Redis-compatible storage backed by a local SQLite database
+
+    All commands run on one connection guarded by a re-entrant lock, so a
+    command (or a whole pipeline) always sees the writes that preceded it even
+    before they are committed. A background thread commits pending writes and
+    purges expired keys.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        commit_interval: Optional[float] = None,
+        commit_batch_size: int = DEFAULT_COMMIT_BATCH_SIZE,
+    ):
+        if path is None:
+            path = os.getenv("SQLITE_STORAGE_PATH") or DEFAULT_DB_PATH
+        self._path = str(path)
+        if self._path != ":memory:":
+            Path(self._path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+            self._path = str(Path(self._path).expanduser())
+
+        self._commit_interval = _get_commit_interval_from_env() if commit_interval is None else commit_interval
+        # An interval of 0 disables batching: every write is committed immediately
+        self._commit_batch_size = max(1, commit_batch_size) if self._commit_interval else 1
+        self._pending_writes = 0
+        self._in_pipeline = False
+        self._closed = False
+        self._commits = 0
+        self._lock = threading.RLock()
+
+        # isolation_level=None: transactions are managed explicitly so writes can be batched
+        self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._cleanup_interval = _cleanup_interval_seconds()
+        self._last_cleanup = time.time()
+        self._purge_expired()
+
+        self._shutdown = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
+        self._flush_thread.start()
+
+        logger.info(f"SQLite conversation storage initialized at {self._path}")
+
+    # Internal helpers - callers must hold self._lock
+
+    def _write(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Run a write inside the current batch transaction, opening one if needed"""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        cursor = self._conn.execute(sql, params)
+        self._pending_writes += 1
+        return cursor
+
+    def _after_write(self) -> None:
+        """Commit once enough writes have accumulated (the flush thread handles the rest)"""
+        if self._pending_writes >= self._commit_batch_size and not self._in_pipeline:
+            self._commit()
+
+    def _commit(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+            self._commits += 1
+        self._pending_writes = 0
+
+    def _live_entry(self, key: str) -> Optional[tuple[str, Optional[str]]]:
+        """Return (kind, value) for a key that exists and has not expired"""
+        row = self._conn.execute(
+            "SELECT kind, value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row
+
+    def _delete_key(self, key: str) -> bool:
+        removed = self._write("DELETE FROM kv WHERE key = ?", (key,)).rowcount
+        self._write("DELETE FROM list_items WHERE key = ?", (key,))
+        return removed > 0
+
+    def _purge_expired(self) -> int:
+        """Delete expired keys using the expiry index"""
+        now = time.time()
+        expired = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT key FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).fetchall()
+        ]
+        for key in expired:
+            self._delete_key(key)
+        self._commit()
+        return len(expired)
+
+    # Public Redis-compatible API
+
+    def set_with_ttl(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
+        """Store value with expiration time"""
+        expires_at = time.time() + _ttl_seconds(ttl_seconds)
+        with self._lock:
+            self._write("DELETE FROM list_items WHERE key = ?", (key,))
+            self._write(
+                "INSERT OR REPLACE INTO kv (key, kind, value, expires_at) VALUES (?, 'string', ?, ?)",
+                (key, value, expires_at),
+            )
+            self._after_write()
+        logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
+
+    def setex(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
+        """Redis-compatible setex method"""
+        self.set_with_ttl(key, ttl_seconds, value)
+
+    def get(self, key: str) -> Optional[str]:
+        """Retrieve value if not expired"""
+        with self._lock:
+            entry = self._live_entry(key)
+        if entry is None or entry[0] != "string":
+            return None
+        return entry[1]
+
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        """Redis-compatible mget; returns values in key order, None for missing keys"""
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def delete(self, *keys: str) -> int:
+        """Redis-compatible delete; returns the number of keys removed"""
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._live_entry(key) is not None:
+                    removed += self._delete_key(key)
+            self._after_write()
+            return removed
+
+    def expire(self, key: str, ttl_seconds: Union[int, timedelta]) -> bool:
+        """Redis-compatible expire; returns False if the key does not exist"""
+        with self._lock:
+            if self._live_entry(key) is None:
+                return False
+            self._write("UPDATE kv SET expires_at = ? WHERE key = ?", (time.time() + _ttl_seconds(ttl_seconds), key))
+            self._after_write()
+            return True
+
+    def rpush(self, key: str, *values: str) -> int:
+        """Redis-compatible rpush; appends values and returns the new list length"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                # Drop any expired leftovers before starting a fresh list without expiry (as in Redis)
+                self._delete_key(key)
+                self._write("INSERT INTO kv (key, kind, value, expires_at) VALUES (?, 'list', NULL, NULL)", (key,))
+                next_seq = 0
+            elif entry[0] != "list":
+                raise TypeError(f"Key {key} does not hold a list")
+            else:
+                next_seq = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM list_items WHERE key = ?", (key,)
+                ).fetchone()[0]
+            for offset, value in enumerate(values):
+                self._write(
+                    "INSERT INTO list_items (key, seq, value) VALUES (?, ?, ?)", (key, next_seq + offset, value)
+                )
+            self._after_write()
+            return self.llen(key)
+
+    def lrange(self, key: str, start: int, end: int) -> list[str]:
+        """Redis-compatible lrange with inclusive end and negative index support"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return []
+            if entry[0] != "list":
+                raise TypeError(f"Key {key} does not hold a list")
+            items = [
+                row[0] for row in self._conn.execute("SELECT value FROM list_items WHERE key = ? ORDER BY seq", (key,))
+            ]
+        stop = None if end == -1 else end + 1
+        return items[start:stop]
+
+    def llen(self, key: str) -> int:
+        """Redis-compatible llen"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None or entry[0] != "list":
+                return 0
+            return self._conn.execute("SELECT COUNT(*) FROM list_items WHERE key = ?", (key,)).fetchone()[0]
+
+    def lrem(self, key: str, count: int, value: str) -> int:
+        """Redis-compatible lrem; count < 0 removes from the tail, 0 removes all matches"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None or entry[0] != "list":
+                return 0
+            order = "DESC" if count < 0 else "ASC"
+            limit = abs(count) if count else -1
+            seqs = [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT seq FROM list_items WHERE key = ? AND value = ? ORDER BY seq {order} LIMIT ?",
+                    (key, value, limit),
+                )
+            ]
+            for seq in seqs:
+                self._write("DELETE FROM list_items WHERE key = ? AND seq = ?", (key, seq))
+            self._after_write()
+            return len(seqs)
+
+    def set(self, key: str, value: str, ex: Optional[Union[int, timedelta]] = None, nx: bool = False) -> Optional[bool]:
+        """Redis-compatible set; with nx=True an existing key is left alone and None is returned"""
+        expires_at = None if ex is None else time.time() + _ttl_seconds(ex)
+        with self._lock:
+            if nx and self._live_entry(key) is not None:
+                return None
+            self._write("DELETE FROM list_items WHERE key = ?", (key,))
+            self._write(
+                "INSERT OR REPLACE INTO kv (key, kind, value, expires_at) VALUES (?, 'string', ?, ?)",
+                (key, value, expires_at),
+            )
+            self._after_write()
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "SQLitePipeline":
+        """Redis-compatible pipeline; queued commands run atomically on execute()"""
+        return SQLitePipeline(self)
+
+    def flush(self) -> None:
+        """Commit all pending writes now"""
+        with self._lock:
+            self._commit()
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get storage counters for diagnostics
+
+        Returns:
+            dict: keys, pending_writes, commits and the database path
+        """
+        with self._lock:
+            keys = self._conn.execute(
+                "SELECT COUNT(*) FROM kv WHERE expires_at IS NULL OR expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+            return {
+                "keys": keys,
+                "pending_writes": self._pending_writes,
+                "commits": self._commits,
+                "path": self._path,
+            }
+
+    def _flush_worker(self):
+        """Background thread that commits batched writes and periodically purges expired keys"""
+        while not self._shutdown.wait(max(self._commit_interval, 0.1)):
+            try:
+                with self._lock:
+                    self._commit()
+                    if time.time() - self._last_cleanup >= self._cleanup_interval:
+                        removed = self._purge_expired()
+                        self._last_cleanup = time.time()
+                        if removed:
+                            logger.debug(f"Cleaned up {removed} expired conversation keys")
+            except sqlite3.Error as e:
+                logger.warning(f"SQLite storage background flush failed: {e}")
+
+    def shutdown(self):
+        """Commit pending writes, stop the background thread and close the database"""
+        self._shutdown.set()
+        if self._flush_thread.is_alive():
+            self._flush_thread.join(timeout=1)
+        with self._lock:
+            if self._closed:
+                return
+            self._commit()
+            self._conn.close()
+            self._closed = True
+
+
+class SQLitePipeline(InMemoryPipeline):
+    """Pipeline for SQLiteStorage whose commands always land in the same commit"""
+
+    def execute(self) -> list[Any]:
+        """
+        Run all queued commands atomically and return their results in order
+
+        The commands run inside a savepoint of the current batch transaction: if any
+        command fails, the writes of the earlier ones are rolled back (writes batched
+        before the pipeline are kept) and the error is re-raised.
+        """
+        storage = self._storage
+        commands, self._commands = self._commands, []
+        with storage._lock:
+            conn = storage._conn
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute("SAVEPOINT pipeline")
+            pending_writes = storage._pending_writes
+            storage._in_pipeline = True
+            try:
+                results = [getattr(storage, name)(*args, **kwargs) for name, args, kwargs in commands]
+            except BaseException:
+                conn.execute("ROLLBACK TO SAVEPOINT pipeline")
+                conn.execute("RELEASE SAVEPOINT pipeline")
+                storage._pending_writes = pending_writes
+                raise
+            finally:
+                storage._in_pipeline = False
+            conn.execute("RELEASE SAVEPOINT pipeline")
+            storage._after_write()
+        return results
+
+
+# Global singleton instance
+_storage_instance = None
+_storage_lock = threading.Lock()
+
+
+def get_sqlite_storage() -> SQLiteStorage:
+    """Get the global SQLite storage instance (singleton pattern)"""
+    global _storage_instance
+    if _storage_instance is None:
+        with _storage_lock:
+            if _storage_instance is None:
+                _storage_instance = SQLiteStorage()
+                # Don't lose the last batch of writes on a clean interpreter exit
+                atexit.register(_storage_instance.shutdown)
+    return _storage_instance
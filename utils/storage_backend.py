@@ -13,101 +13,842 @@ conversations only need to persist during a single Claude session.
 Key Features:
 - Thread-safe operations using locks
 - TTL support with automatic expiration
+- Redis-style list commands (rpush/lrange/llen/lrem) for append-only turn storage
+- Redis-style set commands (sadd/srem/smembers/scard)
+- Redis-style sorted set commands (zadd/zrem/zcard/zrange/zrevrange/zrangebyscore/zremrangebyscore)
+- Transactional pipelines that apply a batch of commands atomically
+- Optional lock-striped sharding (MEMORY_STORAGE_SHARDS) so concurrent tool calls
+  touching different threads do not contend on one lock
+- Byte-budgeted LRU eviction (MEMORY_STORAGE_MAX_BYTES, default 512MB)
+- Heap-ordered expiry so cleanup cost is proportional to expired keys
+- Hit/miss/eviction/expiration counters and resident byte accounting via get_stats()
 - Background cleanup thread for memory management
 - Singleton pattern for consistent state within a single process
 - Drop-in replacement for Redis storage (for single-process scenarios)
 """
 
+import bisect
+import heapq
 import logging
+import math
 import os
+import sys
 import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Default memory budget for stored values (512MB); 0 disables the budget
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
 
-class InMemoryStorage:
-    """Thread-safe in-memory storage for conversation threads"""
+# Default number of lock stripes for the shared storage backend. Striping only pays off
+# when threads can run storage code in parallel (free-threaded Python); with the GIL a
+# single lock is faster, see scripts/benchmark_storage.py
+DEFAULT_SHARDS = 1
+
+# Approximate per-item pointer overhead of a Python list slot
+_LIST_SLOT_BYTES = 8
+
+# Approximate per-member overhead of a sorted set entry (dict slot, float score and order tuple)
+_ZSET_ENTRY_BYTES = 24 + 8 + 64 + _LIST_SLOT_BYTES
+
+
+class _SortedSet(dict):
+    """
+    Sorted set value: member -> score, plus the (score, member) pairs kept in
+    Redis order so range queries slice or bisect instead of sorting per call
+    """
+
+    __slots__ = ("order",)
 
     def __init__(self):
-        self._store: dict[str, tuple[str, float]] = {}
-        self._lock = threading.Lock()
-        # Match Redis behavior: cleanup interval based on conversation timeout
-        # Run cleanup at 1/10th of timeout interval (e.g., 18 mins for 3 hour timeout)
-        timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
-        self._cleanup_interval = (timeout_hours * 3600) // 10
-        self._cleanup_interval = max(300, self._cleanup_interval)  # Minimum 5 minutes
-        self._shutdown = False
-
-        # Start background cleanup thread
-        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
-        self._cleanup_thread.start()
+        super().__init__()
+        self.order: list[tuple[float, str]] = []
 
-        logger.info(
-            f"In-memory storage initialized with {timeout_hours}h timeout, cleanup every {self._cleanup_interval//60}m"
+    def add(self, member: str, score: float) -> bool:
+        """Set a member's score; returns True if the member is new"""
+        old = self.get(member)
+        if old is not None:
+            if old == score:
+                return False
+            del self.order[bisect.bisect_left(self.order, (old, member))]
+        self[member] = score
+        bisect.insort(self.order, (score, member))
+        return old is None
+
+    def discard(self, member: str) -> bool:
+        """Remove a member; returns True if it was present"""
+        score = self.pop(member, None)
+        if score is None:
+            return False
+        del self.order[bisect.bisect_left(self.order, (score, member))]
+        return True
+
+    def score_range(self, low: float, high: float) -> list[tuple[float, str]]:
+        """(score, member) pairs with low <= score <= high, in order"""
+        start = bisect.bisect_left(self.order, (low,))
+        # (score,) sorts before every (score, member), so bisect just past the high score
+        stop = (
+            len(self.order) if high == math.inf else bisect.bisect_left(self.order, (math.nextafter(high, math.inf),))
         )
+        return self.order[start:stop]
+
+
+# Strings, lists (rpush), sets (sadd) or sorted sets as member -> score (zadd)
+StoredValue = Union[str, list[str], set[str], _SortedSet]
+
+
+def _get_max_bytes_from_env() -> int:
+    """Read MEMORY_STORAGE_MAX_BYTES, falling back to the default on invalid values"""
+    raw = os.getenv("MEMORY_STORAGE_MAX_BYTES", "")
+    if not raw:
+        return DEFAULT_MAX_BYTES
+    try:
+        value = int(raw)
+        if value < 0:
+            raise ValueError
+        return value
+    except ValueError:
+        logger.warning(f"Invalid MEMORY_STORAGE_MAX_BYTES value ('{raw}'), using default of {DEFAULT_MAX_BYTES}")
+        return DEFAULT_MAX_BYTES
+
+
+def _get_shards_from_env() -> int:
+    """Read MEMORY_STORAGE_SHARDS, falling back to the default on invalid values"""
+    raw = os.getenv("MEMORY_STORAGE_SHARDS", "")
+    if not raw:
+        return DEFAULT_SHARDS
+    try:
+        value = int(raw)
+        if value < 1:
+            raise ValueError
+        return value
+    except ValueError:
+        logger.warning(f"Invalid MEMORY_STORAGE_SHARDS value ('{raw}'), using default of {DEFAULT_SHARDS}")
+        return DEFAULT_SHARDS
+
+
+def _cleanup_interval_seconds() -> int:
+    """Match Redis behavior: cleanup interval based on conversation timeout
+
+    Cleanup runs at 1/10th of the timeout interval (e.g., 18 mins for 3 hour timeout),
+    but no more often than every 5 minutes.
+    """
+    timeout_hours = int(os.getenv("CONVERSATION_TIMEOUT_HOURS", "3"))
+    return max(300, (timeout_hours * 3600) // 10)
 
-    def set_with_ttl(self, key: str, ttl_seconds: int, value: str) -> None:
+
+def _ttl_seconds(ttl: Union[int, float, timedelta]) -> float:
+    """Accept TTLs as seconds or timedelta, like redis-py does"""
+    if isinstance(ttl, timedelta):
+        return ttl.total_seconds()
+    return ttl
+
+
+def _value_size(value: StoredValue) -> int:
+    """Approximate resident bytes of a stored value"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) + _ZSET_ENTRY_BYTES for item in value)
+    if isinstance(value, (list, set)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) + _LIST_SLOT_BYTES for item in value)
+    return sys.getsizeof(value)
+
+
+class InMemoryStorage:
+    """
+    Thread-safe in-memory storage for conversation threads
+
+    Memory is bounded by a byte budget (MEMORY_STORAGE_MAX_BYTES): when a write
+    pushes resident bytes over the budget, least recently used keys are evicted.
+    Expiry times are tracked in a min-heap so cleanup only touches expired keys.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, start_cleanup_thread: bool = True):
+        # Values are strings, lists of strings (rpush), sets of strings (sadd) or
+        # sorted sets (zadd). Collection keys have no expiry until expire() is called (as in Redis).
+        # Ordered by recency of use: least recently used first.
+        self._store: OrderedDict[str, tuple[StoredValue, float]] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        # (expires_at, key) min-heap; entries whose expiry no longer matches the store are stale
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._max_bytes = _get_max_bytes_from_env() if max_bytes is None else max_bytes
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        # Re-entrant so pipelines can run several commands under a single acquisition
+        self._lock = threading.RLock()
+        self._cleanup_interval = _cleanup_interval_seconds()
+        self._shutdown = threading.Event()
+
+        # Start background cleanup thread (shards of ShardedInMemoryStorage share one instead)
+        self._cleanup_thread = None
+        if start_cleanup_thread:
+            self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
+            self._cleanup_thread.start()
+            logger.info(f"In-memory storage initialized, cleanup every {self._cleanup_interval//60}m")
+
+    # Internal helpers - callers must hold self._lock
+
+    def _put_entry(self, key: str, value: StoredValue, expires_at: float, size: int) -> None:
+        """Insert or replace an entry as most recently used, then enforce the byte budget"""
+        self._bytes += size - self._sizes.get(key, 0)
+        self._store[key] = (value, expires_at)
+        self._store.move_to_end(key)
+        self._sizes[key] = size
+        if expires_at != float("inf"):
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+        self._evict_over_budget(protect=key)
+
+    def _remove_entry(self, key: str) -> None:
+        del self._store[key]
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _resize_entry(self, key: str, delta: int) -> None:
+        self._sizes[key] += delta
+        self._bytes += delta
+        if delta > 0:
+            self._evict_over_budget(protect=key)
+
+    def _evict_over_budget(self, protect: str) -> None:
+        """Evict least recently used keys until within budget (never the key just written)"""
+        if not self._max_bytes:
+            return
+        while self._bytes > self._max_bytes and len(self._store) > 1:
+            oldest = next(iter(self._store))
+            if oldest == protect:
+                self._store.move_to_end(protect)
+                oldest = next(iter(self._store))
+            self._remove_entry(oldest)
+            self._evictions += 1
+            logger.debug(f"Evicted key {oldest} to stay within {self._max_bytes:,} byte budget")
+
+    def _get_live_entry(self, key: str, touch: bool = True) -> Optional[tuple[StoredValue, float]]:
+        """Return the (value, expires_at) entry for key, dropping it if expired"""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry[1]:
+            self._remove_entry(key)
+            self._expirations += 1
+            return None
+        if touch:
+            self._store.move_to_end(key)
+        return entry
+
+    def _purge_expired(self) -> int:
+        """Pop expired keys off the expiry heap; cost is proportional to the number expired"""
+        now = time.time()
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._store.get(key)
+            # Skip stale heap entries left behind by overwrites, expire() and deletes
+            if entry is not None and entry[1] == expires_at:
+                self._remove_entry(key)
+                removed += 1
+        self._expirations += removed
+
+        # Rebuild if stale entries dominate (e.g. many TTL refreshes of the same keys)
+        if len(heap) > 2 * len(self._store) + 64:
+            self._expiry_heap = [(exp, k) for k, (_, exp) in self._store.items() if exp != float("inf")]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    # Public Redis-compatible API
+
+    def set_with_ttl(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
         """Store value with expiration time"""
         with self._lock:
-            expires_at = time.time() + ttl_seconds
-            self._store[key] = (value, expires_at)
+            self._purge_expired()
+            expires_at = time.time() + _ttl_seconds(ttl_seconds)
+            self._put_entry(key, value, expires_at, sys.getsizeof(key) + _value_size(value))
             logger.debug(f"Stored key {key} with TTL {ttl_seconds}s")
 
     def get(self, key: str) -> Optional[str]:
         """Retrieve value if not expired"""
         with self._lock:
-            if key in self._store:
-                value, expires_at = self._store[key]
-                if time.time() < expires_at:
-                    logger.debug(f"Retrieved key {key}")
-                    return value
-                else:
-                    # Clean up expired entry
-                    del self._store[key]
-                    logger.debug(f"Key {key} expired and removed")
+            entry = self._get_live_entry(key)
+            if entry is not None:
+                self._hits += 1
+                logger.debug(f"Retrieved key {key}")
+                return entry[0]
+            self._misses += 1
         return None
 
-    def setex(self, key: str, ttl_seconds: int, value: str) -> None:
+    def setex(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
         """Redis-compatible setex method"""
         self.set_with_ttl(key, ttl_seconds, value)
 
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        """Redis-compatible mget; returns values in key order, None for missing keys"""
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def delete(self, *keys: str) -> int:
+        """Redis-compatible delete; returns the number of keys removed"""
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._get_live_entry(key, touch=False) is not None:
+                    self._remove_entry(key)
+                    removed += 1
+            return removed
+
+    def expire(self, key: str, ttl_seconds: Union[int, timedelta]) -> bool:
+        """Redis-compatible expire; returns False if the key does not exist"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None:
+                return False
+            expires_at = time.time() + _ttl_seconds(ttl_seconds)
+            self._store[key] = (entry[0], expires_at)
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            return True
+
+    def rpush(self, key: str, *values: str) -> int:
+        """Redis-compatible rpush; appends values and returns the new list length"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None:
+                self._put_entry(key, [], float("inf"), sys.getsizeof(key) + _value_size([]))
+                entry = self._store[key]
+            items = entry[0]
+            if not isinstance(items, list):
+                raise TypeError(f"Key {key} does not hold a list")
+            items.extend(values)
+            self._resize_entry(key, sum(sys.getsizeof(v) + _LIST_SLOT_BYTES for v in values))
+            return len(items)
+
+    def lrange(self, key: str, start: int, end: int) -> list[str]:
+        """Redis-compatible lrange with inclusive end and negative index support"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None:
+                self._misses += 1
+                return []
+            items = entry[0]
+            if not isinstance(items, list):
+                raise TypeError(f"Key {key} does not hold a list")
+            self._hits += 1
+            stop = None if end == -1 else end + 1
+            return list(items[start:stop])
+
+    def llen(self, key: str) -> int:
+        """Redis-compatible llen"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None:
+                return 0
+            return len(entry[0]) if isinstance(entry[0], list) else 0
+
+    def lrem(self, key: str, count: int, value: str) -> int:
+        """Redis-compatible lrem; count < 0 removes from the tail, 0 removes all matches"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None or not isinstance(entry[0], list):
+                return 0
+            items = entry[0]
+            indices = [i for i, item in enumerate(items) if item == value]
+            if count > 0:
+                indices = indices[:count]
+            elif count < 0:
+                indices = indices[count:]
+            for i in reversed(indices):
+                del items[i]
+            self._resize_entry(key, -len(indices) * (sys.getsizeof(value) + _LIST_SLOT_BYTES))
+            return len(indices)
+
+    def sadd(self, key: str, *members: str) -> int:
+        """Redis-compatible sadd; returns the number of members that were added"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None:
+                self._put_entry(key, set(), float("inf"), sys.getsizeof(key) + _value_size(set()))
+                entry = self._store[key]
+            items = entry[0]
+            if not isinstance(items, set):
+                raise TypeError(f"Key {key} does not hold a set")
+            added = [member for member in dict.fromkeys(members) if member not in items]
+            items.update(added)
+            self._resize_entry(key, sum(sys.getsizeof(m) + _LIST_SLOT_BYTES for m in added))
+            return len(added)
+
+    def srem(self, key: str, *members: str) -> int:
+        """Redis-compatible srem; returns the number of members removed (empty sets are deleted)"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None or not isinstance(entry[0], set):
+                return 0
+            items = entry[0]
+            removed = [member for member in dict.fromkeys(members) if member in items]
+            items.difference_update(removed)
+            if items:
+                self._resize_entry(key, -sum(sys.getsizeof(m) + _LIST_SLOT_BYTES for m in removed))
+            else:
+                self._remove_entry(key)
+            return len(removed)
+
+    def smembers(self, key: str) -> set[str]:
+        """Redis-compatible smembers"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None or not isinstance(entry[0], set):
+                return set()
+            return set(entry[0])
+
+    def scard(self, key: str) -> int:
+        """Redis-compatible scard"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None or not isinstance(entry[0], set):
+                return 0
+            return len(entry[0])
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        """Redis-compatible zadd; sets member scores and returns the number of new members"""
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry is None:
+                self._put_entry(key, _SortedSet(), float("inf"), sys.getsizeof(key) + _value_size(_SortedSet()))
+                entry = self._store[key]
+            scores = entry[0]
+            if not isinstance(scores, _SortedSet):
+                raise TypeError(f"Key {key} does not hold a sorted set")
+            added = [member for member, score in mapping.items() if scores.add(member, float(score))]
+            self._resize_entry(key, sum(sys.getsizeof(m) + _ZSET_ENTRY_BYTES for m in added))
+            return len(added)
+
+    def zrem(self, key: str, *members: str) -> int:
+        """Redis-compatible zrem; returns the number of members removed (empty sorted sets are deleted)"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None or not isinstance(entry[0], _SortedSet):
+                return 0
+            scores = entry[0]
+            removed = [member for member in dict.fromkeys(members) if scores.discard(member)]
+            if scores:
+                self._resize_entry(key, -sum(sys.getsizeof(m) + _ZSET_ENTRY_BYTES for m in removed))
+            else:
+                self._remove_entry(key)
+            return len(removed)
+
+    def zcard(self, key: str) -> int:
+        """Redis-compatible zcard"""
+        with self._lock:
+            entry = self._get_live_entry(key, touch=False)
+            if entry is None or not isinstance(entry[0], _SortedSet):
+                return 0
+            return len(entry[0])
+
+    def _sorted_set(self, key: str) -> Optional[_SortedSet]:
+        entry = self._get_live_entry(key)
+        if entry is None or not isinstance(entry[0], _SortedSet):
+            return None
+        return entry[0]
+
+    def zrange(self, key: str, start: int, end: int, desc: bool = False, withscores: bool = False) -> list:
+        """Redis-compatible zrange by rank with inclusive end and negative index support"""
+        stop = None if end == -1 else end + 1
+        with self._lock:
+            scores = self._sorted_set(key)
+            if scores is None:
+                return []
+            order = scores.order
+            if desc:
+                # Ranks in descending order count from the end of the ascending list
+                items = [order[len(order) - 1 - rank] for rank in range(len(order))[start:stop]]
+            else:
+                items = order[start:stop]
+        return [(member, score) for score, member in items] if withscores else [member for _, member in items]
+
+    def zrevrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        """Redis-compatible zrevrange"""
+        return self.zrange(key, start, end, desc=True, withscores=withscores)
+
+    def zrangebyscore(
+        self,
+        key: str,
+        min: Union[float, str],
+        max: Union[float, str],
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> list:
+        """Redis-compatible zrangebyscore with inclusive bounds and optional LIMIT start/num"""
+        low, high = float(min), float(max)
+        with self._lock:
+            scores = self._sorted_set(key)
+            items = scores.score_range(low, high) if scores is not None else []
+        if start is not None and num is not None:
+            items = items[start : start + num] if num >= 0 else items[start:]
+        return [(member, score) for score, member in items] if withscores else [member for _, member in items]
+
+    def zremrangebyscore(self, key: str, min: Union[float, str], max: Union[float, str]) -> int:
+        """Redis-compatible zremrangebyscore; returns the number of members removed"""
+        with self._lock:
+            members = self.zrangebyscore(key, min, max)
+            return self.zrem(key, *members) if members else 0
+
+    def set(self, key: str, value: str, ex: Optional[Union[int, timedelta]] = None, nx: bool = False) -> Optional[bool]:
+        """Redis-compatible set; with nx=True an existing key is left alone and None is returned"""
+        with self._lock:
+            if nx and self._get_live_entry(key, touch=False) is not None:
+                return None
+            self._purge_expired()
+            expires_at = float("inf") if ex is None else time.time() + _ttl_seconds(ex)
+            self._put_entry(key, value, expires_at, sys.getsizeof(key) + _value_size(value))
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        """Redis-compatible pipeline; queued commands run atomically on execute()"""
+        return InMemoryPipeline(self)
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get storage counters for diagnostics
+
+        Returns:
+            dict: hits, misses, evictions, expirations, keys, bytes_resident and max_bytes
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "keys": len(self._store),
+                "bytes_resident": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
     def _cleanup_worker(self):
         """Background thread that periodically cleans up expired entries"""
-        while not self._shutdown:
-            time.sleep(self._cleanup_interval)
+        # Event.wait returns True as soon as shutdown() is called
+        while not self._shutdown.wait(self._cleanup_interval):
             self._cleanup_expired()
 
     def _cleanup_expired(self):
         """Remove all expired entries"""
         with self._lock:
-            current_time = time.time()
-            expired_keys = [k for k, (_, exp) in self._store.items() if exp < current_time]
-            for key in expired_keys:
-                del self._store[key]
+            removed = self._purge_expired()
+
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired conversation threads")
+
+    def shutdown(self):
+        """Graceful shutdown of background thread"""
+        self._shutdown.set()
+        if self._cleanup_thread is not None and self._cleanup_thread.is_alive():
+            self._cleanup_thread.join(timeout=1)
+
+
+class InMemoryPipeline:
+    """
+    Minimal Redis-style pipeline for InMemoryStorage
+
+    Commands are queued by calling storage methods on the pipeline and applied
+    together under the storage lock when execute() is called, giving the same
+    all-or-nothing visibility as a Redis MULTI/EXEC block.
+    """
+
+    def __init__(self, storage: Union[InMemoryStorage, "ShardedInMemoryStorage"]):
+        self._storage = storage
+        self._commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(self._storage, name, None)):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list[Any]:
+        """Run all queued commands atomically and return their results in order"""
+        with self._storage._lock:
+            results = [getattr(self._storage, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._commands = []
+
+
+class _OrderedLocks:
+    """Context manager that holds several locks, acquired in the given order"""
+
+    __slots__ = ("_locks",)
+
+    def __init__(self, locks: list[threading.RLock]):
+        self._locks = locks
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+class ShardedInMemoryStorage:
+    """
+    Lock-striped InMemoryStorage for concurrent tool calls
+
+    Keys are spread over independent InMemoryStorage shards, each with its own lock,
+    so reads and writes to different conversation threads do not serialize on a
+    single lock. The byte budget is split evenly across shards and LRU eviction
+    happens per shard. One background thread handles expiry for all shards.
+
+    Keys are routed by their first two ':'-separated segments, so a thread's header
+    and turn list live in the same shard. Pipelines and multi-key deletes lock every
+    shard they touch in shard order, so they stay atomic even when keys span shards.
+    """
+
+    def __init__(self, num_shards: int = 16, max_bytes: Optional[int] = None):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        total_bytes = _get_max_bytes_from_env() if max_bytes is None else max_bytes
+        shard_bytes = -(-total_bytes // num_shards)  # ceil, so 0 (unlimited) stays 0
+        self._shards = [InMemoryStorage(max_bytes=shard_bytes, start_cleanup_thread=False) for _ in range(num_shards)]
+        self._num_shards = num_shards
+        self._cleanup_interval = _cleanup_interval_seconds()
+        self._shutdown = threading.Event()
+
+        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
+        self._cleanup_thread.start()
+
+        logger.info(
+            f"Sharded in-memory storage initialized with {num_shards} shards, "
+            f"cleanup every {self._cleanup_interval//60}m"
+        )
+
+    def _shard_index(self, key: str) -> int:
+        """
+        Route a key by its first two ':'-separated segments
+
+        "thread:<id>" and "thread:<id>:turns" share a shard, so the pipelines that
+        conversation memory issues for one thread only ever take one lock.
+        """
+        end = key.find(":", key.find(":") + 1)
+        # str hashes are salted per process, which is fine for process-local storage
+        return hash(key if end < 0 else key[:end]) % self._num_shards
+
+    def _shard(self, key: str) -> InMemoryStorage:
+        return self._shards[self._shard_index(key)]
+
+    def _group_keys(self, keys: tuple[str, ...]) -> dict[int, list[str]]:
+        """Group keys by shard index, preserving order within each shard"""
+        groups: dict[int, list[str]] = {}
+        for key in keys:
+            groups.setdefault(self._shard_index(key), []).append(key)
+        return groups
+
+    def _lock_shards(self, indices):
+        """Acquire shard locks in ascending index order to avoid lock-order deadlocks"""
+        unique = sorted(set(indices))
+        if len(unique) == 1:
+            return self._shards[unique[0]]._lock
+        return _OrderedLocks([self._shards[index]._lock for index in unique])
+
+    def set_with_ttl(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
+        """Store value with expiration time"""
+        self._shard(key).set_with_ttl(key, ttl_seconds, value)
+
+    def get(self, key: str) -> Optional[str]:
+        """Retrieve value if not expired"""
+        return self._shard(key).get(key)
+
+    def setex(self, key: str, ttl_seconds: Union[int, timedelta], value: str) -> None:
+        """Redis-compatible setex method"""
+        self._shard(key).set_with_ttl(key, ttl_seconds, value)
+
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        """
+        Redis-compatible mget; returns values in key order, None for missing keys
+
+        Like MGET on Redis Cluster this is not a snapshot across shards: each key is
+        read under its own shard's lock. Use a pipeline when atomicity matters.
+        """
+        shards = self._shards
+        return [shards[self._shard_index(key)].get(key) for key in keys]
+
+    def delete(self, *keys: str) -> int:
+        """Redis-compatible delete; returns the number of keys removed"""
+        groups = self._group_keys(keys)
+        with self._lock_shards(groups):
+            return sum(self._shards[index].delete(*shard_keys) for index, shard_keys in groups.items())
+
+    def expire(self, key: str, ttl_seconds: Union[int, timedelta]) -> bool:
+        """Redis-compatible expire; returns False if the key does not exist"""
+        return self._shard(key).expire(key, ttl_seconds)
+
+    def rpush(self, key: str, *values: str) -> int:
+        """Redis-compatible rpush; appends values and returns the new list length"""
+        return self._shard(key).rpush(key, *values)
+
+    def lrange(self, key: str, start: int, end: int) -> list[str]:
+        """Redis-compatible lrange with inclusive end and negative index support"""
+        return self._shard(key).lrange(key, start, end)
+
+    def llen(self, key: str) -> int:
+        """Redis-compatible llen"""
+        return self._shard(key).llen(key)
+
+    def lrem(self, key: str, count: int, value: str) -> int:
+        """Redis-compatible lrem; count < 0 removes from the tail, 0 removes all matches"""
+        return self._shard(key).lrem(key, count, value)
+
+    def sadd(self, key: str, *members: str) -> int:
+        """Redis-compatible sadd; returns the number of members that were added"""
+        return self._shard(key).sadd(key, *members)
+
+    def srem(self, key: str, *members: str) -> int:
+        """Redis-compatible srem; returns the number of members removed (empty sets are deleted)"""
+        return self._shard(key).srem(key, *members)
+
+    def smembers(self, key: str) -> set[str]:
+        """Redis-compatible smembers"""
+        return self._shard(key).smembers(key)
+
+    def scard(self, key: str) -> int:
+        """Redis-compatible scard"""
+        return self._shard(key).scard(key)
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        """Redis-compatible zadd; sets member scores and returns the number of new members"""
+        return self._shard(key).zadd(key, mapping)
+
+    def zrem(self, key: str, *members: str) -> int:
+        """Redis-compatible zrem; returns the number of members removed (empty sorted sets are deleted)"""
+        return self._shard(key).zrem(key, *members)
 
-            if expired_keys:
-                logger.debug(f"Cleaned up {len(expired_keys)} expired conversation threads")
+    def zcard(self, key: str) -> int:
+        """Redis-compatible zcard"""
+        return self._shard(key).zcard(key)
+
+    def zrange(self, key: str, start: int, end: int, desc: bool = False, withscores: bool = False) -> list:
+        """Redis-compatible zrange by rank with inclusive end and negative index support"""
+        return self._shard(key).zrange(key, start, end, desc=desc, withscores=withscores)
+
+    def zrevrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        """Redis-compatible zrevrange"""
+        return self._shard(key).zrevrange(key, start, end, withscores=withscores)
+
+    def zrangebyscore(
+        self,
+        key: str,
+        min: Union[float, str],
+        max: Union[float, str],
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> list:
+        """Redis-compatible zrangebyscore with inclusive bounds and optional LIMIT start/num"""
+        return self._shard(key).zrangebyscore(key, min, max, start=start, num=num, withscores=withscores)
+
+    def zremrangebyscore(self, key: str, min: Union[float, str], max: Union[float, str]) -> int:
+        """Redis-compatible zremrangebyscore; returns the number of members removed"""
+        return self._shard(key).zremrangebyscore(key, min, max)
+
+    def set(self, key: str, value: str, ex: Optional[Union[int, timedelta]] = None, nx: bool = False) -> Optional[bool]:
+        """Redis-compatible set; with nx=True an existing key is left alone and None is returned"""
+        return self._shard(key).set(key, value, ex=ex, nx=nx)
+
+    def pipeline(self, transaction: bool = True) -> "ShardedInMemoryPipeline":
+        """Redis-compatible pipeline; queued commands run atomically on execute()"""
+        return ShardedInMemoryPipeline(self)
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get storage counters for diagnostics, summed over all shards
+
+        Returns:
+            dict: hits, misses, evictions, expirations, keys, bytes_resident, max_bytes and shards
+        """
+        totals: dict[str, int] = {}
+        for shard in self._shards:
+            for name, value in shard.get_stats().items():
+                totals[name] = totals.get(name, 0) + value
+        totals["shards"] = len(self._shards)
+        return totals
+
+    def _cleanup_worker(self):
+        """Background thread that periodically cleans up expired entries in every shard"""
+        # Event.wait returns True as soon as shutdown() is called
+        while not self._shutdown.wait(self._cleanup_interval):
+            self._cleanup_expired()
+
+    def _cleanup_expired(self):
+        """Remove all expired entries, one shard at a time"""
+        for shard in self._shards:
+            shard._cleanup_expired()
 
     def shutdown(self):
         """Graceful shutdown of background thread"""
-        self._shutdown = True
+        self._shutdown.set()
         if self._cleanup_thread.is_alive():
             self._cleanup_thread.join(timeout=1)
 
 
+_MULTI_KEY_COMMANDS = frozenset({"delete", "mget"})
+
+
+class ShardedInMemoryPipeline(InMemoryPipeline):
+    """Pipeline for ShardedInMemoryStorage that locks every shard its commands touch"""
+
+    def execute(self) -> list[Any]:
+        """Run all queued commands atomically and return their results in order"""
+        storage = self._storage
+        indices = []
+        calls = []
+        for name, args, kwargs in self._commands:
+            if name in _MULTI_KEY_COMMANDS:
+                indices.extend(storage._shard_index(key) for key in args)
+                calls.append((getattr(storage, name), args, kwargs))
+            else:
+                # Single-key commands go straight to the owning shard
+                index = storage._shard_index(args[0])
+                indices.append(index)
+                calls.append((getattr(storage._shards[index], name), args, kwargs))
+        with storage._lock_shards(indices):
+            results = [method(*args, **kwargs) for method, args, kwargs in calls]
+        self._commands = []
+        return results
+
+
 # Global singleton instance
 _storage_instance = None
 _storage_lock = threading.Lock()
 
 
-def get_storage_backend() -> InMemoryStorage:
-    """Get the global storage instance (singleton pattern)"""
+def get_storage_backend() -> Union[InMemoryStorage, ShardedInMemoryStorage]:
+    """
+    Get the global storage instance (singleton pattern)
+
+    MEMORY_STORAGE_SHARDS controls lock striping: values above 1 return a
+    ShardedInMemoryStorage, the default of 1 returns a single-lock InMemoryStorage.
+    """
     global _storage_instance
     if _storage_instance is None:
         with _storage_lock:
             if _storage_instance is None:
-                _storage_instance = InMemoryStorage()
+                num_shards = _get_shards_from_env()
+                if num_shards > 1:
+                    _storage_instance = ShardedInMemoryStorage(num_shards=num_shards)
+                else:
+                    _storage_instance = InMemoryStorage()
                 logger.info("Initialized in-memory conversation storage")
     return _storage_instance
@@ -0,0 +1,452 @@
+"""
+Deadline-bounded file reads on a dedicated I/O pool
+
+Reads of files on unresponsive filesystems (stale network mounts, FUSE, FIFOs)
+can block indefinitely. Rather than arming a SIGALRM per file, which only works
+on the main thread and interferes with other alarm users, reads are handed to a
+small shared pool and the caller waits on the result with a deadline. This
+works the same from any thread and from asyncio code (aread_text).
+
+The deadline starts when the read is submitted and covers time spent queued
+behind other reads as well as the read itself, so a caller never waits longer
+than its timeout. A read that misses its deadline raises OSError(ETIMEDOUT).
+A watchdog thread enforces deadlines whether or not anyone is waiting on the
+read: queued reads are failed, and since Python cannot interrupt a blocked
+read, the worker running an overdue read is abandoned: it leaves the pool, a
+replacement worker takes its place, and the thread exits once the filesystem
+responds. When max_stuck abandoned reads are still blocked, new reads fail
+immediately with OSError(EAGAIN) instead of piling more threads onto the
+unresponsive filesystem.
+
+Reads started from a pool worker (for example the per-file steps of a read
+that is itself running on a pool) run inline under the outer read's deadline
+instead of hopping to another thread.
+
+Read latencies are recorded in a histogram for diagnostics.
+
+Configuration (environment variables):
+- FILE_IO_WORKERS: Threads in the I/O pool (default: 16)
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_IO_WORKERS = 16
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Upper bounds (milliseconds) of the latency histogram buckets; slower reads land in the overflow bucket
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Set on pool worker threads, so nested reads run inline
+_worker_state = threading.local()
+
+
+def _get_io_workers() -> int:
+    raw = os.getenv("FILE_IO_WORKERS", "")
+    if not raw:
+        return DEFAULT_IO_WORKERS
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        logger.warning(f"Invalid FILE_IO_WORKERS value ('{raw}'), using default of {DEFAULT_IO_WORKERS}")
+        return DEFAULT_IO_WORKERS
+
+
+def _read_text(path: Union[str, Path]) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of operation latencies"""
+
+    def __init__(self, buckets_ms: tuple[int, ...] = LATENCY_BUCKETS_MS):
+        self._bounds = buckets_ms
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = bisect_left(self._bounds, seconds * 1000)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict: count, total_seconds, max_seconds and per-bucket counts keyed "<=Nms" / ">Nms"
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, maximum = self._total, self._max
+        buckets = {f"<={bound}ms": count for bound, count in zip(self._bounds, counts)}
+        buckets[f">{self._bounds[-1]}ms"] = counts[-1]
+        return {"count": sum(counts), "total_seconds": total, "max_seconds": maximum, "buckets": buckets}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self._bounds) + 1)
+            self._total = 0.0
+            self._max = 0.0
+
+
+class TimedRead:
+    """A read submitted to a TimedReader; its deadline starts when it is submitted"""
+
+    def __init__(self, reader: "TimedReader", func: Callable[..., Any], path: Union[str, Path], args: tuple, timeout):
+        self.reader = reader
+        self.func = func
+        self.path = path
+        self.args = args
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.future: Future = Future()
+        self.worker: Optional[threading.Thread] = None
+        self.abandoned = False
+
+    def _remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def result(self) -> Any:
+        """
+        Wait for the result of the read within its deadline
+
+        Raises:
+            OSError: If the read fails, does not complete within the timeout, or the pool is saturated
+        """
+        try:
+            return self.future.result(timeout=self._remaining())
+        except FutureTimeoutError:
+            # Normally the watchdog has already failed the read
+            self.reader._expire(self)
+        return self.future.result()
+
+    async def aresult(self) -> Any:
+        """Async variant of result that does not block the event loop"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.future)), self._remaining())
+        except asyncio.TimeoutError:
+            self.reader._expire(self)
+        return self.future.result()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the read if no worker has picked it up yet, or abandon it if it is past its deadline
+
+        Returns:
+            bool: False if the read is still running within its deadline (or already finished)
+        """
+        if self.future.cancel():
+            return True
+        return time.monotonic() >= self.deadline and self.reader._expire(self)
+
+
+class TimedReader:
+    """Runs file reads on a dedicated pool and waits for them with a deadline"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_stuck: Optional[int] = None, name: str = "file-io"):
+        self.max_workers = max_workers or _get_io_workers()
+        # Abandoned reads allowed to hold threads before new reads are refused
+        self.max_stuck = max_stuck if max_stuck is not None else self.max_workers
+        self.name = name
+        self.latency = LatencyHistogram()
+        self._queue: deque[TimedRead] = deque()
+        self._running: set[TimedRead] = set()
+        self._threads: set[threading.Thread] = set()
+        self._watchdog: Optional[threading.Thread] = None
+        self._workers = 0
+        self._idle = 0
+        self._stuck = 0
+        self._shutdown = False
+        self._timeouts = 0
+        self._errors = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._deadlines_changed = threading.Condition(self._lock)
+
+    def _timed_call(self, func: Callable[..., T], *args: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+    def _worker(self) -> None:
+        _worker_state.active = True
+        while True:
+            with self._work_available:
+                while not self._queue and not self._shutdown:
+                    self._idle += 1
+                    self._work_available.wait()
+                    self._idle -= 1
+                if not self._queue:
+                    self._workers -= 1
+                    self._threads.discard(threading.current_thread())
+                    return
+                task = self._queue.popleft()
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                task.worker = threading.current_thread()
+                self._running.add(task)
+            result, error = None, None
+            try:
+                result = self._timed_call(task.func, task.path, *task.args)
+            except BaseException as e:
+                error = e
+            with self._lock:
+                if task.abandoned:
+                    # A replacement took this worker's place when the read missed its deadline
+                    self._stuck -= 1
+                    logger.debug(f"Abandoned read of {task.path} finished; {self._stuck} still stuck")
+                    return
+                self._running.discard(task)
+                if error is not None:
+                    task.future.set_exception(error)
+                else:
+                    task.future.set_result(result)
+
+    def _spawn_workers(self) -> None:
+        """Start workers for queued reads that no idle worker will pick up; called with the lock held"""
+        while len(self._queue) > self._idle and self._workers < self.max_workers:
+            self._workers += 1
+            self._idle += 1  # Counted as idle until it takes a read, so the next submit does not spawn again
+            thread = threading.Thread(target=self._worker_started, name=f"{self.name}_{self._workers}", daemon=True)
+            self._threads.add(thread)
+            thread.start()
+        self._work_available.notify(len(self._queue))
+
+    def _worker_started(self) -> None:
+        with self._lock:
+            self._idle -= 1
+        self._worker()
+
+    def _expire(self, task: TimedRead) -> bool:
+        """Fail a read that missed its deadline; False if it already finished"""
+        with self._lock:
+            return self._expire_locked(task)
+
+    def _expire_locked(self, task: TimedRead) -> bool:
+        """Fail a queued read, or abandon a running one and replace its worker; called with the lock held"""
+        if task.future.done():
+            return False
+        self._timeouts += 1
+        if task in self._running:
+            task.abandoned = True
+            self._running.discard(task)
+            self._threads.discard(task.worker)
+            self._workers -= 1
+            self._stuck += 1
+            if self._stuck >= self.max_stuck:
+                self._reject_queued()
+            else:
+                self._spawn_workers()
+            logger.warning(f"File read exceeded {task.timeout:g}s and was abandoned: {task.path}")
+        else:
+            self._queue.remove(task)
+            task.future.set_running_or_notify_cancel()
+            logger.warning(f"File read waited {task.timeout:g}s for a worker and was not started: {task.path}")
+        task.future.set_exception(self._timeout_error(task))
+        return True
+
+    def _watch(self) -> None:
+        """Expire overdue reads whether or not a caller is waiting on them; exits when no reads are pending"""
+        with self._lock:
+            while True:
+                pending = [task for task in (*self._queue, *self._running) if not task.future.done()]
+                if not pending:
+                    self._watchdog = None
+                    return
+                now = time.monotonic()
+                for task in pending:
+                    if task.deadline <= now:
+                        self._expire_locked(task)
+                upcoming = [task.deadline for task in pending if not task.future.done()]
+                if upcoming:
+                    self._deadlines_changed.wait(min(upcoming) - now)
+
+    def _start_watchdog(self) -> None:
+        """Called with the lock held"""
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name=f"{self.name}_watchdog", daemon=True)
+            self._watchdog.start()
+        else:
+            self._deadlines_changed.notify()
+
+    @staticmethod
+    def _timeout_error(task: TimedRead) -> OSError:
+        return OSError(errno.ETIMEDOUT, f"File read timed out after {task.timeout:g} seconds: {task.path}")
+
+    def _saturated_error(self, path: Union[str, Path]) -> OSError:
+        return OSError(
+            errno.EAGAIN,
+            f"File read not started: {self._stuck} earlier reads are stuck on an unresponsive filesystem: {path}",
+        )
+
+    def _reject_queued(self) -> None:
+        """Fail reads still waiting for a worker; called with the lock held"""
+        while self._queue:
+            task = self._queue.popleft()
+            if task.future.set_running_or_notify_cancel():
+                self._rejected += 1
+                error = self._saturated_error(task.path)
+                task.future.set_exception(error)
+
+    def submit(
+        self, func: Callable[..., T], path: Union[str, Path], *args: Any, timeout: float = DEFAULT_READ_TIMEOUT
+    ) -> TimedRead:
+        """
+        Queue a read function on the I/O pool
+
+        Args:
+            func: Called as func(path, *args) on a pool thread
+            path: File being read (also used in error messages)
+            timeout: Seconds from submission, including time queued, before the read is failed
+
+        Returns:
+            TimedRead: Call result() or await aresult() for the outcome
+
+        Raises:
+            OSError: EAGAIN if max_stuck reads are blocked on unresponsive filesystems
+        """
+        task = TimedRead(self, func, path, args, timeout)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("TimedReader has been shut down")
+            if self._stuck >= self.max_stuck:
+                self._rejected += 1
+                raise self._saturated_error(path)
+            self._queue.append(task)
+            self._spawn_workers()
+            self._start_watchdog()
+        return task
+
+    def run(
+        self, func: Callable[..., T], path: Union[str, Path], *args: Any, timeout: float = DEFAULT_READ_TIMEOUT
+    ) -> T:
+        """
+        Run a read function on the I/O pool within a deadline
+
+        Called from a pool worker, the function runs inline under the deadline
+        of the read that worker is running.
+
+        Args:
+            func: Called as func(path, *args) on a pool thread
+            path: File being read (also used in the timeout message)
+            timeout: Seconds to wait, including time queued, before giving up
+
+        Returns:
+            The function's result
+
+        Raises:
+            OSError: If the read fails, does not complete within the timeout, or the pool is saturated
+        """
+        if getattr(_worker_state, "active", False):
+            return self._timed_call(func, path, *args)
+        return self.submit(func, path, *args, timeout=timeout).result()
+
+    async def arun(
+        self, func: Callable[..., T], path: Union[str, Path], *args: Any, timeout: float = DEFAULT_READ_TIMEOUT
+    ) -> T:
+        """Async variant of run that does not block the event loop"""
+        return await self.submit(func, path, *args, timeout=timeout).aresult()
+
+    def read_text(self, path: Union[str, Path], timeout: float = DEFAULT_READ_TIMEOUT) -> str:
+        """
+        Read a text file (UTF-8, invalid bytes replaced) within a deadline
+
+        Args:
+            path: File to read
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            str: File content
+
+        Raises:
+            OSError: If the read fails or does not complete within the timeout
+        """
+        return self.run(_read_text, path, timeout=timeout)
+
+    async def aread_text(self, path: Union[str, Path], timeout: float = DEFAULT_READ_TIMEOUT) -> str:
+        """Async variant of read_text that does not block the event loop"""
+        return await self.arun(_read_text, path, timeout=timeout)
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get read counters and the latency histogram
+
+        Returns:
+            dict: timeouts, errors, rejected (refused while the pool was saturated), workers,
+            stuck (abandoned reads still blocked), queued and the latency histogram snapshot
+        """
+        with self._lock:
+            stats: dict[str, Any] = {
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "rejected": self._rejected,
+                "workers": self._workers,
+                "stuck": self._stuck,
+                "queued": len(self._queue),
+            }
+        stats["latency"] = self.latency.snapshot()
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._timeouts = 0
+            self._errors = 0
+            self._rejected = 0
+        self.latency.reset()
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Cancel queued reads and let idle workers exit
+
+        Args:
+            wait: Wait for running reads to finish (abandoned reads are never waited for)
+        """
+        with self._lock:
+            self._shutdown = True
+            while self._queue:
+                self._queue.popleft().cancel()
+            self._work_available.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
+_timed_reader: Optional[TimedReader] = None
+_timed_reader_lock = threading.Lock()
+
+
+def get_timed_reader() -> TimedReader:
+    """Get the process-wide timed reader"""
+    global _timed_reader
+    if _timed_reader is None:
+        with _timed_reader_lock:
+            if _timed_reader is None:
+                _timed_reader = TimedReader()
+    return _timed_reader